@@ -1,138 +1,610 @@
 #!/usr/bin/env python3
+"""
+Import meal photos from MealImages/ into Assets.xcassets/FeaturedMeals.
+
+Usage:
+python add_images_to_xcode.py            # one-off import of everything in MealImages/
+python add_images_to_xcode.py --watch    # keep running and import new or changed photos
+python add_images_to_xcode.py --bulk --source dump/ --workers 8   # import a large photo dump
+python add_images_to_xcode.py --format heic   # HEIC renditions, encoded once from the source
+
+--format heic encodes each photo as HEIC straight from the source, at the
+quality that matches JPEG 90's SSIM (see rendition_format.py), instead of
+writing image.jpg. The default (jpeg) keeps the source's JPEG or PNG.
+
+Photos go through the image_quality.py gate first. Empty, truncated,
+unreadable, tiny, blurry, badly exposed and placeholder images are skipped
+with the reason instead of being copied into the catalog. --min-side
+changes the smallest accepted short side and --skip-quality imports
+everything that matches a meal.
+
+Watch mode uses inotify on Linux and falls back to polling elsewhere. Events are
+debounced so a photo is imported once after it has finished being written, and
+only files that were created or modified since the last import are processed.
+
+Bulk mode is for large dumps (100k photos). It streams the directory with
+os.scandir in windows of --window entries, so the full listing is never held
+in memory. Each window is quality-checked as one batch and then imported on a
+thread pool. Photos that need no resizing are cloned instead of copied through
+Python: a reflink (FICLONE) where the filesystem supports it, otherwise
+os.copy_file_range, which copies inside the kernel. With --hardlink, the
+imageset shares the source file's inode instead. Only do that when the dump
+will not be edited in place.
+"""
 import os
+import sys
 import json
+import time
+import errno
 import shutil
-import glob
+import select
+import argparse
+import itertools
+import tempfile
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from asset_catalog import base_dir, featured_meals_dir, cache_dir, IMAGE_EXTENSIONS, RENDITION_EXTENSIONS, meal_names
+from asset_trace import span
+from image_quality import MIN_SIDE, check_images
 
 # Directories
-base_dir = "/Users/samueleskenasy/xCode applications/foodscannerpro"
 download_dir = os.path.join(base_dir, "MealImages")
-assets_dir = os.path.join(base_dir, "foodscannerpro/Assets.xcassets/FeaturedMeals")
-
-# List of all meal names we're expecting images for
-meal_names = [
-    "greek_yogurt_parfait", 
-    "avocado_toast",
-    "oatmeal_bowl",
-    "smoothie_bowl",
-    "protein_pancakes",
-    "veggie_frittata",
-    "chia_pudding",
-    "breakfast_burrito",
-    "quinoa_breakfast",
-    "cottage_cheese_toast",
-    "greek_salad",
-    "grilled_fish",
-    "hummus_plate",
-    "ratatouille",
-    "mediterranean_pasta",
-    "falafel_wrap",
-    "seafood_paella",
-    "tabbouleh",
-    "stuffed_peppers",
-    "shakshuka",
-    "grilled_chicken",
-    "salmon_bowl",
-    "turkey_meatballs",
-    "lentil_curry",
-    "tuna_steak",
-    "protein_bowl",
-    "tofu_stirfry",
-    "yogurt_bowl",
-    "egg_white_omelette",
-    "shrimp_skewers"
-]
-
-# Contents.json template
-contents_json = {
-    "images": [
-        {
-            "idiom": "universal",
-            "scale": "1x"
-        },
-        {
-            "filename": "image.jpg",  # Will be updated with actual filename
-            "idiom": "universal",
-            "scale": "2x"
-        },
-        {
-            "idiom": "universal",
-            "scale": "3x"
+assets_dir = featured_meals_dir
+state_path = os.path.join(cache_dir, "meal_import_state.json")
+
+# Imported photos are downscaled so the long edge is at most this many pixels
+MAX_IMAGE_SIZE = 1024
+JPEG_QUALITY = 90
+# --format choices: "jpeg" keeps the source's JPEG/PNG, "heic" encodes HEIC at matched quality
+IMPORT_FORMATS = ("jpeg", "heic")
+
+# Bulk import: directory entries per window, and import threads
+BULK_WINDOW = 512
+BULK_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+# ioctl request that makes a file share another file's extents (btrfs, XFS, APFS-style reflink)
+FICLONE = 0x40049409
+# errno values meaning "this filesystem / pair of filesystems can't do that"
+UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EPERM, errno.EINVAL, errno.ENOTTY, errno.ENOSYS,
+                      errno.EOPNOTSUPP, errno.EBADF, errno.EMLINK}
+
+def build_meal_lookup(names):
+    """Lookup from normalized file name to meal name"""
+    return {meal_name.lower(): meal_name for meal_name in names}
+
+
+meal_lookup = build_meal_lookup(meal_names)
+
+
+def make_contents_json(filename):
+    """Contents.json for a FeaturedMeals imageset with a single 2x image"""
+    return {
+        "images": [
+            {
+                "idiom": "universal",
+                "scale": "1x"
+            },
+            {
+                "filename": filename,
+                "idiom": "universal",
+                "scale": "2x"
+            },
+            {
+                "idiom": "universal",
+                "scale": "3x"
+            }
+        ],
+        "info": {
+            "author": "xcode",
+            "version": 1
         }
-    ],
-    "info": {
-        "author": "xcode",
-        "version": 1
     }
-}
 
-def process_downloaded_images():
+
+def match_meal_name(filename, lookup=None):
+    """Return the meal name a photo file belongs to, or None"""
+    lookup = meal_lookup if lookup is None else lookup
+    name = os.path.splitext(filename)[0].lower()
+    return lookup.get(name) or lookup.get(name.replace(" ", "_"))
+
+
+def is_image_file(filename):
+    return not filename.startswith(".") and filename.lower().endswith(IMAGE_EXTENSIONS)
+
+
+# (method, source device, target device) combinations that already failed once
+_unsupported = set()
+
+
+def clone_file(src, dst, hardlink=False):
+    """Put a copy of src at dst, avoiding a userspace byte copy where the filesystem allows it
+
+    Tries a hardlink (only when hardlink=True), a reflink, os.copy_file_range and
+    finally shutil.copyfile, remembering which ones a pair of devices does not
+    support. Returns the method that worked.
+    """
+    devices = (os.stat(src).st_dev, os.stat(os.path.dirname(dst) or ".").st_dev)
+
+    if hardlink and ("hardlink", *devices) not in _unsupported:
+        # os.link cannot overwrite, so link under a unique name in the target directory, then rename
+        tmp_dir = tempfile.mkdtemp(prefix=".link-", dir=os.path.dirname(dst) or ".")
+        try:
+            tmp_path = os.path.join(tmp_dir, "link")
+            os.link(src, tmp_path)
+            os.replace(tmp_path, dst)
+            return "hardlink"
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_ERRNOS:
+                raise
+            _unsupported.add(("hardlink", *devices))
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    # A hardlinked dst shares its inode with an older source; never write through it
+    if os.path.lexists(dst):
+        os.remove(dst)
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        if ("reflink", *devices) not in _unsupported:
+            import fcntl
+            try:
+                fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+                return "reflink"
+            except OSError as e:
+                if e.errno not in UNSUPPORTED_ERRNOS:
+                    raise
+                _unsupported.add(("reflink", *devices))
+
+        if hasattr(os, "copy_file_range") and ("copy_file_range", *devices) not in _unsupported:
+            try:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+                return "copy_file_range"
+            except OSError as e:
+                if e.errno not in UNSUPPORTED_ERRNOS:
+                    raise
+                _unsupported.add(("copy_file_range", *devices))
+                fsrc.seek(0)
+                fdst.seek(0)
+                fdst.truncate()
+
+        shutil.copyfileobj(fsrc, fdst)
+        return "copy"
+
+
+def write_resized(image_path, target_path, hardlink=False, fmt="jpeg"):
+    """Copy an image into place, downscaling it first if it is larger than MAX_IMAGE_SIZE
+
+    With fmt="heic" the photo is always decoded and encoded once, as HEIC at
+    the quality matching JPEG_QUALITY. Returns how the file got there: a
+    clone_file method, "resized" or "heic".
+    """
+    from PIL import Image
+
+    with Image.open(image_path) as img:
+        if fmt == "jpeg" and max(img.size) <= MAX_IMAGE_SIZE:
+            with span("copy"):
+                return clone_file(image_path, target_path, hardlink)
+        with span("decode"):
+            img.draft("RGB", (MAX_IMAGE_SIZE, MAX_IMAGE_SIZE))
+            img.load()
+        with span("resize"):
+            img.thumbnail((MAX_IMAGE_SIZE, MAX_IMAGE_SIZE), Image.LANCZOS)
+        with span("encode", format=fmt):
+            if fmt == "heic":
+                from rendition_format import encode, matched_quality
+
+                pixels = img.convert("RGB")
+                with open(target_path, "wb") as f:
+                    f.write(encode(pixels, "heic", matched_quality(pixels, reference_quality=JPEG_QUALITY)))
+                return "heic"
+            if target_path.lower().endswith(".png"):
+                img.save(target_path, optimize=True)
+            else:
+                img.convert("RGB").save(target_path, quality=JPEG_QUALITY, optimize=True)
+        return "resized"
+
+
+def import_image(image_path, matching_meal, assets_dir=assets_dir, hardlink=False, fmt="jpeg"):
+    """Resize a photo into its imageset and point Contents.json at it; returns how it was written"""
+    ext = ".heic" if fmt == "heic" else os.path.splitext(image_path)[1].lower()
+    imageset_dir = os.path.join(assets_dir, f"{matching_meal}.imageset")
+    os.makedirs(imageset_dir, exist_ok=True)
+    filename = f"image{ext}"
+
+    # Write under a unique name, then rename over the old file. The old file may be a hardlink to a
+    # source photo, and if decoding or encoding fails, Contents.json still points at a complete image.
+    target_path = os.path.join(imageset_dir, filename)
+    tmp_dir = tempfile.mkdtemp(prefix=".import-", dir=imageset_dir)
+    try:
+        tmp_path = os.path.join(tmp_dir, filename)
+        method = write_resized(image_path, tmp_path, hardlink, fmt)
+        os.replace(tmp_path, target_path)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    # Drop an older rendition with a different extension (or a HEIC/WebP conversion) so the set has one image
+    for other in os.listdir(imageset_dir):
+        if other != filename and os.path.splitext(other)[0] == "image" and other.lower().endswith(RENDITION_EXTENSIONS):
+            os.remove(os.path.join(imageset_dir, other))
+
+    with span("json_write"), open(os.path.join(imageset_dir, "Contents.json"), "w") as f:
+        json.dump(make_contents_json(filename), f, indent=2)
+    return method
+
+
+def print_meal_names():
+    print("   Rename it to match one of these meal names:")
+    for i, name in enumerate(meal_names):
+        if i > 0 and i % 5 == 0:
+            print()  # Line break every 5 items
+        print(f"   - {name}", end="  ")
+    print("\n")
+
+
+def import_file(image_path, quality=None, fmt="jpeg", min_side=MIN_SIDE, skip_quality=False):
+    """Import a single photo, printing the outcome. Returns True if it was imported.
+
+    quality is the photo's image_quality result when the caller already checked a batch.
+    """
+    filename = os.path.basename(image_path)
+    matching_meal = match_meal_name(filename)
+    if not matching_meal:
+        print(f"⚠️  Warning: {filename} doesn't match any meal name")
+        print_meal_names()
+        return False
+
+    if quality is None:
+        quality = check_images([image_path], min_side, skip=skip_quality)[image_path]
+    if not quality["ok"]:
+        print(f"⚠️  Skipping {filename}: {', '.join(quality['problems'])}")
+        return False
+
+    try:
+        with span("import", name=filename):
+            import_image(image_path, matching_meal, fmt=fmt)
+        print(f"✅ Added {filename} to {matching_meal} asset")
+        return True
+    except Exception as e:
+        print(f"❌ Failed to process {filename}: {str(e)}")
+        return False
+
+
+def process_downloaded_images(fmt="jpeg", min_side=MIN_SIDE, skip_quality=False):
     """Process all downloaded images in the MealImages directory"""
     print("\n" + "=" * 70)
     print("XCODE IMAGE IMPORTER".center(70))
     print("=" * 70)
     print(f"Looking for images in: {download_dir}")
-    
+
     # Find all image files in the download directory
-    image_files = []
-    for ext in ['*.jpg', '*.jpeg', '*.png']:
-        image_files.extend(glob.glob(os.path.join(download_dir, ext)))
-    
+    image_files = sorted(
+        entry.path for entry in os.scandir(download_dir)
+        if entry.is_file() and is_image_file(entry.name)
+    ) if os.path.isdir(download_dir) else []
+
     if not image_files:
         print("\nNo images found in the download directory.")
         print(f"Please download images to: {download_dir}")
         print("Make sure to name them according to the meal (e.g., 'greek_salad.jpg')")
         return
-    
+
     print(f"\nFound {len(image_files)} images")
     print("\nProcessing images...")
-    
+
+    # Check the whole batch before spending any resizing or encoding on it
+    quality = check_images(image_files, min_side, skip=skip_quality)
     for image_path in image_files:
-        filename = os.path.basename(image_path)
-        name, ext = os.path.splitext(filename)
-        
-        # Check if this matches any meal name
-        matching_meal = None
-        for meal_name in meal_names:
-            if name.lower() == meal_name.lower() or name.lower().replace(" ", "_") == meal_name.lower():
-                matching_meal = meal_name
-                break
-        
-        if matching_meal:
-            imageset_dir = os.path.join(assets_dir, f"{matching_meal}.imageset")
-            target_path = os.path.join(imageset_dir, f"image{ext}")
-            
-            try:
-                # Copy the image to the asset catalog
-                shutil.copy(image_path, target_path)
-                
-                # Update the Contents.json
-                contents_path = os.path.join(imageset_dir, "Contents.json")
-                
-                # Make a copy of the template and update the filename
-                json_data = contents_json.copy()
-                json_data["images"][1]["filename"] = f"image{ext}"
-                
-                with open(contents_path, "w") as f:
-                    json.dump(json_data, f, indent=2)
-                
-                print(f"✅ Added {filename} to {matching_meal} asset")
-            except Exception as e:
-                print(f"❌ Failed to process {filename}: {str(e)}")
-        else:
-            print(f"⚠️  Warning: {filename} doesn't match any meal name")
-            print("   Rename it to match one of these meal names:")
-            for i, name in enumerate(meal_names):
-                if i > 0 and i % 5 == 0:
-                    print()  # Line break every 5 items
-                print(f"   - {name}", end="  ")
-            print("\n")
-    
+        import_file(image_path, quality[image_path], fmt)
+
     print("\n" + "=" * 70)
     print("Import complete!")
     print("Open your Xcode project and check the Assets.xcassets/FeaturedMeals folder")
     print("to see your imported images.")
     print("=" * 70)
 
+
+# --- Bulk mode ---
+
+def iter_image_windows(directory, window=BULK_WINDOW):
+    """Lists of at most window image paths, streamed from os.scandir in directory order"""
+    with os.scandir(directory) as entries:
+        images = (entry.path for entry in entries if is_image_file(entry.name) and entry.is_file())
+        while True:
+            batch = list(itertools.islice(images, window))
+            if not batch:
+                return
+            yield batch
+
+
+def bulk_import_one(image_path, matching_meal, assets_dir, hardlink, fmt="jpeg"):
+    try:
+        with span("import", name=os.path.basename(image_path)):
+            return import_image(image_path, matching_meal, assets_dir, hardlink, fmt)
+    except Exception as e:
+        print(f"❌ Failed to process {os.path.basename(image_path)}: {str(e)}")
+        return "failed"
+
+
+def newest_per_meal(matched):
+    """Keep the newest photo (by mtime, then path) of each meal from a {path: meal} dict"""
+    newest = {}
+    for image_path, matching_meal in matched.items():
+        key = (os.stat(image_path).st_mtime_ns, image_path)
+        if matching_meal not in newest or key > newest[matching_meal][0]:
+            newest[matching_meal] = (key, image_path)
+    return {image_path: matching_meal for matching_meal, (_, image_path) in newest.items()}
+
+
+def import_bulk(directory=download_dir, assets_dir=assets_dir, lookup=None, workers=BULK_WORKERS,
+                window=BULK_WINDOW, hardlink=False, fmt="jpeg", min_side=MIN_SIDE, skip_quality=False):
+    """Import a large photo dump window by window on a thread pool; returns a Counter of outcomes
+
+    Memory stays proportional to the window, not the dump: each window is
+    scanned, quality-checked and imported before the next one is read.
+    """
+    outcomes = Counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for batch in iter_image_windows(directory, window):
+            matched = {}
+            for image_path in batch:
+                matching_meal = match_meal_name(os.path.basename(image_path), lookup)
+                if matching_meal:
+                    matched[image_path] = matching_meal
+                else:
+                    outcomes["unmatched"] += 1
+
+            quality = check_images(list(matched), min_side, skip=skip_quality)
+            for image_path in [path for path in matched if not quality[path]["ok"]]:
+                print(f"⚠️  Skipping {os.path.basename(image_path)}: {', '.join(quality[image_path]['problems'])}")
+                del matched[image_path]
+                outcomes["rejected"] += 1
+
+            # One source per imageset, so no two threads write the same set
+            chosen = newest_per_meal(matched)
+            outcomes["duplicate"] += len(matched) - len(chosen)
+
+            outcomes.update(pool.map(
+                bulk_import_one, chosen, chosen.values(),
+                itertools.repeat(assets_dir), itertools.repeat(hardlink), itertools.repeat(fmt),
+            ))
+            print(f"   {sum(outcomes.values())} photos scanned...")
+    return outcomes
+
+
+def print_bulk_summary(outcomes):
+    skipped = ("unmatched", "rejected", "duplicate", "failed")
+    imported = sum(count for outcome, count in outcomes.items() if outcome not in skipped)
+    print(f"\n📊 Imported {imported} photos (" +
+          ", ".join(f"{outcome} {count}" for outcome, count in sorted(outcomes.items())) + ")")
+
+
+# --- Watch mode ---
+
+def file_signature(path):
+    """(size, mtime) used to tell whether a photo changed since it was imported"""
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def load_import_state():
+    try:
+        with open(state_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_import_state(state):
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, state_path)
+
+
+class InotifyWatcher:
+    """Minimal inotify binding via ctypes; raises OSError where inotify is unavailable"""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    EVENT_HEADER_SIZE = 16  # int wd; uint32 mask, cookie, len
+
+    def __init__(self, directory):
+        import ctypes
+        import ctypes.util
+
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_CLOSE_WRITE | self.IN_MOVED_TO
+        if libc.inotify_add_watch(self.fd, os.fsencode(directory), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout):
+        """Return the file names that were written or moved in within timeout seconds"""
+        import struct
+
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        names = []
+        offset = 0
+        while offset + self.EVENT_HEADER_SIZE <= len(data):
+            _, _, _, length = struct.unpack_from("iIII", data, offset)
+            offset += self.EVENT_HEADER_SIZE
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if name:
+                names.append(os.fsdecode(name))
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingWatcher:
+    """Fallback watcher that rescans the directory's stat data on an interval"""
+
+    def __init__(self, directory, interval=1.0):
+        self.directory = directory
+        self.interval = interval
+        self.seen = self.scan()
+
+    def scan(self):
+        signatures = {}
+        for entry in os.scandir(self.directory):
+            if not is_image_file(entry.name):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                st = entry.stat()
+            except OSError:
+                # Removed or renamed since the scandir (editor temp files, partial downloads)
+                continue
+            signatures[entry.name] = (st.st_size, st.st_mtime_ns)
+        return signatures
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        current = self.scan()
+        changed = [name for name, sig in current.items() if self.seen.get(name) != sig]
+        self.seen = current
+        return changed
+
+    def close(self):
+        pass
+
+
+def make_watcher(directory, force_polling=False):
+    if not force_polling:
+        try:
+            return InotifyWatcher(directory), "inotify"
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(directory), "polling"
+
+
+def import_changed(names, state, fmt="jpeg", min_side=MIN_SIDE, skip_quality=False):
+    """Import the named files whose size or mtime differs from the last import"""
+    imported = 0
+    changed = {}
+    for name in sorted(names):
+        path = os.path.join(download_dir, name)
+        if not os.path.isfile(path) or not is_image_file(name):
+            continue
+        signature = file_signature(path)
+        if state.get(name) != signature:
+            changed[name] = (path, signature)
+
+    quality = check_images([path for path, _ in changed.values()], min_side, skip=skip_quality)
+    for name, (path, signature) in changed.items():
+        if import_file(path, quality[path], fmt):
+            imported += 1
+        # Remember unmatched and rejected files too so they are only reported once per change
+        state[name] = signature
+    if imported or names:
+        save_import_state(state)
+    return imported
+
+
+def pending_signature(name):
+    """file_signature of a MealImages/ file, or None once it is gone"""
+    try:
+        return file_signature(os.path.join(download_dir, name))
+    except OSError:
+        return None
+
+
+def watch_meal_images(debounce=1.0, force_polling=False, fmt="jpeg", min_side=MIN_SIDE, skip_quality=False):
+    """Watch MealImages/ and import photos as they are created or modified"""
+    os.makedirs(download_dir, exist_ok=True)
+    state = load_import_state()
+
+    # Catch up on anything that changed while the watcher was not running
+    initial = [entry.name for entry in os.scandir(download_dir) if entry.is_file()]
+    import_changed(initial, state, fmt, min_side, skip_quality)
+
+    watcher, backend = make_watcher(download_dir, force_polling)
+    print(f"👀 Watching {download_dir} ({backend}). Press Ctrl+C to stop.")
+
+    # name -> (time the file was last seen changing, its (size, mtime) then)
+    pending = {}
+    try:
+        while True:
+            timeout = debounce
+            if pending:
+                timeout = max(0.05, min(last for last, _ in pending.values()) + debounce - time.monotonic())
+            names = watcher.wait(timeout)
+            # Timestamp events after the wait, so the quiet window starts when they were seen
+            now = time.monotonic()
+            for name in names:
+                if is_image_file(name):
+                    pending[name] = (now, pending_signature(name))
+
+            # Import files whose size and mtime have not changed for the whole debounce window
+            ready = []
+            for name, (last, signature) in list(pending.items()):
+                if now - last < debounce:
+                    continue
+                current = pending_signature(name)
+                if current is None:
+                    del pending[name]
+                elif current != signature:
+                    pending[name] = (now, current)
+                else:
+                    del pending[name]
+                    ready.append(name)
+            if ready:
+                import_changed(ready, state, fmt, min_side, skip_quality)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+    finally:
+        watcher.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import meal photos into the FeaturedMeals asset catalog")
+    parser.add_argument("--watch", action="store_true", help="Keep running and import new or modified photos")
+    parser.add_argument("--debounce", type=float, default=1.0, help="Seconds a file must be quiet before import")
+    parser.add_argument("--poll", action="store_true", help="Use polling instead of inotify")
+    parser.add_argument("--bulk", action="store_true", help="Stream a large directory in windows and import on a thread pool")
+    parser.add_argument("--source", default=download_dir, help="Directory to bulk import from")
+    parser.add_argument("--workers", type=int, default=BULK_WORKERS, help="Bulk import threads")
+    parser.add_argument("--window", type=int, default=BULK_WINDOW, help="Directory entries per bulk window")
+    parser.add_argument("--hardlink", action="store_true", help="Hardlink unresized photos instead of cloning them")
+    parser.add_argument("--format", choices=IMPORT_FORMATS, default="jpeg",
+                        help="jpeg keeps the source's JPEG/PNG; heic encodes HEIC from the source at matched quality")
+    parser.add_argument("--min-side", type=int, default=MIN_SIDE, help="Smallest accepted short side in pixels")
+    parser.add_argument("--skip-quality", action="store_true", help="Import photos without the image quality gate")
+    args = parser.parse_args(argv)
+
+    if args.bulk:
+        print(f"Bulk importing {args.source} ({args.workers} workers, {args.window} per window)")
+        print_bulk_summary(import_bulk(args.source, workers=args.workers, window=args.window, hardlink=args.hardlink,
+                                       fmt=args.format, min_side=args.min_side, skip_quality=args.skip_quality))
+    elif args.watch:
+        watch_meal_images(debounce=args.debounce, force_polling=args.poll, fmt=args.format,
+                          min_side=args.min_side, skip_quality=args.skip_quality)
+    else:
+        process_downloaded_images(args.format, args.min_side, args.skip_quality)
+
+
 if __name__ == "__main__":
-    process_downloaded_images() 
\ No newline at end of file
+    main()
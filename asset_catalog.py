@@ -0,0 +1,188 @@
+"""
+Asset catalog helpers shared by the Food Scanner Pro image tools.
+
+Paths are resolved relative to this file so the tools work from any checkout.
+"""
+
+import os
+import json
+import hashlib
+
+# Directories
+base_dir = os.path.dirname(os.path.abspath(__file__))
+xcassets_dir = os.path.join(base_dir, "foodscannerpro/Assets.xcassets")
+featured_meals_dir = os.path.join(xcassets_dir, "FeaturedMeals")
+categories_dir = os.path.join(xcassets_dir, "Categories")
+cache_dir = os.path.join(base_dir, ".asset_cache")
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+# Catalog renditions may also be HEIC or lossless WebP (see rendition_format.py)
+RENDITION_EXTENSIONS = IMAGE_EXTENSIONS + (".heic", ".webp")
+
+SCALE_ORDER = {"1x": 1, "2x": 2, "3x": 3}
+
+# List of all featured meal image names
+meal_names = [
+    "greek_yogurt_parfait",
+    "avocado_toast",
+    "oatmeal_bowl",
+    "smoothie_bowl",
+    "protein_pancakes",
+    "veggie_frittata",
+    "chia_pudding",
+    "breakfast_burrito",
+    "quinoa_breakfast",
+    "cottage_cheese_toast",
+    "greek_salad",
+    "grilled_fish",
+    "hummus_plate",
+    "ratatouille",
+    "mediterranean_pasta",
+    "falafel_wrap",
+    "seafood_paella",
+    "tabbouleh",
+    "stuffed_peppers",
+    "shakshuka",
+    "grilled_chicken",
+    "salmon_bowl",
+    "turkey_meatballs",
+    "lentil_curry",
+    "tuna_steak",
+    "protein_bowl",
+    "tofu_stirfry",
+    "yogurt_bowl",
+    "egg_white_omelette",
+    "shrimp_skewers"
+]
+
+# Featured categories with their titles and descriptions (see FeaturedCategory in FeaturedMeals.swift)
+categories = [
+    {
+        "name": "healthy_breakfast",
+        "title": "Healthy Breakfast",
+        "description": "Start your day with nutritious and energizing meals"
+    },
+    {
+        "name": "mediterranean_diet",
+        "title": "Mediterranean Diet",
+        "description": "Heart-healthy choices inspired by Mediterranean cuisine"
+    },
+    {
+        "name": "protein_rich",
+        "title": "Protein-Rich Meals",
+        "description": "High-protein meals for muscle building and recovery"
+    }
+]
+
+
+def iter_imagesets(catalog_dir):
+    """Yield (name, imageset_dir) for every imageset in a catalog folder, sorted by name"""
+    if not os.path.isdir(catalog_dir):
+        return
+    for entry in sorted(os.scandir(catalog_dir), key=lambda e: e.name):
+        if entry.is_dir() and entry.name.endswith(".imageset"):
+            yield entry.name[:-len(".imageset")], entry.path
+
+
+def load_contents(imageset_dir):
+    """Read an imageset's Contents.json, returning an empty catalog entry if it is missing"""
+    contents_path = os.path.join(imageset_dir, "Contents.json")
+    try:
+        with open(contents_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"images": [], "info": {"author": "xcode", "version": 1}}
+
+
+def write_contents(imageset_dir, contents):
+    """Write an imageset's Contents.json in the same layout Xcode uses"""
+    with open(os.path.join(imageset_dir, "Contents.json"), "w") as f:
+        json.dump(contents, f, indent=2)
+
+
+def primary_image(imageset_dir):
+    """Return the path of the best source image in an imageset, or None.
+
+    Prefers the highest-scale rendition referenced by Contents.json and falls
+    back to any image file in the folder for sets whose Contents.json is stale.
+    Dark and high-contrast variants (entries with "appearances") are skipped.
+    """
+    referenced = []
+    for image in load_contents(imageset_dir).get("images", []):
+        filename = image.get("filename")
+        if filename and filename.lower().endswith(RENDITION_EXTENSIONS) and not image.get("appearances"):
+            path = os.path.join(imageset_dir, filename)
+            if os.path.isfile(path):
+                referenced.append((SCALE_ORDER.get(image.get("scale"), 1), path))
+    if referenced:
+        return heif_readable(max(referenced)[1])
+
+    for filename in sorted(os.listdir(imageset_dir)):
+        if filename.lower().endswith(RENDITION_EXTENSIONS):
+            return heif_readable(os.path.join(imageset_dir, filename))
+    return None
+
+
+def heif_readable(path):
+    """Register pillow-heif's opener when path is a HEIC rendition, so Pillow callers can decode it"""
+    if path.lower().endswith(".heic"):
+        try:
+            import pillow_heif
+            pillow_heif.register_heif_opener()
+        except ImportError:
+            pass
+    return path
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """SHA-256 of a file's contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ContentCache:
+    """Small JSON cache of derived results keyed by image content hash.
+
+    Entries that are not touched during a run are dropped on save unless
+    prune=False, so the cache never grows beyond the current catalog.
+    """
+
+    def __init__(self, name, version=1):
+        self.path = os.path.join(cache_dir, f"{name}.json")
+        self.version = version
+        self.entries = {}
+        self.used = set()
+        self.hits = 0
+        self.misses = 0
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get("version") == version:
+                self.entries = data.get("entries", {})
+        except (OSError, ValueError):
+            pass
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.used.add(key)
+        return entry
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.used.add(key)
+
+    def save(self, prune=True):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        keys = self.used if prune else self.entries
+        entries = {key: self.entries[key] for key in sorted(keys)}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": self.version, "entries": entries}, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,172 @@
+"""
+Per-stage timing spans for the asset tools.
+
+Wrap a stage in `with span("encode"):` to record it. Spans nest, are tracked
+per thread, and can also record the tracemalloc peak reached inside them
+(tracemalloc is process-wide, so peaks are exact only for single-threaded
+stages).
+Tracing is off by default: span() then returns a shared no-op context
+manager, so instrumented code pays one function call per stage.
+
+Enable it with `foodscanner-assets --trace trace.json [--trace-memory] ...`
+(or enable()/finish() when calling the tools from Python). The trace is
+Chrome trace-event JSON, which chrome://tracing and ui.perfetto.dev open
+directly, and a per-stage summary table is printed at the end.
+"""
+
+import os
+import json
+import time
+import threading
+import contextlib
+
+_NULL_SPAN = contextlib.nullcontext()
+_tracer = None
+
+
+class _Frame:
+    __slots__ = ("name", "args", "start", "mem_start", "mem_peak")
+
+    def __init__(self, name, args, start, mem_start):
+        self.name = name
+        self.args = args
+        self.start = start
+        self.mem_start = mem_start
+        self.mem_peak = mem_start
+
+
+class Tracer:
+    """Collects completed spans as Chrome trace "complete" (ph=X) events"""
+
+    def __init__(self, memory=False):
+        self.memory = memory
+        self.events = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        self.started_tracemalloc = False
+        if memory:
+            import tracemalloc
+            self.tracemalloc = tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self.started_tracemalloc = True
+
+    def _stack(self):
+        stack = getattr(self.local, "stack", None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+    @contextlib.contextmanager
+    def span(self, stage, args):
+        stack = self._stack()
+        mem_start = 0
+        if self.memory:
+            current, peak = self.tracemalloc.get_traced_memory()
+            # Fold the parent's peak so far into it before the child resets the counter
+            if stack:
+                stack[-1].mem_peak = max(stack[-1].mem_peak, peak)
+            self.tracemalloc.reset_peak()
+            mem_start = current
+        frame = _Frame(stage, args, time.perf_counter(), mem_start)
+        stack.append(frame)
+        try:
+            yield frame
+        finally:
+            end = time.perf_counter()
+            stack.pop()
+            event = {
+                "name": stage,
+                "ph": "X",
+                "ts": (frame.start - self.origin) * 1e6,
+                "dur": (end - frame.start) * 1e6,
+                "pid": self.pid,
+                "tid": threading.get_ident(),
+            }
+            event_args = dict(args) if args else {}
+            if self.memory:
+                _, peak = self.tracemalloc.get_traced_memory()
+                frame.mem_peak = max(frame.mem_peak, peak)
+                if stack:
+                    stack[-1].mem_peak = max(stack[-1].mem_peak, frame.mem_peak)
+                event_args["peak_alloc_bytes"] = frame.mem_peak - frame.mem_start
+            if event_args:
+                event["args"] = event_args
+            with self.lock:
+                self.events.append(event)
+
+    def summary(self):
+        """Aggregate events by span name: (name, count, total_ms, mean_ms, max_ms, peak_bytes)"""
+        stats = {}
+        for event in self.events:
+            entry = stats.setdefault(event["name"], [0, 0.0, 0.0, 0])
+            duration = event["dur"] / 1000
+            entry[0] += 1
+            entry[1] += duration
+            entry[2] = max(entry[2], duration)
+            entry[3] = max(entry[3], event.get("args", {}).get("peak_alloc_bytes", 0))
+        rows = [
+            (name, count, total, total / count, longest, peak)
+            for name, (count, total, longest, peak) in stats.items()
+        ]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows
+
+    def write_chrome_trace(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+
+    def print_summary(self):
+        rows = self.summary()
+        header = f"{'stage':<24} {'count':>7} {'total ms':>10} {'mean ms':>9} {'max ms':>9}"
+        if self.memory:
+            header += f" {'peak KB':>9}"
+        print(header)
+        print("-" * len(header))
+        for name, count, total, mean, longest, peak in rows:
+            line = f"{name:<24} {count:>7} {total:>10.1f} {mean:>9.2f} {longest:>9.2f}"
+            if self.memory:
+                line += f" {peak / 1024:>9.1f}"
+            print(line)
+
+
+def span(stage, **args):
+    """Time a stage. Keyword arguments are stored with the event (e.g. name=...).
+
+    Returns a no-op context manager when tracing is disabled.
+    """
+    if _tracer is None:
+        return _NULL_SPAN
+    return _tracer.span(stage, args)
+
+
+def enabled():
+    return _tracer is not None
+
+
+def enable(memory=False):
+    """Start collecting spans, optionally with tracemalloc peak tracking"""
+    global _tracer
+    _tracer = Tracer(memory=memory)
+    return _tracer
+
+
+def finish(trace_path=None, summary=True):
+    """Stop tracing, write the Chrome trace if a path is given and print the summary"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is None:
+        return None
+    if tracer.started_tracemalloc:
+        tracer.tracemalloc.stop()
+    if trace_path:
+        tracer.write_chrome_trace(trace_path)
+    if summary:
+        print()
+        tracer.print_summary()
+        if trace_path:
+            print(f"\nTrace written to {trace_path} (open in ui.perfetto.dev or chrome://tracing)")
+    return tracer
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Audit Assets.xcassets for wasted bytes and broken references.
+
+The catalog is indexed in one walk (file sizes from the directory entries,
+pixel sizes from the image headers only), and every string literal in the
+Swift sources is collected once. Findings:
+
+  missing    Contents.json names a file that is not in the imageset
+  empty      an imageset with no image in any slot
+  oversized  a rendition larger than its display size x slot scale, with
+             the bytes a resize would roughly save
+  orphan     files no Contents.json references (stray images, .swift files,
+             text clippings), with their size
+  unused     imagesets whose name appears in no Swift string literal
+  name       set names Finder or Xcode made by accident ("Avocado_Toast 1",
+             "protein_pancakes " with a trailing space)
+
+Display sizes are in points per catalog folder (DISPLAY_POINTS); sets
+elsewhere are checked against the largest iPhone screen. Names built at run
+time (string interpolation) cannot be seen, so check "unused" sets before
+deleting them.
+
+As a CI gate, --fail-on picks the finding kinds that fail the run, and
+--budget-kb / --max-waste-kb cap the catalog size and the reclaimable bytes.
+
+Requirements:
+- Pillow
+
+Usage:
+python audit_assets.py                                  # report
+python audit_assets.py --json audit.json --fail-on missing oversized --budget-kb 8000
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+
+from asset_catalog import base_dir, xcassets_dir, RENDITION_EXTENSIONS, SCALE_ORDER, heif_readable
+from asset_trace import span
+
+# Largest rendered size of each catalog folder's images, in points (width, height)
+DISPLAY_POINTS = {
+    "FeaturedMeals": (430, 250),  # full-width hero in FeaturedMealDetailView
+    "Categories": (180, 180),  # category cards in FeaturedMealsView
+}
+# iPhone Pro Max screen, for sets outside the folders above
+SCREEN_POINTS = (430, 932)
+# Renditions may exceed display size x scale by this much before they count as oversized
+OVERSIZE_TOLERANCE = 1.1
+
+FINDING_KINDS = ("missing", "empty", "oversized", "orphan", "unused", "name")
+SKIPPED_DIRS = {".git", ".asset_cache", "build", "DerivedData", "__pycache__", "benchmarks"}
+
+STRING_LITERAL = re.compile(r'"((?:[^"\\\n]|\\.)*)"')
+# Finder / Xcode duplicate suffix ("Avocado_Toast 1") or stray surrounding whitespace
+ACCIDENTAL_NAME = re.compile(r"(\s\d+$)|(^\s)|(\s$)")
+
+
+def swift_string_literals(root=base_dir):
+    """Every string literal in the Swift sources outside asset catalogs"""
+    literals = set()
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d not in SKIPPED_DIRS and not d.endswith(".xcassets")]
+        for filename in filenames:
+            if filename.endswith(".swift"):
+                with open(os.path.join(dirpath, filename), encoding="utf-8", errors="replace") as f:
+                    literals.update(STRING_LITERAL.findall(f.read()))
+    return literals
+
+
+def pixel_size(path):
+    """(width, height) from the image header, or None if it cannot be read"""
+    from PIL import Image
+
+    try:
+        with Image.open(path) as img:
+            return img.size
+    except Exception:
+        return None
+
+
+def load_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def index_catalog(catalog_dir=xcassets_dir):
+    """One walk of the catalog: imagesets with their slots and files, and files outside any set"""
+    imagesets = []
+    loose_files = []
+
+    def walk(directory, namespace, group):
+        for entry in sorted(os.scandir(directory), key=lambda e: e.name):
+            if entry.is_dir():
+                if entry.name.endswith(".imageset"):
+                    imagesets.append(read_imageset(entry, namespace, group))
+                elif os.path.splitext(entry.name)[1]:
+                    # .appiconset, .colorset, ...: Xcode resolves these from build settings
+                    continue
+                else:
+                    properties = load_json(os.path.join(entry.path, "Contents.json")).get("properties", {})
+                    prefix = f"{namespace}{entry.name}/" if properties.get("provides-namespace") else namespace
+                    walk(entry.path, prefix, group or entry.name)
+            elif entry.name != "Contents.json" and not entry.name.startswith("."):
+                loose_files.append((entry.path, entry.stat().st_size))
+
+    with span("index"):
+        walk(catalog_dir, "", None)
+    return imagesets, loose_files
+
+
+def read_imageset(entry, namespace, group):
+    files = {
+        child.name: child.stat().st_size
+        for child in os.scandir(entry.path)
+        if child.is_file() and child.name != "Contents.json" and not child.name.startswith(".")
+    }
+    slots = []
+    for image in load_json(os.path.join(entry.path, "Contents.json")).get("images", []):
+        filename = image.get("filename")
+        if filename:
+            slots.append((filename, SCALE_ORDER.get(image.get("scale"), 1)))
+    return {
+        "name": namespace + entry.name[:-len(".imageset")],
+        "path": entry.path,
+        "group": group,
+        "files": files,
+        "slots": slots,
+    }
+
+
+def oversize(width, height, display, scale):
+    """How many times larger than needed a rendition is (1.0 = exact); it must cover the display size"""
+    return min(width / (display[0] * scale), height / (display[1] * scale))
+
+
+def audit(catalog_dir=xcassets_dir, source_root=base_dir):
+    """List of findings {kind, set, path, bytes, detail} and the catalog's total bytes"""
+    imagesets, loose_files = index_catalog(catalog_dir)
+    with span("swift_scan"):
+        literals = swift_string_literals(source_root)
+
+    findings = []
+    total = sum(size for _, size in loose_files)
+
+    def add(kind, imageset, path, size, detail):
+        findings.append({"kind": kind, "set": imageset, "path": os.path.relpath(path, catalog_dir),
+                         "bytes": size, "detail": detail})
+
+    for path, size in loose_files:
+        add("orphan", None, path, size, "file outside any imageset")
+
+    for imageset in imagesets:
+        name, files = imageset["name"], imageset["files"]
+        set_bytes = sum(files.values())
+        total += set_bytes
+        display = DISPLAY_POINTS.get(imageset["group"], SCREEN_POINTS)
+
+        referenced = set()
+        for filename, scale in imageset["slots"]:
+            path = os.path.join(imageset["path"], filename)
+            if filename not in files:
+                add("missing", name, path, 0, f"{scale}x slot names a file that does not exist")
+                continue
+            referenced.add(filename)
+            size = pixel_size(heif_readable(path)) if filename.lower().endswith(RENDITION_EXTENSIONS) else None
+            if size is None:
+                continue
+            ratio = oversize(*size, display, scale)
+            if ratio > OVERSIZE_TOLERANCE:
+                # Bytes scale roughly with pixel area
+                saved = int(files[filename] * (1 - 1 / ratio ** 2))
+                add("oversized", name, path, saved,
+                    f"{size[0]}x{size[1]} in the {scale}x slot, {display[0]}x{display[1]}pt needs "
+                    f"{display[0] * scale}x{display[1] * scale} ({ratio:.1f}x)")
+
+        for filename, size in files.items():
+            if filename not in referenced:
+                add("orphan", name, os.path.join(imageset["path"], filename), size, "not referenced by Contents.json")
+        if not referenced:
+            add("empty", name, imageset["path"], 0, "no image in any slot")
+        if name not in literals:
+            add("unused", name, imageset["path"], set_bytes, "name not found in any Swift string literal")
+        if ACCIDENTAL_NAME.search(name.rsplit("/", 1)[-1]):
+            add("name", name, imageset["path"], 0, f"accidental-looking name {name!r}")
+
+    findings.sort(key=lambda f: (FINDING_KINDS.index(f["kind"]), -f["bytes"], f["path"]))
+    return findings, total
+
+
+def reclaimable(findings):
+    """Bytes saved by fixing everything, without counting a file twice"""
+    unused_sets = {f["set"] for f in findings if f["kind"] == "unused"}
+    saved = sum(f["bytes"] for f in findings if f["kind"] == "unused")
+    saved += sum(
+        f["bytes"] for f in findings
+        if f["kind"] in ("oversized", "orphan") and f["set"] not in unused_sets
+    )
+    return saved
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Audit the asset catalog for oversized, orphan and unused images")
+    parser.add_argument("--catalog", default=xcassets_dir, help="Asset catalog to audit")
+    parser.add_argument("--sources", default=base_dir, help="Directory searched for Swift sources")
+    parser.add_argument("--json", help="Write the findings here")
+    parser.add_argument("--fail-on", nargs="*", choices=FINDING_KINDS, default=["missing"],
+                        help="Finding kinds that fail the run (default: missing)")
+    parser.add_argument("--budget-kb", type=int, help="Fail if the catalog is larger than this")
+    parser.add_argument("--max-waste-kb", type=int, help="Fail if more than this could be reclaimed")
+    args = parser.parse_args(argv)
+
+    findings, total = audit(args.catalog, args.sources)
+    saved = reclaimable(findings)
+
+    icons = {"missing": "❌", "empty": "❌", "oversized": "📏", "orphan": "🗑️", "unused": "💤", "name": "⚠️"}
+    for kind in FINDING_KINDS:
+        group = [f for f in findings if f["kind"] == kind]
+        if not group:
+            continue
+        print(f"\n{icons[kind]} {kind} ({len(group)}, {sum(f['bytes'] for f in group) / 1024:.1f} KB)")
+        for f in group:
+            size = f" [{f['bytes'] / 1024:.1f} KB]" if f["bytes"] else ""
+            print(f"   - {f['path']}: {f['detail']}{size}")
+
+    if args.json:
+        with span("json_write"), open(args.json, "w") as f:
+            json.dump({"totalBytes": total, "reclaimableBytes": saved, "findings": findings}, f, indent=2)
+
+    print(f"\n📊 Catalog {total / 1024:.1f} KB, about {saved / 1024:.1f} KB reclaimable")
+
+    failures = [f"{kind} findings" for kind in args.fail_on if any(f["kind"] == kind for f in findings)]
+    if args.budget_kb is not None and total > args.budget_kb * 1024:
+        failures.append(f"catalog over the {args.budget_kb} KB budget")
+    if args.max_waste_kb is not None and saved > args.max_waste_kb * 1024:
+        failures.append(f"more than {args.max_waste_kb} KB reclaimable")
+    if failures:
+        print(f"❌ Audit failed: {', '.join(failures)}")
+        return 1
+    print("✅ Audit passed")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Quick timing checks for the asset tools.
+
+Reports how long each tool module takes to import in a fresh interpreter (the
+startup cost of the matching foodscanner-assets subcommand) and how fast the
+category card renderer runs on a synthetic catalog.
+
+With --suite it runs the pytest-benchmark suite in benchmarks/ instead.
+--save-baseline stores the results under benchmarks/baselines/, and
+--compare fails the run if any benchmark's mean regressed by more than
+--max-regression against the most recent stored baseline, or if no
+baseline has been stored yet.
+
+Usage:
+python bench_assets.py [--cards 50]
+python bench_assets.py --suite --save-baseline
+python bench_assets.py --suite --compare [--max-regression 15%] [--large]
+"""
+
+import io
+import os
+import sys
+import time
+import contextlib
+import tempfile
+import argparse
+import subprocess
+
+from asset_catalog import base_dir
+from asset_trace import span
+
+benchmarks_dir = os.path.join(base_dir, "benchmarks")
+baselines_dir = os.path.join(benchmarks_dir, "baselines")
+# Largest mean slowdown against the baseline that --compare accepts
+DEFAULT_MAX_REGRESSION = "15%"
+
+# Module imported by each foodscanner-assets subcommand
+subcommand_modules = {
+    "contents": "create_basic_placeholder",
+    "import": "add_images_to_xcode",
+    "dedupe": "dedupe_assets",
+    "download": "download_images",
+    "render": "create_category_direct",
+}
+
+
+def time_import(module, repeat=3):
+    """Best wall time in ms to start a fresh interpreter and import module"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", f"import {module}"], cwd=base_dir, check=True)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_startup():
+    baseline = time_import("os")
+    print(f"{'subcommand':<12} {'module':<28} {'import ms':>10}")
+    print(f"{'(python)':<12} {'-':<28} {baseline:>10.1f}")
+    for subcommand, module in subcommand_modules.items():
+        print(f"{subcommand:<12} {module:<28} {time_import(module):>10.1f}")
+
+
+def bench_render(cards):
+    import create_category_direct
+
+    with tempfile.TemporaryDirectory() as output_dir, contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for i in range(cards):
+            category = {
+                "name": f"bench_{i}",
+                "title": f"Bench Card {i}",
+                "description": "Synthetic category card used for timing",
+            }
+            with span("card", name=category["name"]):
+                create_category_direct.create_category_image(category, (76, 175, 80), output_dir)
+        elapsed = time.perf_counter() - start
+    print(f"\nRendered {cards} category cards in {elapsed:.2f}s ({elapsed / cards * 1000:.1f} ms/card)")
+
+
+def stored_baselines():
+    """Saved pytest-benchmark runs, as baselines/<machine>/<NNNN>_<name>.json"""
+    return sorted(
+        os.path.join(dirpath, name)
+        for dirpath, _, filenames in os.walk(baselines_dir) for name in filenames if name.endswith(".json")
+    )
+
+
+def run_suite(save_baseline=False, compare=False, max_regression=DEFAULT_MAX_REGRESSION, large=False):
+    """Run the pytest-benchmark suite, returning pytest's exit code (1 when there is no baseline to compare with)"""
+    if compare and not stored_baselines():
+        print(f"No baseline in {os.path.relpath(baselines_dir, base_dir)}/ to compare with; "
+              f"record one with --suite --save-baseline first")
+        return 1
+    command = [
+        sys.executable, "-m", "pytest", benchmarks_dir, "-q",
+        f"--benchmark-storage=file://{baselines_dir}",
+        "--benchmark-columns=min,mean,stddev,rounds",
+    ]
+    if save_baseline:
+        command.append("--benchmark-autosave")
+    if compare:
+        command += ["--benchmark-compare", f"--benchmark-compare-fail=mean:{max_regression}"]
+    if large:
+        command.append("--large")
+    return subprocess.run(command, cwd=base_dir).returncode
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time asset tool startup and rendering")
+    parser.add_argument("--cards", type=int, default=50, help="Number of synthetic cards to render")
+    parser.add_argument("--suite", action="store_true", help="Run the pytest-benchmark suite in benchmarks/")
+    parser.add_argument("--save-baseline", action="store_true", help="Store suite results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="Fail if the suite regressed against the baseline")
+    parser.add_argument("--max-regression", default=DEFAULT_MAX_REGRESSION, help="Allowed mean regression, e.g. 10%% or 0.005")
+    parser.add_argument("--large", action="store_true", help="Include 10,000-item runs of the slow stages")
+    args = parser.parse_args(argv)
+
+    if args.suite:
+        return run_suite(args.save_baseline, args.compare, args.max_regression, args.large)
+
+    bench_startup()
+    if args.cards:
+        bench_render(args.cards)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
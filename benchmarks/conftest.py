@@ -0,0 +1,140 @@
+"""
+Shared fixtures for the asset pipeline benchmarks.
+
+Synthetic catalogs of 10, 1,000 and 10,000 items stand in for the real
+FeaturedMeals list. The 10,000-item runs of the slow stages (rendering,
+downloads) only run with --large.
+"""
+
+import os
+import sys
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+CATALOG_SIZES = [10, 1000, 10000]
+LARGE_CATALOG = 10000
+
+
+def pytest_addoption(parser):
+    parser.addoption("--large", action="store_true", help="Also run slow stages on the 10,000-item catalog")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--large"):
+        return
+    skip_large = pytest.mark.skip(reason="10,000-item run of a slow stage; use --large")
+    for item in items:
+        callspec = getattr(item, "callspec", None)
+        if item.get_closest_marker("slow") and callspec and callspec.params.get("size") == LARGE_CATALOG:
+            item.add_marker(skip_large)
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: stage is too slow to run on the 10,000-item catalog by default")
+
+
+def synthetic_meal_names(size):
+    return [f"synthetic_meal_{i:05d}" for i in range(size)]
+
+
+def synthetic_categories(size):
+    return [
+        {
+            "name": f"synthetic_category_{i:05d}",
+            "title": f"Category {i}",
+            "description": "Synthetic category used for benchmarking",
+        }
+        for i in range(size)
+    ]
+
+
+@pytest.fixture(scope="session")
+def source_photo(tmp_path_factory):
+    """A 1280x853 JPEG similar to the downloaded meal photos"""
+    from PIL import Image
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, size=(853, 1280, 3), dtype=np.uint8)
+    path = tmp_path_factory.mktemp("photos") / "source.jpg"
+    Image.fromarray(pixels).save(path, quality=90)
+    return str(path)
+
+
+class _PhotoHandler(BaseHTTPRequestHandler):
+    payload = b""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "image/jpeg")
+        self.send_header("Content-Length", str(len(self.payload)))
+        self.end_headers()
+        self.wfile.write(self.payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="session")
+def photo_server(source_photo):
+    """Local HTTP stand-in for the image CDN; serves the source photo for any path"""
+    with open(source_photo, "rb") as f:
+        handler = type("Handler", (_PhotoHandler,), {"payload": f.read()})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+# (fdc_id, data_type, description, {nutrient_id: amount}) for the synthetic FoodData Central download
+FDC_FOODS = [
+    (1001, "sr_legacy_food", "Apples, raw, with skin", {1008: 52, 1003: 0.26, 1005: 13.81, 1004: 0.17, 1079: 2.4}),
+    (1002, "sr_legacy_food", "Apple pie, commercially prepared", {1008: 265, 1003: 2.4, 1005: 37.1, 1004: 12.5}),
+    # Foundation foods report energy as Atwater kcal (2047) rather than 1008
+    (1003, "foundation_food", "Yogurt, Greek, plain, nonfat", {2047: 59, 1003: 10.2, 1005: 3.6, 1093: 36}),
+    (1004, "sr_legacy_food", "Doughnuts, cake-type, plain", {1008: 421, 1003: 5.0, 1005: 49.0, 1004: 23.0}),
+    (1005, "survey_fndds_food", "Egg, whole, raw", {1008: 143, 1003: 12.6}),
+    (1006, "sr_legacy_food", "Hummus, commercial", {1008: 166, 1003: 7.9, 1005: 14.3, 1004: 9.6, 1162: 0.0}),
+    (1007, "sr_legacy_food", "Beef, ground, raw", {}),
+]
+FDC_NUTRIENTS = [
+    (1003, "Protein", "G"), (1004, "Total lipid (fat)", "G"), (1005, "Carbohydrate, by difference", "G"),
+    (1008, "Energy", "KCAL"), (1079, "Fiber, total dietary", "G"), (1093, "Sodium, Na", "MG"),
+    (1162, "Vitamin C, total ascorbic acid", "MG"), (2047, "Energy (Atwater General Factors)", "KCAL"),
+    (1051, "Water", "G"),
+]
+
+
+@pytest.fixture
+def fdc_csv_dir(tmp_path):
+    """A tiny FoodData Central CSV download (food.csv, nutrient.csv, food_nutrient.csv) in FDC's column layout"""
+    import csv
+
+    directory = tmp_path / "fdc"
+    directory.mkdir()
+    with open(directory / "food.csv", "w", newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(["fdc_id", "data_type", "description", "food_category_id", "publication_date"])
+        for fdc_id, data_type, description, _ in FDC_FOODS:
+            writer.writerow([fdc_id, data_type, description, "", "2019-04-01"])
+    with open(directory / "nutrient.csv", "w", newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(["id", "name", "unit_name", "nutrient_nbr", "rank"])
+        for nutrient_id, name, unit in FDC_NUTRIENTS:
+            writer.writerow([nutrient_id, name, unit, "", ""])
+    with open(directory / "food_nutrient.csv", "w", newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(["id", "fdc_id", "nutrient_id", "amount", "data_points"])
+        row_id = 1
+        for fdc_id, _, _, amounts in FDC_FOODS:
+            # Water is in the download but not stored
+            for nutrient_id, amount in {**amounts, 1051: 80.0}.items():
+                writer.writerow([row_id, fdc_id, nutrient_id, amount, 1])
+                row_id += 1
+    return directory
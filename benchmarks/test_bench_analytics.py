@@ -0,0 +1,79 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import meal_analytics
+from coredata_store import create_fixture_store
+from conftest import CATALOG_SIZES
+
+
+@pytest.mark.parametrize("size", CATALOG_SIZES)
+def test_meal_analytics(benchmark, tmp_path, size):
+    store = create_fixture_store(str(tmp_path / "FoodScannerPro.sqlite"), meal_count=size, days=max(size // 3, 14))
+
+    metrics = benchmark.pedantic(meal_analytics.analyze_store, args=(store,), rounds=3, iterations=1)
+    assert meal_analytics.validate(metrics, meal_analytics.reference_metrics(store)) == []
+
+
+@pytest.mark.parametrize("size", CATALOG_SIZES)
+def test_incremental_aggregates(benchmark, tmp_path, size):
+    import sqlite3
+    from coredata_store import CORE_DATA_EPOCH, add_meal, update_food_item, update_meal_date, delete_meal
+    from materialize_aggregates import refresh
+
+    store = create_fixture_store(str(tmp_path / "FoodScannerPro.sqlite"), meal_count=size, days=max(size // 3, 14))
+    aggregates = str(tmp_path / "aggregates.sqlite")
+    refresh(store, aggregates, "America/New_York")
+    connection = sqlite3.connect(store)
+    latest = connection.execute("SELECT MAX(ZDATE) FROM ZMEAL").fetchone()[0] + CORE_DATA_EPOCH
+
+    def edit():
+        # One of each change: a new meal, an edited and a moved item, a moved and a deleted meal
+        meals = [row[0] for row in connection.execute("SELECT DISTINCT ZMEAL FROM ZFOODITEM ORDER BY ZMEAL LIMIT 3")]
+        items = [row[0] for row in connection.execute("SELECT Z_PK FROM ZFOODITEM WHERE ZMEAL = ?", (meals[1],))]
+        add_meal(connection, latest + 86400, "Lunch", [("Apple", 95, 0.5, 25, 0.3), ("Tea", 2, 0, 0, 0)])
+        update_food_item(connection, items[0], calories=640.0, meal=meals[2])
+        update_meal_date(connection, meals[1], latest - 86400 * 5)
+        delete_meal(connection, meals[0])
+
+    mode, _ = benchmark.pedantic(
+        refresh, args=(store, aggregates, "America/New_York"), setup=edit, rounds=3, iterations=1
+    )
+    assert mode == "incremental"
+
+    rebuilt = str(tmp_path / "rebuilt.sqlite")
+    refresh(store, rebuilt, "America/New_York")
+    tables = "SELECT * FROM daily ORDER BY day", "SELECT * FROM weekly ORDER BY week_start"
+    for sql in tables:
+        incremental_rows = sqlite3.connect(aggregates).execute(sql).fetchall()
+        rebuilt_rows = sqlite3.connect(rebuilt).execute(sql).fetchall()
+        assert [row[0] for row in incremental_rows] == [row[0] for row in rebuilt_rows]
+        for incremental_row, rebuilt_row in zip(incremental_rows, rebuilt_rows):
+            assert incremental_row == pytest.approx(rebuilt_row)
+
+
+def test_aggregates_entity_numbers(tmp_path):
+    """Change filtering follows Z_PRIMARYKEY when a newer model shifts the entity numbers"""
+    import sqlite3
+    from coredata_store import CORE_DATA_EPOCH, add_meal, changes_since, entity_numbers
+    from materialize_aggregates import read_range, refresh
+
+    store = create_fixture_store(str(tmp_path / "FoodScannerPro.sqlite"), meal_count=50, extra_entities=("AppSettings",))
+    aggregates = str(tmp_path / "aggregates.sqlite")
+    refresh(store, aggregates, "UTC")
+    connection = sqlite3.connect(store)
+    numbers = entity_numbers(connection)
+    assert numbers["AppSettings"] == 1 and numbers["Meal"] == 4
+
+    mark = connection.execute("SELECT MAX(Z_PK) FROM ATRANSACTION").fetchone()[0]
+    latest = connection.execute("SELECT MAX(ZDATE) FROM ZMEAL").fetchone()[0] + CORE_DATA_EPOCH
+    meal_pk = add_meal(connection, latest + 86400 * 2, "Lunch", [("Apple", 95, 0.5, 25, 0.3)])
+    changes = changes_since(connection, mark, ("Meal", "FoodItem", "Recipe"))
+    assert list(changes["Meal"]) == [meal_pk]
+    assert len(changes["FoodItem"]) == 1
+    assert changes["Recipe"] == {}
+
+    mode, _ = refresh(store, aggregates, "UTC")
+    assert mode == "incremental"
+    day = int((latest + 86400 * 2) // 86400)
+    assert [row[1] for row in read_range(aggregates, day, day)] == [pytest.approx(95)]
@@ -0,0 +1,70 @@
+import json
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("PIL")
+
+import audit_assets
+from conftest import CATALOG_SIZES, synthetic_meal_names
+
+
+def make_imageset(directory, filename, data):
+    directory.mkdir(parents=True)
+    (directory / filename).write_bytes(data)
+    contents = {"images": [{"idiom": "universal", "scale": "1x"},
+                           {"filename": filename, "idiom": "universal", "scale": "2x"},
+                           {"idiom": "universal", "scale": "3x"}],
+                "info": {"author": "xcode", "version": 1}}
+    (directory / "Contents.json").write_text(json.dumps(contents))
+
+
+@pytest.fixture
+def synthetic_catalog(tmp_path):
+    """Catalog of card-sized featured meal sets plus one of each kind of problem, and Swift sources naming them"""
+    from PIL import Image
+
+    def make(size):
+        catalog = tmp_path / "Assets.xcassets"
+        featured = catalog / "FeaturedMeals"
+        Image.new("RGB", (860, 500), (200, 120, 40)).save(tmp_path / "card.jpg")
+        Image.new("RGB", (2580, 1500), (200, 120, 40)).save(tmp_path / "large.jpg")
+        card, large = (tmp_path / "card.jpg").read_bytes(), (tmp_path / "large.jpg").read_bytes()
+
+        names = synthetic_meal_names(size)
+        for name in names:
+            make_imageset(featured / f"{name}.imageset", "image.jpg", card)
+        make_imageset(featured / "oversized_meal.imageset", "image.jpg", large)
+        make_imageset(featured / f"{names[0]} 1.imageset", "image.jpg", card)
+        make_imageset(featured / "missing_meal.imageset", "image.jpg", card)
+        (featured / "missing_meal.imageset" / "image.jpg").unlink()
+        (featured / "placeholder_generator.swift").write_text("// stray")
+
+        sources = tmp_path / "Sources"
+        sources.mkdir()
+        literals = ", ".join(f'"{name}"' for name in [*names, "oversized_meal", "missing_meal"])
+        (sources / "Meals.swift").write_text(f"let imageNames = [{literals}]\n")
+        return str(catalog), str(sources)
+
+    return make
+
+
+@pytest.mark.parametrize("size", CATALOG_SIZES)
+def test_audit(benchmark, synthetic_catalog, size):
+    catalog, sources = synthetic_catalog(size)
+
+    findings, total = benchmark.pedantic(audit_assets.audit, args=(catalog, sources), rounds=3, iterations=1)
+    by_kind = {}
+    for finding in findings:
+        by_kind.setdefault(finding["kind"], []).append(finding["path"])
+
+    first = synthetic_meal_names(size)[0]
+    assert by_kind == {
+        "missing": ["FeaturedMeals/missing_meal.imageset/image.jpg"],
+        "empty": ["FeaturedMeals/missing_meal.imageset"],
+        "oversized": ["FeaturedMeals/oversized_meal.imageset/image.jpg"],
+        "orphan": ["FeaturedMeals/placeholder_generator.swift"],
+        "unused": [f"FeaturedMeals/{first} 1.imageset"],
+        "name": [f"FeaturedMeals/{first} 1.imageset"],
+    }
+    assert 0 < audit_assets.reclaimable(findings) < total
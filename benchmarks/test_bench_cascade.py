@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from build_cascade import choose_threshold, sweep_thresholds
+
+FRAME_COUNT = 10000
+CLASS_COUNT = 101
+
+
+def cascade_outputs(count, seed=0):
+    """Stage-one probabilities that are right when confident, and a stage two that is always right"""
+    rng = np.random.default_rng(seed)
+    labels = rng.integers(0, CLASS_COUNT, count)
+    easy = rng.random(count) < 0.8
+    logits = rng.normal(size=(count, CLASS_COUNT))
+    logits[np.arange(count), np.where(easy, labels, rng.integers(0, CLASS_COUNT, count))] += np.where(easy, 8.0, 1.0)
+    probs = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+    return probs, labels.copy(), labels
+
+
+def test_cascade_sweep(benchmark):
+    probs, stage_two, labels = cascade_outputs(FRAME_COUNT)
+
+    rows = benchmark(sweep_thresholds, probs, stage_two, labels, 10.0, 80.0)
+    assert rows[0]["escalationRate"] == 0.0 and rows[-1]["escalationRate"] == 1.0
+    assert [row["latencyMs"] for row in rows] == sorted(row["latencyMs"] for row in rows)
+
+    chosen = choose_threshold(rows, {"top1": 1.0, "agreement": 1.0}, 0.01)
+    # The easy 80% stay on stage one at a fraction of the full model's cost
+    assert chosen["escalationRate"] < 0.3
+    assert chosen["top1"] >= 0.99
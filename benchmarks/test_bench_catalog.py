@@ -0,0 +1,145 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import add_images_to_xcode
+import create_basic_placeholder
+from conftest import CATALOG_SIZES, synthetic_meal_names
+
+
+@pytest.mark.parametrize("size", CATALOG_SIZES)
+def test_contents_json_generation(benchmark, tmp_path, size):
+    names = synthetic_meal_names(size)
+
+    benchmark.pedantic(
+        create_basic_placeholder.create_basic_placeholders,
+        args=(names, str(tmp_path)),
+        rounds=3,
+        iterations=1,
+    )
+    assert len(list(tmp_path.iterdir())) == size
+
+
+@pytest.mark.parametrize("size", CATALOG_SIZES)
+def test_importer_matching(benchmark, size):
+    names = synthetic_meal_names(size)
+    lookup = add_images_to_xcode.build_meal_lookup(names)
+    # Mix of exact names, upper-case names, names with spaces and strays
+    filenames = []
+    for i, name in enumerate(names):
+        if i % 4 == 0:
+            filenames.append(f"{name}.jpg")
+        elif i % 4 == 1:
+            filenames.append(f"{name.upper()}.JPEG")
+        elif i % 4 == 2:
+            filenames.append(f"{name.replace('_', ' ')}.png")
+        else:
+            filenames.append(f"unrelated_photo_{i}.jpg")
+
+    def match_all():
+        return sum(1 for filename in filenames if add_images_to_xcode.match_meal_name(filename, lookup))
+
+    matched = benchmark(match_all)
+    assert matched == size - size // 4
+
+
+@pytest.fixture
+def photo_dump(tmp_path):
+    """Directory of card-sized JPEGs (no resize needed) named after synthetic meals"""
+    from PIL import Image
+    import numpy as np
+
+    def make(size):
+        dump = tmp_path / "dump"
+        dump.mkdir()
+        rng = np.random.default_rng(0)
+        Image.fromarray(rng.integers(0, 256, (600, 800, 3), dtype=np.uint8)).save(dump / "photo.jpg", quality=90)
+        data = (dump / "photo.jpg").read_bytes()
+        (dump / "photo.jpg").unlink()
+        for name in synthetic_meal_names(size):
+            (dump / f"{name}.jpg").write_bytes(data)
+        (dump / "unrelated_photo.jpg").write_bytes(data)
+        return dump
+
+    return make
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("hardlink", [False, True])
+@pytest.mark.parametrize("size", CATALOG_SIZES)
+def test_bulk_import(benchmark, tmp_path, photo_dump, size, hardlink):
+    dump = photo_dump(size)
+    assets_dir = tmp_path / "FeaturedMeals"
+    lookup = add_images_to_xcode.build_meal_lookup(synthetic_meal_names(size))
+
+    outcomes = benchmark.pedantic(
+        add_images_to_xcode.import_bulk,
+        args=(str(dump), str(assets_dir), lookup),
+        kwargs={"window": 256, "hardlink": hardlink},
+        rounds=3 if size <= 10 else 1,
+        iterations=1,
+    )
+    assert outcomes["unmatched"] == 1
+    assert sum(outcomes.values()) == size + 1
+    assert len(list(assets_dir.iterdir())) == size
+
+    first = assets_dir / f"{synthetic_meal_names(size)[0]}.imageset" / "image.jpg"
+    source = dump / f"{synthetic_meal_names(size)[0]}.jpg"
+    assert first.read_bytes() == source.read_bytes()
+    assert first.samefile(source) == hardlink
+
+
+@pytest.mark.parametrize("hardlink", [False, True])
+def test_bulk_import_duplicate_sources(tmp_path, photo_dump, hardlink):
+    """Several photos of one meal in a window: one imageset write, from the newest photo"""
+    import json
+    import os
+
+    dump = photo_dump(10)
+    name = synthetic_meal_names(10)[0]
+    data = (dump / f"{name}.jpg").read_bytes()
+    variants = [f"{name.upper()}.JPEG", f"{name.replace('_', ' ')}.png", f"{name.title()}.jpg"]
+    for i, variant in enumerate(variants, 1):
+        (dump / variant).write_bytes(data)
+        os.utime(dump / variant, ns=(i * 10**9, i * 10**9))
+    os.utime(dump / f"{name}.jpg", ns=(0, 0))
+    newest = dump / variants[-1]
+    assets_dir = tmp_path / "FeaturedMeals"
+    lookup = add_images_to_xcode.build_meal_lookup(synthetic_meal_names(10))
+
+    outcomes = add_images_to_xcode.import_bulk(str(dump), str(assets_dir), lookup, workers=8, hardlink=hardlink)
+
+    assert outcomes["duplicate"] == len(variants)
+    assert outcomes["failed"] == 0
+    imageset = assets_dir / f"{name}.imageset"
+    contents = json.loads((imageset / "Contents.json").read_text())
+    filenames = [image["filename"] for image in contents["images"] if image.get("filename")]
+    assert sorted(os.listdir(imageset)) == ["Contents.json", *filenames]
+    assert (imageset / filenames[0]).read_bytes() == newest.read_bytes()
+
+
+def test_import_failure_keeps_previous_image(monkeypatch, tmp_path, photo_dump):
+    """A photo that fails to encode leaves the imageset's earlier image and Contents.json in place"""
+    import json
+    import os
+
+    dump = photo_dump(1)
+    name = synthetic_meal_names(1)[0]
+    source = str(dump / f"{name}.jpg")
+    assets_dir = tmp_path / "FeaturedMeals"
+    add_images_to_xcode.import_image(source, name, str(assets_dir))
+    imageset = assets_dir / f"{name}.imageset"
+    before = {filename: (imageset / filename).read_bytes() for filename in os.listdir(imageset)}
+
+    def fail_halfway(image_path, target_path, *args):
+        with open(target_path, "wb") as f:
+            f.write(b"\xff\xd8partial")
+        raise OSError("encoder crashed")
+
+    monkeypatch.setattr(add_images_to_xcode, "write_resized", fail_halfway)
+    with pytest.raises(OSError):
+        add_images_to_xcode.import_image(source, name, str(assets_dir))
+
+    assert {filename: (imageset / filename).read_bytes() for filename in os.listdir(imageset)} == before
+    contents = json.loads(before["Contents.json"])
+    assert all((imageset / image["filename"]).exists() for image in contents["images"] if image.get("filename"))
@@ -0,0 +1,61 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import download_images
+from conftest import CATALOG_SIZES, synthetic_meal_names
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("size", CATALOG_SIZES)
+def test_download_meal_images(benchmark, tmp_path, photo_server, size):
+    meal_images = {name: f"{photo_server}/{name}.jpg" for name in synthetic_meal_names(size)}
+    image_dir = tmp_path / "MealImages"
+    assets_dir = tmp_path / "FeaturedMeals"
+
+    benchmark.pedantic(
+        download_images.download_meal_images,
+        args=(meal_images, str(image_dir), str(assets_dir)),
+        kwargs={"delay": 0, "crop_aspect": None},
+        rounds=3 if size <= 10 else 1,
+        iterations=1,
+    )
+    assert len(list(assets_dir.iterdir())) == size
+
+
+def test_download_crop_failures(monkeypatch, tmp_path, photo_server):
+    """A photo whose crop fails goes into the catalog uncropped; the others are still cropped"""
+    from PIL import Image
+
+    names = synthetic_meal_names(3)
+    failing = names[1]
+
+    class FlakyCropper:
+        saved = False
+
+        def crop_boxes(self, paths, aspect):
+            if len(paths) > 1:
+                raise RuntimeError("detector crashed")
+            if paths[0].endswith(f"{failing}.jpg"):
+                raise RuntimeError("cannot decode")
+            return {paths[0]: (100, 100, 600, 400)}
+
+        def save(self):
+            self.saved = True
+
+    cropper = FlakyCropper()
+    monkeypatch.setattr(download_images, "default_cropper", lambda: cropper)
+    image_dir = tmp_path / "MealImages"
+    assets_dir = tmp_path / "FeaturedMeals"
+
+    download_images.download_meal_images({name: f"{photo_server}/{name}.jpg" for name in names},
+                                         str(image_dir), str(assets_dir), delay=0)
+
+    for name in names:
+        target = assets_dir / f"{name}.imageset" / "image.jpg"
+        if name == failing:
+            assert target.read_bytes() == (image_dir / f"{name}.jpg").read_bytes()
+        else:
+            with Image.open(target) as img:
+                assert img.size == (500, 300)
+    assert cropper.saved
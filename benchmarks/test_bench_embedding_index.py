@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from build_embedding_index import EmbeddingIndex
+
+VECTOR_COUNTS = [1000, 10000]
+DIM = 512
+
+
+def clustered_embeddings(count, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(64, DIM))
+    vectors = centers[rng.integers(0, len(centers), count)] + rng.normal(scale=0.6, size=(count, DIM))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+@pytest.mark.parametrize("kind", ["flat", "ivf"])
+@pytest.mark.parametrize("count", VECTOR_COUNTS)
+def test_embedding_search(benchmark, tmp_path, kind, count):
+    embeddings = clustered_embeddings(count)
+    items = [{"id": f"image/{i}", "name": str(i)} for i in range(count)]
+    path = str(tmp_path / "meal_embeddings.index")
+    EmbeddingIndex.build(items, embeddings, kind).save(path)
+    index = EmbeddingIndex.load(path)
+
+    rng = np.random.default_rng(1)
+    queries = embeddings[:50] + rng.normal(scale=0.02, size=(50, DIM)).astype(np.float32)
+
+    def search_all():
+        return [index.search(query, k=5) for query in queries]
+
+    results = benchmark(search_all)
+    recall = np.mean([
+        len({int(item["id"].split("/")[1]) for item, _ in found} & set(np.argsort(-(embeddings @ query))[:5])) / 5
+        for query, found in zip(queries, results)
+    ])
+    assert recall > 0.9
+
+
+def test_preprocess_exif_orientation(tmp_path):
+    from PIL import Image
+    from build_embedding_index import preprocess
+
+    # A portrait photo: red food on top, blue plate below
+    upright = Image.new("RGB", (300, 400), (200, 40, 30))
+    upright.paste((30, 60, 200), (0, 200, 300, 400))
+    upright.save(tmp_path / "upright.jpg", quality=95)
+    # The same photo as a camera stores it: sensor landscape plus "rotate 90 CW" (orientation 6)
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    upright.transpose(Image.Transpose.ROTATE_90).save(tmp_path / "rotated.jpg", quality=95, exif=exif)
+
+    expected = preprocess(str(tmp_path / "upright.jpg"))
+    assert np.abs(preprocess(str(tmp_path / "rotated.jpg")) - expected).max() < 0.2
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("PIL")
+
+from frame_similarity import METHODS, FrameSimilarityGate
+
+FRAME_COUNT = 120
+
+
+def plate_frames(count, seed=0):
+    """A static plate with sensor noise; a second item appears halfway through"""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[:480, :640]
+    plate = np.full((480, 640, 3), 40, dtype=np.uint8)
+    plate[(x - 320) ** 2 + (y - 240) ** 2 < 150 ** 2] = (200, 180, 150)
+    plate[(x - 300) ** 2 + (y - 220) ** 2 < 40 ** 2] = (180, 50, 40)
+    changed = plate.copy()
+    changed[(x - 400) ** 2 + (y - 300) ** 2 < 60 ** 2] = (30, 160, 40)
+    frames = []
+    for i in range(count):
+        base = plate if i < count // 2 else changed
+        noise = rng.normal(0, 6, base.shape)
+        frames.append((base + noise).clip(0, 255).astype(np.uint8))
+    return frames
+
+
+def run_gate(frames, method):
+    gate = FrameSimilarityGate(method)
+    recognized = []
+    for index, frame in enumerate(frames):
+        frame_hash, results = gate.lookup(frame)
+        if results is None:
+            recognized.append(index)
+            gate.store(frame_hash, index)
+    return gate, recognized
+
+
+@pytest.mark.parametrize("method", METHODS)
+def test_frame_gate(benchmark, method):
+    frames = plate_frames(FRAME_COUNT)
+
+    gate, recognized = benchmark.pedantic(run_gate, args=(frames, method), rounds=3, iterations=1)
+    assert gate.hit_rate > 0.9
+    if method == "phash":
+        # The new item must trigger recognition right away
+        assert FRAME_COUNT // 2 in recognized
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("PIL")
+
+from image_quality import check_images
+
+PHOTO_COUNT = 40
+
+
+@pytest.fixture
+def photo_batch(tmp_path):
+    """Good photos plus one of each kind of reject, keyed by what is wrong with them"""
+    from PIL import Image, ImageFilter
+
+    rng = np.random.default_rng(0)
+
+    def photo(size=(640, 480)):
+        return Image.fromarray(rng.integers(40, 220, (size[1], size[0], 3), dtype=np.uint8))
+
+    paths = {}
+    for i in range(PHOTO_COUNT):
+        path = tmp_path / f"good_{i:02d}.jpg"
+        photo().save(path, quality=90)
+        paths[str(path)] = "good"
+
+    photo().filter(ImageFilter.GaussianBlur(12)).save(tmp_path / "blurry.jpg")
+    Image.new("RGB", (640, 480), (8, 8, 8)).save(tmp_path / "dark.png")
+    photo((200, 150)).save(tmp_path / "small.jpg")
+    Image.new("RGB", (640, 480), (240, 240, 240)).save(tmp_path / "placeholder.jpg")
+    (tmp_path / "empty.jpg").write_bytes(b"")
+    data = (tmp_path / "good_00.jpg").read_bytes()
+    (tmp_path / "truncated.jpg").write_bytes(data[: len(data) // 2])
+    for name in ("blurry.jpg", "dark.png", "small.jpg", "placeholder.jpg", "empty.jpg", "truncated.jpg"):
+        paths[str(tmp_path / name)] = name.split(".")[0]
+    return paths
+
+
+def test_check_images(benchmark, photo_batch):
+    results = benchmark.pedantic(check_images, args=(list(photo_batch),), rounds=3, iterations=1)
+    for path, kind in photo_batch.items():
+        assert results[path]["ok"] == (kind == "good"), (kind, results[path]["problems"])
+
+    problems = {kind: " ".join(results[path]["problems"]) for path, kind in photo_batch.items() if kind != "good"}
+    assert "blurry" in problems["blurry"]
+    assert "underexposed" in problems["dark"]
+    assert "too small" in problems["small"]
+    assert "placeholder" in problems["placeholder"]
+    assert problems["empty"] == "empty file"
+    assert problems["truncated"] == "truncated JPEG"
+
+
+def test_check_images_chunks(photo_batch):
+    """Chunked measuring gives the same results as one batch, in input order"""
+    paths = list(photo_batch)
+    assert check_images(paths, chunk=7) == check_images(paths, chunk=len(paths))
+    assert list(check_images(paths, chunk=7)) == list(check_images(paths, chunk=len(paths)))
+
+
+def test_check_images_options(photo_batch, tmp_path):
+    """--min-side and --skip-quality, and files that disappear before the check"""
+    small = str(tmp_path / "small.jpg")
+    assert not check_images([small])[small]["ok"]
+    assert check_images([small], min_side=150)[small]["ok"]
+
+    paths = list(photo_batch)
+    assert all(result["ok"] for result in check_images(paths, skip=True).values())
+
+    gone = str(tmp_path / "deleted.jpg")
+    assert check_images([gone])[gone] == {"ok": False, "problems": ["missing file"]}
@@ -0,0 +1,50 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import build_label_index
+import build_nutrition_database
+from prewarm_nutrition_cache import cache_key, SWIFT_REFERENCE_DATE
+
+
+@pytest.fixture
+def nutrition_database(tmp_path, fdc_csv_dir):
+    path = str(tmp_path / "nutrition.sqlite")
+    build_nutrition_database.build_database(str(fdc_csv_dir), path)
+    return path
+
+
+def test_normalize_tokens():
+    assert build_label_index.normalize_tokens("Donuts_with_sprinkles") == ["doughnut", "sprinkle"]
+    assert build_label_index.normalize_tokens("Apples, raw, with skin") == ["apple", "raw", "skin"]
+
+
+def test_build_label_index(benchmark, nutrition_database):
+    labels = ["apple_pie", "donuts", "hummus", "greek_yogurt", "ramen"]
+
+    index, matches = benchmark.pedantic(build_label_index.build_label_index, args=(labels, nutrition_database),
+                                        rounds=3, iterations=1)
+
+    best = {label: match[1] if match else None for label, match, _ in matches}
+    assert best == {"apple_pie": 1002, "donuts": 1004, "hummus": 1006, "greek_yogurt": 1003, "ramen": None}
+
+    entries = index["labels"]
+    assert sorted(entries) == sorted(cache_key(label) for label in labels if best[label])
+    pie = entries[cache_key("apple_pie")]
+    assert pie["matchedName"] == "Apple pie, commercially prepared"
+    assert build_label_index.DEFAULT_MIN_SCORE <= pie["score"] <= 1.0
+    # FoodNutritionInfo JSON, as parseUSDAFood would have built it from the API
+    nutrition = pie["nutrition"]
+    assert nutrition["foodName"] == "Apple pie, commercially prepared"
+    assert nutrition["calories"] == 265 and nutrition["fat"] == 12.5 and nutrition["fiber"] == 0.0
+    assert nutrition["servingSize"] == 100.0 and nutrition["servingUnit"] == "g" and nutrition["source"] == "USDA"
+    assert 0 < nutrition["timestamp"] < 2 ** 31 - SWIFT_REFERENCE_DATE
+    assert entries[cache_key("greek_yogurt")]["nutrition"]["calories"] == 59
+
+
+def test_resolve_ranks_food_before_dish(nutrition_database):
+    """"apple" is the fruit, not the pie, even though both names contain it"""
+    food_index = build_label_index.FoodIndex.from_database(nutrition_database)
+    ranked = food_index.resolve("apple")
+    assert [fdc_id for _, fdc_id, _ in ranked[:2]] == [1001, 1002]
+    assert ranked[0][0] > ranked[1][0]
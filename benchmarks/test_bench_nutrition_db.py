@@ -0,0 +1,44 @@
+import sqlite3
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import build_nutrition_database
+
+
+def test_build_database(benchmark, tmp_path, fdc_csv_dir):
+    output = str(tmp_path / "nutrition.sqlite")
+
+    count = benchmark.pedantic(build_nutrition_database.build_database, args=(str(fdc_csv_dir), output),
+                               rounds=3, iterations=1)
+
+    # Foundation + SR Legacy foods that have nutrients: the survey food and the empty one are left out
+    assert count == 5
+    connection = sqlite3.connect(output)
+    connection.row_factory = sqlite3.Row
+    rows = {row["fdc_id"]: dict(row) for row in connection.execute("SELECT * FROM foods")}
+    connection.close()
+    assert sorted(rows) == [1001, 1002, 1003, 1004, 1006]
+    assert rows[1001]["calories"] == 52 and rows[1001]["fiber"] == 2.4 and rows[1001]["sodium"] is None
+    # Atwater energy stands in for a missing 1008
+    assert rows[1003]["calories"] == 59 and rows[1003]["sodium"] == 36
+    # A stored zero is kept rather than dropped as missing
+    assert rows[1006]["vitaminC"] == 0.0
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("apple", [1001, 1002]),
+    ("apple pie", [1002]),
+    ("greek yogurt", [1003]),
+    ("doughnut", [1004]),
+    ("hummus", [1006]),
+    ("egg", []),
+])
+def test_search_foods(tmp_path, fdc_csv_dir, query, expected):
+    output = str(tmp_path / "nutrition.sqlite")
+    build_nutrition_database.build_database(str(fdc_csv_dir), output)
+
+    found = [food["fdc_id"] for food in build_nutrition_database.search_foods(output, query)]
+    # bm25 puts the shorter, closer name first
+    assert found == expected
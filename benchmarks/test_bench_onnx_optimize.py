@@ -0,0 +1,52 @@
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+torch = pytest.importorskip("torch")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "foodscannerpro", "Resources", "CoreML"))
+
+from convert_food_detector_model import check_parity, optimize_onnx
+
+INPUT_SIZE = 64
+
+
+def conv_block(in_channels, out_channels, stride=1):
+    """YOLOv5's Conv: Conv2d without bias, BatchNorm2d, SiLU"""
+    return torch.nn.Sequential(
+        torch.nn.Conv2d(in_channels, out_channels, 3, stride, 1, bias=False),
+        torch.nn.BatchNorm2d(out_channels),
+        torch.nn.SiLU(),
+    )
+
+
+def small_detector():
+    torch.manual_seed(0)
+    model = torch.nn.Sequential(
+        conv_block(3, 16, 2), conv_block(16, 32, 2), conv_block(32, 32), torch.nn.Conv2d(32, 85, 1), torch.nn.Flatten(2)
+    )
+    for module in model.modules():
+        if isinstance(module, torch.nn.BatchNorm2d):
+            module.running_mean.uniform_(-0.5, 0.5)
+            module.running_var.uniform_(0.5, 2.0)
+    return model.eval()
+
+
+def test_onnx_optimize(benchmark, tmp_path):
+    model = small_detector()
+    raw_path, optimized_path = str(tmp_path / "raw.onnx"), str(tmp_path / "optimized.onnx")
+    torch.onnx.export(
+        model, torch.zeros(1, 3, INPUT_SIZE, INPUT_SIZE), raw_path, opset_version=12,
+        input_names=["input"], output_names=["output"],
+        dynamic_axes={"input": {0: "batch_size"}, "output": {0: "batch_size"}},
+        do_constant_folding=False, dynamo=False,
+    )
+
+    stats = benchmark.pedantic(optimize_onnx, args=(raw_path, optimized_path), rounds=3, iterations=1)
+    assert stats["batch_norms_folded"] == 3
+    assert stats["nodes_after"] < stats["nodes_before"]
+    assert all(ok for *_, ok, _ in check_parity(model, [optimized_path], input_size=INPUT_SIZE))
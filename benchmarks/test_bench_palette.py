@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("PIL")
+
+import asset_catalog
+from card_palette import MIN_CONTRAST, WHITE, BLACK, PaletteExtractor, contrast_ratio, minibatch_kmeans
+from conftest import CATALOG_SIZES
+
+PHOTO_COUNT = 20
+
+
+@pytest.fixture
+def meal_photos(tmp_path):
+    """Photos of differently colored food on a light table"""
+    from PIL import Image
+
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[:400, :640]
+    food = rng.integers(30, 220, (PHOTO_COUNT, 3))
+    paths = []
+    for i, color in enumerate(food):
+        pixels = np.full((400, 640, 3), (235, 230, 220), dtype=np.float64) + rng.normal(0, 4, (400, 640, 3))
+        pixels[(x - 320) ** 2 + (y - 200) ** 2 < 160 ** 2] = color
+        path = tmp_path / f"meal_{i:02d}.jpg"
+        Image.fromarray(pixels.clip(0, 255).astype(np.uint8)).save(path, quality=90)
+        paths.append(str(path))
+    return paths, food
+
+
+@pytest.mark.parametrize("size", CATALOG_SIZES[:2])
+def test_minibatch_kmeans(benchmark, size):
+    rng = np.random.default_rng(size)
+    centers = rng.uniform(0, 255, (5, 3))
+    pixels = (centers[rng.integers(0, 5, 4096)] + rng.normal(0, 5, (4096, 3))).astype(np.float32)
+
+    def cluster_all():
+        return [minibatch_kmeans(pixels, seed=seed) for seed in range(size // 10)]
+
+    found, shares = benchmark.pedantic(cluster_all, rounds=3, iterations=1)[0]
+    assert shares.sum() == pytest.approx(1.0)
+    # Every true color has a center within a few levels
+    assert np.abs(centers[:, np.newaxis] - found[np.newaxis]).max(axis=2).min(axis=1).max() < 12
+
+
+def test_palette(benchmark, monkeypatch, tmp_path, meal_photos):
+    monkeypatch.setattr(asset_catalog, "cache_dir", str(tmp_path / "cache"))
+    paths, food = meal_photos
+
+    def extract_all():
+        extractor = PaletteExtractor()
+        return [extractor.palette(path) for path in paths]
+
+    palettes = benchmark.pedantic(extract_all, rounds=3, iterations=1)
+    for palette, color in zip(palettes, food):
+        assert contrast_ratio(palette["card"], WHITE) >= MIN_CONTRAST
+        assert contrast_ratio(palette["tint"], BLACK) >= MIN_CONTRAST
+        # The food, not the table, is one of the two main colors
+        assert min(np.abs(np.subtract(palette[role], color)).max() for role in ("dominant", "accent")) < 16
+
+
+def test_category_colors_fallback(monkeypatch, tmp_path, meal_photos):
+    """Instruction cards and gray photos keep the fixed color; real photos get theirs"""
+    import shutil
+    from PIL import Image, ImageDraw
+    import card_palette
+
+    monkeypatch.setattr(asset_catalog, "cache_dir", str(tmp_path / "cache"))
+    monkeypatch.setattr(card_palette, "temp_dir", str(tmp_path / "temp_images"))
+    (tmp_path / "temp_images").mkdir()
+    card = Image.new("RGB", (400, 200), (240, 240, 240))
+    ImageDraw.Draw(card).text((20, 90), "Please replace this with a real photo", fill=(0, 0, 0))
+    card.save(tmp_path / "temp_images" / "placeholder_photo.jpg")
+    gray = np.random.default_rng(1).normal(128, 30, (400, 640)).clip(0, 255).astype(np.uint8)
+    Image.fromarray(gray).convert("RGB").save(tmp_path / "temp_images" / "gray_photo.jpg")
+    paths, food = meal_photos
+    colorful = max(range(len(food)), key=lambda i: card_palette.saturation(tuple(food[i])))
+    shutil.copy(paths[colorful], tmp_path / "temp_images" / "meal_photo.jpg")
+
+    categories = [{"name": name} for name in ("placeholder", "gray", "missing", "meal")]
+    fallback = {"placeholder": (76, 175, 80), "gray": (33, 150, 243), "missing": (233, 30, 99), "meal": (0, 0, 0)}
+    colors = card_palette.category_colors(categories, fallback)
+
+    assert colors["placeholder"] == fallback["placeholder"]
+    assert colors["gray"] == fallback["gray"]
+    assert colors["missing"] == fallback["missing"]
+    assert colors["meal"] != fallback["meal"]
+    assert contrast_ratio(colors["meal"], WHITE) >= MIN_CONTRAST
@@ -0,0 +1,150 @@
+import io
+import math
+import base64
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("PIL")
+
+from create_image_placeholders import (
+    BASE83_CHARS,
+    LQIP_SIZE,
+    WORK_SIZE,
+    blurhash_batch,
+    compute_placeholders,
+    linear_to_srgb,
+    load_image,
+    srgb_to_linear,
+)
+
+
+def decode_base83(text):
+    value = 0
+    for char in text:
+        value = value * 83 + BASE83_CHARS.index(char)
+    return value
+
+
+def decode_blurhash(blurhash, width, height):
+    """The reference BlurHash decoder, returning a (height, width, 3) uint8 array"""
+    size_flag = decode_base83(blurhash[0])
+    components_x, components_y = size_flag % 9 + 1, size_flag // 9 + 1
+    assert len(blurhash) == 4 + 2 * components_x * components_y
+    maximum_value = (decode_base83(blurhash[1]) + 1) / 166
+
+    dc = decode_base83(blurhash[2:6])
+    colors = [srgb_to_linear(np.array([dc >> 16, (dc >> 8) & 255, dc & 255], dtype=np.float64))]
+    for i in range(1, components_x * components_y):
+        value = decode_base83(blurhash[4 + i * 2:6 + i * 2])
+        quantised = (np.array([value // 361, value // 19 % 19, value % 19]) - 9) / 9
+        colors.append(np.sign(quantised) * quantised ** 2 * maximum_value)
+
+    basis_x = np.cos(np.pi * np.outer(np.arange(components_x), np.arange(width)) / width)
+    basis_y = np.cos(np.pi * np.outer(np.arange(components_y), np.arange(height)) / height)
+    factors = np.array(colors).reshape(components_y, components_x, 3)
+    linear = np.einsum("jy,ix,jic->yxc", basis_y, basis_x, factors)
+    return linear_to_srgb(linear).astype(np.uint8)
+
+
+def gradient_photos(count):
+    """Smooth images, which a 4x3 BlurHash can reproduce closely"""
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[:WORK_SIZE, :WORK_SIZE] / WORK_SIZE
+    photos = []
+    for start, end in rng.uniform(30, 225, (count, 2, 3)):
+        weight = ((x + y) / 2)[..., None]
+        photos.append((start * (1 - weight) + end * weight).astype(np.uint8))
+    return np.stack(photos)
+
+
+def reference_blurhash(pixels, components_x=4, components_y=3):
+    """BlurHash of one image, computed pixel by pixel like the reference encoder"""
+    height, width = len(pixels), len(pixels[0])
+
+    def to_linear(value):
+        v = value / 255
+        return v / 12.92 if v <= 0.04045 else ((v + 0.055) / 1.055) ** 2.4
+
+    def to_srgb(value):
+        v = min(max(value, 0.0), 1.0)
+        return int((v * 12.92 if v <= 0.0031308 else 1.055 * v ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+    def encode(value, length):
+        return "".join(BASE83_CHARS[value // 83 ** (length - i) % 83] for i in range(1, length + 1))
+
+    linear = [[[to_linear(channel) for channel in pixel] for pixel in row] for row in pixels]
+    factors = []
+    for j in range(components_y):
+        for i in range(components_x):
+            normalisation = 1 if i == j == 0 else 2
+            factor = [0.0, 0.0, 0.0]
+            for y in range(height):
+                for x in range(width):
+                    basis = normalisation * math.cos(math.pi * i * x / width) * math.cos(math.pi * j * y / height)
+                    for c in range(3):
+                        factor[c] += basis * linear[y][x][c]
+            factors.append([value / (width * height) for value in factor])
+
+    dc, ac = factors[0], factors[1:]
+    quantised_max = max(0, min(82, math.floor(max(abs(v) for f in ac for v in f) * 166 - 0.5)))
+    maximum_value = (quantised_max + 1) / 166
+    blurhash = encode((components_x - 1) + (components_y - 1) * 9, 1) + encode(quantised_max, 1)
+    blurhash += encode((to_srgb(dc[0]) << 16) + (to_srgb(dc[1]) << 8) + to_srgb(dc[2]), 4)
+    for factor in ac:
+        q = [
+            max(0, min(18, math.floor(math.copysign(math.sqrt(abs(v / maximum_value)), v) * 9 + 9.5)))
+            for v in factor
+        ]
+        blurhash += encode(q[0] * 19 * 19 + q[1] * 19 + q[2], 2)
+    return blurhash
+
+
+def test_blurhash_matches_reference(source_photo):
+    from PIL import Image
+
+    img, _ = load_image(source_photo)
+    photo = np.asarray(img.resize((WORK_SIZE, WORK_SIZE), Image.BILINEAR), dtype=np.uint8)
+    pixels = np.concatenate([photo[None], gradient_photos(3)])
+
+    hashes = blurhash_batch(pixels)
+
+    assert hashes == [reference_blurhash(image.tolist()) for image in pixels]
+
+
+def test_blurhash_round_trip(benchmark):
+    pixels = gradient_photos(64)
+
+    hashes = benchmark(blurhash_batch, pixels)
+
+    assert len(hashes) == len(pixels)
+    for original, blurhash in zip(pixels, hashes):
+        assert len(blurhash) == 28
+        decoded = decode_blurhash(blurhash, WORK_SIZE, WORK_SIZE)
+        assert np.abs(decoded.astype(np.int64) - original).mean() < 6
+
+
+def test_lqip(tmp_path, source_photo):
+    from PIL import Image
+
+    portrait = tmp_path / "portrait.png"
+    Image.new("RGB", (300, 600), (200, 120, 40)).save(portrait)
+    broken = tmp_path / "broken.jpg"
+    broken.write_bytes(b"not a photo")
+    jobs = [("photo", source_photo), ("portrait", str(portrait)), ("broken", str(broken))]
+
+    results = compute_placeholders(jobs)
+
+    assert set(results) == {source_photo, str(portrait)}
+    expected = {source_photo: ((1280, 853), (16, 11)), str(portrait): ((300, 600), (8, 16))}
+    for path, (size, lqip_size) in expected.items():
+        entry = results[path]
+        assert (entry["width"], entry["height"]) == size
+        assert (entry["lqip_width"], entry["lqip_height"]) == lqip_size
+        with Image.open(io.BytesIO(base64.b64decode(entry["lqip"]))) as lqip:
+            assert lqip.format == "JPEG"
+            assert lqip.size == lqip_size
+            assert max(lqip.size) == LQIP_SIZE
+    with Image.open(io.BytesIO(base64.b64decode(results[str(portrait)]["lqip"]))) as lqip:
+        assert np.abs(np.asarray(lqip, dtype=np.int64) - (200, 120, 40)).max() < 12
@@ -0,0 +1,74 @@
+import json
+import time
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import build_nutrition_database
+import prewarm_nutrition_cache
+from usda_mock_server import start_mock_server
+
+
+@pytest.fixture
+def mock_api():
+    """usda_mock_server on an ephemeral port, serving synthetic foods"""
+    server, base_url = start_mock_server()
+    yield server, base_url
+    server.shutdown()
+    server.server_close()
+
+
+def test_prewarm_cache(benchmark, tmp_path, mock_api):
+    server, base_url = mock_api
+    labels = prewarm_nutrition_cache.load_labels()
+    output = str(tmp_path / "nutrition_cache.json")
+
+    def run():
+        client = prewarm_nutrition_cache.USDAClient("test-key", base_url, rate=0)
+        return prewarm_nutrition_cache.prewarm_cache(client, labels, output, workers=8, refresh=True)
+
+    before = time.time()
+    fetched, missing, failed = benchmark.pedantic(run, rounds=1, iterations=1)
+    after = time.time()
+
+    assert len(labels) == len(fetched) == 101 and not missing and not failed
+    with open(output) as f:
+        cache = json.load(f)
+    assert sorted(cache) == sorted(prewarm_nutrition_cache.cache_key(label) for label in labels)
+    for info in cache.values():
+        # Swift's default JSONEncoder date: seconds since 2001-01-01 UTC
+        assert before - prewarm_nutrition_cache.SWIFT_REFERENCE_DATE <= info["timestamp"]
+        assert info["timestamp"] <= after - prewarm_nutrition_cache.SWIFT_REFERENCE_DATE
+        assert isinstance(info["calories"], int) and info["source"] == "USDA" and info["servingUnit"] == "g"
+    assert cache[prewarm_nutrition_cache.cache_key("eggs_benedict")]["foodName"] == "Eggs benedict"
+
+    # A second run only fetches what is missing
+    requests = server.stats["requests"]
+    client = prewarm_nutrition_cache.USDAClient("test-key", base_url, rate=0)
+    assert prewarm_nutrition_cache.prewarm_cache(client, labels, output) == ([], [], [])
+    assert server.stats["requests"] == requests
+
+
+def test_prewarm_from_database(tmp_path, fdc_csv_dir):
+    """The mock serves foods from an offline nutrition database; labels it has no food for are reported missing"""
+    database = str(tmp_path / "nutrition.sqlite")
+    build_nutrition_database.build_database(str(fdc_csv_dir), database)
+    server, base_url = start_mock_server(database)
+    try:
+        client = prewarm_nutrition_cache.USDAClient("test-key", base_url, rate=0)
+        output = str(tmp_path / "nutrition_cache.json")
+        fetched, missing, failed = prewarm_nutrition_cache.prewarm_cache(
+            client, ["apple_pie", "hummus", "ramen"], output, workers=2)
+        _, yogurt = prewarm_nutrition_cache.fetch_label(client, "greek_yogurt")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert sorted(fetched) == ["apple_pie", "hummus"] and missing == ["ramen"] and not failed
+    with open(output) as f:
+        cache = json.load(f)
+    apple_pie = cache[prewarm_nutrition_cache.cache_key("apple_pie")]
+    assert apple_pie["foodName"] == "Apple pie, commercially prepared"
+    assert apple_pie["calories"] == 265 and apple_pie["fat"] == 12.5
+    assert yogurt["calories"] == 59 and yogurt["sodium"] == 36
@@ -0,0 +1,52 @@
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+torch = pytest.importorskip("torch")
+torchvision = pytest.importorskip("torchvision")
+
+import prune_food101_model
+
+CLASSES = 101
+# Small inputs keep the Taylor backward passes fast; ResNets pool adaptively
+INPUT_SIZE = 64
+IMAGES = 4
+
+
+def random_resnet(name):
+    torch.manual_seed(0)
+    model = getattr(torchvision.models, name)(weights=None, num_classes=CLASSES)
+    for module in model.modules():
+        if isinstance(module, torch.nn.BatchNorm2d):
+            module.running_mean.uniform_(-0.2, 0.2)
+            module.running_var.uniform_(0.5, 1.5)
+    return model.eval()
+
+
+def importances(model, importance, inputs):
+    if importance == "l1":
+        return prune_food101_model.l1_importance(model)
+    teacher_logits = prune_food101_model.predict(model, inputs)
+    labels = torch.full((len(inputs),), -1)
+    return prune_food101_model.taylor_importance(model, inputs, teacher_logits, labels)
+
+
+@pytest.mark.parametrize("importance", ["l1", "taylor"])
+@pytest.mark.parametrize("name", ["resnet18", "resnet50"])
+def test_prune(benchmark, name, importance):
+    model = random_resnet(name)
+    inputs = torch.rand(IMAGES, 3, INPUT_SIZE, INPUT_SIZE, generator=torch.Generator().manual_seed(1))
+    scores = importances(model, importance, inputs)
+    reference = prune_food101_model.predict(model, inputs)
+    _, macs = prune_food101_model.count_macs(model)
+
+    pruned = benchmark.pedantic(prune_food101_model.prune, args=(model, scores, 0.5), rounds=1, iterations=1)
+
+    output = prune_food101_model.predict(pruned, inputs)
+    assert output.shape == (IMAGES, CLASSES)
+    _, pruned_macs = prune_food101_model.count_macs(pruned)
+    assert 0.35 * macs < pruned_macs < 0.65 * macs
+
+    # Sparsity 0 keeps every channel, so the network is unchanged
+    unpruned = prune_food101_model.prune(model, scores, 0.0)
+    assert prune_food101_model.count_macs(unpruned) == prune_food101_model.count_macs(model)
+    torch.testing.assert_close(prune_food101_model.predict(unpruned, inputs), reference)
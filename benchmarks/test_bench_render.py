@@ -0,0 +1,137 @@
+import json
+from xml.etree import ElementTree
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("PIL")
+
+import create_category_direct
+import create_category_images
+import create_category_images_from_photos
+import create_placeholder_images
+from card_appearance import APPEARANCES
+from conftest import CATALOG_SIZES, synthetic_categories, synthetic_meal_names
+
+
+def rounds_for(size):
+    return 5 if size <= 10 else 1
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("size", CATALOG_SIZES)
+def test_create_category_image(benchmark, tmp_path, size):
+    categories = synthetic_categories(size)
+
+    def render():
+        for category in categories:
+            assert create_category_direct.create_category_image(category, (76, 175, 80), str(tmp_path))
+
+    benchmark.pedantic(render, rounds=rounds_for(size), iterations=1)
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("size", CATALOG_SIZES)
+def test_create_category_image_with_overlay(benchmark, tmp_path, source_photo, size):
+    categories = synthetic_categories(size)
+
+    def render():
+        for category in categories:
+            assert create_category_images_from_photos.create_category_image_with_overlay(
+                source_photo, category, str(tmp_path)
+            )
+
+    benchmark.pedantic(render, rounds=rounds_for(size), iterations=1)
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("size", CATALOG_SIZES)
+def test_create_placeholder(benchmark, size):
+    names = synthetic_meal_names(size)
+
+    def render():
+        for name in names:
+            create_placeholder_images.create_placeholder(name)
+
+    benchmark.pedantic(render, rounds=rounds_for(size), iterations=1)
+
+
+@pytest.mark.parametrize("variants", [1, len(APPEARANCES)])
+def test_overlay_appearances(benchmark, tmp_path, source_photo, variants):
+    """Cost of the extra dark and high-contrast variants on top of the default card"""
+    category = synthetic_categories(1)[0]
+    appearances = APPEARANCES[:variants]
+
+    def render():
+        assert create_category_images_from_photos.create_category_image_with_overlay(
+            source_photo, category, str(tmp_path), appearances=appearances
+        )
+
+    benchmark.pedantic(render, rounds=5, iterations=1)
+    create_category_images_from_photos.update_contents_json(category["name"], str(tmp_path), appearances)
+
+    imageset = tmp_path / f"{category['name']}.imageset"
+    contents = json.loads((imageset / "Contents.json").read_text())
+    assert len(contents["images"]) == 3 * variants
+    assert all((imageset / image["filename"]).exists() for image in contents["images"])
+    expected = {(), ("dark",), ("high",), ("dark", "high")} if variants == len(APPEARANCES) else {()}
+    assert {tuple(a["value"] for a in image.get("appearances", [])) for image in contents["images"]} == expected
+
+
+@pytest.mark.parametrize("size", CATALOG_SIZES)
+def test_svg_template(benchmark, tmp_path, size):
+    categories = [{**category, "title": f"Fish & Chips <{i}>"} for i, category in enumerate(synthetic_categories(size))]
+    colors = {category["name"]: (76, 175, 80) for category in categories}
+
+    benchmark.pedantic(
+        create_category_images.render_svg_categories,
+        args=(categories, colors, str(tmp_path)),
+        rounds=rounds_for(size),
+        iterations=1,
+    )
+    svg = (tmp_path / f"{categories[-1]['name']}.imageset" / f"{categories[-1]['name']}.svg").read_text()
+    ElementTree.fromstring(svg.split("?>", 1)[1])
+    assert f"Fish &amp; Chips &lt;{size - 1}&gt;" in svg
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("size", CATALOG_SIZES)
+def test_svg_rasterize(benchmark, tmp_path, size):
+    backend = create_category_images.find_raster_backend()
+    if backend is None:
+        pytest.skip("no SVG rasterizer (cairosvg, resvg or rsvg-convert) installed")
+    categories = synthetic_categories(size)
+    colors = {category["name"]: (76, 175, 80) for category in categories}
+
+    benchmark.pedantic(
+        create_category_images.render_svg_categories,
+        args=(categories, colors, str(tmp_path)),
+        kwargs={"output": "png", "backend": backend},
+        rounds=rounds_for(size),
+        iterations=1,
+    )
+    from PIL import Image
+
+    imageset = tmp_path / f"{categories[0]['name']}.imageset"
+    with Image.open(imageset / f"{categories[0]['name']}@3x.png") as img:
+        assert img.size == (540, 540)
+    assert not list(imageset.glob("*.svg"))
+
+
+def test_svg_rasterize_failure_leaves_catalog(tmp_path, monkeypatch):
+    """A rasterizer failure must not touch existing imagesets or leave new ones behind"""
+    categories = synthetic_categories(3)
+    colors = {category["name"]: (76, 175, 80) for category in categories}
+    create_category_images.render_svg_categories(categories[:2], colors, str(tmp_path))
+    before = {path: path.read_bytes() for path in tmp_path.rglob("*") if path.is_file()}
+
+    def fail(job):
+        raise FileNotFoundError("rsvg-convert")
+
+    monkeypatch.setattr(create_category_images, "rasterize", fail)
+    with pytest.raises(RuntimeError):
+        create_category_images.render_svg_categories(categories, colors, str(tmp_path), output="png",
+                                                     backend="rsvg-convert")
+    after = {path: path.read_bytes() for path in tmp_path.rglob("*") if path.is_file()}
+    assert after == before
+    assert not (tmp_path / f"{categories[2]['name']}.imageset").exists()
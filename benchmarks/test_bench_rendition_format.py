@@ -0,0 +1,165 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("PIL")
+pytest.importorskip("numpy")
+
+import rendition_format
+from conftest import synthetic_meal_names
+
+RENDITIONS = 3
+
+
+def gradient(width, height, seed):
+    """A smooth photo-like RGB image: gradients plus a little noise"""
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width]
+    pixels = np.stack([x * 255 / width, y * 255 / height, (x + y) * 127 / (width + height) + 64], axis=-1)
+    pixels += rng.normal(0, 4, pixels.shape)
+    return Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+
+@pytest.fixture
+def synthetic_catalog(tmp_path):
+    """FeaturedMeals sets with one 2x JPEG each, plus a category set with a PNG"""
+    catalog = tmp_path / "Assets.xcassets"
+    for i, name in enumerate(synthetic_meal_names(RENDITIONS)):
+        imageset = catalog / "FeaturedMeals" / f"{name}.imageset"
+        imageset.mkdir(parents=True)
+        gradient(640, 400, i).save(imageset / "image.jpg", "JPEG", quality=95)
+        (imageset / "Contents.json").write_text(json.dumps({
+            "images": [{"idiom": "universal", "scale": "1x"},
+                       {"filename": "image.jpg", "idiom": "universal", "scale": "2x"},
+                       {"idiom": "universal", "scale": "3x"}],
+            "info": {"author": "xcode", "version": 1},
+        }))
+    card = catalog / "Categories" / "synthetic_card.imageset"
+    card.mkdir(parents=True)
+    gradient(360, 360, 99).quantize(64).convert("RGB").save(card / "card.png")
+    (card / "Contents.json").write_text(json.dumps({
+        "images": [{"filename": "card.png", "idiom": "universal", "scale": "2x"}],
+        "info": {"author": "xcode", "version": 1},
+    }))
+    return catalog
+
+
+def referenced_files(catalog):
+    return sorted(
+        os.path.join(dirpath, image["filename"])
+        for dirpath, _, filenames in os.walk(catalog) if "Contents.json" in filenames
+        for image in json.load(open(os.path.join(dirpath, "Contents.json"))).get("images", []) if image.get("filename")
+    )
+
+
+def test_convert_lossless_webp(benchmark, synthetic_catalog):
+    converted, before, after = benchmark.pedantic(
+        rendition_format.convert_catalog, args=(str(synthetic_catalog), "jpeg", "webp"), rounds=1, iterations=1)
+
+    files = referenced_files(synthetic_catalog)
+    assert converted == 1 and after < before
+    assert all(os.path.isfile(path) for path in files)
+    assert sum(path.endswith(".webp") for path in files) == 1
+    assert sum(path.endswith(".jpg") for path in files) == RENDITIONS
+
+
+def test_convert_heic(benchmark, synthetic_catalog):
+    pytest.importorskip("pillow_heif")
+
+    converted, before, after = benchmark.pedantic(
+        rendition_format.convert_catalog, args=(str(synthetic_catalog), "heic", "webp"), rounds=1, iterations=1)
+
+    files = referenced_files(synthetic_catalog)
+    assert converted == RENDITIONS + 1 and after < before
+    assert all(os.path.isfile(path) for path in files)
+    assert sorted(os.path.splitext(path)[1] for path in files) == [".heic"] * RENDITIONS + [".webp"]
+
+
+def test_compare_formats(benchmark, synthetic_catalog):
+    pytest.importorskip("pillow_heif")
+    paths = referenced_files(synthetic_catalog)
+
+    report = benchmark.pedantic(rendition_format.compare_formats, args=(paths,), rounds=1, iterations=1)
+
+    assert report["current"]["images"] == RENDITIONS + 1
+    assert report["jpeg"]["images"] == report["heic"]["images"] == RENDITIONS
+    # HEIC at matched quality: no worse than JPEG q90 (within the crop-vs-full-image slack) and smaller
+    assert report["heic"]["ssim"] >= report["jpeg"]["ssim"] - 0.01
+    assert report["heic"]["bytes"] < report["jpeg"]["bytes"]
+    # Lossless WebP decodes to the same pixels
+    assert report["webp"]["ssim"] == pytest.approx(1.0)
+
+
+def test_convert_defaults_unchanged(synthetic_catalog):
+    """HEIC and WebP are opt-in: the defaults leave the catalog alone"""
+    before = referenced_files(synthetic_catalog)
+    assert rendition_format.convert_catalog(str(synthetic_catalog)) == (0, 0, 0)
+    assert referenced_files(synthetic_catalog) == before
+
+
+def test_import_heic(benchmark, tmp_path):
+    """--format heic encodes from the source once, replacing an earlier JPEG import"""
+    pytest.importorskip("pillow_heif")
+    import add_images_to_xcode
+
+    source = tmp_path / "greek_salad.png"
+    gradient(1600, 1000, 7).save(source)
+    assets = tmp_path / "FeaturedMeals"
+    add_images_to_xcode.import_image(str(source), "greek_salad", str(assets))
+
+    method = benchmark.pedantic(add_images_to_xcode.import_image, args=(str(source), "greek_salad", str(assets)),
+                                kwargs={"fmt": "heic"}, rounds=1, iterations=1)
+
+    imageset = assets / "greek_salad.imageset"
+    assert method == "heic"
+    assert sorted(os.listdir(imageset)) == ["Contents.json", "image.heic"]
+    assert referenced_files(assets) == [str(imageset / "image.heic")]
+    # Matched against JPEG 90 on the (downscaled) source pixels, not on a JPEG
+    from PIL import Image
+
+    with Image.open(source) as img:
+        pixels = img.convert("RGB")
+    pixels.thumbnail((add_images_to_xcode.MAX_IMAGE_SIZE,) * 2, Image.LANCZOS)
+    heic = rendition_format.decode((imageset / "image.heic").read_bytes())
+    jpeg = rendition_format.decode(rendition_format.encode(pixels, "jpeg"))
+    assert heic.size == pixels.size
+    assert rendition_format.ssim(pixels, heic) >= rendition_format.ssim(pixels, jpeg) - 0.01
+
+
+def test_render_heic(tmp_path):
+    """The card renderers write HEIC renditions directly and drop the JPEGs of an earlier run"""
+    pytest.importorskip("pillow_heif")
+    import create_category_direct
+    from conftest import synthetic_categories
+
+    categories = synthetic_categories(2)
+    colors = {category["name"]: (76, 175, 80) for category in categories}
+    create_category_direct.render_categories(categories, colors, str(tmp_path))
+    create_category_direct.render_categories(categories, colors, str(tmp_path), fmt="heic")
+
+    files = referenced_files(tmp_path)
+    assert files and all(path.endswith(".heic") and os.path.isfile(path) for path in files)
+    written = [os.path.join(dirpath, name) for dirpath, _, names in os.walk(tmp_path)
+               for name in names if name != "Contents.json"]
+    assert sorted(written) == files
+
+
+def test_compare_sources(tmp_path):
+    """--compare --sources measures SSIM against the original photo, downscaled like the importer"""
+    pytest.importorskip("pillow_heif")
+    paths = []
+    for i in range(2):
+        path = tmp_path / f"source_{i}.png"
+        gradient(1600, 1000, i).save(path)
+        paths.append(str(path))
+
+    report = rendition_format.compare_formats(paths, formats=("jpeg", "heic"), max_size=1024)
+
+    assert report["current"]["images"] == 0
+    assert report["jpeg"]["images"] == report["heic"]["images"] == 2
+    assert report["heic"]["ssim"] >= report["jpeg"]["ssim"] - 0.01
@@ -0,0 +1,139 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("PIL")
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "foodscannerpro", "Resources", "CoreML"))
+
+import replay_recognition
+from convert_food101_model import FOOD101_CLASSES
+from frame_similarity import FrameSimilarityGate
+
+FRAME_COUNT = 60
+
+
+def yolo_row(box, objectness, class_index, letterbox_pad=(0, 80)):
+    """One 85-column YOLOv5 output row for a frame-pixel box (x1, y1, x2, y2) in a 640x480 frame"""
+    x1, y1, x2, y2 = box
+    row = np.zeros(85, dtype=np.float32)
+    row[:4] = ((x1 + x2) / 2 + letterbox_pad[0], (y1 + y2) / 2 + letterbox_pad[1], x2 - x1, y2 - y1)
+    row[4] = objectness
+    row[5 + class_index] = 0.9
+    return row
+
+
+def test_nms():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [20, 20, 30, 30], [0, 0, 10, 10]], dtype=np.float32)
+    scores = np.array([0.8, 0.9, 0.7, 0.5])
+    assert replay_recognition.nms(boxes, scores).tolist() == [1, 2]
+    assert replay_recognition.nms(boxes, scores, iou_threshold=1.0).tolist() == [1, 0, 2, 3]
+
+
+def test_decode_detections(benchmark):
+    # A 640x480 frame letterboxes into 640x640 at scale 1 with 80 px of padding above and below
+    rows = [
+        yolo_row((100, 100, 200, 200), 0.9, 3),
+        yolo_row((105, 102, 205, 202), 0.8, 3),  # duplicate of the first box
+        yolo_row((300, 200, 500, 400), 0.7, 10),
+        yolo_row((0, 0, 50, 50), 0.3, 1),  # 0.3 x 0.9 is below the minimum confidence
+    ]
+    # Plus many background rows, like a real 25,200-row output
+    background = np.zeros((25200 - len(rows), 85), dtype=np.float32)
+    output = np.concatenate([np.stack(rows), background])[np.newaxis]
+
+    boxes, confidence = benchmark(replay_recognition.decode_detections, output, 1.0, (0, 80), (480, 640, 3))
+
+    assert len(boxes) == 2
+    np.testing.assert_allclose(boxes[0], [100, 100, 200, 200], atol=1e-4)
+    np.testing.assert_allclose(boxes[1], [300, 200, 500, 400], atol=1e-4)
+    np.testing.assert_allclose(confidence, [0.81, 0.63], atol=1e-6)
+
+
+def test_top_results():
+    probabilities = np.zeros(len(FOOD101_CLASSES))
+    probabilities[[5, 7, 9]] = [0.31, 0.5, 0.3]
+    assert replay_recognition.top_results(probabilities, FOOD101_CLASSES) == [
+        (FOOD101_CLASSES[7], 0.5), (FOOD101_CLASSES[5], 0.31),
+    ]
+    probabilities = np.full(len(FOOD101_CLASSES), 0.4)
+    assert len(replay_recognition.top_results(probabilities, FOOD101_CLASSES)) == replay_recognition.MAX_RESULTS
+
+
+class StubPipeline:
+    """Stands in for RecognitionPipeline: labels each frame by its mean brightness"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def process(self, frame):
+        self.calls += 1
+        return [{"box": [0, 0, frame.shape[1], frame.shape[0]], "boxConfidence": 1.0,
+                 "labels": [(f"level_{int(frame.mean()) // 32}", 0.9)]}], {"crop": 0.1, "classify": 0.2}
+
+
+def still_frames(count, seed=0):
+    """A static scene with sensor noise that cuts to a darker, different scene halfway through"""
+    rng = np.random.default_rng(seed)
+    scene = rng.integers(0, 256, (48, 64, 3)).astype(np.float64)
+    cut = rng.integers(0, 100, (48, 64, 3)).astype(np.float64)
+    frames = []
+    for i in range(count):
+        base = scene if i < count // 2 else cut
+        frames.append((base + rng.normal(0, 2, base.shape)).clip(0, 255).astype(np.uint8))
+    return frames
+
+
+def test_replay_stub(benchmark):
+    frames = still_frames(FRAME_COUNT)
+
+    def run():
+        pipeline = StubPipeline()
+        records = []
+        stats = replay_recognition.replay(frames, pipeline, frame_skip=1, cache=FrameSimilarityGate(),
+                                          on_result=records.append)
+        return pipeline, stats, records
+
+    pipeline, stats, records = benchmark.pedantic(run, rounds=3, iterations=1)
+
+    assert stats["frames"] == FRAME_COUNT
+    assert stats["processed"] == FRAME_COUNT // 2 == len(records)
+    assert [record["frame"] for record in records] == list(range(0, FRAME_COUNT, 2))
+    # The gate serves the still scene from cache, so only a few frames reach the pipeline
+    assert pipeline.calls == stats["processed"] - stats["cached"] == len(stats["stages"]["classify"])
+    assert 2 <= pipeline.calls < stats["processed"] // 2
+    assert records[0]["results"][0]["labels"] != records[-1]["results"][0]["labels"]
+
+
+def test_replay_onnx_classifier(benchmark, tmp_path):
+    """A small Food101-shaped network exported like convert_food101_model.py --onnx, run through onnxruntime"""
+    pytest.importorskip("onnx")
+    pytest.importorskip("onnxruntime")
+    torch = pytest.importorskip("torch")
+    from convert_food101_model import export_onnx
+
+    torch.manual_seed(0)
+    model = torch.nn.Sequential(
+        torch.nn.Conv2d(3, 8, 3, stride=4), torch.nn.ReLU(), torch.nn.AdaptiveAvgPool2d(1), torch.nn.Flatten(),
+        torch.nn.Linear(8, len(FOOD101_CLASSES)),
+    ).eval()
+    path = export_onnx(model, str(tmp_path / "food101.onnx"))
+    pipeline = replay_recognition.RecognitionPipeline(
+        replay_recognition.load_session(path), FOOD101_CLASSES, min_confidence=0.0, batch_size=2,
+    )
+    frames = still_frames(8)
+
+    stats = benchmark.pedantic(replay_recognition.replay, args=(frames, pipeline), rounds=1, iterations=1)
+
+    assert stats["processed"] == len(frames) == len(stats["stages"]["classify"])
+    results, _ = pipeline.process(frames[0])
+    labels = results[0]["labels"]
+    assert len(labels) == replay_recognition.MAX_RESULTS
+    assert all(label in FOOD101_CLASSES for label, _ in labels)
+    # Same logits as PyTorch on the same crop
+    batch = replay_recognition.crop_batch(frames[0], np.array([[0, 0, 64, 48]], dtype=np.float32))
+    expected = replay_recognition.softmax(model(torch.from_numpy(batch)).detach().numpy())[0]
+    assert labels[0] == (FOOD101_CLASSES[int(expected.argmax())], round(float(expected.max()), 4))
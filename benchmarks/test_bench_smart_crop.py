@@ -0,0 +1,104 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("PIL")
+
+import asset_catalog
+from smart_crop import CATEGORY_ASPECT, FEATURED_ASPECT, SmartCropper
+
+PHOTO_COUNT = 20
+
+
+@pytest.fixture
+def plate_photos(tmp_path):
+    """Landscape photos of a plate placed off-center, like the 1280px downloads"""
+    from PIL import Image
+
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[:800, :1280]
+    paths = []
+    for i in range(PHOTO_COUNT):
+        center_x = 250 + 780 * i / (PHOTO_COUNT - 1)
+        pixels = np.full((800, 1280, 3), 220, dtype=np.float64) + rng.normal(0, 3, (800, 1280, 3))
+        pixels[(x - center_x) ** 2 + (y - 400) ** 2 < 200 ** 2] = (190, 70, 40)
+        path = tmp_path / f"plate_{i:02d}.jpg"
+        Image.fromarray(pixels.clip(0, 255).astype(np.uint8)).save(path, quality=90)
+        paths.append((str(path), center_x))
+    return paths
+
+
+@pytest.mark.parametrize("aspect", [CATEGORY_ASPECT, FEATURED_ASPECT])
+def test_smart_crop(benchmark, monkeypatch, tmp_path, plate_photos, aspect):
+    monkeypatch.setattr(asset_catalog, "cache_dir", str(tmp_path / "cache"))
+
+    def crop_all():
+        return SmartCropper().crop_boxes([path for path, _ in plate_photos], aspect)
+
+    boxes = benchmark.pedantic(crop_all, rounds=3, iterations=1)
+    for path, center_x in plate_photos:
+        left, top, right, bottom = boxes[path]
+        assert right - left == pytest.approx((bottom - top) * aspect, abs=1)
+        # The whole plate stays in the crop
+        assert left <= center_x - 200 and center_x + 200 <= right
+
+
+def test_smart_crop_cached(monkeypatch, tmp_path, plate_photos):
+    monkeypatch.setattr(asset_catalog, "cache_dir", str(tmp_path / "cache"))
+    paths = [path for path, _ in plate_photos]
+    cropper = SmartCropper()
+    first = cropper.crop_boxes(paths, CATEGORY_ASPECT)
+    cropper.save()
+
+    cached = SmartCropper()
+    assert cached.crop_boxes(paths, CATEGORY_ASPECT) == first
+    assert cached.cache.hits == PHOTO_COUNT and cached.salient == 0
+
+
+def test_food_classes_only():
+    """With the stock COCO detector a dining table does not count, only the pizza on it"""
+    from replay_recognition import decode_detections
+    from smart_crop import COCO_FOOD_CLASSES, choose_crop
+
+    def row(box, class_index):
+        x1, y1, x2, y2 = box
+        scores = np.zeros(85, dtype=np.float32)
+        scores[:5] = ((x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1, 0.9)
+        scores[5 + class_index] = 0.9
+        return scores
+
+    table, pizza = 60, 53
+    output = np.stack([row((0, 0, 640, 640), table), row((450, 250, 600, 400), pizza)])[np.newaxis]
+
+    # Weighted by area, the table would drag a narrow crop off the pizza
+    boxes, confidences = decode_detections(output, 1.0, (0, 0), (640, 640, 3), 0.25)
+    assert len(boxes) == 2
+    left, _, right, _ = choose_crop(640, 640, 0.5, boxes, confidences)
+    assert not (left <= 450 and 600 <= right)
+
+    boxes, confidences = decode_detections(output, 1.0, (0, 0), (640, 640, 3), 0.25, COCO_FOOD_CLASSES)
+    assert len(boxes) == 1
+    np.testing.assert_allclose(boxes[0], [450, 250, 600, 400])
+    left, _, right, _ = choose_crop(640, 640, 0.5, boxes, confidences)
+    assert left <= 450 and 600 <= right
+
+
+def test_render_crops_in_one_batch(monkeypatch, tmp_path, plate_photos):
+    """Category cards get their crops from one crop_boxes() call over every photo"""
+    pytest.importorskip("PIL.ImageFont")
+    import create_category_images_from_photos as photos
+
+    monkeypatch.setattr(asset_catalog, "cache_dir", str(tmp_path / "cache"))
+    categories = [{"name": f"card_{i}", "title": f"Card {i}", "description": "Synthetic"} for i in range(4)]
+    image_paths = {cat["name"]: path for cat, (path, _) in zip(categories, plate_photos)}
+    calls = []
+
+    class CountingCropper(SmartCropper):
+        def crop_boxes(self, paths, aspect):
+            calls.append(list(paths))
+            return super().crop_boxes(paths, aspect)
+
+    photos.render_photo_categories(categories, image_paths, str(tmp_path / "Categories"), CountingCropper())
+
+    assert calls == [list(image_paths.values())]
+    assert all((tmp_path / "Categories" / f"{cat['name']}.imageset" / "Contents.json").exists() for cat in categories)
@@ -0,0 +1,45 @@
+import io
+import sqlite3
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+pytest.importorskip("PIL")
+
+import extract_images
+from coredata_store import create_fixture_store, set_image
+
+IMAGE_COUNTS = [10, 100]
+
+
+def camera_jpeg(seed, size=(1280, 960)):
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", size, (seed * 37 % 256, seed * 11 % 256, 90)).save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("count", IMAGE_COUNTS)
+def test_extract_thumbnails(benchmark, tmp_path, count):
+    store = create_fixture_store(str(tmp_path / "FoodScannerPro.sqlite"), meal_count=count * 2)
+    connection = sqlite3.connect(store)
+    # Half the history images are stored externally; every food item reuses one of them
+    for pk in range(1, count + 1):
+        set_image(connection, store, "FoodRecognitionHistory", pk, camera_jpeg(pk), external=pk % 2 == 0)
+    for pk in range(1, count // 2 + 1):
+        set_image(connection, store, "FoodItem", pk, camera_jpeg(pk))
+    connection.close()
+
+    def run():
+        output = tmp_path / "thumbnails"
+        for path in output.glob("*"):
+            path.unlink()
+        return extract_images.extract_images(store, str(output), size=256)
+
+    index, report = benchmark.pedantic(run, rounds=3, iterations=1)
+    assert report["rows"] == count + count // 2
+    assert report["unique"] == count
+    assert report["external"] == count // 2
+    assert report["thumbnail_bytes"] < report["unique_bytes"]
+    assert len(index["rows"]) == report["rows"]
@@ -0,0 +1,98 @@
+import json
+import threading
+import tracemalloc
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import asset_trace
+
+MB = 1024 * 1024
+
+
+@pytest.fixture(autouse=True)
+def no_tracer():
+    yield
+    asset_trace.finish(summary=False)
+
+
+def test_span_disabled(benchmark):
+    def stages():
+        for _ in range(1000):
+            with asset_trace.span("encode", name="greek_salad"):
+                pass
+
+    benchmark(stages)
+    assert not asset_trace.enabled()
+    assert asset_trace.span("encode") is asset_trace.span("decode")
+
+
+def test_nested_spans_per_thread(tmp_path):
+    asset_trace.enable()
+    both_inside = threading.Barrier(2)
+
+    def work(name):
+        with asset_trace.span("outer", name=name):
+            # Both threads hold an open outer span while their inner spans run
+            both_inside.wait()
+            with asset_trace.span("inner"):
+                both_inside.wait()
+
+    threads = [threading.Thread(target=work, args=(name,)) for name in ("first", "second")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    trace_path = tmp_path / "trace" / "trace.json"
+    tracer = asset_trace.finish(str(trace_path), summary=False)
+
+    with open(trace_path) as f:
+        trace = json.load(f)
+    assert trace["displayTimeUnit"] == "ms"
+    events = trace["traceEvents"]
+    assert events == tracer.events
+    assert sorted(event["name"] for event in events) == ["inner", "inner", "outer", "outer"]
+    for event in events:
+        assert event["ph"] == "X" and event["pid"] == tracer.pid
+        assert event["ts"] >= 0 and event["dur"] >= 0
+
+    by_thread = {}
+    for event in events:
+        by_thread.setdefault(event["tid"], {})[event["name"]] = event
+    assert len(by_thread) == 2
+    assert sorted(spans["outer"]["args"]["name"] for spans in by_thread.values()) == ["first", "second"]
+    for spans in by_thread.values():
+        outer, inner = spans["outer"], spans["inner"]
+        assert "args" not in inner
+        assert outer["ts"] <= inner["ts"]
+        assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+        # Inner spans are closed before their own thread's outer span, whatever the other thread does
+        assert events.index(inner) < events.index(outer)
+
+    rows = {row[0]: row for row in tracer.summary()}
+    assert rows["outer"][1] == rows["inner"][1] == 2
+    assert rows["outer"][2] >= rows["inner"][2]
+
+
+def test_memory_peaks_fold_into_parent():
+    was_tracing = tracemalloc.is_tracing()
+    asset_trace.enable(memory=True)
+
+    with asset_trace.span("stage"):
+        # The stage's own peak comes before the child resets the counter
+        buffer = bytearray(2 * MB)
+        del buffer
+        with asset_trace.span("child"):
+            buffer = bytearray(MB)
+            del buffer
+        with asset_trace.span("small_child"):
+            pass
+    tracer = asset_trace.finish(summary=False)
+
+    peaks = {event["name"]: event["args"]["peak_alloc_bytes"] for event in tracer.events}
+    assert MB <= peaks["child"] < 2 * MB
+    assert peaks["small_child"] < MB
+    assert peaks["stage"] >= 2 * MB
+    assert {row[0]: row[5] for row in tracer.summary()} == peaks
+    assert tracemalloc.is_tracing() == was_tracing
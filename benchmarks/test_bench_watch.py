@@ -0,0 +1,103 @@
+import os
+import time
+import threading
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+import add_images_to_xcode
+from add_images_to_xcode import InotifyWatcher, PollingWatcher
+from conftest import synthetic_meal_names
+
+WATCHED_FILES = 1000
+
+
+def test_polling_scan(benchmark, tmp_path):
+    for name in synthetic_meal_names(WATCHED_FILES):
+        (tmp_path / f"{name}.jpg").write_bytes(b"\xff\xd8" + name.encode())
+    (tmp_path / "notes.txt").write_text("not a photo")
+    watcher = PollingWatcher(str(tmp_path), interval=0.01)
+
+    seen = benchmark(watcher.scan)
+
+    assert len(seen) == WATCHED_FILES
+    assert watcher.wait(0.01) == []
+    (tmp_path / "new_meal.jpg").write_bytes(b"\xff\xd8new")
+    os.utime(tmp_path / f"{synthetic_meal_names(1)[0]}.jpg", ns=(0, 0))
+    assert sorted(watcher.wait(0.01)) == sorted(["new_meal.jpg", f"{synthetic_meal_names(1)[0]}.jpg"])
+    assert watcher.wait(0.01) == []
+
+
+def test_polling_scan_vanished_entry(monkeypatch, tmp_path):
+    """A file removed between the scandir and the stat is skipped, not fatal"""
+    (tmp_path / "kept.jpg").write_bytes(b"kept")
+    (tmp_path / "partial.jpg").write_bytes(b"partial")
+    watcher = PollingWatcher(str(tmp_path), interval=0.01)
+    real_scandir = os.scandir
+
+    def scandir_then_remove(path):
+        entries = list(real_scandir(path))
+        os.remove(tmp_path / "partial.jpg")
+        return iter(entries)
+
+    monkeypatch.setattr(os, "scandir", scandir_then_remove)
+    assert set(watcher.scan()) == {"kept.jpg"}
+
+
+def test_inotify_watcher(tmp_path):
+    try:
+        watcher = InotifyWatcher(str(tmp_path))
+    except (OSError, AttributeError):
+        pytest.skip("inotify is not available")
+    try:
+        (tmp_path / "greek_salad.jpg").write_bytes(b"photo")
+        os.replace(tmp_path / "greek_salad.jpg", tmp_path / "caesar_salad.jpg")
+        names = []
+        deadline = time.monotonic() + 2
+        while len(names) < 2 and time.monotonic() < deadline:
+            names += watcher.wait(0.2)
+        assert names == ["greek_salad.jpg", "caesar_salad.jpg"]
+    finally:
+        watcher.close()
+
+
+@pytest.mark.parametrize("force_polling", [True, False])
+def test_watch_debounce(monkeypatch, tmp_path, force_polling):
+    """A photo written in chunks is imported once, after its size and mtime stop changing for the debounce window"""
+    debounce = 0.4
+    monkeypatch.setattr(add_images_to_xcode, "download_dir", str(tmp_path / "MealImages"))
+    monkeypatch.setattr(add_images_to_xcode, "state_path", str(tmp_path / "state.json"))
+    monkeypatch.setattr(add_images_to_xcode, "cache_dir", str(tmp_path))
+    os.makedirs(tmp_path / "MealImages")
+    path = tmp_path / "MealImages" / "greek_salad.jpg"
+    imports = []
+    writes = []
+
+    def record_import(names, state, *args):
+        if not names:
+            return 0
+        imports.append((time.monotonic(), sorted(names), path.stat().st_size))
+        raise KeyboardInterrupt
+
+    def write_slowly():
+        # Close the file after each chunk so inotify sees every write
+        for _ in range(5):
+            with open(path, "ab") as f:
+                f.write(b"x" * 1000)
+            writes.append(time.monotonic())
+            time.sleep(0.15)
+
+    monkeypatch.setattr(add_images_to_xcode, "import_changed", record_import)
+    writer = threading.Timer(0.2, write_slowly)
+    writer.start()
+    try:
+        add_images_to_xcode.watch_meal_images(debounce=debounce, force_polling=force_polling)
+    finally:
+        writer.join()
+
+    assert len(imports) == 1
+    imported_at, names, size = imports[0]
+    assert names == ["greek_salad.jpg"]
+    assert size == 5000
+    assert imported_at >= writes[-1] + debounce
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Confidence-gated classifier cascade: a small fast model first, Food101 only when it is unsure.
+
+Most camera frames show an obvious dish, and a small network already gets
+those right. This tool builds the first stage of a two-stage cascade and
+picks the escalation threshold:
+
+1. Stage one is MobileNetV3-Small (ImageNet weights) with a new 101-class
+   head, distilled from the full Food101 model on the --calibration images
+   for --steps on CPU. Its Core ML export ends in a softmax, so the top
+   confidence the app sees is a probability.
+2. Both models run on the held-out calibration images. For every threshold
+   in the sweep, frames whose stage-one top probability is below the
+   threshold escalate to the full model. The report gives, per threshold,
+   the escalation rate, the average per-frame CPU latency
+   (stage one + escalation rate x stage two) and the accuracy: top-1 on
+   labeled images and agreement with the full model on all of them.
+3. The chosen threshold is the lowest one whose accuracy stays within
+   --max-accuracy-drop of the full model alone, which is also the cheapest.
+4. FoodClassifierFast.mlmodel is converted with cascade.* metadata
+   (threshold, stage-two model name, expected escalation rate), and the
+   full model is converted next to it as FoodClassifier.mlmodel.
+   FoodRecognitionService reads the metadata and only runs stage two when
+   stage one is unsure.
+
+Calibration images use the same layout as prune_food101_model.py: class
+subfolders are labeled, loose images are not, every fifth image is held out.
+The report is also written to cascade_report.json.
+
+Requirements:
+- torch, torchvision, coremltools, numpy, Pillow
+
+Usage:
+python build_cascade.py --calibration calib/
+python build_cascade.py --calibration calib/ --max-accuracy-drop 0.005 --skip-convert
+"""
+
+import os
+import sys
+import json
+import argparse
+
+import numpy as np
+
+from asset_trace import span
+from prune_food101_model import cpu_latency, fine_tune, load_calibration, load_converter, predict
+
+STAGE_ONE_NAME = "FoodClassifierFast"
+STAGE_TWO_NAME = "FoodClassifier"
+DEFAULT_THRESHOLDS = tuple(round(0.05 * i, 2) for i in range(21))
+DEFAULT_MAX_ACCURACY_DROP = 0.01
+
+
+def build_stage_one(class_count):
+    """MobileNetV3-Small with a class_count-way head"""
+    import torch
+    from torchvision import models
+
+    try:
+        model = models.mobilenet_v3_small(weights=models.MobileNet_V3_Small_Weights.DEFAULT)
+    except Exception as error:
+        print(f"⚠️ Could not load ImageNet weights ({error}); starting stage one from random weights")
+        model = models.mobilenet_v3_small()
+    head = model.classifier[-1]
+    model.classifier[-1] = torch.nn.Linear(head.in_features, class_count)
+    return model
+
+
+def sweep_thresholds(stage_one_probs, stage_two_predictions, labels, stage_one_ms, stage_two_ms, thresholds=DEFAULT_THRESHOLDS):
+    """One row per threshold: escalation rate, average latency and cascade accuracy"""
+    confidence = stage_one_probs.max(axis=1)
+    stage_one_predictions = stage_one_probs.argmax(axis=1)
+    labeled = labels >= 0
+    rows = []
+    for threshold in thresholds:
+        escalate = confidence < threshold
+        predictions = np.where(escalate, stage_two_predictions, stage_one_predictions)
+        row = {
+            "threshold": threshold,
+            "escalationRate": float(escalate.mean()),
+            "latencyMs": round(stage_one_ms + float(escalate.mean()) * stage_two_ms, 2),
+            "agreement": float((predictions == stage_two_predictions).mean()),
+        }
+        if labeled.any():
+            row["top1"] = float((predictions[labeled] == labels[labeled]).mean())
+        rows.append(row)
+    return rows
+
+
+def choose_threshold(rows, reference, max_drop):
+    """The cheapest row whose accuracy is within max_drop of the full model's"""
+    metric = "top1" if "top1" in reference else "agreement"
+    acceptable = [row for row in rows if row[metric] >= reference[metric] - max_drop]
+    return min(acceptable, key=lambda row: (row["latencyMs"], row["threshold"])) if acceptable else rows[-1]
+
+
+def cascade_metadata(row):
+    """Core ML user-defined metadata entries that tell the app how to run the cascade"""
+    return {
+        "cascade.stage": "1",
+        "cascade.score": "top1Probability",
+        "cascade.threshold": str(row["threshold"]),
+        "cascade.stageTwoModel": STAGE_TWO_NAME,
+        "cascade.expectedEscalationRate": f"{row['escalationRate']:.4f}",
+    }
+
+
+def print_report(reference, rows, chosen):
+    print(f"\n{'threshold':>9} {'escalate':>9} {'latency':>9} {'top-1':>7} {'agree':>7}")
+    for row in [reference] + rows:
+        label = "full" if row is reference else f"{row['threshold']:.2f}"
+        top1 = f"{row['top1']:.1%}" if "top1" in row else "-"
+        marker = "  <-" if row is chosen else ""
+        print(f"{label:>9} {row['escalationRate']:>9.1%} {row['latencyMs']:>7.1f}ms {top1:>7} {row['agreement']:>7.1%}{marker}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a two-stage classifier cascade and calibrate its escalation threshold")
+    parser.add_argument("--calibration", required=True, help="Folder of calibration images (class subfolders are labeled)")
+    parser.add_argument("--thresholds", type=float, nargs="+", default=list(DEFAULT_THRESHOLDS), help="Stage-one confidences to sweep")
+    parser.add_argument("--max-accuracy-drop", type=float, default=DEFAULT_MAX_ACCURACY_DROP, help="Accuracy the cascade may lose against the full model")
+    parser.add_argument("--steps", type=int, default=300, help="Distillation steps for stage one (0 to skip)")
+    parser.add_argument("--learning-rate", type=float, default=5e-3, help="Distillation learning rate")
+    parser.add_argument("--batch-size", type=int, default=16, help="Calibration and distillation batch size")
+    parser.add_argument("--max-images", type=int, default=512, help="Most calibration images to load")
+    parser.add_argument("--threads", type=int, default=0, help="torch CPU threads (0 = default)")
+    parser.add_argument("--output-dir", default="cascade", help="Where the .mlmodel files and cascade_report.json go")
+    parser.add_argument("--skip-convert", action="store_true", help="Only report, do not convert to Core ML")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.calibration):
+        print(f"❌ {args.calibration} not found")
+        return 1
+
+    import torch
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    converter = load_converter()
+    model, class_names = converter.load_food101_model()
+    inputs, labels, holdout = load_calibration(args.calibration, list(class_names), args.max_images)
+    if not holdout.any():
+        print(f"❌ No images in {args.calibration}")
+        return 1
+    print(f"📋 {len(inputs)} calibration images ({int((labels >= 0).sum())} labeled, {int(holdout.sum())} held out)")
+
+    train = ~holdout
+    with span("teacher"):
+        teacher_logits = predict(model, inputs, args.batch_size)
+    stage_one = build_stage_one(len(class_names))
+    print(f"\nDistilling stage one for {args.steps} steps...")
+    with span("distill"):
+        fine_tune(stage_one, inputs[train], teacher_logits[train], labels[train], args.steps, args.learning_rate, args.batch_size)
+
+    with span("evaluate"):
+        stage_one_probs = torch.softmax(predict(stage_one, inputs[holdout], args.batch_size), dim=1).numpy()
+        stage_two_predictions = teacher_logits[holdout].argmax(dim=1).numpy()
+        holdout_labels = labels[holdout].numpy()
+        stage_one_ms, stage_two_ms = cpu_latency(stage_one), cpu_latency(model)
+
+    reference = {"escalationRate": 1.0, "latencyMs": round(stage_two_ms, 2), "agreement": 1.0}
+    if (holdout_labels >= 0).any():
+        labeled = holdout_labels >= 0
+        reference["top1"] = float((stage_two_predictions[labeled] == holdout_labels[labeled]).mean())
+    rows = sweep_thresholds(stage_one_probs, stage_two_predictions, holdout_labels, stage_one_ms, stage_two_ms, sorted(args.thresholds))
+    chosen = choose_threshold(rows, reference, args.max_accuracy_drop)
+    print_report(reference, rows, chosen)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    report = {"stageOneMs": round(stage_one_ms, 2), "stageTwoMs": round(stage_two_ms, 2), "fullModel": reference, "thresholds": rows, "chosen": chosen}
+    if not args.skip_convert:
+        with span("convert"):
+            converter.convert_model(
+                torch.nn.Sequential(stage_one, torch.nn.Softmax(dim=1)), class_names,
+                os.path.join(args.output_dir, f"{STAGE_ONE_NAME}.mlmodel"),
+                description="Fast first stage of the Food101 classifier cascade", metadata=cascade_metadata(chosen),
+            )
+            converter.convert_model(model, class_names, os.path.join(args.output_dir, f"{STAGE_TWO_NAME}.mlmodel"))
+        report["models"] = [f"{STAGE_ONE_NAME}.mlmodel", f"{STAGE_TWO_NAME}.mlmodel"]
+
+    report_path = os.path.join(args.output_dir, "cascade_report.json")
+    with span("json_write"), open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Threshold {chosen['threshold']:.2f}: {chosen['escalationRate']:.1%} of frames escalate, "
+          f"{chosen['latencyMs']:.1f} ms per frame instead of {stage_two_ms:.1f} ms")
+    print(f"   Report written to {report_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Resolve every classifier label to a record in the offline nutrition database.
+
+The app passes the classifier's label (e.g. "eggs_benedict") straight to
+NutritionService.getNutritionInfo(for:), which sends it to the USDA API as a
+free-text search. This build step does that matching once, offline. Labels
+and food names are normalized into tokens (lowercase, singular, synonyms,
+stop words removed). Candidate foods are then ranked by BM25 over the tokens
+plus character-trigram similarity, which catches spelling variants like
+"macarons"/"macaroons".
+
+The result is label_nutrition_index.json next to the Core ML models. For
+every resolved label it holds the FDC id, the matched name, the match score
+and the nutrition values in FoodNutritionInfo's JSON format. NutritionService
+reads it as a direct label -> nutrition lookup before going to the network.
+
+Usage:
+python build_label_index.py                       # Food101 labels vs. the bundled nutrition.sqlite
+python build_label_index.py --labels labels.txt   # one label per line
+python build_label_index.py --show 10             # print the 10 weakest matches for review
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import time
+import sqlite3
+import argparse
+from collections import Counter, defaultdict
+
+from asset_catalog import base_dir
+from asset_trace import span
+from build_nutrition_database import NUTRIENT_IDS, default_database_path
+from prewarm_nutrition_cache import load_labels, cache_key, parse_usda_food
+
+default_index_path = os.path.join(base_dir, "foodscannerpro/Resources/CoreML/label_nutrition_index.json")
+
+# Words that say nothing about which food it is
+STOP_WORDS = {
+    "a", "and", "or", "with", "without", "in", "of", "the", "to", "for", "from", "on",
+    "ns", "nfs", "as", "type", "style", "made", "prepared", "includes", "usda",
+}
+
+# Label spellings that differ from the USDA names
+SYNONYMS = {
+    "donut": "doughnut",
+    "fry": "fried",
+    "hamburger": "burger",
+    "omelette": "omelet",
+    "macaron": "macaroon",
+    "calamari": "squid",
+    "escargot": "snail",
+    "edamame": "soybean",
+    "prime": "beef",
+}
+
+# BM25 parameters; B is low because USDA names are long lists of qualifiers
+K1 = 1.2
+B = 0.3
+
+# Share of the score from BM25 (the rest is trigram similarity)
+BM25_WEIGHT = 0.7
+
+# Labels whose best match scores below this are left unresolved
+DEFAULT_MIN_SCORE = 0.35
+
+
+def singular(token):
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith(("ches", "shes", "xes", "oes")):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def normalize_tokens(text):
+    """Lowercase word tokens, singular, with synonyms applied and stop words dropped"""
+    tokens = []
+    for word in re.findall(r"[a-z0-9]+", text.lower().replace("_", " ")):
+        if word in STOP_WORDS:
+            continue
+        word = singular(word)
+        tokens.append(SYNONYMS.get(word, word))
+    return tokens
+
+
+def trigrams(tokens):
+    text = f"  {' '.join(tokens)} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class FoodIndex:
+    """BM25 and trigram indexes over the food names of the nutrition database"""
+
+    def __init__(self, foods):
+        self.foods = foods  # list of (fdc_id, name)
+        self.doc_tokens = []
+        self.doc_heads = []
+        self.doc_trigrams = []
+        self.postings = defaultdict(list)
+        self.trigram_postings = defaultdict(list)
+        for doc, (_, name) in enumerate(foods):
+            tokens = normalize_tokens(name)
+            grams = trigrams(tokens)
+            self.doc_tokens.append(Counter(tokens))
+            # USDA names put the food itself before the first comma ("Apples, raw, with skin")
+            self.doc_heads.append(set(normalize_tokens(name.split(",")[0])))
+            self.doc_trigrams.append(grams)
+            for token in set(tokens):
+                self.postings[token].append(doc)
+            for gram in grams:
+                self.trigram_postings[gram].append(doc)
+        count = max(len(foods), 1)
+        self.average_length = sum(sum(c.values()) for c in self.doc_tokens) / count
+        self.idf = {
+            token: math.log(1 + (count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for token, docs in self.postings.items()
+        }
+        # Weight of a token no food name contains, as if it were in none of them
+        self.unseen_idf = math.log(1 + (count + 0.5) / 0.5)
+
+    @classmethod
+    def from_database(cls, database_path):
+        connection = sqlite3.connect(f"file:{database_path}?mode=ro", uri=True)
+        try:
+            foods = connection.execute("SELECT fdc_id, name FROM foods ORDER BY fdc_id").fetchall()
+        finally:
+            connection.close()
+        return cls(foods)
+
+    def bm25(self, query_tokens, doc):
+        counts = self.doc_tokens[doc]
+        length = sum(counts.values())
+        score = 0.0
+        for token in query_tokens:
+            frequency = counts.get(token, 0)
+            if frequency:
+                norm = frequency + K1 * (1 - B + B * length / self.average_length)
+                score += self.idf[token] * frequency * (K1 + 1) / norm
+        return score
+
+    def join_compounds(self, tokens):
+        """Merge adjacent tokens that the database spells as one word ("hot dog" -> "hotdog")"""
+        joined = []
+        i = 0
+        while i < len(tokens):
+            if i + 1 < len(tokens):
+                compound = singular(tokens[i] + tokens[i + 1])
+                if compound in self.idf:
+                    joined.append(compound)
+                    i += 2
+                    continue
+            joined.append(tokens[i])
+            i += 1
+        return joined
+
+    def candidates(self, tokens, grams, trigram_candidates=200):
+        """Docs sharing a token with the query, plus the docs sharing the most trigrams"""
+        docs = set()
+        for token in tokens:
+            docs.update(self.postings.get(token, ()))
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.trigram_postings.get(gram, ()))
+        docs.update(doc for doc, _ in shared.most_common(trigram_candidates))
+        return docs
+
+    def resolve(self, label, limit=3):
+        """Rank foods for a label; returns [(score, fdc_id, name)] best first, scores in 0..1"""
+        tokens = self.join_compounds(normalize_tokens(label))
+        if not tokens:
+            return []
+        grams = trigrams(tokens)
+        # BM25 of a perfect match, so scores are comparable across labels; tokens
+        # missing from every food name still count, so "beef tartare" is not a
+        # perfect match for plain beef
+        best_possible = sum(self.idf.get(token, self.unseen_idf) for token in tokens)
+        ranked = []
+        for doc in self.candidates(tokens, grams):
+            lexical = min(self.bm25(tokens, doc) / best_possible, 1.0)
+            doc_grams = self.doc_trigrams[doc]
+            fuzzy = len(grams & doc_grams) / len(grams | doc_grams)
+            score = BM25_WEIGHT * lexical + (1 - BM25_WEIGHT) * fuzzy
+            # Prefer foods whose head segment is the label, then shorter (more generic) names
+            head = self.doc_heads[doc]
+            score += 0.1 * len(head & set(tokens)) / len(head | set(tokens))
+            fdc_id, name = self.foods[doc]
+            ranked.append((min(score, 1.0), -len(name), fdc_id, name))
+        ranked.sort(reverse=True)
+        return [(score, fdc_id, name) for score, _, fdc_id, name in ranked[:limit]]
+
+
+def load_nutrition(database_path, fdc_ids, timestamp):
+    """FoodNutritionInfo dicts for the given fdc_ids, via the app's parseUSDAFood mapping"""
+    connection = sqlite3.connect(f"file:{database_path}?mode=ro", uri=True)
+    connection.row_factory = sqlite3.Row
+    nutrition = {}
+    try:
+        for fdc_id in fdc_ids:
+            row = connection.execute("SELECT * FROM foods WHERE fdc_id = ?", (fdc_id,)).fetchone()
+            food = {
+                "description": row["name"],
+                "servingSize": row["serving_size"],
+                "servingSizeUnit": row["serving_unit"],
+                "foodNutrients": [
+                    {"nutrientId": nutrient_id, "value": row[column]}
+                    for column, nutrient_id in NUTRIENT_IDS.items()
+                    if row[column] is not None
+                ],
+            }
+            nutrition[fdc_id] = parse_usda_food(food, timestamp)
+    finally:
+        connection.close()
+    return nutrition
+
+
+def build_label_index(labels, database_path=default_database_path, min_score=DEFAULT_MIN_SCORE):
+    """Resolve labels against the database; returns (index dict, [(label, best match or None)])"""
+    with span("index"):
+        food_index = FoodIndex.from_database(database_path)
+
+    matches = []
+    with span("resolve"):
+        for label in labels:
+            ranked = food_index.resolve(label)
+            best = ranked[0] if ranked and ranked[0][0] >= min_score else None
+            matches.append((label, best, ranked))
+
+    timestamp = time.time()
+    nutrition = load_nutrition(database_path, {best[1] for _, best, _ in matches if best}, timestamp)
+    entries = {}
+    for label, best, _ in matches:
+        if best:
+            score, fdc_id, name = best
+            entries[cache_key(label)] = {
+                "fdcId": fdc_id,
+                "matchedName": name,
+                "score": round(score, 3),
+                "nutrition": nutrition[fdc_id],
+            }
+    index = {"version": 1, "minScore": min_score, "labels": entries}
+    return index, matches
+
+
+def read_labels(path):
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resolve classifier labels to offline nutrition records")
+    parser.add_argument("--database", default=default_database_path, help="Nutrition database from build_nutrition_database.py")
+    parser.add_argument("--labels", help="File with one label per line (default: the Food101 classes)")
+    parser.add_argument("--output", default=default_index_path, help="Index JSON file to write")
+    parser.add_argument("--min-score", type=float, default=DEFAULT_MIN_SCORE, help="Lowest score accepted as a match")
+    parser.add_argument("--show", type=int, default=0, metavar="N", help="Print the N weakest matches with alternatives")
+    args = parser.parse_args(argv)
+
+    if not os.path.isfile(args.database):
+        print(f"❌ {args.database} not found; build it with build_nutrition_database.py first")
+        return 1
+
+    labels = read_labels(args.labels) if args.labels else load_labels()
+    index, matches = build_label_index(labels, args.database, args.min_score)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with span("json_write"), open(args.output, "w") as f:
+        json.dump(index, f, indent=1, sort_keys=True)
+
+    unresolved = [label for label, best, _ in matches if best is None]
+    for label in unresolved:
+        print(f"⚠️ No match for {label}")
+    if args.show:
+        resolved = sorted((m for m in matches if m[1]), key=lambda m: m[1][0])
+        for label, best, ranked in resolved[:args.show]:
+            print(f"\n{label}")
+            for score, fdc_id, name in ranked:
+                print(f"  {score:.3f}  {fdc_id:>8}  {name}")
+
+    print(f"\n✅ Resolved {len(labels) - len(unresolved)} of {len(labels)} labels; index written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+Build the bundled offline nutrition database from the USDA FoodData Central
+bulk CSV download (https://fdc.nal.usda.gov/download-datasets).
+
+Reads food.csv, nutrient.csv and food_nutrient.csv from --fdc-dir. The files
+are streamed in chunks, so the multi-GB food_nutrient.csv never has to fit in
+memory. Only the nutrients that NutritionService.parseUSDAFood reads are kept
+(see NutrientIDs in NutritionModels.swift). They are pivoted into one row per
+food with one column per nutrient, named after the FoodNutritionInfo fields.
+
+The output is a SQLite database with:
+  foods       fdc_id, name, data_type and the nutrient columns (per 100 g)
+  foods_fts   FTS5 index over foods.name (porter stemming)
+  nutrients   column -> USDA nutrient id, name and unit
+  metadata    build information
+
+Usage:
+python build_nutrition_database.py --fdc-dir ~/Downloads/FoodData_Central_csv
+python build_nutrition_database.py --fdc-dir ... --data-types foundation_food,sr_legacy_food,survey_fndds_food
+python build_nutrition_database.py --query "greek yogurt"
+"""
+
+import os
+import csv
+import sys
+import time
+import sqlite3
+import argparse
+
+from asset_catalog import base_dir
+from asset_trace import span
+
+nutrition_dir = os.path.join(base_dir, "foodscannerpro/Resources/Nutrition")
+default_database_path = os.path.join(nutrition_dir, "nutrition.sqlite")
+
+# FoodNutritionInfo field -> USDA nutrient id (NutrientIDs in NutritionModels.swift)
+NUTRIENT_IDS = {
+    "calories": 1008,
+    "protein": 1003,
+    "carbs": 1005,
+    "fat": 1004,
+    "fiber": 1079,
+    "sugar": 2000,
+    "sodium": 1093,
+    "cholesterol": 1253,
+    "potassium": 1092,
+    "calcium": 1087,
+    "iron": 1089,
+    "vitaminA": 1106,
+    "vitaminC": 1162,
+}
+
+# Foundation foods often report energy only as Atwater kcal, not as 1008
+CALORIE_FALLBACK_IDS = (2047, 2048)
+
+# The same data types the app's USDA search asks for ("Foundation,SR Legacy")
+DEFAULT_DATA_TYPES = ("foundation_food", "sr_legacy_food")
+
+CHUNK_SIZE = 100_000
+
+SCHEMA = """
+CREATE TABLE foods (
+    fdc_id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    data_type TEXT NOT NULL,
+    {nutrient_columns},
+    serving_size REAL NOT NULL DEFAULT 100,
+    serving_unit TEXT NOT NULL DEFAULT 'g'
+);
+CREATE TABLE nutrients (
+    column_name TEXT PRIMARY KEY,
+    nutrient_id INTEGER NOT NULL,
+    name TEXT,
+    unit TEXT
+);
+CREATE TABLE metadata (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE VIRTUAL TABLE foods_fts USING fts5(
+    name,
+    content='foods',
+    content_rowid='fdc_id',
+    tokenize='porter unicode61'
+);
+"""
+
+
+def read_chunks(path, columns, chunk_size=CHUNK_SIZE):
+    """Yield lists of tuples holding the named columns of a CSV file, chunk_size rows at a time"""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        indexes = [header.index(column) for column in columns]
+        chunk = []
+        for row in reader:
+            chunk.append(tuple(row[i] for i in indexes))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def nutrient_columns():
+    """(column, nutrient_id) pairs for every stored nutrient, in table order"""
+    return list(NUTRIENT_IDS.items())
+
+
+def create_schema(connection):
+    columns = ",\n    ".join(f"{column} REAL" for column, _ in nutrient_columns())
+    connection.executescript(SCHEMA.format(nutrient_columns=columns))
+
+
+def load_foods(connection, food_csv, data_types):
+    """Stage the foods of the wanted data types; returns their fdc_ids as strings"""
+    wanted = set(data_types)
+    fdc_ids = set()
+    connection.execute("CREATE TEMP TABLE staged_food (fdc_id INTEGER PRIMARY KEY, name TEXT, data_type TEXT)")
+    for chunk in read_chunks(food_csv, ("fdc_id", "data_type", "description")):
+        rows = [row for row in chunk if row[1] in wanted and row[2]]
+        fdc_ids.update(row[0] for row in rows)
+        connection.executemany(
+            "INSERT INTO temp.staged_food VALUES (?, ?, ?)",
+            ((int(fdc_id), description, data_type) for fdc_id, data_type, description in rows),
+        )
+    return fdc_ids
+
+
+def load_nutrients(connection, nutrient_csv):
+    """Record the name and unit of every stored nutrient"""
+    by_id = {nutrient_id: column for column, nutrient_id in nutrient_columns()}
+    found = set()
+    for chunk in read_chunks(nutrient_csv, ("id", "name", "unit_name")):
+        for nutrient_id, name, unit in chunk:
+            column = by_id.get(int(float(nutrient_id)))
+            if column is not None:
+                connection.execute("INSERT INTO nutrients VALUES (?, ?, ?, ?)", (column, int(float(nutrient_id)), name, unit))
+                found.add(column)
+    for column, nutrient_id in nutrient_columns():
+        if column not in found:
+            print(f"⚠️ Nutrient {nutrient_id} ({column}) is not in nutrient.csv")
+            connection.execute("INSERT INTO nutrients VALUES (?, ?, NULL, NULL)", (column, nutrient_id))
+
+
+def load_food_nutrients(connection, food_nutrient_csv, fdc_ids):
+    """Stage (fdc_id, nutrient_id, amount) for the wanted foods and nutrients; returns the row count"""
+    wanted_nutrients = {str(nutrient_id) for _, nutrient_id in nutrient_columns()}
+    wanted_nutrients.update(str(nutrient_id) for nutrient_id in CALORIE_FALLBACK_IDS)
+    connection.execute("CREATE TEMP TABLE staged_amount (fdc_id INTEGER, nutrient_id INTEGER, amount REAL)")
+    kept = 0
+    for chunk in read_chunks(food_nutrient_csv, ("fdc_id", "nutrient_id", "amount")):
+        rows = [
+            (int(fdc_id), int(nutrient_id), float(amount))
+            for fdc_id, nutrient_id, amount in chunk
+            if nutrient_id in wanted_nutrients and fdc_id in fdc_ids and amount
+        ]
+        connection.executemany("INSERT INTO temp.staged_amount VALUES (?, ?, ?)", rows)
+        kept += len(rows)
+    return kept
+
+
+def pivot_foods(connection):
+    """Turn the staged (food, nutrient, amount) rows into one foods row per food"""
+    selects = []
+    for column, nutrient_id in nutrient_columns():
+        value = f"MAX(CASE WHEN a.nutrient_id = {nutrient_id} THEN a.amount END)"
+        if column == "calories":
+            fallbacks = ", ".join(
+                f"MAX(CASE WHEN a.nutrient_id = {fallback} THEN a.amount END)" for fallback in CALORIE_FALLBACK_IDS
+            )
+            value = f"COALESCE({value}, {fallbacks})"
+        selects.append(value)
+    columns = ", ".join(column for column, _ in nutrient_columns())
+    connection.execute("CREATE INDEX temp.staged_amount_fdc ON staged_amount (fdc_id)")
+    connection.execute(f"""
+        INSERT INTO foods (fdc_id, name, data_type, {columns})
+        SELECT f.fdc_id, f.name, f.data_type, {", ".join(selects)}
+        FROM temp.staged_food f
+        JOIN temp.staged_amount a ON a.fdc_id = f.fdc_id
+        GROUP BY f.fdc_id
+        ORDER BY f.fdc_id
+    """)
+    connection.execute("DROP TABLE temp.staged_amount")
+    connection.execute("DROP TABLE temp.staged_food")
+    return connection.execute("SELECT COUNT(*) FROM foods").fetchone()[0]
+
+
+def build_database(fdc_dir, output_path=default_database_path, data_types=DEFAULT_DATA_TYPES):
+    """Build the offline nutrition database and return the number of foods written"""
+    paths = {name: os.path.join(fdc_dir, f"{name}.csv") for name in ("food", "nutrient", "food_nutrient")}
+    for path in paths.values():
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"{path} not found (download the FoodData Central CSV files)")
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    tmp_path = output_path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    connection = sqlite3.connect(tmp_path)
+    try:
+        connection.execute("PRAGMA journal_mode = OFF")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.execute("PRAGMA temp_store = FILE")
+        create_schema(connection)
+
+        with span("load_foods"):
+            fdc_ids = load_foods(connection, paths["food"], data_types)
+        print(f"📋 {len(fdc_ids)} foods of type {', '.join(data_types)}")
+
+        with span("load_nutrients"):
+            load_nutrients(connection, paths["nutrient"])
+
+        with span("load_food_nutrients"):
+            amounts = load_food_nutrients(connection, paths["food_nutrient"], fdc_ids)
+        print(f"📋 {amounts} nutrient values kept")
+
+        with span("pivot"):
+            count = pivot_foods(connection)
+
+        with span("fts_index"):
+            connection.execute("INSERT INTO foods_fts(foods_fts) VALUES ('rebuild')")
+            connection.execute("INSERT INTO foods_fts(foods_fts) VALUES ('optimize')")
+
+        connection.executemany("INSERT INTO metadata VALUES (?, ?)", [
+            ("source", "USDA FoodData Central"),
+            ("data_types", ",".join(data_types)),
+            ("food_count", str(count)),
+            ("built_at", time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())),
+        ])
+        connection.commit()
+
+        with span("vacuum"):
+            connection.execute("VACUUM")
+    finally:
+        connection.close()
+
+    os.replace(tmp_path, output_path)
+    return count
+
+
+def search_foods(database_path, query, limit=5):
+    """Rank foods by FTS5 relevance for a free-text query; returns dicts of the foods row"""
+    terms = [term for term in query.replace('"', " ").split() if term]
+    if not terms:
+        return []
+    match = " ".join(f'"{term}"*' for term in terms)
+    connection = sqlite3.connect(f"file:{database_path}?mode=ro", uri=True)
+    connection.row_factory = sqlite3.Row
+    try:
+        rows = connection.execute(
+            """
+            SELECT foods.* FROM foods_fts
+            JOIN foods ON foods.fdc_id = foods_fts.rowid
+            WHERE foods_fts MATCH ?
+            ORDER BY bm25(foods_fts), length(foods.name)
+            LIMIT ?
+            """,
+            (match, limit),
+        ).fetchall()
+    finally:
+        connection.close()
+    return [dict(row) for row in rows]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the offline nutrition database from FoodData Central CSVs")
+    parser.add_argument("--fdc-dir", help="Folder with food.csv, nutrient.csv and food_nutrient.csv")
+    parser.add_argument("--output", default=default_database_path, help="SQLite database to write")
+    parser.add_argument(
+        "--data-types",
+        default=",".join(DEFAULT_DATA_TYPES),
+        help="Comma-separated food.csv data_type values to include",
+    )
+    parser.add_argument("--query", help="Search an existing database instead of building one")
+    args = parser.parse_args(argv)
+
+    if args.query:
+        if not os.path.isfile(args.output):
+            print(f"❌ {args.output} does not exist")
+            return 1
+        for food in search_foods(args.output, args.query):
+            print(f"{food['fdc_id']:>8}  {food['name']}  ({food['calories'] or 0:.0f} kcal)")
+        return 0
+
+    if not args.fdc_dir:
+        parser.error("--fdc-dir is required to build the database")
+
+    data_types = tuple(t.strip() for t in args.data_types.split(",") if t.strip())
+    start = time.perf_counter()
+    try:
+        count = build_database(args.fdc_dir, args.output, data_types)
+    except FileNotFoundError as e:
+        print(f"❌ {e}")
+        return 1
+    size = os.path.getsize(args.output)
+    print(f"✅ Wrote {count} foods to {args.output} ({size / 1024 / 1024:.1f} MB) in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
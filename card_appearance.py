@@ -0,0 +1,97 @@
+"""
+Dark and high-contrast appearance variants of the category cards.
+
+The renderers decode, crop and lay out a card once, then call apply_style()
+for each entry of APPEARANCES. That only darkens the base and composites the
+text band before the text is drawn, so each extra variant costs compositing
+and encoding rather than another decode. contents_images() writes the
+matching Contents.json entries, so iOS picks the variant from the trait
+collection (Dark Mode, Increase Contrast).
+
+save_card() encodes each rendition once from the rendered pixels, as JPEG
+or (--format heic) as HEIC at the quality matching the JPEG's SSIM.
+"""
+
+import os
+
+from PIL import Image
+
+DARK = {"appearance": "luminosity", "value": "dark"}
+HIGH_CONTRAST = {"appearance": "contrast", "value": "high"}
+
+# (file name suffix, Contents.json appearances, style)
+#   dim:   how far the card is mixed towards black before the text band
+#   band:  opacity (0-255) at the bottom of the text band's gradient
+#   solid: use the band's bottom opacity over the whole band (no gradient)
+#   title, description: text colors
+APPEARANCES = [
+    ("", [], {"dim": 0.0, "band": 180, "solid": False,
+              "title": (255, 255, 255), "description": (235, 235, 235)}),
+    ("-dark", [DARK], {"dim": 0.35, "band": 220, "solid": False,
+                       "title": (235, 235, 235), "description": (210, 210, 210)}),
+    ("-highcontrast", [HIGH_CONTRAST], {"dim": 0.0, "band": 230, "solid": True,
+                                        "title": (255, 255, 255), "description": (255, 255, 255)}),
+    ("-dark-highcontrast", [DARK, HIGH_CONTRAST], {"dim": 0.35, "band": 245, "solid": True,
+                                                   "title": (255, 255, 255), "description": (255, 255, 255)}),
+]
+
+
+# --format choices for the card renderers, and the rendition file extension of each
+CARD_FORMATS = {"jpeg": "jpg", "heic": "heic"}
+
+
+def apply_style(base, style, band_top, band_bottom=None):
+    """Copy of an RGB card with the style's dimming and a black text band from band_top to band_bottom (default: the bottom)"""
+    card = base.point(lambda v: int(v * (1 - style["dim"]))) if style["dim"] else base.copy()
+    band_bottom = card.height if band_bottom is None else band_bottom
+    height = band_bottom - band_top
+    if height > 0 and style["band"]:
+        if style["solid"]:
+            mask = Image.new("L", (card.width, height), style["band"])
+        else:
+            # linear_gradient is a 256x256 black-to-white ramp; scale it to the band and its opacity
+            mask = Image.linear_gradient("L").resize((card.width, height)).point(lambda v: v * style["band"] // 255)
+        card.paste((0, 0, 0), (0, band_top, card.width, band_bottom), mask)
+    return card
+
+
+def contents_images(name, scales, ext="jpg", appearances=APPEARANCES):
+    """Contents.json "images" for each rendered appearance of a card, e.g. name-dark@2x.jpg for the dark 2x slot
+
+    Pass the same appearances the card was rendered with, so no entry
+    points at a file that was not written.
+    """
+    images = []
+    for suffix, traits, _ in appearances:
+        for scale in scales:
+            entry = {"filename": rendition_name(name, suffix, scale, ext), "idiom": "universal", "scale": scale}
+            if traits:
+                entry = {"appearances": traits, **entry}
+            images.append(entry)
+    return images
+
+
+def rendition_name(name, suffix, scale, ext="jpg"):
+    at = "" if scale == "1x" else f"@{scale}"
+    return f"{name}{suffix}{at}.{ext}"
+
+
+def save_card(card, path, fmt="jpeg", quality=95):
+    """Encode a rendered card once: JPEG at quality, or HEIC at the quality matching JPEG's SSIM at quality"""
+    if fmt == "heic":
+        from rendition_format import encode, matched_quality
+
+        with open(path, "wb") as f:
+            f.write(encode(card, "heic", matched_quality(card, reference_quality=quality)))
+    else:
+        card.save(path, quality=quality)
+
+
+def remove_unlisted_renditions(imageset_dir, images):
+    """Delete card files that Contents.json no longer lists (another format, or an appearance not rendered)"""
+    from asset_catalog import RENDITION_EXTENSIONS
+
+    listed = {image["filename"] for image in images if image.get("filename")}
+    for filename in os.listdir(imageset_dir):
+        if filename.lower().endswith(RENDITION_EXTENSIONS) and filename not in listed:
+            os.remove(os.path.join(imageset_dir, filename))
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Card colors derived from meal and category photos.
+
+Instead of picking card colors by hand, this clusters each photo's pixels:
+
+1. The photo is decoded at reduced size (JPEG draft mode) and downsampled to
+   at most --sample pixels, as one N x 3 float array.
+2. Mini-batch k-means (k-means++ seeding, then random batches with
+   per-center learning rates, all in NumPy) finds --clusters colors. Each
+   color's share is the fraction of pixels closest to it.
+3. The dominant color is the largest cluster. The accent is the cluster
+   that is most saturated and most different from the dominant one, among
+   clusters with at least ACCENT_MIN_SHARE of the pixels.
+4. Text contrast follows WCAG 2.x: "card" is the dominant color (the
+   accent when the dominant one is a near-gray plate or table) darkened
+   until white text reaches --min-contrast (4.5:1, AA for normal text).
+   "tint" is a light pastel of the same color, checked the same way for
+   black text.
+
+Palettes are cached in .asset_cache/palettes.json by image hash, so colors
+for thousands of cards only cost one k-means run per new photo. The category
+renderers and the meal placeholders use them, falling back to their fixed
+colors for cards without a photo. Category photos must also pass the
+image_quality.py gate and give a colored palette, so placeholder cards in
+temp_images/ keep the fixed colors instead of turning gray.
+
+Requirements:
+- numpy, Pillow
+
+Usage:
+python card_palette.py MealImages/*.jpg                     # print palettes
+python card_palette.py MealImages/*.jpg --output palettes.json --clusters 6
+"""
+
+import os
+import sys
+import json
+import argparse
+
+import numpy as np
+
+from asset_catalog import base_dir, ContentCache, file_digest
+from asset_trace import span
+
+# Category source photos, as saved by save_images.py / download_category_images.py
+temp_dir = os.path.join(base_dir, "temp_images")
+
+DEFAULT_CLUSTERS = 5
+DEFAULT_SAMPLE = 4096
+BATCH_SIZE = 256
+ITERATIONS = 60
+ACCENT_MIN_SHARE = 0.05
+# Share of white in the light "tint" (placeholder backgrounds)
+TINT_MIX = 0.6
+# Below this saturation the dominant color is a plate or tablecloth, and
+# cards are colored from the accent instead
+NEUTRAL_SATURATION = 0.2
+
+# WCAG 2.x AA contrast for normal-size text
+MIN_CONTRAST = 4.5
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+
+
+# --- Pixels and clustering ---
+
+def pixel_sample(path, max_pixels=DEFAULT_SAMPLE):
+    """float32 N x 3 RGB array of at most max_pixels pixels from an image file"""
+    from PIL import Image
+
+    side = int(max_pixels ** 0.5)
+    with Image.open(path) as img:
+        img.draft("RGB", (side * 2, side * 2))
+        img = img.convert("RGBA")
+        img.thumbnail((side, side), Image.BOX)
+    pixels = np.asarray(img, dtype=np.float32).reshape(-1, 4)
+    # Transparent pixels are not part of the picture
+    return pixels[pixels[:, 3] > 127, :3]
+
+
+def kmeans_plus_plus(pixels, k, rng):
+    """Greedy k-means++ seeding: of 2 + log(k) sampled candidates per step, keep the one that lowers inertia most"""
+    candidates_per_step = 2 + int(np.log(k))
+    centers = [pixels[rng.integers(len(pixels))]]
+    distances = ((pixels - centers[0]) ** 2).sum(axis=1)
+    for _ in range(1, k):
+        total = distances.sum()
+        if total <= 0:
+            break
+        candidates = pixels[rng.choice(len(pixels), candidates_per_step, p=distances / total)]
+        candidate_distances = np.minimum(distances, ((pixels[np.newaxis] - candidates[:, np.newaxis]) ** 2).sum(axis=2))
+        best = candidate_distances.sum(axis=1).argmin()
+        centers.append(candidates[best])
+        distances = candidate_distances[best]
+    return np.array(centers, dtype=np.float32)
+
+
+def nearest(pixels, centers):
+    # |p - c|^2 = |p|^2 - 2 p.c + |c|^2; |p|^2 does not change the argmin
+    return ((centers ** 2).sum(axis=1) - 2 * pixels @ centers.T).argmin(axis=1)
+
+
+def minibatch_kmeans(pixels, k=DEFAULT_CLUSTERS, batch_size=BATCH_SIZE, iterations=ITERATIONS, seed=0):
+    """(centers k' x 3, share of the pixels closest to each), largest share first; k' <= k for flat images"""
+    rng = np.random.default_rng(seed)
+    centers = kmeans_plus_plus(pixels, min(k, len(pixels)), rng)
+    counts = np.zeros(len(centers))
+    for _ in range(iterations):
+        batch = pixels[rng.integers(0, len(pixels), min(batch_size, len(pixels)))]
+        labels = nearest(batch, centers)
+        batch_counts = np.bincount(labels, minlength=len(centers))
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, batch)
+        # Per-center learning rate 1/count, the mini-batch k-means update
+        counts += batch_counts
+        moved = batch_counts > 0
+        rate = (batch_counts[moved] / counts[moved])[:, np.newaxis]
+        centers[moved] += rate * (sums[moved] / batch_counts[moved][:, np.newaxis] - centers[moved])
+    shares = np.bincount(nearest(pixels, centers), minlength=len(centers)) / len(pixels)
+    order = np.argsort(-shares)
+    keep = order[shares[order] > 0]
+    return centers[keep], shares[keep]
+
+
+# --- WCAG contrast ---
+
+def relative_luminance(rgb):
+    """WCAG relative luminance of an sRGB color (0-255 channels)"""
+    channels = np.asarray(rgb, dtype=np.float64) / 255
+    linear = np.where(channels <= 0.03928, channels / 12.92, ((channels + 0.055) / 1.055) ** 2.4)
+    return float(linear @ [0.2126, 0.7152, 0.0722])
+
+
+def contrast_ratio(a, b):
+    la, lb = sorted((relative_luminance(a), relative_luminance(b)), reverse=True)
+    return (la + 0.05) / (lb + 0.05)
+
+
+def with_contrast(color, text, minimum=MIN_CONTRAST):
+    """color mixed towards black or white (away from text) just enough for text to reach minimum contrast"""
+    target = BLACK if relative_luminance(text) > 0.5 else WHITE
+    color, target = np.asarray(color, dtype=np.float64), np.asarray(target, dtype=np.float64)
+    for amount in np.linspace(0, 1, 41):
+        mixed = tuple(int(round(v)) for v in color + (target - color) * amount)
+        if contrast_ratio(mixed, text) >= minimum:
+            return mixed
+    return tuple(int(v) for v in target)
+
+
+def mix(color, other, amount):
+    return tuple(int(round(a + (b - a) * amount)) for a, b in zip(color, other))
+
+
+def saturation(rgb):
+    high, low = max(rgb), min(rgb)
+    return (high - low) / high if high else 0.0
+
+
+# --- Palettes ---
+
+def build_palette(centers, shares, min_contrast=MIN_CONTRAST):
+    colors = [tuple(int(round(v)) for v in center) for center in centers]
+    dominant = colors[0]
+    candidates = [color for color, share in zip(colors[1:], shares[1:]) if share >= ACCENT_MIN_SHARE]
+    accent = max(
+        candidates,
+        key=lambda c: saturation(c) * np.linalg.norm(np.subtract(c, dominant)),
+        default=dominant,
+    )
+    base = accent if saturation(dominant) < NEUTRAL_SATURATION else dominant
+    card = with_contrast(base, WHITE, min_contrast)
+    tint = with_contrast(mix(base, WHITE, TINT_MIX), BLACK, min_contrast)
+    return {
+        "dominant": list(dominant),
+        "accent": list(accent),
+        "card": list(card),
+        "cardContrast": round(contrast_ratio(card, WHITE), 2),
+        "tint": list(tint),
+        "tintContrast": round(contrast_ratio(tint, BLACK), 2),
+        "colors": [{"rgb": list(color), "share": round(float(share), 4)} for color, share in zip(colors, shares)],
+    }
+
+
+class PaletteExtractor:
+    """Palettes for image files, cached by content hash"""
+
+    def __init__(self, clusters=DEFAULT_CLUSTERS, sample=DEFAULT_SAMPLE, min_contrast=MIN_CONTRAST):
+        self.clusters = clusters
+        self.sample = sample
+        self.min_contrast = min_contrast
+        self.cache = ContentCache("palettes", version=f"{clusters}-{sample}-{BATCH_SIZE}-{ITERATIONS}-{min_contrast}")
+
+    def palette(self, path):
+        key = file_digest(path)
+        entry = self.cache.get(key)
+        if entry is None:
+            with span("decode"):
+                pixels = pixel_sample(path, self.sample)
+            if not len(pixels):
+                return None
+            with span("kmeans"):
+                centers, shares = minibatch_kmeans(pixels, self.clusters)
+            entry = build_palette(centers, shares, self.min_contrast)
+            self.cache.put(key, entry)
+        return entry
+
+    def color(self, path, role="card", fallback=None):
+        """One palette color as an RGB tuple, or fallback when there is no photo"""
+        if not path or not os.path.exists(path):
+            return fallback
+        palette = self.palette(path)
+        return tuple(palette[role]) if palette else fallback
+
+    def save(self):
+        # Category and meal tools share the cache, so keep each other's entries
+        self.cache.save(prune=False)
+
+
+def usable_palette(palette):
+    """False for near-flat or gray palettes (instruction cards, blank fills) that make a gray card"""
+    if palette is None or len(palette["colors"]) < 2:
+        return False
+    return max(saturation(palette["dominant"]), saturation(palette["accent"])) >= NEUTRAL_SATURATION
+
+
+def category_colors(categories, fallback):
+    """{category name: card color} from the category photos in temp_images/, else the fallback colors
+
+    Photos that fail the image quality gate (the "Please replace this..."
+    cards, empty or tiny files) and gray palettes get the fallback color.
+    """
+    from image_quality import check_images
+
+    paths = {cat["name"]: os.path.join(temp_dir, f"{cat['name']}_photo.jpg") for cat in categories}
+    with span("quality"):
+        quality = check_images([path for path in paths.values() if os.path.exists(path)])
+    extractor = PaletteExtractor()
+    colors = {}
+    for cat in categories:
+        path = paths[cat["name"]]
+        palette = extractor.palette(path) if quality.get(path, {}).get("ok") else None
+        colors[cat["name"]] = tuple(palette["card"]) if usable_palette(palette) else fallback.get(cat["name"])
+    extractor.save()
+    return colors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract dominant/accent card colors with WCAG-checked text contrast")
+    parser.add_argument("images", nargs="+", help="Photos to extract palettes from")
+    parser.add_argument("--clusters", type=int, default=DEFAULT_CLUSTERS, help="k-means clusters per photo")
+    parser.add_argument("--sample", type=int, default=DEFAULT_SAMPLE, help="Most pixels sampled per photo")
+    parser.add_argument("--min-contrast", type=float, default=MIN_CONTRAST, help="WCAG contrast for card text")
+    parser.add_argument("--output", help="Write {image name: palette} JSON here")
+    args = parser.parse_args(argv)
+
+    extractor = PaletteExtractor(args.clusters, args.sample, args.min_contrast)
+    palettes = {}
+    for path in args.images:
+        palette = extractor.palette(path)
+        if palette is None:
+            print(f"⚠️ {path}: no opaque pixels")
+            continue
+        palettes[os.path.splitext(os.path.basename(path))[0]] = palette
+        print(f"  {os.path.basename(path)}: dominant {palette['dominant']}, accent {palette['accent']}, "
+              f"card {palette['card']} ({palette['cardContrast']}:1 white text)")
+    extractor.save()
+
+    if args.output:
+        with span("json_write"), open(args.output, "w") as f:
+            json.dump(palettes, f, indent=2)
+    print(f"✅ {len(palettes)} palettes ({extractor.cache.hits} cached)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
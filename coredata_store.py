@@ -0,0 +1,481 @@
+"""
+Readers for the app's Core Data SQLite store (FoodScannerPro.sqlite).
+
+NSPersistentCloudKitContainer(name: "FoodScannerPro") keeps each entity in a
+Z<ENTITY> table. Attributes are stored as Z<ATTRIBUTE> columns and to-one
+relationships as a Z<RELATIONSHIP> column holding the target's Z_PK. Dates
+are REAL seconds since 2001-01-01 UTC. The readers pull whole columns with one
+bulk query each and return them as NumPy arrays. Dates are converted to Unix
+seconds, and a missing date is NaN.
+
+The CloudKit container always enables persistent history tracking, so every
+save is also recorded as an ATRANSACTION row with one ACHANGE row per
+inserted, updated or deleted object. changes_since() reads those rows for
+incremental processing.
+
+Binary attributes with "Allows External Storage" (FoodItem.image and
+FoodRecognitionHistory.imageData) start with a marker byte: 0x01 means the
+data follows inline, 0x02 means the rest is the UUID of a file in
+.<store>_SUPPORT/_EXTERNAL_DATA next to the store. open_binary() resolves
+both and reads the value incrementally, so large images are never loaded
+whole.
+
+Entity numbers (Z_ENT, ACHANGE.ZENTITY) are read from the store's Z_PRIMARYKEY
+table. Core Data assigns them when it creates the store, so a model version
+that adds an entity can shift them.
+
+create_fixture_store() writes a store with the same tables from synthetic
+data, for validation and benchmarks. The add_meal(), update_food_item(),
+set_image() and delete_meal() helpers edit a fixture store and record
+history the way the app's saves would.
+"""
+
+import io
+import os
+import time
+import uuid
+import sqlite3
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Seconds between the Unix epoch and Core Data's reference date (2001-01-01)
+CORE_DATA_EPOCH = 978307200
+
+# Entities of the fixture store's model
+FIXTURE_ENTITIES = ("FoodItem", "FoodRecognitionHistory", "Meal", "NutritionInfoEntity")
+
+# ACHANGE.ZCHANGETYPE values (NSPersistentHistoryChangeType)
+CHANGE_INSERT = 0
+CHANGE_UPDATE = 1
+CHANGE_DELETE = 2
+
+FETCH_SIZE = 50_000
+
+# First byte of a binary attribute that allows external storage
+BINARY_INLINE = 0x01
+BINARY_EXTERNAL = 0x02
+
+# (table, column) of the image attributes, by entity
+IMAGE_ATTRIBUTES = {
+    "FoodRecognitionHistory": ("ZFOODRECOGNITIONHISTORY", "ZIMAGEDATA"),
+    "FoodItem": ("ZFOODITEM", "ZIMAGE"),
+}
+
+FIXTURE_SCHEMA = """
+CREATE TABLE ZFOODITEM (
+    Z_PK INTEGER PRIMARY KEY, Z_ENT INTEGER, Z_OPT INTEGER, ZMEAL INTEGER,
+    ZCALORIES FLOAT, ZCARBS FLOAT, ZDATESCANNED TIMESTAMP, ZFATS FLOAT, ZPROTEIN FLOAT,
+    ZNAME VARCHAR, ZID BLOB, ZIMAGE BLOB
+);
+CREATE INDEX ZFOODITEM_ZMEAL_INDEX ON ZFOODITEM (ZMEAL);
+CREATE TABLE ZFOODRECOGNITIONHISTORY (
+    Z_PK INTEGER PRIMARY KEY, Z_ENT INTEGER, Z_OPT INTEGER, ZISRECOMMENDED INTEGER,
+    ZNUTRITIONINFO INTEGER, ZCONFIDENCE FLOAT, ZTIMESTAMP TIMESTAMP, ZFOODNAME VARCHAR,
+    ZRECOMMENDATIONREASON VARCHAR, ZID BLOB, ZIMAGEDATA BLOB, ZWARNINGS BLOB
+);
+CREATE TABLE ZMEAL (
+    Z_PK INTEGER PRIMARY KEY, Z_ENT INTEGER, Z_OPT INTEGER, ZDATE TIMESTAMP,
+    ZNAME VARCHAR, ZNOTES VARCHAR, ZTYPE VARCHAR, ZID BLOB
+);
+CREATE TABLE ZNUTRITIONINFOENTITY (
+    Z_PK INTEGER PRIMARY KEY, Z_ENT INTEGER, Z_OPT INTEGER, ZCALORIES INTEGER,
+    ZFOODRECOGNITION INTEGER, ZCALCIUM FLOAT, ZCARBS FLOAT, ZCHOLESTEROL FLOAT, ZFAT FLOAT,
+    ZFIBER FLOAT, ZIRON FLOAT, ZPOTASSIUM FLOAT, ZPROTEIN FLOAT, ZSERVINGSIZE FLOAT,
+    ZSODIUM FLOAT, ZSUGAR FLOAT, ZVITAMINA FLOAT, ZVITAMINC FLOAT, ZSERVINGUNIT VARCHAR,
+    ZSOURCE VARCHAR
+);
+CREATE TABLE ATRANSACTION (
+    Z_PK INTEGER PRIMARY KEY, Z_ENT INTEGER, Z_OPT INTEGER, ZTIMESTAMP TIMESTAMP,
+    ZAUTHOR VARCHAR, ZCONTEXTNAME VARCHAR
+);
+CREATE TABLE ACHANGE (
+    Z_PK INTEGER PRIMARY KEY, Z_ENT INTEGER, Z_OPT INTEGER, ZCHANGETYPE INTEGER,
+    ZENTITY INTEGER, ZENTITYPK INTEGER, ZTRANSACTIONID INTEGER, ZCOLUMNS BLOB
+);
+CREATE INDEX ACHANGE_ZTRANSACTIONID_INDEX ON ACHANGE (ZTRANSACTIONID);
+CREATE TABLE Z_PRIMARYKEY (Z_ENT INTEGER PRIMARY KEY, Z_NAME VARCHAR, Z_SUPER INTEGER, Z_MAX INTEGER);
+CREATE TABLE Z_METADATA (Z_VERSION INTEGER PRIMARY KEY, Z_UUID VARCHAR(255), Z_PLIST BLOB);
+"""
+
+
+def connect(store_path):
+    """Open a store read-only, so a store the app has open is never modified"""
+    return sqlite3.connect(f"file:{store_path}?mode=ro", uri=True)
+
+
+def read_columns(connection, sql, names, dtypes, params=()):
+    """Run a query and return {name: array}, fetching FETCH_SIZE rows at a time.
+
+    NULL becomes NaN in float columns; integer columns must not contain NULL
+    (wrap them in IFNULL in the query).
+    """
+    chunks = {name: [] for name in names}
+    cursor = connection.execute(sql, params)
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        for name, dtype, column in zip(names, dtypes, zip(*rows)):
+            chunks[name].append(np.array(column, dtype=dtype))
+    return {
+        name: np.concatenate(chunks[name]) if chunks[name] else np.zeros(0, dtype=dtype)
+        for name, dtype in zip(names, dtypes)
+    }
+
+
+def has_history(connection):
+    """Whether the store has persistent history tables"""
+    tables = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    return {"ATRANSACTION", "ACHANGE"} <= tables
+
+
+def transaction_range(connection):
+    """(first, last) ATRANSACTION Z_PK still in the store, or (0, 0) if history is empty"""
+    first, last = connection.execute("SELECT MIN(Z_PK), MAX(Z_PK) FROM ATRANSACTION").fetchone()
+    return first or 0, last or 0
+
+
+def entity_numbers(connection):
+    """{entity name: Z_ENT} from the store's Z_PRIMARYKEY table"""
+    return {name: number for number, name in connection.execute("SELECT Z_ENT, Z_NAME FROM Z_PRIMARYKEY")}
+
+
+def changes_since(connection, transaction_id, entities):
+    """{entity name: {Z_PK: last change type}} for changes after transaction_id"""
+    known = entity_numbers(connection)
+    numbers = {known[name]: name for name in entities if name in known}
+    changes = {name: {} for name in entities}
+    if not numbers:
+        return changes
+    placeholders = ", ".join("?" * len(numbers))
+    rows = connection.execute(
+        f"SELECT ZENTITY, ZENTITYPK, ZCHANGETYPE FROM ACHANGE"
+        f" WHERE ZTRANSACTIONID > ? AND ZENTITY IN ({placeholders}) ORDER BY Z_PK",
+        (transaction_id, *numbers),
+    )
+    for entity, pk, change_type in rows:
+        changes[numbers[entity]][pk] = change_type
+    return changes
+
+
+def external_data_dir(store_path):
+    """Where Core Data keeps externally stored binary values for a store"""
+    directory, name = os.path.split(os.path.abspath(store_path))
+    return os.path.join(directory, f".{os.path.splitext(name)[0]}_SUPPORT", "_EXTERNAL_DATA")
+
+
+class BlobReader(io.RawIOBase):
+    """Seekable read-only view of an SQLite blob, starting at offset"""
+
+    def __init__(self, blob, offset=0):
+        self.blob = blob
+        self.offset = offset
+        self.size = len(blob) - offset
+        blob.seek(offset)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.blob.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def seek(self, position, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            position += self.tell()
+        elif whence == io.SEEK_END:
+            position += self.size
+        self.blob.seek(self.offset + min(max(position, 0), self.size))
+        return self.tell()
+
+    def tell(self):
+        return self.blob.tell() - self.offset
+
+    def close(self):
+        self.blob.close()
+        super().close()
+
+
+def open_binary(connection, store_path, table, column, pk):
+    """Open one binary value for streaming; returns (file object, size, external file name or None).
+
+    Returns (None, 0, None) when the value is NULL or its external file is missing.
+    """
+    try:
+        blob = connection.blobopen(table, column, pk, readonly=True)
+    except sqlite3.OperationalError:
+        return None, 0, None  # NULL or no such row
+    marker = blob.read(1)[:1]
+    if marker == bytes([BINARY_EXTERNAL]):
+        name = blob.read().split(b"\0")[0].decode("ascii")
+        blob.close()
+        path = os.path.join(external_data_dir(store_path), name)
+        if not os.path.isfile(path):
+            return None, 0, name
+        return open(path, "rb"), os.path.getsize(path), name
+    reader = BlobReader(blob, 1 if marker == bytes([BINARY_INLINE]) else 0)
+    return io.BufferedReader(reader), reader.size, None
+
+
+def to_unix(core_data_seconds):
+    return core_data_seconds + CORE_DATA_EPOCH
+
+
+def load_meals(connection):
+    """Meal columns: pk, date (Unix seconds), type, name"""
+    columns = read_columns(
+        connection,
+        "SELECT Z_PK, ZDATE, ZTYPE, ZNAME FROM ZMEAL",
+        ("pk", "date", "type", "name"),
+        (np.int64, np.float64, object, object),
+    )
+    columns["date"] = to_unix(columns["date"])
+    return columns
+
+
+def load_food_items(connection):
+    """FoodItem columns: pk, meal (Z_PK, 0 when unset), name, calories, protein, carbs, fats, date_scanned"""
+    columns = read_columns(
+        connection,
+        "SELECT Z_PK, IFNULL(ZMEAL, 0), ZNAME, ZCALORIES, ZPROTEIN, ZCARBS, ZFATS, ZDATESCANNED FROM ZFOODITEM",
+        ("pk", "meal", "name", "calories", "protein", "carbs", "fats", "date_scanned"),
+        (np.int64, np.int64, object, np.float64, np.float64, np.float64, np.float64, np.float64),
+    )
+    columns["date_scanned"] = to_unix(columns["date_scanned"])
+    return columns
+
+
+def load_history(connection):
+    """FoodRecognitionHistory columns: pk, timestamp (Unix seconds), food_name, confidence, is_recommended"""
+    columns = read_columns(
+        connection,
+        "SELECT Z_PK, ZTIMESTAMP, ZFOODNAME, ZCONFIDENCE, IFNULL(ZISRECOMMENDED, 0) FROM ZFOODRECOGNITIONHISTORY",
+        ("pk", "timestamp", "food_name", "confidence", "is_recommended"),
+        (np.int64, np.float64, object, np.float64, np.int64),
+    )
+    columns["timestamp"] = to_unix(columns["timestamp"])
+    return columns
+
+
+def _offset_lookup(tz):
+    if tz is None:
+        return lambda t: float(time.localtime(t).tm_gmtoff)
+    return lambda t: datetime.fromtimestamp(t, tz).utcoffset().total_seconds()
+
+
+def utc_offsets(unix_seconds, tz=None):
+    """UTC offset in seconds at each timestamp, for a zoneinfo tz or the local zone.
+
+    The offset is looked up at the start and end of each distinct UTC day.
+    Only days where the two differ (DST changes) are resolved per 15-minute
+    bucket; real offset changes always fall on a quarter hour.
+    """
+    offset_at = _offset_lookup(tz)
+    days = np.floor(unix_seconds / 86400).astype(np.int64)
+    unique_days, inverse = np.unique(days, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    day_start = np.array([offset_at(int(d) * 86400) for d in unique_days])
+    day_end = np.array([offset_at(int(d) * 86400 + 86399) for d in unique_days])
+    offsets = day_start[inverse]
+
+    changing = (day_start != day_end)[inverse]
+    if changing.any():
+        buckets = np.floor(unix_seconds[changing] / 900).astype(np.int64)
+        unique_buckets, bucket_inverse = np.unique(buckets, return_inverse=True)
+        bucket_offsets = np.array([offset_at(int(b) * 900) for b in unique_buckets])
+        offsets[changing] = bucket_offsets[bucket_inverse.reshape(-1)]
+    return offsets
+
+
+def local_days(unix_seconds, tz=None):
+    """Calendar day in the given zone as days since 1970-01-01 (Calendar.current's day grouping)"""
+    if len(unix_seconds) == 0:
+        return np.zeros(0, dtype=np.int64)
+    return np.floor((unix_seconds + utc_offsets(unix_seconds, tz)) / 86400).astype(np.int64)
+
+
+def week_starts(days, first_weekday=1):
+    """First day of each day's week. first_weekday follows Calendar: 1 = Sunday, 2 = Monday"""
+    # 1970-01-01 was a Thursday, which is Calendar weekday 5
+    weekday = (days + 4) % 7 + 1
+    return days - (weekday - first_weekday) % 7
+
+
+def day_to_date(day):
+    """Day number -> datetime.date"""
+    return datetime.fromtimestamp(int(day) * 86400, timezone.utc).date()
+
+
+def create_fixture_store(path, meal_count=200, days=90, seed=0, start=None, food_names=None, extra_entities=()):
+    """Write a synthetic store with Meal, FoodItem and FoodRecognitionHistory rows.
+
+    Each meal has 0-4 food items. A few food items have no meal, and a few
+    meals have no items, like real stores. Entities are numbered alphabetically,
+    like Core Data does; extra_entities adds (empty) entities to the model,
+    which shifts the numbers of the ones after them.
+    """
+    rng = np.random.default_rng(seed)
+    food_names = food_names or [
+        "Oatmeal with Berries", "Greek Yogurt", "Grilled Chicken", "Caesar Salad", "Salmon Bowl",
+        "Apple", "Banana", "Avocado Toast", "Lentil Curry", "Tofu Stirfry", "Pizza", "Hummus",
+    ]
+    meal_types = ["Breakfast", "Lunch", "Dinner", "Snack"]
+    start = CORE_DATA_EPOCH + 700_000_000 if start is None else start
+    numbers = {name: number for number, name in enumerate(sorted({*FIXTURE_ENTITIES, *extra_entities}), start=1)}
+
+    connection = sqlite3.connect(path)
+    try:
+        connection.executescript(FIXTURE_SCHEMA)
+        meal_dates = np.sort(start + rng.uniform(0, days * 86400, meal_count)) - CORE_DATA_EPOCH
+        connection.executemany(
+            "INSERT INTO ZMEAL (Z_PK, Z_ENT, Z_OPT, ZDATE, ZNAME, ZTYPE) VALUES (?, ?, 1, ?, ?, ?)",
+            [
+                (pk, numbers["Meal"], float(date), f"Meal {pk}", meal_types[pk % len(meal_types)])
+                for pk, date in enumerate(meal_dates, start=1)
+            ],
+        )
+
+        items = []
+        for meal_pk, date in enumerate(meal_dates, start=1):
+            for _ in range(int(rng.integers(0, 5))):
+                items.append((meal_pk, date))
+        for _ in range(max(1, meal_count // 50)):
+            items.append((None, meal_dates[0]))
+        connection.executemany(
+            "INSERT INTO ZFOODITEM (Z_PK, Z_ENT, Z_OPT, ZMEAL, ZCALORIES, ZCARBS, ZDATESCANNED, ZFATS, ZPROTEIN, ZNAME)"
+            " VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    pk, numbers["FoodItem"], meal_pk,
+                    float(rng.uniform(20, 800)), float(rng.uniform(0, 90)), float(date),
+                    float(rng.uniform(0, 40)), float(rng.uniform(0, 50)),
+                    food_names[int(rng.integers(0, len(food_names)))],
+                )
+                for pk, (meal_pk, date) in enumerate(items, start=1)
+            ],
+        )
+
+        history_count = meal_count // 2
+        history_dates = np.sort(start + rng.uniform(0, days * 86400, history_count)) - CORE_DATA_EPOCH
+        connection.executemany(
+            "INSERT INTO ZFOODRECOGNITIONHISTORY (Z_PK, Z_ENT, Z_OPT, ZISRECOMMENDED, ZCONFIDENCE, ZTIMESTAMP, ZFOODNAME)"
+            " VALUES (?, ?, 1, ?, ?, ?, ?)",
+            [
+                (
+                    pk, numbers["FoodRecognitionHistory"], int(rng.integers(0, 2)),
+                    float(rng.uniform(0.3, 1.0)), float(date), food_names[int(rng.integers(0, len(food_names)))],
+                )
+                for pk, date in enumerate(history_dates, start=1)
+            ],
+        )
+
+        row_counts = {"FoodItem": len(items), "FoodRecognitionHistory": history_count, "Meal": meal_count}
+        connection.executemany(
+            "INSERT INTO Z_PRIMARYKEY VALUES (?, ?, 0, ?)",
+            [(number, name, row_counts.get(name, 0)) for name, number in numbers.items()],
+        )
+        record_transaction(
+            connection,
+            [(CHANGE_INSERT, "Meal", pk) for pk in range(1, meal_count + 1)]
+            + [(CHANGE_INSERT, "FoodItem", pk) for pk in range(1, len(items) + 1)],
+        )
+        connection.commit()
+    finally:
+        connection.close()
+    return path
+
+
+# --- Fixture editing (records persistent history like an app save) ---
+
+def record_transaction(connection, changes):
+    """Add an ATRANSACTION with one ACHANGE per (change type, entity name, Z_PK)"""
+    numbers = entity_numbers(connection)
+    cursor = connection.execute(
+        "INSERT INTO ATRANSACTION (Z_ENT, Z_OPT, ZTIMESTAMP, ZCONTEXTNAME) VALUES (16002, 1, ?, 'viewContext')",
+        (time.time() - CORE_DATA_EPOCH,),
+    )
+    connection.executemany(
+        "INSERT INTO ACHANGE (Z_ENT, Z_OPT, ZCHANGETYPE, ZENTITY, ZENTITYPK, ZTRANSACTIONID) VALUES (16001, 1, ?, ?, ?, ?)",
+        [(change_type, numbers[entity], pk, cursor.lastrowid) for change_type, entity, pk in changes],
+    )
+    return cursor.lastrowid
+
+
+def _next_pk(connection, table):
+    return (connection.execute(f"SELECT MAX(Z_PK) FROM {table}").fetchone()[0] or 0) + 1
+
+
+def add_meal(connection, unix_date, meal_type, items):
+    """Insert a meal with items [(name, calories, protein, carbs, fats)]; returns the meal's Z_PK"""
+    numbers = entity_numbers(connection)
+    meal_pk = _next_pk(connection, "ZMEAL")
+    connection.execute(
+        "INSERT INTO ZMEAL (Z_PK, Z_ENT, Z_OPT, ZDATE, ZNAME, ZTYPE) VALUES (?, ?, 1, ?, ?, ?)",
+        (meal_pk, numbers["Meal"], unix_date - CORE_DATA_EPOCH, meal_type, meal_type),
+    )
+    changes = [(CHANGE_INSERT, "Meal", meal_pk)]
+    item_pk = _next_pk(connection, "ZFOODITEM")
+    for name, calories, protein, carbs, fats in items:
+        connection.execute(
+            "INSERT INTO ZFOODITEM (Z_PK, Z_ENT, Z_OPT, ZMEAL, ZCALORIES, ZCARBS, ZDATESCANNED, ZFATS, ZPROTEIN, ZNAME)"
+            " VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?)",
+            (item_pk, numbers["FoodItem"], meal_pk, calories, carbs, unix_date - CORE_DATA_EPOCH, fats, protein, name),
+        )
+        changes.append((CHANGE_INSERT, "FoodItem", item_pk))
+        item_pk += 1
+    record_transaction(connection, changes)
+    connection.commit()
+    return meal_pk
+
+
+def update_food_item(connection, pk, **values):
+    """Change FoodItem attributes (calories=..., meal=<Z_PK>, ...) and record the update"""
+    assignments = ", ".join(f"Z{name.upper()} = ?" for name in values)
+    connection.execute(
+        f"UPDATE ZFOODITEM SET {assignments}, Z_OPT = Z_OPT + 1 WHERE Z_PK = ?",
+        (*values.values(), pk),
+    )
+    record_transaction(connection, [(CHANGE_UPDATE, "FoodItem", pk)])
+    connection.commit()
+
+
+def update_meal_date(connection, pk, unix_date):
+    """Move a meal to another date and record the update"""
+    connection.execute(
+        "UPDATE ZMEAL SET ZDATE = ?, Z_OPT = Z_OPT + 1 WHERE Z_PK = ?", (unix_date - CORE_DATA_EPOCH, pk)
+    )
+    record_transaction(connection, [(CHANGE_UPDATE, "Meal", pk)])
+    connection.commit()
+
+
+def set_image(connection, store_path, entity, pk, data, external=False):
+    """Store image bytes the way Core Data does (inline, or in _EXTERNAL_DATA) and record the update"""
+    table, column = IMAGE_ATTRIBUTES[entity]
+    if external:
+        name = str(uuid.uuid4()).upper()
+        os.makedirs(external_data_dir(store_path), exist_ok=True)
+        with open(os.path.join(external_data_dir(store_path), name), "wb") as f:
+            f.write(data)
+        value = bytes([BINARY_EXTERNAL]) + name.encode("ascii") + b"\0"
+    else:
+        value = bytes([BINARY_INLINE]) + data
+    connection.execute(f"UPDATE {table} SET {column} = ?, Z_OPT = Z_OPT + 1 WHERE Z_PK = ?", (value, pk))
+    record_transaction(connection, [(CHANGE_UPDATE, entity, pk)])
+    connection.commit()
+
+
+def delete_meal(connection, pk):
+    """Delete a meal and (cascade rule) its food items, recording both"""
+    item_pks = [row[0] for row in connection.execute("SELECT Z_PK FROM ZFOODITEM WHERE ZMEAL = ?", (pk,))]
+    connection.execute("DELETE FROM ZFOODITEM WHERE ZMEAL = ?", (pk,))
+    connection.execute("DELETE FROM ZMEAL WHERE Z_PK = ?", (pk,))
+    record_transaction(
+        connection,
+        [(CHANGE_DELETE, "Meal", pk)] + [(CHANGE_DELETE, "FoodItem", item_pk) for item_pk in item_pks],
+    )
+    connection.commit()
@@ -1,151 +1,158 @@
 #!/usr/bin/env python3
 import os
 import json
-import base64
+import argparse
+
 from PIL import Image, ImageDraw, ImageFont
-from io import BytesIO
+
+from asset_catalog import categories_dir, categories
+from asset_trace import span
+from card_appearance import (APPEARANCES, CARD_FORMATS, apply_style, contents_images, remove_unlisted_renditions,
+                             rendition_name, save_card)
+from card_palette import category_colors
 
 # Base directory for the assets
-assets_dir = "foodscannerpro/Assets.xcassets/Categories"
-
-# Define the categories with their titles and descriptions
-categories = [
-    {
-        "name": "healthy_breakfast", 
-        "title": "Healthy Breakfast", 
-        "description": "Start your day with nutritious and energizing meals"
-    },
-    {
-        "name": "mediterranean_diet", 
-        "title": "Mediterranean Diet", 
-        "description": "Heart-healthy choices inspired by Mediterranean cuisine"
-    },
-    {
-        "name": "protein_rich", 
-        "title": "Protein-Rich Meals", 
-        "description": "High-protein meals for muscle building and recovery"
-    }
-]
+assets_dir = categories_dir
+
+# Card colors for categories without a photo in temp_images/ (see card_palette.py)
+fallback_colors = {
+    "healthy_breakfast": (76, 175, 80),  # Green
+    "mediterranean_diet": (63, 81, 181),  # Blue
+    "protein_rich": (233, 30, 99)  # Pink
+}
+
 
-# Function to create a generic category image with text and color
-def create_category_image(category, color):
+# Function to create a generic category image with text and color, in every appearance (see card_appearance.py)
+def create_category_image(category, color, assets_dir=assets_dir, appearances=APPEARANCES, fmt="jpeg"):
     try:
         # Create a new image
         width, height = 360, 360
         img = Image.new('RGB', (width, height), color=color)
         draw = ImageDraw.Draw(img)
-        
-        # Add a gradient overlay
-        for y in range(height):
-            opacity = min(100, int(y / height * 200))
-            draw.line([(0, y), (width, y)], fill=(0, 0, 0, opacity))
-        
-        # Try to use a nice font, fallback to default if not available
-        try:
-            title_font = ImageFont.truetype("Arial Bold.ttf", 28)
-            desc_font = ImageFont.truetype("Arial.ttf", 16)
-        except IOError:
+
+        with span("font_load"):
+            # Try to use a nice font, fallback to default if not available
             try:
-                # macOS system fonts
-                title_font = ImageFont.truetype("/System/Library/Fonts/Supplemental/Arial Bold.ttf", 28)
-                desc_font = ImageFont.truetype("/System/Library/Fonts/Supplemental/Arial.ttf", 16)
+                title_font = ImageFont.truetype("Arial Bold.ttf", 28)
+                desc_font = ImageFont.truetype("Arial.ttf", 16)
             except IOError:
-                # Default bitmap font as a last resort
-                title_font = ImageFont.load_default()
-                desc_font = title_font
-        
-        # Add title text
+                try:
+                    # macOS system fonts
+                    title_font = ImageFont.truetype("/System/Library/Fonts/Supplemental/Arial Bold.ttf", 28)
+                    desc_font = ImageFont.truetype("/System/Library/Fonts/Supplemental/Arial.ttf", 16)
+                except IOError:
+                    # Default bitmap font as a last resort
+                    title_font = ImageFont.load_default()
+                    desc_font = title_font
+
+        # Lay out the title and description once for all appearances
         title_text = category["title"]
         title_bbox = draw.textbbox((0, 0), title_text, font=title_font)
         title_width = title_bbox[2] - title_bbox[0]
         title_height = title_bbox[3] - title_bbox[1]
         title_position = ((width - title_width) // 2, height // 2 - title_height)
-        
-        # Add shadow for text
-        shadow_offset = 2
-        draw.text(
-            (title_position[0] + shadow_offset, title_position[1] + shadow_offset),
-            title_text,
-            font=title_font,
-            fill=(0, 0, 0, 180)
-        )
-        
-        # Draw title
-        draw.text(
-            title_position,
-            title_text,
-            font=title_font,
-            fill=(255, 255, 255)
-        )
-        
-        # Draw description
+
         desc_text = category["description"]
         desc_bbox = draw.textbbox((0, 0), desc_text, font=desc_font)
         desc_width = desc_bbox[2] - desc_bbox[0]
         desc_height = desc_bbox[3] - desc_bbox[1]
         desc_position = ((width - desc_width) // 2, title_position[1] + title_height + 20)
-        
-        draw.text(
-            desc_position,
-            desc_text,
-            font=desc_font,
-            fill=(255, 255, 255, 220)
-        )
-        
-        # Save the image
+        # High contrast variants put a solid strip behind the text instead of darkening the whole card
+        text_strip = (title_position[1] - 16, desc_position[1] + desc_height + 20)
+
         target_dir = f"{assets_dir}/{category['name']}.imageset"
         os.makedirs(target_dir, exist_ok=True)
-        
-        img_path = f"{target_dir}/{category['name']}.jpg"
-        img.save(img_path, quality=95)
-        
+
+        for suffix, _, style in appearances:
+            # Add a gradient overlay over the whole card
+            with span("gradient", appearance=suffix or "any"):
+                card = apply_style(img, style, *(text_strip if style["solid"] else (0,)))
+            draw = ImageDraw.Draw(card)
+
+            with span("text", appearance=suffix or "any"):
+                # Add shadow for text
+                shadow_offset = 2
+                draw.text(
+                    (title_position[0] + shadow_offset, title_position[1] + shadow_offset),
+                    title_text,
+                    font=title_font,
+                    fill=(0, 0, 0)
+                )
+
+                # Draw title
+                draw.text(
+                    title_position,
+                    title_text,
+                    font=title_font,
+                    fill=style["title"]
+                )
+
+                # Draw description
+                draw.text(
+                    desc_position,
+                    desc_text,
+                    font=desc_font,
+                    fill=style["description"]
+                )
+
+            # Save the image
+            img_path = os.path.join(target_dir, rendition_name(category["name"], suffix, "1x", CARD_FORMATS[fmt]))
+            with span("encode", format=fmt):
+                save_card(card, img_path, fmt)
+
         print(f"Created category image for {category['title']}")
         return True
     except Exception as e:
         print(f"Error creating image for {category['title']}: {str(e)}")
         return False
 
+
 # Create updated Contents.json for each category
-def update_contents_json(category_name):
-    contents_path = f"{assets_dir}/{category_name}.imageset/Contents.json"
-    
+def update_contents_json(category_name, assets_dir=assets_dir, appearances=APPEARANCES, fmt="jpeg"):
+    imageset_dir = f"{assets_dir}/{category_name}.imageset"
+    contents_path = f"{imageset_dir}/Contents.json"
+
     contents = {
-        "images": [
-            {
-                "filename": f"{category_name}.jpg",
-                "idiom": "universal",
-                "scale": "1x"
-            }
-        ],
+        "images": contents_images(category_name, ["1x"], CARD_FORMATS[fmt], appearances),
         "info": {
             "author": "xcode",
             "version": 1
         }
     }
-    
-    with open(contents_path, 'w') as f:
+
+    with span("json_write"), open(contents_path, 'w') as f:
         json.dump(contents, f, indent=2)
-    
+    remove_unlisted_renditions(imageset_dir, contents["images"])
+
     print(f"Updated Contents.json for {category_name}")
 
-# Main process
-print("Starting category image generation...")
 
-# Define colors for each category
-colors = {
-    "healthy_breakfast": (76, 175, 80),  # Green
-    "mediterranean_diet": (63, 81, 181),  # Blue
-    "protein_rich": (233, 30, 99)  # Pink
-}
+def render_categories(categories=categories, colors=None, assets_dir=assets_dir, appearances=APPEARANCES, fmt="jpeg"):
+    """Render a card for each category and point its Contents.json at it"""
+    if colors is None:
+        colors = category_colors(categories, fallback_colors)
+    for cat in categories:
+        with span("card", name=cat["name"]):
+            # Create the category image with overlay
+            success = create_category_image(cat, colors[cat["name"]], assets_dir, appearances, fmt)
+
+            if success:
+                # Update Contents.json
+                update_contents_json(cat["name"], assets_dir, appearances, fmt)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render colored category cards")
+    parser.add_argument("--format", choices=list(CARD_FORMATS), default="jpeg", help="Rendition format")
+    args = parser.parse_args(argv)
+
+    print("Starting category image generation...")
+
+    render_categories(fmt=args.format)
+
+    print("\nAll category images have been generated!")
+    print("Now when you run your app, the category cards will show the images with text.")
+
 
-# Process each category
-for cat in categories:
-    # Create the category image with overlay
-    success = create_category_image(cat, colors[cat["name"]])
-    
-    if success:
-        # Update Contents.json
-        update_contents_json(cat["name"])
-
-print("\nAll category images have been generated!")
-print("Now when you run your app, the category cards will show the images with text.") 
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,116 +1,292 @@
 #!/usr/bin/env python3
+"""
+Category cards from one SVG template, as vector SVGs or build-time PNGs.
+
+The card template is compiled once into literal chunks and field names, so
+each card is a join of the chunks with its XML-escaped values. Titles with
+"&" or "<" no longer break the markup. Cards are written as:
+
+- svg: one vector SVG with preserves-vector-representation. The device
+  rasterizes it at run time.
+- png: 1x/2x/3x PNGs rasterized here, in parallel, so the device only
+  decodes a bitmap.
+
+PNG rasterization uses the first available of cairosvg (Python module),
+resvg and rsvg-convert (command-line tools). Note that cairosvg ignores the
+drop-shadow filter. --format sets the output for every card, and --raster
+picks individual cards to rasterize.
+
+Requirements:
+- For PNG output: cairosvg (pip install cairosvg), resvg or rsvg-convert
+
+Usage:
+python create_category_images.py                        # SVG cards
+python create_category_images.py --format png --workers 8
+python create_category_images.py --raster protein_rich  # PNG for one card, SVG for the rest
+"""
+
 import os
-import base64
+import re
+import sys
 import json
+import shutil
+import argparse
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from xml.sax.saxutils import escape
 
-# Define the categories with their colors and descriptions
-categories = [
-    {
-        "name": "healthy_breakfast", 
-        "title": "Healthy Breakfast", 
-        "description": "Start your day with nutritious and energizing meals",
-        "color": (76, 175, 80)  # Green
-    },
-    {
-        "name": "mediterranean_diet", 
-        "title": "Mediterranean Diet", 
-        "description": "Heart-healthy choices inspired by Mediterranean cuisine",
-        "color": (63, 81, 181)  # Blue
-    },
-    {
-        "name": "protein_rich", 
-        "title": "Protein-Rich Meals", 
-        "description": "High-protein meals for muscle building and recovery",
-        "color": (233, 30, 99)  # Pink
-    }
-]
+from asset_catalog import categories_dir, categories
+from asset_trace import span
+from card_palette import category_colors
 
 # Base directory for the assets
-assets_dir = "foodscannerpro/Assets.xcassets/Categories"
+assets_dir = categories_dir
 
-# Function to create a more styled SVG image with text
-def create_svg_image(name, title, description, color):
-    r, g, b = color
-    
-    # Create gradient colors
-    darker_r = max(0, r - 50)
-    darker_g = max(0, g - 50)
-    darker_b = max(0, b - 50)
-    
-    svg = f'''<?xml version="1.0" encoding="UTF-8" standalone="no"?>
-<svg width="180" height="180" xmlns="http://www.w3.org/2000/svg">
+# Card size in points; PNG renditions are this times the scale
+CARD_SIZE = 180
+SCALES = {"1x": 1, "2x": 2, "3x": 3}
+RASTER_BACKENDS = ("cairosvg", "resvg", "rsvg-convert")
+
+# Card colors for categories without a photo in temp_images/ (see card_palette.py)
+fallback_colors = {
+    "healthy_breakfast": (76, 175, 80),  # Green
+    "mediterranean_diet": (63, 81, 181),  # Blue
+    "protein_rich": (233, 30, 99)  # Pink
+}
+
+CARD_TEMPLATE = '''<?xml version="1.0" encoding="UTF-8" standalone="no"?>
+<svg width="{{size}}" height="{{size}}" viewBox="0 0 180 180" xmlns="http://www.w3.org/2000/svg">
     <!-- Background with gradient -->
     <defs>
         <linearGradient id="grad" x1="0%" y1="0%" x2="0%" y2="100%">
-            <stop offset="0%" style="stop-color:rgb({r},{g},{b});stop-opacity:1" />
-            <stop offset="100%" style="stop-color:rgb({darker_r},{darker_g},{darker_b});stop-opacity:1" />
+            <stop offset="0%" style="stop-color:{{top}};stop-opacity:1" />
+            <stop offset="100%" style="stop-color:{{bottom}};stop-opacity:1" />
         </linearGradient>
-        
+
         <!-- Shadow filter -->
         <filter id="shadow" x="-20%" y="-20%" width="140%" height="140%">
             <feDropShadow dx="2" dy="2" stdDeviation="2" flood-opacity="0.3" />
         </filter>
     </defs>
-    
+
     <!-- Card background -->
     <rect width="180" height="180" rx="15" ry="15" fill="url(#grad)" />
-    
+
     <!-- Overlay for text contrast -->
     <rect width="180" height="80" y="100" rx="0" ry="0" fill="rgba(0,0,0,0.3)" />
-    
+
     <!-- Title text -->
-    <text x="90" y="130" font-family="Arial, Helvetica, sans-serif" font-size="16" font-weight="bold" fill="white" text-anchor="middle" filter="url(#shadow)">{title}</text>
-    
+    <text x="90" y="130" font-family="Arial, Helvetica, sans-serif" font-size="16" font-weight="bold" fill="white" text-anchor="middle" filter="url(#shadow)">{{title}}</text>
+
     <!-- Description text -->
     <text x="90" y="155" font-family="Arial, Helvetica, sans-serif" font-size="10" fill="white" text-anchor="middle" opacity="0.9">
-        <tspan x="90" dy="0">{description}</tspan>
+        <tspan x="90" dy="0">{{description}}</tspan>
     </text>
-    
+
     <!-- Decorative elements -->
     <circle cx="90" cy="60" r="25" fill="white" opacity="0.2" />
 </svg>'''
-    return svg
+
+
+class SvgTemplate:
+    """An SVG with {{field}} slots, compiled once and filled with XML-escaped values"""
+
+    FIELD = re.compile(r"\{\{(\w+)\}\}")
+
+    def __init__(self, source):
+        # re.split with one group alternates literal text and field names
+        parts = self.FIELD.split(source)
+        self.chunks = parts[0::2]
+        self.fields = parts[1::2]
+
+    def render(self, **values):
+        # Quotes are escaped too so values are also safe inside attributes
+        escaped = [escape(str(values[field]), {'"': "&quot;", "'": "&apos;"}) for field in self.fields]
+        out = [self.chunks[0]]
+        for value, chunk in zip(escaped, self.chunks[1:]):
+            out += (value, chunk)
+        return "".join(out)
+
+
+card_template = SvgTemplate(CARD_TEMPLATE)
+
+
+# Function to create a more styled SVG image with text
+def create_svg_image(name, title, description, color, size=CARD_SIZE):
+    r, g, b = color
+    return card_template.render(
+        size=size,
+        top=f"rgb({r},{g},{b})",
+        # Create gradient colors
+        bottom=f"rgb({max(0, r - 50)},{max(0, g - 50)},{max(0, b - 50)})",
+        title=title,
+        description=description,
+    )
 
 # Function to save the SVG file
 def save_svg(svg_content, output_path):
     with open(output_path, 'w') as f:
         f.write(svg_content)
 
-# Create images for each category
-for cat in categories:
-    # Create the directory if it doesn't exist
-    output_dir = f"{assets_dir}/{cat['name']}.imageset"
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # Create SVG image
-    svg_content = create_svg_image(cat['name'], cat['title'], cat['description'], cat['color'])
-    
-    # Save SVG image
-    svg_path = f"{output_dir}/{cat['name']}.svg"
-    save_svg(svg_content, svg_path)
-    
-    print(f"Created SVG image for {cat['title']}")
-    
-    # Create a Contents.json file that uses the SVG
-    contents = {
-        "images": [
-            {
-                "filename": f"{cat['name']}.svg",
-                "idiom": "universal",
-                "scale": "1x"
-            }
-        ],
-        "info": {
-            "author": "xcode",
-            "version": 1
-        },
-        "properties": {
-            "preserves-vector-representation": True
+
+# --- Rasterization ---
+
+def find_raster_backend():
+    """Name of the first available SVG rasterizer, or None"""
+    try:
+        import cairosvg  # noqa: F401
+        return "cairosvg"
+    except (ImportError, OSError):
+        # OSError: the module is installed but the cairo library is not
+        pass
+    for tool in RASTER_BACKENDS[1:]:
+        if shutil.which(tool):
+            return tool
+    return None
+
+
+def rasterize(job):
+    """Render one (svg text, pixel size, output path, backend) job to a PNG"""
+    svg_content, pixels, output_path, backend = job
+    if backend == "cairosvg":
+        import cairosvg
+        cairosvg.svg2png(bytestring=svg_content.encode(), write_to=output_path,
+                         output_width=pixels, output_height=pixels)
+    elif backend == "resvg":
+        subprocess.run(["resvg", "--width", str(pixels), "--height", str(pixels), "-", output_path],
+                       input=svg_content.encode(), check=True, capture_output=True)
+    else:
+        subprocess.run(["rsvg-convert", "-w", str(pixels), "-h", str(pixels), "-o", output_path],
+                       input=svg_content.encode(), check=True, capture_output=True)
+    return output_path
+
+
+def rasterize_all(jobs, backend, workers=None):
+    """Run rasterize() jobs in parallel: processes for cairosvg (GIL-bound), threads for the command-line tools"""
+    executor = ProcessPoolExecutor if backend == "cairosvg" else ThreadPoolExecutor
+    with span("rasterize", cards=len(jobs)), executor(max_workers=workers) as pool:
+        return list(pool.map(rasterize, [(*job, backend) for job in jobs]))
+
+
+def png_rendition(name, scale):
+    return f"{name}.png" if scale == "1x" else f"{name}@{scale}.png"
+
+
+def make_contents(name, output):
+    if output == "svg":
+        return {
+            "images": [{"filename": f"{name}.svg", "idiom": "universal", "scale": "1x"}],
+            "info": {"author": "xcode", "version": 1},
+            "properties": {"preserves-vector-representation": True},
         }
+    return {
+        "images": [{"filename": png_rendition(name, scale), "idiom": "universal", "scale": scale} for scale in SCALES],
+        "info": {"author": "xcode", "version": 1},
     }
-    
-    # Save the Contents.json file
-    with open(f"{output_dir}/Contents.json", 'w') as f:
-        json.dump(contents, f, indent=2)
 
-print("All category images created successfully!") 
\ No newline at end of file
+
+def remove_stale_renditions(output_dir, keep):
+    """Delete the other format's files left from an earlier run"""
+    for filename in os.listdir(output_dir):
+        if filename.endswith((".svg", ".png")) and filename not in keep:
+            os.remove(os.path.join(output_dir, filename))
+
+
+# Create images for each category
+def render_svg_categories(categories=categories, colors=None, assets_dir=assets_dir, output="svg", workers=None,
+                          backend=None):
+    """Write each category card as an SVG or PNG renditions
+
+    output is "svg", "png", or a {category name: "svg" | "png"} dict for a
+    per-card choice (missing names get "svg"). PNGs are rasterized to
+    temporary files first; nothing in the catalog changes unless every one
+    of them succeeds. Raises RuntimeError otherwise.
+    """
+    if colors is None:
+        colors = category_colors(categories, fallback_colors)
+    formats = output if isinstance(output, dict) else {cat["name"]: output for cat in categories}
+    if any(formats.get(cat["name"], "svg") == "png" for cat in categories):
+        backend = backend or find_raster_backend()
+        if backend is None:
+            raise RuntimeError("PNG output needs cairosvg (pip install cairosvg), resvg or rsvg-convert")
+
+    jobs = []
+    renames = []
+    created_dirs = []
+    for cat in categories:
+        name = cat["name"]
+        if formats.get(name, "svg") != "png":
+            continue
+        output_dir = f"{assets_dir}/{name}.imageset"
+        if not os.path.isdir(output_dir):
+            os.makedirs(output_dir)
+            created_dirs.append(output_dir)
+        with span("template", name=name):
+            # Render each scale straight from the vector source rather than resampling one bitmap
+            for scale, factor in SCALES.items():
+                pixels = CARD_SIZE * factor
+                svg_content = create_svg_image(name, cat['title'], cat['description'], colors[name], pixels)
+                final_path = os.path.join(output_dir, png_rendition(name, scale))
+                tmp_path = os.path.join(output_dir, f".tmp-{png_rendition(name, scale)}")
+                jobs.append((svg_content, pixels, tmp_path))
+                renames.append((tmp_path, final_path))
+
+    if jobs:
+        print(f"Rasterizing {len(jobs)} PNG renditions with {backend}...")
+        try:
+            rasterize_all(jobs, backend, workers)
+        except Exception as e:
+            for tmp_path, _ in renames:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            for output_dir in created_dirs:
+                os.rmdir(output_dir)
+            raise RuntimeError(f"Rasterizing with {backend} failed, catalog left unchanged: {e}") from e
+
+    # Every rendition exists now: move them into place and switch each imageset over
+    for tmp_path, final_path in renames:
+        os.replace(tmp_path, final_path)
+    for cat in categories:
+        name = cat["name"]
+        card_output = formats.get(name, "svg")
+        output_dir = f"{assets_dir}/{name}.imageset"
+        if card_output == "svg":
+            os.makedirs(output_dir, exist_ok=True)
+            with span("template", name=name):
+                save_svg(create_svg_image(name, cat['title'], cat['description'], colors[name]),
+                         f"{output_dir}/{name}.svg")
+            keep = {f"{name}.svg"}
+        else:
+            keep = {png_rendition(name, scale) for scale in SCALES}
+
+        remove_stale_renditions(output_dir, keep)
+        with span("json_write"), open(f"{output_dir}/Contents.json", 'w') as f:
+            json.dump(make_contents(name, card_output), f, indent=2)
+
+        print(f"Created {card_output.upper()} image for {cat['title']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render category cards from the SVG template")
+    parser.add_argument("--format", choices=["svg", "png"], default="svg", help="Output for every card")
+    parser.add_argument("--raster", nargs="+", default=[], metavar="NAME", help="Rasterize only these cards to PNG")
+    parser.add_argument("--workers", type=int, help="Parallel rasterization workers (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    unknown = sorted(set(args.raster) - {cat["name"] for cat in categories})
+    if unknown:
+        print(f"❌ Unknown category for --raster: {', '.join(unknown)}")
+        print(f"   Categories: {', '.join(cat['name'] for cat in categories)}")
+        return 1
+    formats = {cat["name"]: "png" if cat["name"] in args.raster else args.format for cat in categories}
+    try:
+        render_svg_categories(output=formats, workers=args.workers)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+    print("All category images created successfully!")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
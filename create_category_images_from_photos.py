@@ -1,113 +1,115 @@
 #!/usr/bin/env python3
 import os
 import json
+import sys
 import shutil
+import argparse
+
 from PIL import Image, ImageDraw, ImageFont
 
+from asset_catalog import base_dir, categories_dir, categories
+from asset_trace import span
+from card_appearance import (APPEARANCES, CARD_FORMATS, apply_style, contents_images, remove_unlisted_renditions,
+                             rendition_name, save_card)
+from image_quality import MIN_SIDE, check_images
+from smart_crop import CATEGORY_ASPECT, default_cropper
+
+temp_dir = os.path.join(base_dir, "temp_images")
+
 # Define the image paths
 image_paths = {
-    "healthy_breakfast": "temp_images/healthy_breakfast_photo.jpg",  # Yogurt parfait
-    "mediterranean_diet": "temp_images/mediterranean_diet_photo.jpg",  # Mediterranean ingredients
-    "protein_rich": "temp_images/protein_rich_photo.jpg"  # Protein sources
+    "healthy_breakfast": os.path.join(temp_dir, "healthy_breakfast_photo.jpg"),  # Yogurt parfait
+    "mediterranean_diet": os.path.join(temp_dir, "mediterranean_diet_photo.jpg"),  # Mediterranean ingredients
+    "protein_rich": os.path.join(temp_dir, "protein_rich_photo.jpg")  # Protein sources
 }
 
-# Define the categories with their titles and descriptions
-categories = [
-    {
-        "name": "healthy_breakfast", 
-        "title": "Healthy Breakfast", 
-        "description": "Start your day with nutritious and energizing meals"
-    },
-    {
-        "name": "mediterranean_diet", 
-        "title": "Mediterranean Diet", 
-        "description": "Heart-healthy choices inspired by Mediterranean cuisine"
-    },
-    {
-        "name": "protein_rich", 
-        "title": "Protein-Rich Meals", 
-        "description": "High-protein meals for muscle building and recovery"
-    }
-]
-
 # Base directory for the assets
-assets_dir = "foodscannerpro/Assets.xcassets/Categories"
+assets_dir = categories_dir
+
+# Height of the dark band behind the title and description (2x pixels)
+BAND_HEIGHT = 140
 
-# Function to create an image with text overlay
-def create_category_image_with_overlay(source_path, category):
+
+def load_fonts():
+    """Title and description fonts, falling back to Pillow's default font"""
     try:
-        # Open the original image
-        img = Image.open(source_path)
-        
-        # Resize to 180x180
-        img = img.resize((360, 360))  # Making it 2x for better quality
-        
-        # Create a semi-transparent overlay at the bottom
-        draw = ImageDraw.Draw(img)
-        
-        # Add a dark gradient overlay at the bottom
-        height = img.height
-        for i in range(80):
-            # Create a gradually increasing opacity from top to bottom of overlay
-            opacity = int(180 * (i / 80))  # Max opacity of 180 (out of 255)
-            draw.rectangle(
-                [(0, height - 80 + i), (img.width, height - 80 + i + 1)],
-                fill=(0, 0, 0, opacity)
-            )
-        
-        # Try to use a nice font, fallback to default if not available
+        return ImageFont.truetype("Arial Bold.ttf", 24), ImageFont.truetype("Arial.ttf", 14)
+    except IOError:
         try:
-            title_font = ImageFont.truetype("Arial Bold.ttf", 24)
-            desc_font = ImageFont.truetype("Arial.ttf", 14)
+            # macOS system fonts
+            return (ImageFont.truetype("/System/Library/Fonts/Supplemental/Arial Bold.ttf", 24),
+                    ImageFont.truetype("/System/Library/Fonts/Supplemental/Arial.ttf", 14))
         except IOError:
-            try:
-                # macOS system fonts
-                title_font = ImageFont.truetype("/System/Library/Fonts/Supplemental/Arial Bold.ttf", 24)
-                desc_font = ImageFont.truetype("/System/Library/Fonts/Supplemental/Arial.ttf", 14)
-            except IOError:
-                # Default bitmap font as a last resort
-                title_font = ImageFont.load_default()
-                desc_font = title_font
-        
-        # Add title text
-        title_text = category["title"]
-        title_bbox = draw.textbbox((0, 0), title_text, font=title_font)
-        title_width = title_bbox[2] - title_bbox[0]
-        title_position = ((img.width - title_width) // 2, height - 60)
-        
-        # Add text shadow
-        draw.text((title_position[0] + 2, title_position[1] + 2), title_text, font=title_font, fill=(0, 0, 0, 180))
-        # Draw title
-        draw.text(title_position, title_text, font=title_font, fill=(255, 255, 255, 230))
-        
-        # Add description text
-        desc_text = category["description"]
-        desc_bbox = draw.textbbox((0, 0), desc_text, font=desc_font)
-        desc_width = desc_bbox[2] - desc_bbox[0]
-        desc_position = ((img.width - desc_width) // 2, height - 30)
-        
-        # Draw description
-        draw.text(desc_position, desc_text, font=desc_font, fill=(255, 255, 255, 200))
-        
-        # Save the image
+            # Default bitmap font as a last resort
+            font = ImageFont.load_default()
+            return font, font
+
+
+def text_layout(img, category, title_font, desc_font):
+    """Positions of the title and description at the bottom of the card"""
+    draw = ImageDraw.Draw(img)
+    title_bbox = draw.textbbox((0, 0), category["title"], font=title_font)
+    desc_bbox = draw.textbbox((0, 0), category["description"], font=desc_font)
+    return {
+        "title": ((img.width - (title_bbox[2] - title_bbox[0])) // 2, img.height - 60),
+        "description": ((img.width - (desc_bbox[2] - desc_bbox[0])) // 2, img.height - 30),
+    }
+
+
+# Function to create an image with text overlay, in every appearance (see card_appearance.py)
+def create_category_image_with_overlay(source_path, category, assets_dir=assets_dir, cropper=None, appearances=APPEARANCES,
+                                      box=None, fmt="jpeg"):
+    try:
+        # Open the original image
+        with span("decode"):
+            img = Image.open(source_path)
+            img.load()
+
+        # Crop around the food to a square and resize to 180x180 at 2x
+        img = (cropper or default_cropper()).crop(img, source_path, (360, 360), box)
+
+        with span("font_load"):
+            title_font, desc_font = load_fonts()
+        layout = text_layout(img, category, title_font, desc_font)
+
         target_dir = f"{assets_dir}/{category['name']}.imageset"
         os.makedirs(target_dir, exist_ok=True)
-        
-        # Save as 1x, 2x and 3x versions
-        img_path_1x = f"{target_dir}/{category['name']}.jpg"
-        img_path_2x = f"{target_dir}/{category['name']}@2x.jpg"
-        img_path_3x = f"{target_dir}/{category['name']}@3x.jpg"
-        
-        # Save the original size as 2x
-        img.save(img_path_2x, quality=95)
-        
-        # Create and save a 1x version (half size)
-        img_1x = img.resize((180, 180), Image.LANCZOS)
-        img_1x.save(img_path_1x, quality=90)
-        
-        # For 3x, we'll just copy the 2x version since we don't have a larger original
-        shutil.copy2(img_path_2x, img_path_3x)
-        
+
+        for suffix, _, style in appearances:
+            # Darken and add the gradient band behind the text, then the text on top
+            with span("gradient", appearance=suffix or "any"):
+                card = apply_style(img, style, img.height - BAND_HEIGHT)
+
+            with span("text", appearance=suffix or "any"):
+                draw = ImageDraw.Draw(card)
+                title_position = layout["title"]
+                # Add text shadow
+                draw.text((title_position[0] + 2, title_position[1] + 2), category["title"], font=title_font, fill=(0, 0, 0))
+                # Draw title
+                draw.text(title_position, category["title"], font=title_font, fill=style["title"])
+                # Draw description
+                draw.text(layout["description"], category["description"], font=desc_font, fill=style["description"])
+
+            # Save as 1x, 2x and 3x versions
+            ext = CARD_FORMATS[fmt]
+            img_path_1x = os.path.join(target_dir, rendition_name(category["name"], suffix, "1x", ext))
+            img_path_2x = os.path.join(target_dir, rendition_name(category["name"], suffix, "2x", ext))
+            img_path_3x = os.path.join(target_dir, rendition_name(category["name"], suffix, "3x", ext))
+
+            # Save the original size as 2x
+            with span("encode", scale="2x"):
+                save_card(card, img_path_2x, fmt, 95)
+
+            # Create and save a 1x version (half size)
+            with span("resize", scale="1x"):
+                card_1x = card.resize((180, 180), Image.LANCZOS)
+            with span("encode", scale="1x"):
+                save_card(card_1x, img_path_1x, fmt, 90)
+
+            # For 3x, we'll just copy the 2x version since we don't have a larger original
+            with span("copy", scale="3x"):
+                shutil.copy2(img_path_2x, img_path_3x)
+
         print(f"Created category image for {category['title']}")
         return True
     except Exception as e:
@@ -115,66 +117,91 @@ def create_category_image_with_overlay(source_path, category):
         return False
 
 # Create updated Contents.json for each category
-def update_contents_json(category_name):
-    contents_path = f"{assets_dir}/{category_name}.imageset/Contents.json"
+def update_contents_json(category_name, assets_dir=assets_dir, appearances=APPEARANCES, fmt="jpeg"):
+    imageset_dir = f"{assets_dir}/{category_name}.imageset"
+    contents_path = f"{imageset_dir}/Contents.json"
     
     contents = {
-        "images": [
-            {
-                "filename": f"{category_name}.jpg",
-                "idiom": "universal",
-                "scale": "1x"
-            },
-            {
-                "filename": f"{category_name}@2x.jpg",
-                "idiom": "universal",
-                "scale": "2x"
-            },
-            {
-                "filename": f"{category_name}@3x.jpg",
-                "idiom": "universal",
-                "scale": "3x"
-            }
-        ],
+        "images": contents_images(category_name, ["1x", "2x", "3x"], CARD_FORMATS[fmt], appearances),
         "info": {
             "author": "xcode",
             "version": 1
         }
     }
     
-    with open(contents_path, 'w') as f:
+    with span("json_write"), open(contents_path, 'w') as f:
         json.dump(contents, f, indent=2)
+    remove_unlisted_renditions(imageset_dir, contents["images"])
     
     print(f"Updated Contents.json for {category_name}")
 
-# Main process
-print("Starting category image processing...")
-
-# Create temp_images directory if it doesn't exist
-os.makedirs("temp_images", exist_ok=True)
-
-# Check if the source images exist
-missing_images = []
-for cat in categories:
-    if not os.path.exists(image_paths[cat["name"]]):
-        missing_images.append((cat["name"], image_paths[cat["name"]]))
-
-if missing_images:
-    print("Warning: Some source images are missing!")
-    print("Please save the following images to continue:")
-    for name, path in missing_images:
-        print(f"  - {path} for {name}")
-    print("\nPlease run this script again after saving the images.")
-    exit(1)
-
-# Process each category
-for cat in categories:
-    # Create the category image with overlay
-    success = create_category_image_with_overlay(image_paths[cat["name"]], cat)
-    
-    if success:
-        # Update Contents.json
-        update_contents_json(cat["name"])
+def find_missing_images(categories=categories, image_paths=image_paths, min_side=MIN_SIDE, skip_quality=False):
+    """Return (name, path) for each category whose source photo is missing or fails image_quality.py
+
+    The 0-byte files and "Please replace this..." cards left by
+    download_category_images.py count as missing.
+    """
+    present = [image_paths[cat["name"]] for cat in categories if os.path.exists(image_paths[cat["name"]])]
+    quality = check_images(present, min_side, skip=skip_quality)
+    return [
+        (cat["name"], image_paths[cat["name"]])
+        for cat in categories
+        if image_paths[cat["name"]] not in quality or not quality[image_paths[cat["name"]]]["ok"]
+    ]
+
+
+def render_photo_categories(categories=categories, image_paths=image_paths, assets_dir=assets_dir, cropper=None,
+                            appearances=APPEARANCES, fmt="jpeg"):
+    """Overlay each category's photo with its title and write the renditions"""
+    cropper = cropper or default_cropper()
+    # Find every crop in one pass so the detector runs in batches, not once per card
+    sources = [image_paths[cat["name"]] for cat in categories if os.path.exists(image_paths[cat["name"]])]
+    try:
+        boxes = cropper.crop_boxes(sources, CATEGORY_ASPECT)
+    except Exception as e:
+        print(f"Warning: batch crop failed ({str(e)}), cropping card by card")
+        boxes = {}
+    for cat in categories:
+        with span("card", name=cat["name"]):
+            # Create the category image with overlay
+            source = image_paths[cat["name"]]
+            success = create_category_image_with_overlay(source, cat, assets_dir, cropper, appearances, boxes.get(source), fmt)
+
+            if success:
+                # Update Contents.json
+                update_contents_json(cat["name"], assets_dir, appearances, fmt)
+    cropper.save()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render category cards from the photos in temp_images/")
+    parser.add_argument("--format", choices=list(CARD_FORMATS), default="jpeg", help="Rendition format")
+    parser.add_argument("--min-side", type=int, default=MIN_SIDE, help="Smallest accepted short side in pixels")
+    parser.add_argument("--skip-quality", action="store_true", help="Use the photos without the image quality gate")
+    args = parser.parse_args(argv)
+
+    print("Starting category image processing...")
+
+    # Create temp_images directory if it doesn't exist
+    os.makedirs(temp_dir, exist_ok=True)
+
+    # Check if the source images exist
+    missing_images = find_missing_images(min_side=args.min_side, skip_quality=args.skip_quality)
+
+    if missing_images:
+        print("Warning: Some source images are missing or unusable!")
+        print("Please save the following images to continue:")
+        for name, path in missing_images:
+            print(f"  - {path} for {name}")
+        print("\nPlease run this script again after saving the images.")
+        return 1
+
+    render_photo_categories(fmt=args.format)
+
+    print("\nAll category images have been processed!")
+    print("Now when you run your app, it will show the real food photos in the category cards.")
+    return 0
+
 
-print("\nAll category images have been processed!")
-print("Now when you run your app, it will show the real food photos in the category cards.") 
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
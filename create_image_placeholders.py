@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Placeholder Precomputation for Food Scanner Pro
+
+Computes a BlurHash string and a tiny low-quality image placeholder (LQIP) for
+every image in Assets.xcassets/FeaturedMeals and Assets.xcassets/Categories,
+so meal cards have something to show before the full JPEG decodes.
+
+The BlurHash DCT runs on a batch of images at once with NumPy. Results are
+cached by image content hash in .asset_cache/, so re-runs only touch images
+that changed.
+
+Requirements:
+- Pillow
+- numpy
+
+Usage:
+python create_image_placeholders.py [--json foodscannerpro/Resources/MealPlaceholders.json]
+"""
+
+import os
+import io
+import json
+import base64
+import argparse
+
+import numpy as np
+from PIL import Image
+
+from asset_catalog import (
+    base_dir,
+    featured_meals_dir,
+    categories_dir,
+    iter_imagesets,
+    primary_image,
+    file_digest,
+    ContentCache,
+)
+from asset_trace import span
+
+# Output
+swift_output_path = os.path.join(base_dir, "foodscannerpro/Models/MealPlaceholders.swift")
+
+# BlurHash settings
+COMPONENTS_X = 4
+COMPONENTS_Y = 3
+WORK_SIZE = 32  # Images are reduced to WORK_SIZE x WORK_SIZE before the DCT
+
+# LQIP settings
+LQIP_SIZE = 16
+LQIP_QUALITY = 40
+
+BATCH_SIZE = 64
+
+BASE83_CHARS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+
+def encode_base83(value, length):
+    """Encode an integer as a fixed-length base83 string"""
+    result = ""
+    for i in range(1, length + 1):
+        digit = (int(value) // (83 ** (length - i))) % 83
+        result += BASE83_CHARS[digit]
+    return result
+
+
+def srgb_to_linear(values):
+    """Convert 0-255 sRGB values to linear light"""
+    v = values / 255.0
+    return np.where(v <= 0.04045, v / 12.92, ((v + 0.055) / 1.055) ** 2.4)
+
+
+def linear_to_srgb(values):
+    """Convert linear light values to 0-255 sRGB integers"""
+    v = np.clip(values, 0.0, 1.0)
+    srgb = np.where(v <= 0.0031308, v * 12.92, 1.055 * np.power(v, 1 / 2.4) - 0.055)
+    return np.floor(srgb * 255 + 0.5).astype(np.int64)
+
+
+def blurhash_batch(pixels, components_x=COMPONENTS_X, components_y=COMPONENTS_Y):
+    """Compute BlurHash strings for a batch of equally sized RGB images.
+
+    pixels is a uint8 array of shape (batch, height, width, 3). The DCT factors
+    for the whole batch come from two matrix products, so the per-image Python
+    work is only the final base83 string assembly.
+    """
+    batch, height, width, _ = pixels.shape
+    linear = srgb_to_linear(pixels.astype(np.float64))
+
+    basis_x = np.cos(np.pi * np.outer(np.arange(components_x), np.arange(width)) / width)
+    basis_y = np.cos(np.pi * np.outer(np.arange(components_y), np.arange(height)) / height)
+
+    # factors[b, j, i, c] = sum_y sum_x basis_y[j, y] * basis_x[i, x] * linear[b, y, x, c]
+    factors = np.einsum("jy,ix,byxc->bjic", basis_y, basis_x, linear, optimize=True)
+    normalisation = np.full((components_y, components_x), 2.0)
+    normalisation[0, 0] = 1.0
+    factors *= normalisation[None, :, :, None] / (width * height)
+    factors = factors.reshape(batch, components_x * components_y, 3)
+
+    dc = factors[:, 0, :]
+    ac = factors[:, 1:, :]
+
+    # DC: packed sRGB colour
+    dc_srgb = linear_to_srgb(dc)
+    dc_values = (dc_srgb[:, 0] << 16) + (dc_srgb[:, 1] << 8) + dc_srgb[:, 2]
+
+    # AC: quantised relative to the largest component of each image
+    if ac.shape[1]:
+        actual_max = np.abs(ac).reshape(batch, -1).max(axis=1)
+        quantised_max = np.clip(np.floor(actual_max * 166 - 0.5), 0, 82).astype(np.int64)
+        maximum_value = (quantised_max + 1) / 166
+        scaled = ac / maximum_value[:, None, None]
+        signed_pow = np.sign(scaled) * np.sqrt(np.abs(scaled))
+        quantised = np.clip(np.floor(signed_pow * 9 + 9.5), 0, 18).astype(np.int64)
+        ac_values = quantised[:, :, 0] * 19 * 19 + quantised[:, :, 1] * 19 + quantised[:, :, 2]
+    else:
+        quantised_max = np.zeros(batch, dtype=np.int64)
+        ac_values = np.zeros((batch, 0), dtype=np.int64)
+
+    size_flag = encode_base83((components_x - 1) + (components_y - 1) * 9, 1)
+    hashes = []
+    for b in range(batch):
+        blurhash = size_flag + encode_base83(quantised_max[b], 1) + encode_base83(dc_values[b], 4)
+        blurhash += "".join(encode_base83(value, 2) for value in ac_values[b])
+        hashes.append(blurhash)
+    return hashes
+
+
+def load_image(path):
+    """Decode an image, letting the JPEG decoder downscale where it can"""
+    img = Image.open(path)
+    original_size = img.size
+    img.draft("RGB", (WORK_SIZE * 2, WORK_SIZE * 2))
+    return img.convert("RGB"), original_size
+
+
+def make_lqip(img):
+    """Encode a tiny JPEG of the image as base64"""
+    thumb = img.copy()
+    thumb.thumbnail((LQIP_SIZE, LQIP_SIZE), Image.LANCZOS)
+    buffer = io.BytesIO()
+    thumb.save(buffer, format="JPEG", quality=LQIP_QUALITY, optimize=True)
+    return base64.b64encode(buffer.getvalue()).decode("ascii"), thumb.size
+
+
+def compute_placeholders(jobs):
+    """Compute placeholder entries for (name, path) jobs, returning {path: entry}"""
+    results = {}
+    for start in range(0, len(jobs), BATCH_SIZE):
+        chunk = jobs[start:start + BATCH_SIZE]
+        pixels = []
+        extras = []
+        decoded = []
+        for name, path in chunk:
+            try:
+                with span("decode"):
+                    img, original_size = load_image(path)
+            except Exception as e:
+                print(f"❌ Failed to decode {name}: {str(e)}")
+                continue
+            with span("lqip"):
+                lqip, lqip_size = make_lqip(img)
+            with span("resize"):
+                work = img.resize((WORK_SIZE, WORK_SIZE), Image.BILINEAR)
+            pixels.append(np.asarray(work, dtype=np.uint8))
+            extras.append((original_size, lqip, lqip_size))
+            decoded.append((name, path))
+        if not decoded:
+            continue
+
+        with span("blurhash_dct", batch=len(pixels)):
+            hashes = blurhash_batch(np.stack(pixels))
+        for (name, path), blurhash, (original_size, lqip, lqip_size) in zip(decoded, hashes, extras):
+            results[path] = {
+                "blurhash": blurhash,
+                "lqip": lqip,
+                "lqip_width": lqip_size[0],
+                "lqip_height": lqip_size[1],
+                "width": original_size[0],
+                "height": original_size[1],
+            }
+    return results
+
+
+def collect_images():
+    """Return (name, image_path) for every imageset that has an image"""
+    images = []
+    for catalog_dir in (featured_meals_dir, categories_dir):
+        for name, imageset_dir in iter_imagesets(catalog_dir):
+            path = primary_image(imageset_dir)
+            if path is None:
+                print(f"⚠️  Skipping {name}: no image in imageset")
+                continue
+            images.append((name, path))
+    return images
+
+
+def build_placeholders(images):
+    """Resolve placeholders for every image, computing only cache misses"""
+    cache = ContentCache("placeholders", version=f"{COMPONENTS_X}x{COMPONENTS_Y}-{WORK_SIZE}-{LQIP_SIZE}-{LQIP_QUALITY}")
+    with span("hash"):
+        digests = {name: file_digest(path) for name, path in images}
+
+    # Identical photos in several imagesets are only computed once
+    jobs = {}
+    for name, path in images:
+        digest = digests[name]
+        if digest not in jobs and cache.get(digest) is None:
+            jobs[digest] = (name, path)
+
+    computed = compute_placeholders(list(jobs.values()))
+    for digest, (name, path) in jobs.items():
+        if path in computed:
+            cache.put(digest, computed[path])
+    cache.save()
+
+    placeholders = {
+        name: cache.entries[digests[name]]
+        for name, _ in images
+        if digests[name] in cache.entries
+    }
+
+    print(f"Computed {len(jobs)} placeholders, reused {cache.hits} from cache")
+    return placeholders
+
+
+def swift_string(value):
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def write_swift(placeholders, output_path):
+    """Emit the placeholder lookup as a generated Swift file"""
+    lines = [
+        "// Generated by create_image_placeholders.py - do not edit by hand.",
+        "import Foundation",
+        "",
+        "struct MealPlaceholder {",
+        "    let blurHash: String",
+        "    /// Base64-encoded tiny JPEG",
+        "    let lqip: String",
+        "    let width: Int",
+        "    let height: Int",
+        "",
+        "    var lqipData: Data? {",
+        "        Data(base64Encoded: lqip)",
+        "    }",
+        "}",
+        "",
+        "enum MealPlaceholders {",
+        "    static let all: [String: MealPlaceholder] = [" + ("" if placeholders else ":"),
+    ]
+    for name in sorted(placeholders):
+        entry = placeholders[name]
+        lines.append(
+            f"        {swift_string(name)}: MealPlaceholder(blurHash: {swift_string(entry['blurhash'])}, "
+            f"lqip: {swift_string(entry['lqip'])}, width: {entry['width']}, height: {entry['height']}),"
+        )
+    lines += [
+        "    ]",
+        "",
+        "    static func placeholder(for imageName: String) -> MealPlaceholder? {",
+        "        all[imageName]",
+        "    }",
+        "}",
+        "",
+    ]
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, "w") as f:
+        f.write("\n".join(lines))
+
+
+def write_json(placeholders, output_path):
+    """Emit the placeholder lookup as JSON keyed by image name"""
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w") as f:
+        json.dump({name: placeholders[name] for name in sorted(placeholders)}, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute BlurHash and LQIP placeholders for meal assets")
+    parser.add_argument("--swift", default=swift_output_path, help="Generated Swift lookup path")
+    parser.add_argument("--json", help="Also write the lookup as JSON to this path")
+    args = parser.parse_args(argv)
+
+    print("Collecting asset catalog images...")
+    images = collect_images()
+    placeholders = build_placeholders(images)
+
+    with span("swift_write"):
+        write_swift(placeholders, args.swift)
+    print(f"✅ Wrote {len(placeholders)} placeholders to {args.swift}")
+    if args.json:
+        with span("json_write"):
+            write_json(placeholders, args.json)
+        print(f"✅ Wrote {len(placeholders)} placeholders to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,52 +1,19 @@
 #!/usr/bin/env python3
 import os
 import json
+import zlib
+
 from PIL import Image, ImageDraw, ImageFont
-import random
+
+from asset_catalog import base_dir, featured_meals_dir, meal_names
+from asset_trace import span
+from card_palette import PaletteExtractor
 
 # Directories
-base_dir = "/Users/samueleskenasy/xCode applications/foodscannerpro"
 image_dir = os.path.join(base_dir, "MealImages")
-assets_dir = os.path.join(base_dir, "foodscannerpro/Assets.xcassets/FeaturedMeals")
-
-# Create image directory if it doesn't exist
-os.makedirs(image_dir, exist_ok=True)
-
-# List of meal names
-meal_names = [
-    "greek_yogurt_parfait", 
-    "avocado_toast",
-    "oatmeal_bowl",
-    "smoothie_bowl",
-    "protein_pancakes",
-    "veggie_frittata",
-    "chia_pudding",
-    "breakfast_burrito",
-    "quinoa_breakfast",
-    "cottage_cheese_toast",
-    "greek_salad",
-    "grilled_fish",
-    "hummus_plate",
-    "ratatouille",
-    "mediterranean_pasta",
-    "falafel_wrap",
-    "seafood_paella",
-    "tabbouleh",
-    "stuffed_peppers",
-    "shakshuka",
-    "grilled_chicken",
-    "salmon_bowl",
-    "turkey_meatballs",
-    "lentil_curry",
-    "tuna_steak",
-    "protein_bowl",
-    "tofu_stirfry",
-    "yogurt_bowl",
-    "egg_white_omelette",
-    "shrimp_skewers"
-]
+assets_dir = featured_meals_dir
 
-# Colors for backgrounds
+# Background colors for meals without a photo (see card_palette.py)
 colors = [
     (255, 200, 200), # Light Red
     (200, 255, 200), # Light Green
@@ -80,13 +47,24 @@ contents_json = {
     }
 }
 
-def create_placeholder(meal_name, size=(600, 400)):
+def text_size(draw, text, font):
+    """Width and height of rendered text (ImageDraw.textsize was removed in Pillow 10)"""
+    left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+    return right - left, bottom - top
+
+
+def placeholder_color(meal_name):
+    """Fallback background color, the same for a meal on every run"""
+    return colors[zlib.crc32(meal_name.encode()) % len(colors)]
+
+
+def create_placeholder(meal_name, size=(600, 400), bg_color=None):
     """Create a placeholder image with the meal name and a background color"""
     # Format the display name from the meal name
     display_name = meal_name.replace("_", " ").title()
     
-    # Create a new image with a random background color
-    bg_color = random.choice(colors)
+    # Create a new image with the given background color
+    bg_color = bg_color or placeholder_color(meal_name)
     image = Image.new('RGB', size, color=bg_color)
     draw = ImageDraw.Draw(image)
     
@@ -100,7 +78,7 @@ def create_placeholder(meal_name, size=(600, 400)):
         font_small = font_large
     
     # Draw text centered on the image
-    text_width, text_height = draw.textsize(display_name, font=font_large)
+    text_width, text_height = text_size(draw, display_name, font_large)
     position = ((size[0] - text_width) / 2, (size[1] - text_height) / 2 - 20)
     
     # Draw a rounded rectangle for the text background
@@ -130,38 +108,59 @@ def create_placeholder(meal_name, size=(600, 400)):
     
     # Draw "Placeholder" text at the bottom
     footer_text = "Food Scanner Pro | Meal Image Placeholder"
-    footer_width, footer_height = draw.textsize(footer_text, font=font_small)
+    footer_width, footer_height = text_size(draw, footer_text, font_small)
     footer_position = ((size[0] - footer_width) / 2, size[1] - footer_height - 20)
     draw.text(footer_position, footer_text, font=font_small, fill=(50, 50, 50))
     
     return image
 
 # Generate and save placeholder images
-for meal_name in meal_names:
-    try:
-        # Create the placeholder image
-        image = create_placeholder(meal_name)
-        
-        # Save to the temporary directory
-        image_path = os.path.join(image_dir, f"{meal_name}.png")
-        image.save(image_path)
-        
-        # Get the imageset directory
-        imageset_dir = os.path.join(assets_dir, f"{meal_name}.imageset")
-        os.makedirs(imageset_dir, exist_ok=True)
-        
-        # Copy to the imageset directory
-        target_path = os.path.join(imageset_dir, "image.png")
-        image.save(target_path)
-        
-        # Create/update the Contents.json file
-        with open(os.path.join(imageset_dir, "Contents.json"), "w") as f:
-            json.dump(contents_json, f, indent=2)
-        
-        print(f"✅ Created placeholder for {meal_name}")
-        
-    except Exception as e:
-        print(f"❌ Failed to create placeholder for {meal_name}: {str(e)}")
-
-print("\nAll placeholder images have been created and added to the asset catalog")
-print("Now open your Xcode project to see the images in use") 
\ No newline at end of file
+def create_placeholder_images(names=meal_names, image_dir=image_dir, assets_dir=assets_dir):
+    # Create image directory if it doesn't exist
+    os.makedirs(image_dir, exist_ok=True)
+    palettes = PaletteExtractor()
+
+    for meal_name in names:
+        try:
+            # A light tint of the meal's photo keeps the black text readable (WCAG AA)
+            photo_path = os.path.join(image_dir, f"{meal_name}.jpg")
+            bg_color = palettes.color(photo_path, role="tint", fallback=placeholder_color(meal_name))
+
+            # Create the placeholder image
+            with span("render"):
+                image = create_placeholder(meal_name, bg_color=bg_color)
+
+            # Save to the temporary directory
+            image_path = os.path.join(image_dir, f"{meal_name}.png")
+            with span("encode"):
+                image.save(image_path)
+
+            # Get the imageset directory
+            imageset_dir = os.path.join(assets_dir, f"{meal_name}.imageset")
+            os.makedirs(imageset_dir, exist_ok=True)
+
+            # Copy to the imageset directory
+            target_path = os.path.join(imageset_dir, "image.png")
+            with span("encode"):
+                image.save(target_path)
+
+            # Create/update the Contents.json file
+            with span("json_write"), open(os.path.join(imageset_dir, "Contents.json"), "w") as f:
+                json.dump(contents_json, f, indent=2)
+
+            print(f"✅ Created placeholder for {meal_name}")
+
+        except Exception as e:
+            print(f"❌ Failed to create placeholder for {meal_name}: {str(e)}")
+    palettes.save()
+
+
+def main():
+    create_placeholder_images()
+
+    print("\nAll placeholder images have been created and added to the asset catalog")
+    print("Now open your Xcode project to see the images in use")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Find imagesets in FeaturedMeals and Categories whose images are byte-identical.
+
+Usage:
+python dedupe_assets.py           # report duplicate sets and the bytes they use
+python dedupe_assets.py --apply   # delete the duplicates, keeping one set per image
+
+The kept set is the one named in meal_names/categories if there is one,
+otherwise the alphabetically first. Check the Swift sources for references
+to the removed names before committing the result.
+"""
+
+import os
+import shutil
+import argparse
+
+from asset_catalog import (
+    featured_meals_dir,
+    categories_dir,
+    iter_imagesets,
+    primary_image,
+    file_digest,
+    meal_names,
+    categories,
+)
+
+canonical_names = set(meal_names) | {cat["name"] for cat in categories}
+
+
+def find_duplicate_imagesets(catalog_dirs=(featured_meals_dir, categories_dir)):
+    """Return a list of (keep, [(name, imageset_dir, size)]) groups of identical imagesets"""
+    groups = {}
+    for catalog_dir in catalog_dirs:
+        for name, imageset_dir in iter_imagesets(catalog_dir):
+            path = primary_image(imageset_dir)
+            if path is None:
+                continue
+            groups.setdefault(file_digest(path), []).append((name, imageset_dir, os.path.getsize(path)))
+
+    duplicates = []
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        members.sort(key=lambda m: (m[0] not in canonical_names, m[0]))
+        duplicates.append((members[0], members[1:]))
+    duplicates.sort(key=lambda group: group[0][0])
+    return duplicates
+
+
+def dedupe_assets(apply=False):
+    duplicates = find_duplicate_imagesets()
+    if not duplicates:
+        print("No duplicate imagesets found")
+        return 0
+
+    total = 0
+    for (keep_name, _, _), removable in duplicates:
+        print(f"🔁 {keep_name}")
+        for name, imageset_dir, size in removable:
+            total += size
+            print(f"   - {name} ({size / 1024:.1f} KB)")
+            if apply:
+                shutil.rmtree(imageset_dir)
+    action = "Removed" if apply else "Could remove"
+    print(f"\n{action} {sum(len(r) for _, r in duplicates)} duplicate imagesets ({total / 1024:.1f} KB)")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Find byte-identical imagesets in the asset catalog")
+    parser.add_argument("--apply", action="store_true", help="Delete the duplicate imagesets")
+    args = parser.parse_args(argv)
+    return dedupe_assets(apply=args.apply)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,17 @@
 #!/usr/bin/env python3
 import os
-import urllib.request
 import shutil
 import json
 import time
 
+from asset_catalog import base_dir, featured_meals_dir
+from asset_trace import span
+from image_quality import MIN_SIDE, check_images, quarantine
+from smart_crop import FEATURED_ASPECT, default_cropper
+
 # Directories
-base_dir = "/Users/samueleskenasy/xCode applications/foodscannerpro"
 image_dir = os.path.join(base_dir, "MealImages")
-assets_dir = os.path.join(base_dir, "foodscannerpro/Assets.xcassets/FeaturedMeals")
-
-# Create image directory if it doesn't exist
-os.makedirs(image_dir, exist_ok=True)
+assets_dir = featured_meals_dir
 
 # Meal data with image URLs
 meal_images = {
@@ -75,33 +75,98 @@ contents_json = {
     }
 }
 
+# Write a downloaded photo into its imageset, cropped around the food to the featured meal card's aspect
+def write_meal_image(image_path, target_path, cropper=None, aspect=FEATURED_ASPECT, box=None):
+    """Returns "cropped", or "copied" when there is no cropper or the crop fails (the photo goes in uncropped)"""
+    from PIL import Image, ImageOps
+
+    if cropper is not None:
+        try:
+            box = box or cropper.crop_boxes([image_path], aspect)[image_path]
+            with Image.open(image_path) as img, span("encode"):
+                ImageOps.exif_transpose(img).crop(box).convert("RGB").save(target_path, quality=92)
+            return "cropped"
+        except Exception as e:
+            print(f"⚠️  Could not crop {os.path.basename(image_path)} ({str(e)}), adding it uncropped")
+    with span("copy"):
+        shutil.copy(image_path, target_path)
+    return "copied"
+
+
 # Download and save images
-for meal_name, image_url in meal_images.items():
-    image_path = os.path.join(image_dir, f"{meal_name}.jpg")
-    imageset_dir = os.path.join(assets_dir, f"{meal_name}.imageset")
-    
-    # Create imageset directory if it doesn't exist
-    os.makedirs(imageset_dir, exist_ok=True)
-    
-    try:
-        print(f"Downloading {meal_name} image...")
-        # Download the image
-        urllib.request.urlretrieve(image_url, image_path)
-        
-        # Copy to imageset directory
-        shutil.copy(image_path, os.path.join(imageset_dir, "image.jpg"))
-        
-        # Create Contents.json
-        with open(os.path.join(imageset_dir, "Contents.json"), "w") as f:
-            json.dump(contents_json, f, indent=2)
-        
-        print(f"✅ Successfully added {meal_name} image to asset catalog")
-        
-        # Small delay to avoid overwhelming the server
-        time.sleep(0.5)
-        
-    except Exception as e:
-        print(f"❌ Failed to process {meal_name} image: {str(e)}")
-
-print("\nAll meal images have been added to the asset catalog")
-print("Now open your Xcode project to see the images in use") 
\ No newline at end of file
+def download_meal_images(meal_images=meal_images, image_dir=image_dir, assets_dir=assets_dir, delay=0.5, crop_aspect=FEATURED_ASPECT,
+                         min_side=MIN_SIDE, skip_quality=False):
+    import urllib.request
+
+    # Create image directory if it doesn't exist
+    os.makedirs(image_dir, exist_ok=True)
+
+    downloaded = {}
+    for meal_name, image_url in meal_images.items():
+        image_path = os.path.join(image_dir, f"{meal_name}.jpg")
+
+        try:
+            print(f"Downloading {meal_name} image...")
+            # Download the image
+            with span("download", name=meal_name):
+                urllib.request.urlretrieve(image_url, image_path)
+            downloaded[meal_name] = image_path
+
+            # Small delay to avoid overwhelming the server
+            time.sleep(delay)
+
+        except Exception as e:
+            print(f"❌ Failed to download {meal_name} image: {str(e)}")
+
+    # Check the whole batch before anything is copied, cropped or encoded
+    quality = check_images(list(downloaded.values()), min_side, skip=skip_quality)
+    accepted = {}
+    for meal_name, image_path in downloaded.items():
+        if not quality[image_path]["ok"]:
+            # Keep rejected downloads out of the catalog, but around for a look
+            quarantine(image_path, os.path.join(image_dir, "quarantine"))
+            print(f"⚠️  Quarantined {meal_name} image: {', '.join(quality[image_path]['problems'])}")
+            continue
+        accepted[meal_name] = image_path
+
+    # The originals stay in image_dir; the imagesets get food-centered crops, found in batches up front
+    cropper, boxes = None, {}
+    if crop_aspect and accepted:
+        print(f"Cropping {len(accepted)} images around the food...")
+        cropper = default_cropper()
+        try:
+            boxes = cropper.crop_boxes(list(accepted.values()), crop_aspect)
+        except Exception as e:
+            print(f"⚠️  Batch crop failed ({str(e)}), cropping image by image")
+
+    for meal_name, image_path in accepted.items():
+        imageset_dir = os.path.join(assets_dir, f"{meal_name}.imageset")
+        try:
+            # Create imageset directory if it doesn't exist
+            os.makedirs(imageset_dir, exist_ok=True)
+
+            # Write the (cropped) photo to the imageset directory
+            write_meal_image(image_path, os.path.join(imageset_dir, "image.jpg"), cropper, crop_aspect,
+                             boxes.get(image_path))
+
+            # Create Contents.json
+            with span("json_write"), open(os.path.join(imageset_dir, "Contents.json"), "w") as f:
+                json.dump(contents_json, f, indent=2)
+
+            print(f"✅ Successfully added {meal_name} image to asset catalog")
+
+        except Exception as e:
+            print(f"❌ Failed to process {meal_name} image: {str(e)}")
+    if cropper is not None:
+        cropper.save()
+
+
+def main(crop=True, min_side=MIN_SIDE, skip_quality=False):
+    download_meal_images(crop_aspect=FEATURED_ASPECT if crop else None, min_side=min_side, skip_quality=skip_quality)
+
+    print("\nAll meal images have been added to the asset catalog")
+    print("Now open your Xcode project to see the images in use")
+
+
+if __name__ == "__main__":
+    main()
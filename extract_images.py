@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Stream the images in a Core Data store out as deduplicated thumbnails.
+
+FoodRecognitionHistory.imageData and FoodItem.image hold full camera JPEGs,
+and most of an exported store's size is these images. This tool:
+
+- lists the rows that have an image with one query that only reads value
+  lengths, never the images themselves
+- opens one image at a time with incremental blob I/O (or the
+  _EXTERNAL_DATA file for externally stored values) and hashes it in chunks
+- decodes each distinct image once, at reduced scale where the JPEG decoder
+  allows it, and writes a thumbnail named after its SHA-256, so identical
+  images share one thumbnail and reruns skip existing ones
+- writes index.json, mapping every (entity, Z_PK) to its digest and thumbnail
+
+The summary reports the total image bytes, the bytes in duplicates and how
+much space storing thumbnails instead of originals would reclaim.
+
+Requirements:
+- Pillow
+
+Usage:
+python extract_images.py FoodScannerPro.sqlite                 # thumbnails in FoodScannerPro_thumbnails/
+python extract_images.py FoodScannerPro.sqlite --size 256 --output thumbs/
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+
+from asset_trace import span
+from coredata_store import IMAGE_ATTRIBUTES, connect, open_binary
+
+DEFAULT_SIZE = 320
+JPEG_QUALITY = 80
+CHUNK_SIZE = 1 << 20
+
+
+def image_rows(connection, entity):
+    """(Z_PK, stored length) of every row of entity with an image"""
+    table, column = IMAGE_ATTRIBUTES[entity]
+    return connection.execute(
+        f"SELECT Z_PK, length({column}) FROM {table} WHERE {column} IS NOT NULL ORDER BY Z_PK"
+    )
+
+
+def stream_digest(f):
+    """SHA-256 of a file object's contents, read in chunks; rewinds it afterwards"""
+    digest = hashlib.sha256()
+    with span("hash"):
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    f.seek(0)
+    return digest.hexdigest()
+
+
+def image_size(f):
+    """(width, height) from the image header, without decoding it"""
+    from PIL import Image
+
+    with Image.open(f) as img:
+        return img.size
+
+
+def write_thumbnail(f, target_path, size=DEFAULT_SIZE):
+    """Decode an image from a file object and save a JPEG thumbnail; returns the original (width, height)"""
+    from PIL import Image, ImageOps
+
+    with Image.open(f) as img:
+        original_size = img.size
+        with span("decode"):
+            img.draft("RGB", (size, size))
+            img = ImageOps.exif_transpose(img)
+        with span("resize"):
+            img.thumbnail((size, size), Image.LANCZOS)
+        with span("encode"):
+            img.convert("RGB").save(target_path, quality=JPEG_QUALITY, optimize=True)
+    return original_size
+
+
+def extract_images(store_path, output_dir, size=DEFAULT_SIZE):
+    """Write thumbnails and index.json for every image in the store; returns (index, report)"""
+    os.makedirs(output_dir, exist_ok=True)
+    images = {}
+    rows = []
+    report = {"rows": 0, "external": 0, "missing": 0, "failed": 0, "total_bytes": 0, "duplicate_bytes": 0}
+
+    connection = connect(store_path)
+    try:
+        for entity, (table, column) in IMAGE_ATTRIBUTES.items():
+            for pk, _ in image_rows(connection, entity):
+                f, byte_count, external_name = open_binary(connection, store_path, table, column, pk)
+                if f is None:
+                    if external_name:
+                        print(f"⚠️ {entity} {pk}: external file {external_name} is missing")
+                        report["missing"] += 1
+                    continue
+                with f:
+                    digest = stream_digest(f)
+                    report["rows"] += 1
+                    report["external"] += external_name is not None
+                    report["total_bytes"] += byte_count
+                    rows.append({"entity": entity, "pk": pk, "digest": digest, "external": external_name})
+                    if digest in images:
+                        report["duplicate_bytes"] += byte_count
+                        continue
+
+                    thumbnail = f"{digest[:16]}.jpg"
+                    thumbnail_path = os.path.join(output_dir, thumbnail)
+                    entry = {"bytes": byte_count, "thumbnail": thumbnail}
+                    try:
+                        if os.path.exists(thumbnail_path):
+                            entry["width"], entry["height"] = image_size(f)
+                        else:
+                            entry["width"], entry["height"] = write_thumbnail(f, thumbnail_path, size)
+                    except Exception as e:
+                        print(f"⚠️ {entity} {pk}: could not decode image ({e})")
+                        report["failed"] += 1
+                        entry["thumbnail"] = None
+                    images[digest] = entry
+    finally:
+        connection.close()
+
+    thumbnail_bytes = 0
+    for entry in images.values():
+        if entry["thumbnail"]:
+            entry["thumbnailBytes"] = os.path.getsize(os.path.join(output_dir, entry["thumbnail"]))
+            thumbnail_bytes += entry["thumbnailBytes"]
+    report["unique"] = len(images)
+    report["unique_bytes"] = report["total_bytes"] - report["duplicate_bytes"]
+    report["thumbnail_bytes"] = thumbnail_bytes
+    report["reclaimable_bytes"] = report["total_bytes"] - thumbnail_bytes
+
+    index = {
+        "version": 1,
+        "store": os.path.abspath(store_path),
+        "thumbnailSize": size,
+        "images": images,
+        "rows": rows,
+    }
+    with span("json_write"), open(os.path.join(output_dir, "index.json"), "w") as f:
+        json.dump(index, f, indent=1)
+    return index, report
+
+
+def megabytes(byte_count):
+    return f"{byte_count / 1024 / 1024:.1f} MB"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract deduplicated thumbnails of the images in a Core Data store")
+    parser.add_argument("store", help="FoodScannerPro.sqlite")
+    parser.add_argument("--output", help="Thumbnail directory (default: <store>_thumbnails next to the store)")
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="Longest thumbnail side in pixels")
+    args = parser.parse_args(argv)
+
+    if not os.path.isfile(args.store):
+        print(f"❌ {args.store} not found")
+        return 1
+
+    output_dir = args.output or os.path.splitext(args.store)[0] + "_thumbnails"
+    start = time.perf_counter()
+    _, report = extract_images(args.store, output_dir, args.size)
+
+    print(f"📊 {report['rows']} images ({report['external']} stored externally), {report['unique']} distinct")
+    print(f"   Originals:   {megabytes(report['total_bytes'])} ({megabytes(report['duplicate_bytes'])} in duplicates)")
+    print(f"   Thumbnails:  {megabytes(report['thumbnail_bytes'])}")
+    print(f"   Reclaimable: {megabytes(report['reclaimable_bytes'])} by keeping thumbnails instead of originals")
+    if report["missing"] or report["failed"]:
+        print(f"⚠️ {report['missing']} external files missing, {report['failed']} images could not be decoded")
+    print(f"✅ Wrote thumbnails and index.json to {output_dir} in {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
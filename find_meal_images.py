@@ -1,17 +1,14 @@
 #!/usr/bin/env python3
 import os
 import webbrowser
-import json
 import time
 import urllib.parse
 
+from asset_catalog import base_dir
+
 # Directories
-base_dir = "/Users/samueleskenasy/xCode applications/foodscannerpro"
 download_dir = os.path.join(base_dir, "MealImages")
 
-# Create download directory if it doesn't exist
-os.makedirs(download_dir, exist_ok=True)
-
 # List of meal names with search terms for better results
 meal_searches = {
     "greek_yogurt_parfait": "greek yogurt parfait with berries and honey",
@@ -67,46 +64,55 @@ def open_search_for_image(meal_name, search_term):
     print(f"   Rename it to: {meal_name}.jpg before moving to Xcode")
     print("-" * 70)
 
-# Instructions for the user
-print("\n" + "=" * 70)
-print("MEAL IMAGE FINDER".center(70))
-print("=" * 70)
-print("\nThis script will help you find appropriate images for your featured meals.")
-print("For each meal, it will open search results in your browser.")
-print("You can then:")
-print("  1. Browse the results and choose an image you like")
-print("  2. Download it to your computer")
-print("  3. Rename it to match the meal name (e.g., 'greek_salad.jpg')")
-print("  4. Drag it into Xcode's asset catalog")
-print("\nImages will be searched in batches of 5 to avoid overwhelming your browser.")
-print("Press Enter after each batch to continue to the next set of meals.")
-print("=" * 70)
-
-# Batch process the meals (5 at a time)
-batch_size = 5
-meal_items = list(meal_searches.items())
-
-for i in range(0, len(meal_items), batch_size):
-    batch = meal_items[i:i+batch_size]
-    
-    print(f"\nOpening searches for batch {i//batch_size + 1} of {(len(meal_items) + batch_size - 1)//batch_size}:")
-    for j, (meal_name, search_term) in enumerate(batch, 1):
-        print(f"  {j}. {meal_name.replace('_', ' ').title()}")
-    
-    for meal_name, search_term in batch:
-        open_search_for_image(meal_name, search_term)
-    
-    if i + batch_size < len(meal_items):
-        input("\nPress Enter to open the next batch of meal searches...")
-
-print("\n" + "=" * 70)
-print("All meal searches have been opened.")
-print("After downloading the images, you can:")
-print("1. Rename them according to the meal names (e.g., 'greek_salad.jpg')")
-print("2. Open your Xcode project")
-print("3. Navigate to Assets.xcassets > FeaturedMeals")
-print("4. Drag each image to its corresponding image asset")
-print("=" * 70)
-
-# For convenience, also open the download directory
-webbrowser.open('file:///' + download_dir) 
\ No newline at end of file
+
+def main():
+    # Create download directory if it doesn't exist
+    os.makedirs(download_dir, exist_ok=True)
+
+    # Instructions for the user
+    print("\n" + "=" * 70)
+    print("MEAL IMAGE FINDER".center(70))
+    print("=" * 70)
+    print("\nThis script will help you find appropriate images for your featured meals.")
+    print("For each meal, it will open search results in your browser.")
+    print("You can then:")
+    print("  1. Browse the results and choose an image you like")
+    print("  2. Download it to your computer")
+    print("  3. Rename it to match the meal name (e.g., 'greek_salad.jpg')")
+    print("  4. Drag it into Xcode's asset catalog")
+    print("\nImages will be searched in batches of 5 to avoid overwhelming your browser.")
+    print("Press Enter after each batch to continue to the next set of meals.")
+    print("=" * 70)
+
+    # Batch process the meals (5 at a time)
+    batch_size = 5
+    meal_items = list(meal_searches.items())
+
+    for i in range(0, len(meal_items), batch_size):
+        batch = meal_items[i:i+batch_size]
+
+        print(f"\nOpening searches for batch {i//batch_size + 1} of {(len(meal_items) + batch_size - 1)//batch_size}:")
+        for j, (meal_name, search_term) in enumerate(batch, 1):
+            print(f"  {j}. {meal_name.replace('_', ' ').title()}")
+
+        for meal_name, search_term in batch:
+            open_search_for_image(meal_name, search_term)
+
+        if i + batch_size < len(meal_items):
+            input("\nPress Enter to open the next batch of meal searches...")
+
+    print("\n" + "=" * 70)
+    print("All meal searches have been opened.")
+    print("After downloading the images, you can:")
+    print("1. Rename them according to the meal names (e.g., 'greek_salad.jpg')")
+    print("2. Open your Xcode project")
+    print("3. Navigate to Assets.xcassets > FeaturedMeals")
+    print("4. Drag each image to its corresponding image asset")
+    print("=" * 70)
+
+    # For convenience, also open the download directory
+    webbrowser.open('file:///' + download_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,582 @@
+#!/usr/bin/env python3
+"""
+foodscanner-assets: one entry point for the Food Scanner Pro asset tools.
+
+Subcommands:
+  render     Render category cards or meal placeholders
+  download   Download featured meal photos (or create category photo stand-ins)
+  import     Import MealImages/ into the FeaturedMeals catalog (optionally --watch or --bulk)
+  contents   Reset FeaturedMeals Contents.json files to empty 1x/2x/3x slots
+  convert    Convert the Food101 classifier or YOLOv5 detector to Core ML
+  dedupe     Find byte-identical imagesets
+  audit      Report oversized renditions, orphan files and unused imagesets (CI size gate)
+  bench      Time tool startup and card rendering
+  nutrition-db  Build the offline nutrition database from USDA FDC CSVs
+  prewarm    Pre-warm the bundled nutrition cache for every classifier label
+  label-index  Resolve classifier labels to offline nutrition records
+  analytics  Compute AnalyticsService metrics for exported Core Data stores
+  aggregates  Incrementally maintain daily/weekly nutrition aggregates for a store
+  thumbnails  Extract deduplicated thumbnails of the images in a Core Data store
+  replay     Replay a video or frame directory through the ONNX recognition pipeline
+  frame-gate  Measure the frame-similarity gate's hit rate on a clip
+  embeddings  Build the int8 meal image embedding index and Core ML embedding model
+  prune      Prune Food101 classifier channels and convert each sparsity level
+  cascade    Build the fast first-stage classifier and calibrate its escalation threshold
+  crop       Choose food-centered crop windows for card photos
+  palette    Extract dominant/accent card colors from photos with WCAG-checked contrast
+  quality    Check photos for size, blur, exposure, placeholders and truncation
+  formats    Convert renditions to HEIC / lossless WebP, or compare formats
+
+Each subcommand imports its tool module only when it runs, so PIL, NumPy,
+torch and coremltools are never loaded by subcommands that do not need them.
+
+Usage:
+./foodscanner-assets [--trace trace.json [--trace-memory]] <subcommand> [options]
+
+--trace records per-stage timing spans (decode, resize, gradient, text,
+encode, download, json_write, ...) and writes them as a Chrome trace that
+ui.perfetto.dev can open, followed by a summary table. --trace-memory adds
+the tracemalloc peak for each stage.
+"""
+
+import os
+import sys
+import argparse
+import importlib
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+coreml_dir = os.path.join(base_dir, "foodscannerpro/Resources/CoreML")
+
+if base_dir not in sys.path:
+    sys.path.insert(0, base_dir)
+
+
+def load_coreml_tool(module_name):
+    """Import one of the converter scripts that live next to the Core ML models"""
+    if coreml_dir not in sys.path:
+        sys.path.insert(0, coreml_dir)
+    return importlib.import_module(module_name)
+
+
+# --- Subcommand handlers (each one imports its tool lazily) ---
+
+def cmd_render(args):
+    if args.kind == "direct":
+        import create_category_direct
+        create_category_direct.main(args.extra)
+    elif args.kind == "photos":
+        import create_category_images_from_photos
+        return create_category_images_from_photos.main(args.extra)
+    elif args.kind == "svg":
+        import create_category_images
+        return create_category_images.main(args.extra)
+    elif args.kind == "placeholders":
+        import create_placeholder_images
+        create_placeholder_images.main()
+    elif args.kind == "blurhash":
+        import create_image_placeholders
+        create_image_placeholders.main(args.extra)
+    return 0
+
+
+def cmd_download(args):
+    if args.categories:
+        import download_category_images
+        download_category_images.main()
+    elif args.search:
+        import find_meal_images
+        find_meal_images.main()
+    else:
+        import download_images
+        quality = {"min_side": args.min_side} if args.min_side else {}
+        download_images.main(crop=not args.no_crop, skip_quality=args.skip_quality, **quality)
+    return 0
+
+
+def cmd_import(args):
+    import add_images_to_xcode
+    argv = ["--debounce", str(args.debounce), "--format", args.format]
+    if args.min_side:
+        argv += ["--min-side", str(args.min_side)]
+    if args.skip_quality:
+        argv.append("--skip-quality")
+    if args.watch:
+        argv.append("--watch")
+    if args.poll:
+        argv.append("--poll")
+    if args.bulk:
+        argv += ["--bulk", "--source", args.bulk, "--window", str(args.window)]
+        if args.workers:
+            argv += ["--workers", str(args.workers)]
+        if args.hardlink:
+            argv.append("--hardlink")
+    add_images_to_xcode.main(argv)
+    return 0
+
+
+def cmd_contents(args):
+    import create_basic_placeholder
+    create_basic_placeholder.main()
+    return 0
+
+
+def cmd_convert(args):
+    module_name = {
+        "classifier": "convert_food101_model",
+        "detector": "convert_food_detector_model",
+    }[args.model]
+    tool = load_coreml_tool(module_name)
+    kwargs = {}
+    if args.output:
+        kwargs["output_path"] = args.output
+    if args.model == "detector":
+        if args.onnx:
+            print("❌ --onnx only applies to the classifier (use --keep-onnx for the detector)")
+            return 2
+        kwargs.update(keep_onnx=args.keep_onnx, optimize=not args.no_optimize)
+    elif args.keep_onnx or args.no_optimize:
+        print("❌ --keep-onnx and --no-optimize only apply to the detector")
+        return 2
+    elif args.onnx:
+        kwargs["onnx_path"] = args.onnx
+    return tool.main(**kwargs) or 0
+
+
+def cmd_dedupe(args):
+    import dedupe_assets
+    return dedupe_assets.main(["--apply"] if args.apply else [])
+
+
+def cmd_audit(args):
+    import audit_assets
+    argv = ["--fail-on", *args.fail_on]
+    if args.json:
+        argv += ["--json", args.json]
+    if args.budget_kb is not None:
+        argv += ["--budget-kb", str(args.budget_kb)]
+    if args.max_waste_kb is not None:
+        argv += ["--max-waste-kb", str(args.max_waste_kb)]
+    return audit_assets.main(argv)
+
+
+def cmd_bench(args):
+    import bench_assets
+    argv = ["--cards", str(args.cards)]
+    if args.max_regression:
+        argv += ["--max-regression", args.max_regression]
+    for flag in ("suite", "save_baseline", "compare", "large"):
+        if getattr(args, flag):
+            argv.append("--" + flag.replace("_", "-"))
+    return bench_assets.main(argv)
+
+
+def cmd_nutrition_db(args):
+    import build_nutrition_database
+    argv = ["--output", args.output] if args.output else []
+    if args.fdc_dir:
+        argv += ["--fdc-dir", args.fdc_dir]
+    if args.data_types:
+        argv += ["--data-types", args.data_types]
+    if args.query:
+        argv += ["--query", args.query]
+    return build_nutrition_database.main(argv)
+
+
+def cmd_prewarm(args):
+    import prewarm_nutrition_cache
+    argv = ["--workers", str(args.workers)]
+    for option in ("api_key", "base_url", "output", "rate", "mock_database"):
+        value = getattr(args, option)
+        if value is not None:
+            argv += ["--" + option.replace("_", "-"), str(value)]
+    for flag in ("refresh", "mock"):
+        if getattr(args, flag):
+            argv.append("--" + flag)
+    return prewarm_nutrition_cache.main(argv)
+
+
+def cmd_label_index(args):
+    import build_label_index
+    argv = ["--min-score", str(args.min_score), "--show", str(args.show)]
+    for option in ("database", "labels", "output"):
+        value = getattr(args, option)
+        if value is not None:
+            argv += ["--" + option, value]
+    return build_label_index.main(argv)
+
+
+def cmd_analytics(args):
+    import meal_analytics
+    argv = list(args.stores) + ["--first-weekday", str(args.first_weekday)]
+    for option in ("timezone", "output"):
+        value = getattr(args, option)
+        if value is not None:
+            argv += ["--" + option, value]
+    for flag in ("validate", "fixture"):
+        if getattr(args, flag):
+            argv.append("--" + flag)
+    return meal_analytics.main(argv)
+
+
+def cmd_aggregates(args):
+    import materialize_aggregates
+    argv = [args.store, "--first-weekday", str(args.first_weekday)]
+    for option in ("aggregates", "timezone", "export"):
+        value = getattr(args, option)
+        if value is not None:
+            argv += ["--" + option, value]
+    if args.range:
+        argv += ["--range", *args.range]
+    if args.rebuild:
+        argv.append("--rebuild")
+    return materialize_aggregates.main(argv)
+
+
+def cmd_thumbnails(args):
+    import extract_images
+    argv = [args.store, "--size", str(args.size)]
+    if args.output is not None:
+        argv += ["--output", args.output]
+    return extract_images.main(argv)
+
+
+def cmd_replay(args):
+    import replay_recognition
+    argv = [
+        args.source, "--classifier", args.classifier,
+        "--min-confidence", str(args.min_confidence), "--batch-size", str(args.batch_size),
+        "--frame-skip", str(args.frame_skip), "--cache-method", args.cache_method,
+        "--cache-distance", str(args.cache_distance), "--cache-max-reuse", str(args.cache_max_reuse),
+        "--threads", str(args.threads),
+    ]
+    for option in ("detector", "output"):
+        value = getattr(args, option)
+        if value is not None:
+            argv += ["--" + option, value]
+    if args.cache:
+        argv.append("--cache")
+    return replay_recognition.main(argv)
+
+
+def cmd_embeddings(args):
+    import build_embedding_index
+    argv = ["--kind", args.kind, "--batch-size", str(args.batch_size), "--threads", str(args.threads)]
+    for option in ("history", "images", "nlist", "output", "query"):
+        value = getattr(args, option)
+        if value is not None:
+            argv += ["--" + option, str(value)]
+    if args.skip_model:
+        argv.append("--skip-model")
+    return build_embedding_index.main(argv)
+
+
+def cmd_prune(args):
+    import prune_food101_model
+    argv = [
+        "--calibration", args.calibration, "--sparsity", *map(str, args.sparsity),
+        "--importance", args.importance, "--round-to", str(args.round_to), "--steps", str(args.steps),
+        "--threads", str(args.threads), "--output-dir", args.output_dir,
+    ]
+    if args.skip_convert:
+        argv.append("--skip-convert")
+    return prune_food101_model.main(argv)
+
+
+def cmd_cascade(args):
+    import build_cascade
+    argv = [
+        "--calibration", args.calibration, "--max-accuracy-drop", str(args.max_accuracy_drop),
+        "--steps", str(args.steps), "--threads", str(args.threads), "--output-dir", args.output_dir,
+    ]
+    if args.thresholds:
+        argv += ["--thresholds", *map(str, args.thresholds)]
+    if args.skip_convert:
+        argv.append("--skip-convert")
+    return build_cascade.main(argv)
+
+
+def cmd_crop(args):
+    import smart_crop
+    argv = [*args.images, "--aspect", str(args.aspect), "--batch-size", str(args.batch_size)]
+    if args.detector:
+        argv += ["--detector", args.detector]
+    if args.output_dir:
+        argv += ["--output-dir", args.output_dir]
+    return smart_crop.main(argv)
+
+
+def cmd_palette(args):
+    import card_palette
+    argv = [*args.images, "--clusters", str(args.clusters), "--min-contrast", str(args.min_contrast)]
+    if args.output:
+        argv += ["--output", args.output]
+    return card_palette.main(argv)
+
+
+def cmd_quality(args):
+    import image_quality
+    argv = list(args.sources)
+    if args.min_side:
+        argv += ["--min-side", str(args.min_side)]
+    if args.quarantine:
+        argv += ["--quarantine", args.quarantine]
+    if args.json:
+        argv += ["--json", args.json]
+    return image_quality.main(argv)
+
+
+def cmd_formats(args):
+    import rendition_format
+    argv = [args.catalog] if args.catalog else []
+    argv += ["--lossy", args.lossy, "--lossless", args.lossless]
+    if args.compare:
+        argv.append("--compare")
+    if args.sources:
+        argv += ["--sources", *args.sources]
+    if args.json:
+        argv += ["--json", args.json]
+    return rendition_format.main(argv)
+
+
+def cmd_frame_gate(args):
+    import frame_similarity
+    return frame_similarity.main([
+        args.source, "--method", args.method,
+        "--max-distance", str(args.max_distance), "--max-reuse", str(args.max_reuse),
+    ])
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="foodscanner-assets",
+        description="Food Scanner Pro asset pipeline tools",
+    )
+    parser.add_argument("--trace", metavar="PATH", help="Write a Chrome/Perfetto trace of pipeline stages to PATH")
+    parser.add_argument("--trace-memory", action="store_true", help="Also record tracemalloc peaks per stage")
+    subparsers = parser.add_subparsers(dest="command", metavar="<subcommand>")
+    subparsers.required = True
+
+    render = subparsers.add_parser("render", help="Render category cards or meal placeholders")
+    render.add_argument(
+        "kind",
+        choices=["direct", "photos", "svg", "placeholders", "blurhash"],
+        help="direct: colored cards, photos: photo cards from temp_images/, svg: vector or build-time PNG cards, "
+             "placeholders: meal placeholder images, blurhash: BlurHash/LQIP lookup",
+    )
+    render.add_argument("extra", nargs=argparse.REMAINDER,
+                        help="Options passed through to the tool, e.g. --format heic for direct and photos")
+    render.set_defaults(handler=cmd_render)
+
+    download = subparsers.add_parser("download", help="Download featured meal photos")
+    group = download.add_mutually_exclusive_group()
+    group.add_argument("--categories", action="store_true", help="Create category photo stand-ins in temp_images/")
+    group.add_argument("--search", action="store_true", help="Open image searches in the browser instead")
+    download.add_argument("--no-crop", action="store_true", help="Copy the photos into the catalog without smart cropping")
+    download.add_argument("--min-side", type=int, help="Smallest accepted short side in pixels")
+    download.add_argument("--skip-quality", action="store_true", help="Keep photos that fail the image quality gate")
+    download.set_defaults(handler=cmd_download)
+
+    import_ = subparsers.add_parser("import", help="Import MealImages/ into the FeaturedMeals catalog")
+    import_.add_argument("--watch", action="store_true", help="Keep running and import new or modified photos")
+    import_.add_argument("--debounce", type=float, default=1.0, help="Seconds a file must be quiet before import")
+    import_.add_argument("--poll", action="store_true", help="Use polling instead of inotify")
+    import_.add_argument("--bulk", metavar="DIR", help="Bulk import a large photo dump from DIR in streamed windows")
+    import_.add_argument("--workers", type=int, help="Bulk import threads (default: CPU count + 4, at most 32)")
+    import_.add_argument("--window", type=int, default=512, help="Directory entries per bulk window")
+    import_.add_argument("--hardlink", action="store_true", help="Hardlink unresized photos instead of cloning them")
+    import_.add_argument("--format", choices=["jpeg", "heic"], default="jpeg",
+                         help="heic: encode HEIC renditions from the source photos (needs pillow-heif)")
+    import_.add_argument("--min-side", type=int, help="Smallest accepted short side in pixels")
+    import_.add_argument("--skip-quality", action="store_true", help="Import photos without the image quality gate")
+    import_.set_defaults(handler=cmd_import)
+
+    contents = subparsers.add_parser("contents", help="Reset FeaturedMeals Contents.json files")
+    contents.set_defaults(handler=cmd_contents)
+
+    convert = subparsers.add_parser("convert", help="Convert a model to Core ML")
+    convert.add_argument("model", choices=["classifier", "detector"])
+    convert.add_argument("--output", help="Output .mlmodel path")
+    convert.add_argument("--keep-onnx", help="Detector: keep the optimized ONNX graph at this path")
+    convert.add_argument("--no-optimize", action="store_true", help="Detector: convert the raw ONNX export")
+    convert.add_argument("--onnx", help="Classifier: write an ONNX export here (for replay) instead of Core ML")
+    convert.set_defaults(handler=cmd_convert)
+
+    dedupe = subparsers.add_parser("dedupe", help="Find byte-identical imagesets")
+    dedupe.add_argument("--apply", action="store_true", help="Delete the duplicate imagesets")
+    dedupe.set_defaults(handler=cmd_dedupe)
+
+    audit = subparsers.add_parser("audit", help="Report oversized renditions, orphan files and unused imagesets")
+    audit.add_argument("--json", help="Write the findings here")
+    audit.add_argument("--fail-on", nargs="*", default=["missing"],
+                       choices=["missing", "empty", "oversized", "orphan", "unused", "name"],
+                       help="Finding kinds that fail the run (default: missing)")
+    audit.add_argument("--budget-kb", type=int, help="Fail if the catalog is larger than this")
+    audit.add_argument("--max-waste-kb", type=int, help="Fail if more than this could be reclaimed")
+    audit.set_defaults(handler=cmd_audit)
+
+    bench = subparsers.add_parser("bench", help="Time tool startup and card rendering, or run the benchmark suite")
+    bench.add_argument("--cards", type=int, default=50, help="Number of synthetic cards to render")
+    bench.add_argument("--suite", action="store_true", help="Run the pytest-benchmark suite in benchmarks/")
+    bench.add_argument("--save-baseline", action="store_true", help="Store suite results as the new baseline")
+    bench.add_argument("--compare", action="store_true", help="Fail if the suite regressed against the baseline")
+    bench.add_argument("--max-regression", help="Allowed mean regression, e.g. 10%% or 0.005")
+    bench.add_argument("--large", action="store_true", help="Include 10,000-item runs of the slow stages")
+    bench.set_defaults(handler=cmd_bench)
+
+    nutrition_db = subparsers.add_parser("nutrition-db", help="Build the offline nutrition database from USDA FDC CSVs")
+    nutrition_db.add_argument("--fdc-dir", help="Folder with food.csv, nutrient.csv and food_nutrient.csv")
+    nutrition_db.add_argument("--output", help="SQLite database to write")
+    nutrition_db.add_argument("--data-types", help="Comma-separated food.csv data_type values to include")
+    nutrition_db.add_argument("--query", help="Search an existing database instead of building one")
+    nutrition_db.set_defaults(handler=cmd_nutrition_db)
+
+    prewarm = subparsers.add_parser("prewarm", help="Pre-warm the bundled nutrition cache for every classifier label")
+    prewarm.add_argument("--api-key", help="FoodData Central API key (default: $FDC_API_KEY or DEMO_KEY)")
+    prewarm.add_argument("--base-url", help="API base URL (ends in /fdc/v1)")
+    prewarm.add_argument("--output", help="Cache JSON file to write")
+    prewarm.add_argument("--workers", type=int, default=8, help="Concurrent lookups")
+    prewarm.add_argument("--rate", type=float, help="Maximum requests per second (default: 1000/hour)")
+    prewarm.add_argument("--refresh", action="store_true", help="Fetch every label again")
+    prewarm.add_argument("--mock", action="store_true", help="Run against the local USDA mock server")
+    prewarm.add_argument("--mock-database", help="Offline nutrition database for the mock server")
+    prewarm.set_defaults(handler=cmd_prewarm)
+
+    label_index = subparsers.add_parser("label-index", help="Resolve classifier labels to offline nutrition records")
+    label_index.add_argument("--database", help="Nutrition database from nutrition-db")
+    label_index.add_argument("--labels", help="File with one label per line (default: the Food101 classes)")
+    label_index.add_argument("--output", help="Index JSON file to write")
+    label_index.add_argument("--min-score", type=float, default=0.35, help="Lowest score accepted as a match")
+    label_index.add_argument("--show", type=int, default=0, metavar="N", help="Print the N weakest matches")
+    label_index.set_defaults(handler=cmd_label_index)
+
+    analytics = subparsers.add_parser("analytics", help="Compute AnalyticsService metrics for exported Core Data stores")
+    analytics.add_argument("stores", nargs="*", help="FoodScannerPro.sqlite files")
+    analytics.add_argument("--timezone", help="IANA time zone for day grouping (default: this machine's)")
+    analytics.add_argument("--first-weekday", type=int, default=1, help="1 = Sunday, 2 = Monday")
+    analytics.add_argument("--output", help="Write one JSON line of metrics per store")
+    analytics.add_argument("--validate", action="store_true", help="Check results against the row-by-row Swift port")
+    analytics.add_argument("--fixture", action="store_true", help="Analyze a generated fixture store")
+    analytics.set_defaults(handler=cmd_analytics)
+
+    aggregates = subparsers.add_parser("aggregates", help="Incrementally maintain daily/weekly nutrition aggregates for a store")
+    aggregates.add_argument("store", help="FoodScannerPro.sqlite")
+    aggregates.add_argument("--aggregates", help="Aggregate database (default: <store>.aggregates.sqlite)")
+    aggregates.add_argument("--timezone", help="IANA time zone for day grouping (default: this machine's)")
+    aggregates.add_argument("--first-weekday", type=int, default=1, help="1 = Sunday, 2 = Monday")
+    aggregates.add_argument("--rebuild", action="store_true", help="Recompute everything")
+    aggregates.add_argument("--export", help="Write the tables as JSON column arrays to this path")
+    aggregates.add_argument("--range", nargs=2, metavar=("START", "END"), help="Print the daily rows between two ISO dates")
+    aggregates.set_defaults(handler=cmd_aggregates)
+
+    thumbnails = subparsers.add_parser("thumbnails", help="Extract deduplicated thumbnails of the images in a Core Data store")
+    thumbnails.add_argument("store", help="FoodScannerPro.sqlite")
+    thumbnails.add_argument("--output", help="Thumbnail directory (default: <store>_thumbnails next to the store)")
+    thumbnails.add_argument("--size", type=int, default=320, help="Longest thumbnail side in pixels")
+    thumbnails.set_defaults(handler=cmd_thumbnails)
+
+    replay = subparsers.add_parser("replay", help="Replay a video or frame directory through the ONNX recognition pipeline")
+    replay.add_argument("source", help="Video file or directory of frame images")
+    replay.add_argument("--classifier", required=True, help="Food101 classifier ONNX file")
+    replay.add_argument("--detector", help="YOLOv5 detector ONNX file (default: classify whole frames)")
+    replay.add_argument("--min-confidence", type=float, default=0.3, help="Drop results at or below this confidence")
+    replay.add_argument("--batch-size", type=int, default=8, help="Crops per classifier call")
+    replay.add_argument("--frame-skip", type=int, default=0, help="Process every (N+1)th frame")
+    replay.add_argument("--cache", action="store_true", help="Reuse results while frames match the last recognized one")
+    replay.add_argument("--cache-method", choices=("phash", "dhash"), default="phash", help="Perceptual hash for the frame gate")
+    replay.add_argument("--cache-distance", type=int, default=6, help="Most differing hash bits for a cache hit")
+    replay.add_argument("--cache-max-reuse", type=int, default=30, help="Cache hits in a row before recognizing again")
+    replay.add_argument("--threads", type=int, default=0, help="onnxruntime intra-op threads (0 = automatic)")
+    replay.add_argument("--output", help="Write one JSON line of results per processed frame")
+    replay.set_defaults(handler=cmd_replay)
+
+    frame_gate = subparsers.add_parser("frame-gate", help="Measure the frame-similarity gate's hit rate on a clip")
+    frame_gate.add_argument("source", help="Video file or directory of frame images")
+    frame_gate.add_argument("--method", choices=("phash", "dhash"), default="phash", help="Perceptual hash")
+    frame_gate.add_argument("--max-distance", type=int, default=6, help="Most differing hash bits for a hit")
+    frame_gate.add_argument("--max-reuse", type=int, default=30, help="Hits in a row before forcing recognition")
+    frame_gate.set_defaults(handler=cmd_frame_gate)
+
+    embeddings = subparsers.add_parser("embeddings", help="Build the int8 meal image embedding index and Core ML embedding model")
+    embeddings.add_argument("--history", help="Thumbnail directory from the thumbnails subcommand to include")
+    embeddings.add_argument("--images", help="Extra folder of images to include")
+    embeddings.add_argument("--kind", choices=("auto", "flat", "ivf"), default="auto", help="Index type")
+    embeddings.add_argument("--nlist", type=int, help="IVF lists (default: sqrt of the image count)")
+    embeddings.add_argument("--batch-size", type=int, default=32, help="Images per forward pass")
+    embeddings.add_argument("--threads", type=int, default=0, help="torch CPU threads (0 = default)")
+    embeddings.add_argument("--output", help="Index file to write")
+    embeddings.add_argument("--skip-model", action="store_true", help="Do not export the Core ML model")
+    embeddings.add_argument("--query", help="Image to search for after building")
+    embeddings.set_defaults(handler=cmd_embeddings)
+
+    prune = subparsers.add_parser("prune", help="Prune Food101 classifier channels and convert each sparsity level")
+    prune.add_argument("--calibration", required=True, help="Folder of calibration images (class subfolders are labeled)")
+    prune.add_argument("--sparsity", type=float, nargs="+", default=[0.25, 0.5], help="Share of channels to remove per level")
+    prune.add_argument("--importance", choices=("taylor", "l1"), default="taylor", help="Channel ranking")
+    prune.add_argument("--round-to", type=int, default=8, help="Keep channel counts at multiples of this")
+    prune.add_argument("--steps", type=int, default=200, help="Fine-tuning steps per level (0 to skip)")
+    prune.add_argument("--threads", type=int, default=0, help="torch CPU threads (0 = default)")
+    prune.add_argument("--output-dir", default="pruned", help="Where the .mlmodel files and prune_report.json go")
+    prune.add_argument("--skip-convert", action="store_true", help="Only report, do not convert to Core ML")
+    prune.set_defaults(handler=cmd_prune)
+
+    cascade = subparsers.add_parser("cascade", help="Build the fast first-stage classifier and calibrate its escalation threshold")
+    cascade.add_argument("--calibration", required=True, help="Folder of calibration images (class subfolders are labeled)")
+    cascade.add_argument("--thresholds", type=float, nargs="+", help="Stage-one confidences to sweep (default 0.00-1.00 in 0.05 steps)")
+    cascade.add_argument("--max-accuracy-drop", type=float, default=0.01, help="Accuracy the cascade may lose against the full model")
+    cascade.add_argument("--steps", type=int, default=300, help="Distillation steps for stage one (0 to skip)")
+    cascade.add_argument("--threads", type=int, default=0, help="torch CPU threads (0 = default)")
+    cascade.add_argument("--output-dir", default="cascade", help="Where the .mlmodel files and cascade_report.json go")
+    cascade.add_argument("--skip-convert", action="store_true", help="Only report, do not convert to Core ML")
+    cascade.set_defaults(handler=cmd_cascade)
+
+    crop = subparsers.add_parser("crop", help="Choose food-centered crop windows for card photos")
+    crop.add_argument("images", nargs="+", help="Source photos")
+    crop.add_argument("--aspect", type=float, default=1.0, help="Card width / height (featured meal cards are 1.667)")
+    crop.add_argument("--detector", help="ONNX food detector (default: food_detector.onnx; saliency without it)")
+    crop.add_argument("--batch-size", type=int, default=8, help="Photos per detector batch")
+    crop.add_argument("--output-dir", help="Also write the cropped photos here")
+    crop.set_defaults(handler=cmd_crop)
+
+    palette = subparsers.add_parser("palette", help="Extract dominant/accent card colors from photos with WCAG-checked contrast")
+    palette.add_argument("images", nargs="+", help="Photos to extract palettes from")
+    palette.add_argument("--clusters", type=int, default=5, help="k-means clusters per photo")
+    palette.add_argument("--min-contrast", type=float, default=4.5, help="WCAG contrast for card text")
+    palette.add_argument("--output", help="Write {image name: palette} JSON here")
+    palette.set_defaults(handler=cmd_palette)
+
+    quality = subparsers.add_parser("quality", help="Check photos for size, blur, exposure, placeholders and truncation")
+    quality.add_argument("sources", nargs="+", help="Image files or folders")
+    quality.add_argument("--min-side", type=int, help="Smallest accepted short side in pixels")
+    quality.add_argument("--quarantine", help="Move failing images into this folder")
+    quality.add_argument("--json", help="Write the per-image results here")
+    quality.set_defaults(handler=cmd_quality)
+
+    formats = subparsers.add_parser("formats", help="Convert renditions to HEIC / lossless WebP, or compare formats")
+    formats.add_argument("catalog", nargs="?", help="Asset catalog or folder inside it (default: Assets.xcassets)")
+    formats.add_argument("--compare", action="store_true", help="Only report bytes, decode time and SSIM per format")
+    formats.add_argument("--sources", nargs="+", help="With --compare: original photos or folders to encode instead")
+    formats.add_argument("--lossy", choices=["jpeg", "heic"], default="jpeg", help="Format for JPEG renditions")
+    formats.add_argument("--lossless", choices=["png", "webp"], default="png",
+                         help="Format for PNG renditions (webp is opt-in)")
+    formats.add_argument("--json", help="Write the comparison here")
+    formats.set_defaults(handler=cmd_formats)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not (args.trace or args.trace_memory):
+        return args.handler(args) or 0
+
+    import asset_trace
+    asset_trace.enable(memory=args.trace_memory)
+    try:
+        with asset_trace.span(args.command):
+            return args.handler(args) or 0
+    finally:
+        asset_trace.finish(args.trace)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -26,6 +26,12 @@ class AnalyticsService: ObservableObject {
     /// Cancellables for managing Combine subscriptions
     private var cancellables = Set<AnyCancellable>()
     
+    /// Totals exported by materialize_aggregates.py, if bundled for this time zone and week start
+    private lazy var bundledAggregates: DailyAggregateTable? = DailyAggregateTable.loadBundled()
+    
+    /// The bundled totals, when they cover the latest meal; nil means rescan the meals
+    private var aggregateTable: DailyAggregateTable?
+    
     // MARK: - Initialization
     
     private init() {
@@ -49,6 +55,7 @@ class AnalyticsService: ObservableObject {
         
         do {
             let meals = try context.fetch(fetchRequest)
+            aggregateTable = bundledAggregates.flatMap { $0.covers(meals.last?.date) ? $0 : nil }
             
             // Process the data
             processDailyCalorieIntake(meals: meals)
@@ -141,6 +148,32 @@ class AnalyticsService: ObservableObject {
     
     /// Process nutrition trends over time
     private func processNutritionTrends(meals: [Meal]) {
+        let sortedWeeklyData = aggregateTable?.weeklyData(from: .distantPast, to: Date()) ?? weeklyNutritionData(meals: meals)
+        
+        // Calculate trends
+        if sortedWeeklyData.count >= 2 {
+            let firstWeek = sortedWeeklyData.first!
+            let lastWeek = sortedWeeklyData.last!
+            
+            // Calculate percentage changes
+            let calorieChange = calculatePercentageChange(from: firstWeek.totalCalories, to: lastWeek.totalCalories)
+            let proteinChange = calculatePercentageChange(from: firstWeek.totalProtein, to: lastWeek.totalProtein)
+            let carbsChange = calculatePercentageChange(from: firstWeek.totalCarbs, to: lastWeek.totalCarbs)
+            let fatsChange = calculatePercentageChange(from: firstWeek.totalFats, to: lastWeek.totalFats)
+            
+            // Update nutrition trends
+            nutritionTrends = NutritionTrends(
+                caloriesTrend: calorieChange,
+                proteinTrend: proteinChange,
+                carbsTrend: carbsChange,
+                fatsTrend: fatsChange,
+                weeklyData: sortedWeeklyData
+            )
+        }
+    }
+    
+    /// Weekly totals grouped from the meals themselves
+    private func weeklyNutritionData(meals: [Meal]) -> [WeeklyNutritionData] {
         // Group meals by week
         let calendar = Calendar.current
         var weeklyData: [Date: WeeklyNutritionData] = [:]
@@ -170,28 +203,7 @@ class AnalyticsService: ObservableObject {
         }
         
         // Convert dictionary to sorted array
-        let sortedWeeklyData = weeklyData.values.sorted { $0.weekStartDate < $1.weekStartDate }
-        
-        // Calculate trends
-        if sortedWeeklyData.count >= 2 {
-            let firstWeek = sortedWeeklyData.first!
-            let lastWeek = sortedWeeklyData.last!
-            
-            // Calculate percentage changes
-            let calorieChange = calculatePercentageChange(from: firstWeek.totalCalories, to: lastWeek.totalCalories)
-            let proteinChange = calculatePercentageChange(from: firstWeek.totalProtein, to: lastWeek.totalProtein)
-            let carbsChange = calculatePercentageChange(from: firstWeek.totalCarbs, to: lastWeek.totalCarbs)
-            let fatsChange = calculatePercentageChange(from: firstWeek.totalFats, to: lastWeek.totalFats)
-            
-            // Update nutrition trends
-            nutritionTrends = NutritionTrends(
-                caloriesTrend: calorieChange,
-                proteinTrend: proteinChange,
-                carbsTrend: carbsChange,
-                fatsTrend: fatsChange,
-                weeklyData: sortedWeeklyData
-            )
-        }
+        return weeklyData.values.sorted { $0.weekStartDate < $1.weekStartDate }
     }
     
     /// Process meal type distribution
@@ -389,26 +401,27 @@ class AnalyticsService: ObservableObject {
     func getDataForRange(_ range: DateRange) -> [DailyNutritionData] {
         let calendar = Calendar.current
         let today = Date()
+        let startDate: Date
         
         switch range {
         case .week:
-            let startDate = calendar.date(byAdding: .day, value: -7, to: today)!
-            return dailyCalorieIntake.filter { $0.date >= startDate }
+            startDate = calendar.date(byAdding: .day, value: -7, to: today)!
         case .month:
-            let startDate = calendar.date(byAdding: .month, value: -1, to: today)!
-            return dailyCalorieIntake.filter { $0.date >= startDate }
+            startDate = calendar.date(byAdding: .month, value: -1, to: today)!
         case .threeMonths:
-            let startDate = calendar.date(byAdding: .month, value: -3, to: today)!
-            return dailyCalorieIntake.filter { $0.date >= startDate }
+            startDate = calendar.date(byAdding: .month, value: -3, to: today)!
         case .sixMonths:
-            let startDate = calendar.date(byAdding: .month, value: -6, to: today)!
-            return dailyCalorieIntake.filter { $0.date >= startDate }
+            startDate = calendar.date(byAdding: .month, value: -6, to: today)!
         case .year:
-            let startDate = calendar.date(byAdding: .year, value: -1, to: today)!
-            return dailyCalorieIntake.filter { $0.date >= startDate }
+            startDate = calendar.date(byAdding: .year, value: -1, to: today)!
         case .all:
-            return dailyCalorieIntake
+            return aggregateTable?.dailyData(from: .distantPast, to: today) ?? dailyCalorieIntake
+        }
+        
+        if let aggregateTable = aggregateTable {
+            return aggregateTable.dailyData(from: startDate, to: today)
         }
+        return dailyCalorieIntake.filter { $0.date >= startDate }
     }
 }
 
@@ -475,6 +488,122 @@ struct NutritionTrends {
     var weeklyData: [WeeklyNutritionData] = []
 }
 
+/// Daily and weekly totals exported by materialize_aggregates.py, stored as
+/// column arrays sorted by day (days since 1970-01-01 in the export's time zone)
+struct DailyAggregateTable: Codable {
+    struct Columns: Codable {
+        let day: [Int]
+        let calories: [Double]
+        let protein: [Double]
+        let carbs: [Double]
+        let fats: [Double]
+        let mealCount: [Int]
+        let foodItemCount: [Int]
+    }
+
+    let version: Int
+    let timezone: String
+    let firstWeekday: Int
+    let highWaterMark: Int
+    let daily: Columns
+    let weekly: Columns
+
+    /// The bundled export, if it was grouped in this device's time zone and week start
+    static func loadBundled(named name: String = "aggregates") -> DailyAggregateTable? {
+        guard let tableURL = Bundle.main.url(forResource: name, withExtension: "json"),
+              let data = try? Data(contentsOf: tableURL),
+              let table = try? JSONDecoder().decode(DailyAggregateTable.self, from: data),
+              table.version == 1,
+              table.timezone == TimeZone.current.identifier,
+              table.firstWeekday == Calendar.current.firstWeekday else {
+            return nil
+        }
+        return table
+    }
+
+    /// Whether the table reaches the day of `latestMealDate`, so no logged meal is missing from it
+    func covers(_ latestMealDate: Date?) -> Bool {
+        guard let latestMealDate = latestMealDate else { return true }
+        guard let lastDay = daily.day.last else { return false }
+        return lastDay >= Self.dayNumber(for: latestMealDate)
+    }
+
+    /// Daily data for startDate...endDate with the 7-day moving average, found by binary search
+    func dailyData(from startDate: Date, to endDate: Date) -> [DailyNutritionData] {
+        let lower = Self.firstIndex(in: daily.day, notBelow: Self.dayNumber(for: startDate))
+        let upper = Self.firstIndex(in: daily.day, notBelow: Self.dayNumber(for: endDate) + 1)
+        guard lower < upper else { return [] }
+
+        return (lower..<upper).map { index in
+            var data = DailyNutritionData(
+                date: Self.date(forDayNumber: daily.day[index]),
+                calories: daily.calories[index],
+                protein: daily.protein[index],
+                carbs: daily.carbs[index],
+                fats: daily.fats[index]
+            )
+            // Same as processDailyCalorieIntake: the mean of the 7 entries before this one
+            if index >= 7 {
+                data.caloriesMovingAverage = daily.calories[(index - 7)..<index].reduce(0, +) / 7
+            }
+            return data
+        }
+    }
+
+    /// Weekly data for the weeks starting in startDate...endDate
+    func weeklyData(from startDate: Date, to endDate: Date) -> [WeeklyNutritionData] {
+        let lower = Self.firstIndex(in: weekly.day, notBelow: Self.dayNumber(for: startDate))
+        let upper = Self.firstIndex(in: weekly.day, notBelow: Self.dayNumber(for: endDate) + 1)
+        guard lower < upper else { return [] }
+
+        return (lower..<upper).map { index in
+            WeeklyNutritionData(
+                weekStartDate: Self.date(forDayNumber: weekly.day[index]),
+                totalCalories: weekly.calories[index],
+                totalProtein: weekly.protein[index],
+                totalCarbs: weekly.carbs[index],
+                totalFats: weekly.fats[index],
+                mealCount: weekly.mealCount[index],
+                foodItemCount: weekly.foodItemCount[index]
+            )
+        }
+    }
+
+    private static func firstIndex(in days: [Int], notBelow day: Int) -> Int {
+        var low = 0
+        var high = days.count
+        while low < high {
+            let mid = (low + high) / 2
+            if days[mid] < day {
+                low = mid + 1
+            } else {
+                high = mid
+            }
+        }
+        return low
+    }
+
+    private static var utcCalendar: Calendar {
+        var calendar = Calendar(identifier: .gregorian)
+        calendar.timeZone = TimeZone(identifier: "UTC")!
+        return calendar
+    }
+
+    /// Day number of the calendar date of `date` in the current calendar
+    static func dayNumber(for date: Date) -> Int {
+        let components = Calendar.current.dateComponents([.year, .month, .day], from: date)
+        let utcDate = utcCalendar.date(from: components) ?? date
+        return Int((utcDate.timeIntervalSince1970 / 86400).rounded(.down))
+    }
+
+    /// Start of the calendar date with this day number in the current calendar
+    static func date(forDayNumber day: Int) -> Date {
+        let utcDate = Date(timeIntervalSince1970: Double(day) * 86400)
+        let components = utcCalendar.dateComponents([.year, .month, .day], from: utcDate)
+        return Calendar.current.date(from: components) ?? utcDate
+    }
+}
+
 /// Represents meal type distribution data
 struct MealTypeData: Identifiable {
     let id = UUID()
@@ -9,16 +9,21 @@ class FoodRecognitionService {
     
     // Models
     private var foodClassificationModel: VNCoreMLModel?
+    private var fastClassificationModel: VNCoreMLModel?
     private var foodDetectionModel: VNCoreMLModel?
     
     // Model URLs - these would be replaced with actual model file names
     private let classificationModelName = "FoodClassifier"
+    private let fastClassificationModelName = "FoodClassifierFast"
     private let detectionModelName = "FoodDetector"
     
     // Confidence thresholds
     private let minimumConfidence: Float = 0.3
     private let highConfidenceThreshold: Float = 0.7
     
+    // Stage-one confidence below which the full model runs (calibrated by build_cascade.py)
+    private var cascadeThreshold: Float = 0.7
+    
     // Initialize the service
     private init() {
         loadModels()
@@ -39,6 +44,21 @@ class FoodRecognitionService {
             print("Food classification model not found in bundle, will use Vision framework default")
         }
         
+        // The fast first stage of the classifier cascade, if it was bundled
+        if let modelURL = Bundle.main.url(forResource: fastClassificationModelName, withExtension: "mlmodelc") {
+            do {
+                let model = try MLModel(contentsOf: modelURL)
+                fastClassificationModel = try VNCoreMLModel(for: model)
+                let metadata = model.modelDescription.metadata[.creatorDefinedKey] as? [String: String]
+                if let value = metadata?["cascade.threshold"], let threshold = Float(value) {
+                    cascadeThreshold = threshold
+                }
+                print("Successfully loaded fast food classification model (escalates below \(cascadeThreshold))")
+            } catch {
+                print("Failed to load fast food classification model: \(error)")
+            }
+        }
+        
         // Try to load the food detection model if available
         if let modelURL = Bundle.main.url(forResource: detectionModelName, withExtension: "mlmodelc") {
             do {
@@ -58,6 +78,38 @@ class FoodRecognitionService {
             return
         }
         
+        // Cascade: the fast model answers easy frames, the full model only runs when it is unsure
+        if let fastModel = fastClassificationModel, foodClassificationModel != nil {
+            let requestHandler = VNImageRequestHandler(cgImage: cgImage, options: [:])
+            let request = VNCoreMLRequest(model: fastModel) { request, error in
+                guard error == nil,
+                      let results = request.results as? [VNClassificationObservation],
+                      let top = results.first,
+                      top.confidence >= self.cascadeThreshold else {
+                    self.performFullClassification(on: cgImage, completion: completion)
+                    return
+                }
+                
+                let filteredResults = results
+                    .filter { $0.confidence > self.minimumConfidence }
+                    .prefix(10)
+                    .map { RecognitionResult(name: $0.identifier, confidence: $0.confidence, boundingBox: .zero, source: .customModel) }
+                completion(Array(filteredResults))
+            }
+            
+            do {
+                try requestHandler.perform([request])
+            } catch {
+                print("Failed to perform fast model request: \(error)")
+                performFullClassification(on: cgImage, completion: completion)
+            }
+        } else {
+            performFullClassification(on: cgImage, completion: completion)
+        }
+    }
+    
+    // Classify with the full custom model, falling back to the Vision framework
+    private func performFullClassification(on cgImage: CGImage, completion: @escaping ([RecognitionResult]) -> Void) {
         // Create a request handler
         let requestHandler = VNImageRequestHandler(cgImage: cgImage, options: [:])
         
@@ -0,0 +1,188 @@
+import Foundation
+import Accelerate
+import Vision
+import CoreML
+import UIKit
+
+/// Finds meals that look like a photo, offline, using the index built by build_embedding_index.py
+class MealEmbeddingIndex {
+    // Singleton instance
+    static let shared = MealEmbeddingIndex()
+
+    struct Item: Codable {
+        let id: String
+        let name: String
+    }
+
+    struct Match {
+        let item: Item
+        let similarity: Float
+    }
+
+    private struct Header: Codable {
+        let kind: String
+        let dim: Int
+        let count: Int
+        let nlist: Int
+        let items: [Item]
+    }
+
+    private let indexName = "meal_embeddings"
+    private let modelName = "MealEmbedding"
+    private let nprobe = 4
+
+    private var embeddingModel: VNCoreMLModel?
+    private var items: [Item] = []
+    private var dimension = 0
+    private var centroids: [Float] = []
+    private var offsets: [Int] = []
+    private var scales: [Float] = []
+    private var vectors: [Int8] = []
+
+    var isAvailable: Bool {
+        return embeddingModel != nil && !items.isEmpty
+    }
+
+    private init() {
+        loadIndex()
+        loadModel()
+    }
+
+    // MARK: - Public Methods
+
+    /// The featured or history meals most similar to an image, best first
+    func similarMeals(to image: UIImage, count: Int = 5, completion: @escaping ([Match]) -> Void) {
+        guard let cgImage = image.cgImage, let model = embeddingModel, !items.isEmpty else {
+            completion([])
+            return
+        }
+
+        let request = VNCoreMLRequest(model: model) { [weak self] request, error in
+            guard let self = self,
+                  error == nil,
+                  let observation = request.results?.first as? VNCoreMLFeatureValueObservation,
+                  let embedding = observation.featureValue.multiArrayValue else {
+                completion([])
+                return
+            }
+            let query = (0..<embedding.count).map { embedding[$0].floatValue }
+            completion(self.search(query: query, count: count))
+        }
+        request.imageCropAndScaleOption = .centerCrop
+
+        do {
+            try VNImageRequestHandler(cgImage: cgImage, options: [:]).perform([request])
+        } catch {
+            print("Failed to compute meal embedding: \(error)")
+            completion([])
+        }
+    }
+
+    /// Nearest stored vectors to a normalized query embedding
+    func search(query: [Float], count: Int = 5) -> [Match] {
+        guard query.count == dimension else { return [] }
+
+        // A flat index has a single list; an IVF index scans the lists of the nearest centroids
+        var lists = Array(0..<(offsets.count - 1))
+        if !centroids.isEmpty {
+            lists = lists
+                .map { list in (list, dot(query, centroids, offset: list * dimension)) }
+                .sorted { $0.1 > $1.1 }
+                .prefix(nprobe)
+                .map { $0.0 }
+        }
+
+        var matches: [(index: Int, score: Float)] = []
+        var row = [Float](repeating: 0, count: dimension)
+        for list in lists {
+            for index in offsets[list]..<offsets[list + 1] {
+                matches.append((index, quantizedDot(query, row: index, buffer: &row) * scales[index]))
+            }
+        }
+        return matches
+            .sorted { $0.score > $1.score }
+            .prefix(count)
+            .map { Match(item: items[$0.index], similarity: $0.score) }
+    }
+
+    // MARK: - Private Methods
+
+    private func dot(_ query: [Float], _ values: [Float], offset: Int) -> Float {
+        var sum: Float = 0
+        values.withUnsafeBufferPointer { values in
+            vDSP_dotpr(query, 1, values.baseAddress! + offset, 1, &sum, vDSP_Length(dimension))
+        }
+        return sum
+    }
+
+    /// Widens one stored row to Float in buffer, then takes its dot product with the query
+    private func quantizedDot(_ query: [Float], row: Int, buffer: inout [Float]) -> Float {
+        var sum: Float = 0
+        vectors.withUnsafeBufferPointer { vectors in
+            vDSP_vflt8(vectors.baseAddress! + row * dimension, 1, &buffer, 1, vDSP_Length(dimension))
+        }
+        vDSP_dotpr(query, 1, buffer, 1, &sum, vDSP_Length(dimension))
+        return sum
+    }
+
+    private func loadModel() {
+        guard let modelURL = Bundle.main.url(forResource: modelName, withExtension: "mlmodelc") else {
+            return
+        }
+        do {
+            embeddingModel = try VNCoreMLModel(for: MLModel(contentsOf: modelURL))
+        } catch {
+            print("Failed to load meal embedding model: \(error)")
+        }
+    }
+
+    private func loadIndex() {
+        guard let indexURL = Bundle.main.url(forResource: indexName, withExtension: "index"),
+              let data = try? Data(contentsOf: indexURL),
+              data.count > 12,
+              data.prefix(4) == Data("FSEI".utf8) else {
+            return
+        }
+
+        let headerLength = Int(readUInt32(data, at: 8))
+        guard data.count >= 12 + headerLength,
+              let header = try? JSONDecoder().decode(Header.self, from: trimmedHeader(data.subdata(in: 12..<(12 + headerLength)))) else {
+            return
+        }
+
+        var position = 12 + headerLength
+        let dim = header.dim
+        if header.kind == "ivf" {
+            centroids = readFloats(data, at: position, count: header.nlist * dim)
+            position += header.nlist * dim * 4
+        }
+        offsets = (0...header.nlist).map { Int(Int32(bitPattern: readUInt32(data, at: position + $0 * 4))) }
+        position += (header.nlist + 1) * 4
+        scales = readFloats(data, at: position, count: header.count)
+        position += header.count * 4
+        guard data.count >= position + header.count * dim else { return }
+        vectors = data.subdata(in: position..<(position + header.count * dim)).map { Int8(bitPattern: $0) }
+
+        dimension = dim
+        items = header.items
+    }
+
+    private func trimmedHeader(_ data: Data) -> Data {
+        // The header is padded with zero bytes to a 4-byte boundary
+        var end = data.endIndex
+        while end > data.startIndex && data[end - 1] == 0 {
+            end -= 1
+        }
+        return data.subdata(in: data.startIndex..<end)
+    }
+
+    private func readUInt32(_ data: Data, at offset: Int) -> UInt32 {
+        return (0..<4).reduce(UInt32(0)) { value, i in
+            value | UInt32(data[data.startIndex + offset + i]) << (8 * UInt32(i))
+        }
+    }
+
+    private func readFloats(_ data: Data, at offset: Int, count: Int) -> [Float] {
+        return (0..<count).map { Float(bitPattern: readUInt32(data, at: offset + $0 * 4)) }
+    }
+}
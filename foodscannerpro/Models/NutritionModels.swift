@@ -75,6 +75,23 @@ enum NutritionSource: String, Codable {
     case userProvided = "User Provided"
 }
 
+// MARK: - Label Index Models
+
+/// Classifier label -> nutrition record table built by build_label_index.py
+struct LabelNutritionIndex: Codable {
+    let version: Int
+    let minScore: Double
+    let labels: [String: LabelNutritionEntry]
+}
+
+/// Nutrition record a classifier label resolved to
+struct LabelNutritionEntry: Codable {
+    let fdcId: Int
+    let matchedName: String
+    let score: Double
+    let nutrition: FoodNutritionInfo
+}
+
 // MARK: - USDA API Response Models
 
 /// Root response from USDA API
@@ -19,6 +19,9 @@ class NutritionService: ObservableObject {
     private var nutritionCache: [String: FoodNutritionInfo] = [:]
     private let cacheFileName = "nutrition_cache.json"
     
+    /// Classifier label -> nutrition, bundled with the model (see build_label_index.py)
+    private var labelIndex: [String: FoodNutritionInfo] = [:]
+    
     /// Fallback nutrition database for common foods
     private var fallbackDatabase: [String: FoodNutritionInfo] = [:]
     
@@ -32,6 +35,7 @@ class NutritionService: ObservableObject {
     
     private init() {
         loadCacheFromDisk()
+        loadLabelIndex()
         setupFallbackDatabase()
     }
     
@@ -48,6 +52,12 @@ class NutritionService: ObservableObject {
             return
         }
         
+        // Then the precomputed label index, which covers every classifier label
+        if let indexedInfo = labelIndex[foodName.lowercased()] {
+            completion(.success(indexedInfo))
+            return
+        }
+        
         // Try to get from USDA API
         fetchFromUSDA(foodName: foodName, retryCount: 0) { [weak self] result in
             guard let self = self else { return }
@@ -237,16 +247,28 @@ class NutritionService: ObservableObject {
     // MARK: - Cache Methods
     
     private func loadCacheFromDisk() {
+        // Start from the pre-warmed cache bundled with the app (see prewarm_nutrition_cache.py)
+        nutritionCache = loadBundledCache()
+
         guard let cacheURL = getCacheURL() else { return }
-        
+
         do {
             let data = try Data(contentsOf: cacheURL)
             let decoder = JSONDecoder()
-            nutritionCache = try decoder.decode([String: FoodNutritionInfo].self, from: data)
+            let savedCache = try decoder.decode([String: FoodNutritionInfo].self, from: data)
+            nutritionCache.merge(savedCache) { _, saved in saved }
         } catch {
-            nutritionCache = [:]
+            // Keep the bundled entries
         }
     }
+
+    private func loadBundledCache() -> [String: FoodNutritionInfo] {
+        guard let bundledURL = Bundle.main.url(forResource: "nutrition_cache", withExtension: "json"),
+              let data = try? Data(contentsOf: bundledURL) else {
+            return [:]
+        }
+        return (try? JSONDecoder().decode([String: FoodNutritionInfo].self, from: data)) ?? [:]
+    }
     
     private func saveCacheToDisk() {
         guard let cacheURL = getCacheURL() else { return }
@@ -260,6 +282,15 @@ class NutritionService: ObservableObject {
         }
     }
     
+    private func loadLabelIndex() {
+        guard let indexURL = Bundle.main.url(forResource: "label_nutrition_index", withExtension: "json"),
+              let data = try? Data(contentsOf: indexURL),
+              let index = try? JSONDecoder().decode(LabelNutritionIndex.self, from: data) else {
+            return
+        }
+        labelIndex = index.labels.mapValues { $0.nutrition }
+    }
+    
     private func getCacheURL() -> URL? {
         guard let documentsDirectory = FileManager.default.urls(for: .documentDirectory, in: .userDomainMask).first else {
             return nil
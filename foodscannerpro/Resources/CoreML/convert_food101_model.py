@@ -3,21 +3,56 @@
 Food101 Model Converter for Food Scanner Pro
 
 This script downloads a pre-trained Food101 model and converts it to Core ML format.
+With --onnx it writes an ONNX export instead, for replay_recognition.py.
 Requirements:
 - torch
 - torchvision
-- coremltools
+- coremltools (Core ML output only)
 
 Usage:
 python convert_food101_model.py
+python convert_food101_model.py --onnx food101.onnx
 """
 
 import os
-import torch
-import coremltools as ct
-from torchvision import transforms
+import sys
+import argparse
+
+# The 101 Food101 classes in dataset order (meta/classes.txt)
+FOOD101_CLASSES = [
+    "apple_pie", "baby_back_ribs", "baklava", "beef_carpaccio", "beef_tartare", "beet_salad",
+    "beignets", "bibimbap", "bread_pudding", "breakfast_burrito", "bruschetta", "caesar_salad",
+    "cannoli", "caprese_salad", "carrot_cake", "ceviche", "cheese_plate", "cheesecake",
+    "chicken_curry", "chicken_quesadilla", "chicken_wings", "chocolate_cake", "chocolate_mousse",
+    "churros", "clam_chowder", "club_sandwich", "crab_cakes", "creme_brulee", "croque_madame",
+    "cup_cakes", "deviled_eggs", "donuts", "dumplings", "edamame", "eggs_benedict", "escargots",
+    "falafel", "filet_mignon", "fish_and_chips", "foie_gras", "french_fries", "french_onion_soup",
+    "french_toast", "fried_calamari", "fried_rice", "frozen_yogurt", "garlic_bread", "gnocchi",
+    "greek_salad", "grilled_cheese_sandwich", "grilled_salmon", "guacamole", "gyoza", "hamburger",
+    "hot_and_sour_soup", "hot_dog", "huevos_rancheros", "hummus", "ice_cream", "lasagna",
+    "lobster_bisque", "lobster_roll_sandwich", "macaroni_and_cheese", "macarons", "miso_soup",
+    "mussels", "nachos", "omelette", "onion_rings", "oysters", "pad_thai", "paella", "pancakes",
+    "panna_cotta", "peking_duck", "pho", "pizza", "pork_chop", "poutine", "prime_rib",
+    "pulled_pork_sandwich", "ramen", "ravioli", "red_velvet_cake", "risotto", "samosa", "sashimi",
+    "scallops", "seaweed_salad", "shrimp_and_grits", "spaghetti_bolognese", "spaghetti_carbonara",
+    "spring_rolls", "steak", "strawberry_shortcake", "sushi", "tacos", "takoyaki", "tiramisu",
+    "tuna_tartare", "waffles",
+]
+
+
+def frame_gate_metadata():
+    """frameGate.* settings from frame_similarity.py at the repository root"""
+    repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+    if repo_root not in sys.path:
+        sys.path.insert(0, repo_root)
+    from frame_similarity import gate_metadata
+    return gate_metadata()
+
+
+def load_food101_model():
+    """The pre-trained Food101 network in eval mode, and its class names"""
+    import torch
 
-def main():
     print("Downloading Food101 model from PyTorch Hub...")
     model = torch.hub.load('pytorch/vision:v0.10.0', 'food101', pretrained=True)
     model.eval()
@@ -29,10 +64,18 @@ def main():
         # Try to get class names from the model
         class_names = model.classes
     except AttributeError:
-        # If not available, use a placeholder list
-        print("Class names not found in model, using placeholder names.")
-        class_names = [f"food_{i}" for i in range(101)]
-    
+        # If not available, use the Food101 class list
+        print("Class names not found in model, using the Food101 class list.")
+        class_names = FOOD101_CLASSES
+    return model, class_names
+
+
+def convert_model(model, class_names, output_path, description="Food classification model based on Food101 dataset", metadata=None):
+    """Trace a Food101 network and save it as a Core ML classifier; metadata adds user-defined entries"""
+    # Heavy dependencies are imported here so the module can be imported cheaply
+    import torch
+    import coremltools as ct
+
     # Create example input
     example_input = torch.rand(1, 3, 224, 224)
     
@@ -49,17 +92,55 @@ def main():
     # Set model metadata
     mlmodel.author = "Food Scanner Pro"
     mlmodel.license = "MIT"
-    mlmodel.short_description = "Food classification model based on Food101 dataset"
+    mlmodel.short_description = description
     mlmodel.version = "1.0"
+    # Lets the live camera path reuse results for frames of the same scene
+    mlmodel.user_defined_metadata.update(frame_gate_metadata())
+    mlmodel.user_defined_metadata.update(metadata or {})
     
     # Save the model
-    output_path = "FoodClassifier.mlmodel"
     print(f"Saving model to {output_path}...")
     mlmodel.save(output_path)
+    return mlmodel
+
+
+def export_onnx(model, output_path):
+    """Export a Food101 network as ONNX (input "input", logits "output", dynamic batch) for CPU replay"""
+    import torch
+
+    print(f"Exporting model to ONNX format: {output_path}")
+    torch.onnx.export(
+        model,
+        torch.zeros(1, 3, 224, 224),
+        output_path,
+        opset_version=12,
+        input_names=['input'],
+        output_names=['output'],
+        dynamic_axes={'input': {0: 'batch_size'}, 'output': {0: 'batch_size'}},
+        # The TorchScript exporter; newer torch defaults to dynamo, which needs onnxscript
+        dynamo=False,
+    )
+    return output_path
+
+
+def main(output_path="FoodClassifier.mlmodel", onnx_path=None):
+    model, class_names = load_food101_model()
+    if onnx_path:
+        export_onnx(model, onnx_path)
+        print(f"ONNX model saved to: {os.path.abspath(onnx_path)}")
+        print("Use it with replay_recognition.py --classifier.")
+        return 0
+
+    convert_model(model, class_names, output_path)
     
     print("Conversion complete!")
     print(f"Model saved to: {os.path.abspath(output_path)}")
     print("Add this model to your Xcode project to enable enhanced food recognition.")
+    return 0
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Convert the Food101 classifier to Core ML, or export it as ONNX")
+    parser.add_argument("--output", default="FoodClassifier.mlmodel", help="Core ML model to write")
+    parser.add_argument("--onnx", help="Write an ONNX export here instead of converting to Core ML")
+    args = parser.parse_args()
+    sys.exit(main(args.output, args.onnx)) 
\ No newline at end of file
@@ -3,21 +3,214 @@
 Food Detection Model Converter for Food Scanner Pro
 
 This script downloads a pre-trained YOLOv5 model and converts it to Core ML format.
+
+Between the ONNX export and the Core ML conversion, the graph is optimized:
+shape inference, constant folding, folding BatchNormalization into the
+preceding Conv, Identity removal and dead-node/initializer elimination.
+Conv+activation fusion has no standard ONNX operator (YOLOv5's SiLU is
+Sigmoid+Mul). ONNX Runtime fuses it when it loads the graph, and the Core ML
+converter fuses it during conversion, so those fusions are left to them. A
+parity check then compares the raw and the optimized graph with the PyTorch
+output under ONNX Runtime.
+
 Requirements:
 - torch
 - torchvision
 - coremltools
 - ultralytics
+- onnx, onnxruntime (optimization and parity check)
 
 Usage:
 python convert_food_detector_model.py
+python convert_food_detector_model.py --keep-onnx food_detector.onnx   # also keep the optimized ONNX
+python convert_food_detector_model.py --no-optimize                    # convert the raw export
 """
 
 import os
-import torch
-import coremltools as ct
+import sys
+import time
+import argparse
+
+# Largest difference to the PyTorch output accepted by the parity check
+PARITY_ATOL = 1e-3
+PARITY_RTOL = 1e-3
+
+
+# --- ONNX graph optimization ---
+
+def _consumer_counts(graph):
+    counts = {}
+    for node in graph.node:
+        for name in node.input:
+            counts[name] = counts.get(name, 0) + 1
+    for output in graph.output:
+        counts[output.name] = counts.get(output.name, 0) + 1
+    return counts
+
+
+def fold_constants(graph):
+    """Evaluate nodes whose inputs are all constants and store their outputs as initializers"""
+    import numpy as np
+    from onnx import numpy_helper
+    from onnx.reference import ReferenceEvaluator
+
+    constants = {init.name: numpy_helper.to_array(init) for init in graph.initializer}
+    kept = []
+    folded = 0
+    for node in graph.node:
+        inputs = [name for name in node.input if name]
+        foldable = node.op_type == "Constant" or (inputs and all(name in constants for name in inputs))
+        if not foldable or node.op_type in ("RandomNormal", "RandomUniform", "RandomNormalLike", "RandomUniformLike", "Multinomial"):
+            kept.append(node)
+            continue
+        try:
+            outputs = ReferenceEvaluator(node).run(None, {name: constants[name] for name in inputs})
+        except Exception:
+            kept.append(node)
+            continue
+        for name, value in zip(node.output, outputs):
+            constants[name] = np.asarray(value)
+            graph.initializer.append(numpy_helper.from_array(np.asarray(value), name))
+        folded += 1
+    del graph.node[:]
+    graph.node.extend(kept)
+    return folded
+
+
+def fold_batch_norms(graph):
+    """Fold BatchNormalization nodes that directly follow a Conv into the Conv's weights and bias"""
+    import numpy as np
+    from onnx import numpy_helper
+
+    initializers = {init.name: init for init in graph.initializer}
+    producers = {output: node for node in graph.node for output in node.output}
+    consumers = _consumer_counts(graph)
+    folded = []
+    for norm in [node for node in graph.node if node.op_type == "BatchNormalization"]:
+        conv = producers.get(norm.input[0])
+        if conv is None or conv.op_type != "Conv" or consumers.get(norm.input[0]) != 1:
+            continue
+        if any(name not in initializers for name in list(norm.input[1:5]) + [conv.input[1]]):
+            continue
+        if len(conv.input) > 2 and conv.input[2] and conv.input[2] not in initializers:
+            continue
+        epsilon = next((attr.f for attr in norm.attribute if attr.name == "epsilon"), 1e-5)
+        scale, bias, mean, variance = (numpy_helper.to_array(initializers[name]) for name in norm.input[1:5])
+        weight = numpy_helper.to_array(initializers[conv.input[1]])
+        conv_bias = (
+            numpy_helper.to_array(initializers[conv.input[2]])
+            if len(conv.input) > 2 and conv.input[2] else np.zeros(weight.shape[0], dtype=weight.dtype)
+        )
+        factor = scale / np.sqrt(variance + epsilon)
+        weight = weight * factor.reshape((-1,) + (1,) * (weight.ndim - 1))
+        conv_bias = (conv_bias - mean) * factor + bias
+
+        # New names, in case the original weights are shared with another node
+        weight_name, bias_name = f"{conv.name or conv.output[0]}_bn_weight", f"{conv.name or conv.output[0]}_bn_bias"
+        graph.initializer.append(numpy_helper.from_array(weight.astype(np.float32), weight_name))
+        graph.initializer.append(numpy_helper.from_array(conv_bias.astype(np.float32), bias_name))
+        del conv.input[1:]
+        conv.input.extend([weight_name, bias_name])
+        conv.output[0] = norm.output[0]
+        folded.append(norm)
+    for norm in folded:
+        graph.node.remove(norm)
+    return len(folded)
+
+
+def remove_identities(graph):
+    """Bypass Identity nodes whose output is not a graph output"""
+    graph_outputs = {output.name for output in graph.output}
+    renames = {}
+    removed = []
+    for node in graph.node:
+        if node.op_type == "Identity" and node.output[0] not in graph_outputs:
+            renames[node.output[0]] = renames.get(node.input[0], node.input[0])
+            removed.append(node)
+    for node in removed:
+        graph.node.remove(node)
+    for node in graph.node:
+        for i, name in enumerate(node.input):
+            if name in renames:
+                node.input[i] = renames[name]
+    return len(removed)
+
+
+def eliminate_dead_nodes(graph):
+    """Drop nodes, initializers and value_info that no graph output depends on; returns (nodes, initializers) removed"""
+    needed = {output.name for output in graph.output}
+    live = []
+    for node in reversed(graph.node):
+        if any(name in needed for name in node.output):
+            live.append(node)
+            needed.update(name for name in node.input if name)
+    removed_nodes = len(graph.node) - len(live)
+    del graph.node[:]
+    graph.node.extend(reversed(live))
+
+    unused = [init for init in graph.initializer if init.name not in needed]
+    for init in unused:
+        graph.initializer.remove(init)
+    for value in [value for value in graph.value_info if value.name not in needed]:
+        graph.value_info.remove(value)
+    # Older exporters also list initializers as graph inputs
+    initializer_names = {init.name for init in graph.initializer}
+    for graph_input in [i for i in graph.input if i.name not in needed and i.name not in initializer_names]:
+        if any(graph_input.name == init.name for init in unused):
+            graph.input.remove(graph_input)
+    return removed_nodes, len(unused)
+
+
+def optimize_onnx(input_path, output_path):
+    """Run the optimization passes on an ONNX file; returns a dict of what each pass changed"""
+    import onnx
+
+    model = onnx.load(input_path)
+    stats = {"nodes_before": len(model.graph.node)}
+    model = onnx.shape_inference.infer_shapes(model)
+    stats["constants_folded"] = fold_constants(model.graph)
+    stats["batch_norms_folded"] = fold_batch_norms(model.graph)
+    stats["identities_removed"] = remove_identities(model.graph)
+    stats["dead_nodes_removed"], stats["initializers_removed"] = eliminate_dead_nodes(model.graph)
+    # Folded values change shapes that were unknown before; infer them again on the clean graph
+    del model.graph.value_info[:]
+    model = onnx.shape_inference.infer_shapes(model)
+    onnx.checker.check_model(model)
+    onnx.save(model, output_path)
+    stats["nodes_after"] = len(model.graph.node)
+    return stats
+
+
+def check_parity(model, onnx_paths, input_size=640, batch_sizes=(1, 2), seed=0):
+    """Compare each ONNX file with the PyTorch output on random inputs; returns rows of (path, batch, max diff, ok, ms)"""
+    import numpy as np
+    import torch
+    import onnxruntime as ort
+
+    generator = torch.Generator().manual_seed(seed)
+    sessions = {path: ort.InferenceSession(path, providers=["CPUExecutionProvider"]) for path in onnx_paths}
+    rows = []
+    for batch_size in batch_sizes:
+        example = torch.rand(batch_size, 3, input_size, input_size, generator=generator)
+        with torch.no_grad():
+            reference = model(example)
+        reference = (reference[0] if isinstance(reference, (tuple, list)) else reference).numpy()
+        for path, session in sessions.items():
+            input_name = session.get_inputs()[0].name
+            start = time.perf_counter()
+            output = session.run(None, {input_name: example.numpy()})[0]
+            elapsed = (time.perf_counter() - start) * 1000
+            ok = output.shape == reference.shape and np.allclose(output, reference, atol=PARITY_ATOL, rtol=PARITY_RTOL)
+            difference = float(np.abs(output - reference).max()) if output.shape == reference.shape else float("inf")
+            rows.append((path, batch_size, difference, ok, elapsed))
+    return rows
+
+
+def main(output_path="FoodDetector.mlmodel", keep_onnx=None, optimize=True):
+    # Heavy dependencies are imported here so the module can be imported cheaply
+    import torch
+    import coremltools as ct
 
-def main():
     print("Downloading YOLOv5 model from Ultralytics Hub...")
     # You can replace this with a custom-trained food detection model
     # For this example, we're using a pre-trained YOLOv5s model
@@ -30,51 +223,86 @@ def main():
     
     # Export to ONNX format
     onnx_model_path = 'food_detector.onnx'
+    convert_path = onnx_model_path
     print(f"Exporting model to ONNX format: {onnx_model_path}")
-    
-    # Example input shape (batch_size, channels, height, width)
-    dummy_input = torch.zeros(1, 3, 640, 640)
-    
-    # Export the model
-    torch.onnx.export(
-        model,
-        dummy_input,
-        onnx_model_path,
-        opset_version=12,
-        input_names=['input'],
-        output_names=['output'],
-        dynamic_axes={'input': {0: 'batch_size'}, 'output': {0: 'batch_size'}}
-    )
-    
-    print("Converting ONNX model to Core ML format...")
-    # Convert ONNX model to Core ML
-    mlmodel = ct.converters.onnx.convert(
-        model=onnx_model_path,
-        minimum_ios_deployment_target='14.0',
-        predicted_feature_name='output'
-    )
-    
-    # Set model metadata
-    mlmodel.author = "Food Scanner Pro"
-    mlmodel.license = "MIT"
-    mlmodel.short_description = "Food detection model based on YOLOv5"
-    mlmodel.version = "1.0"
-    
-    # Save the model
-    output_path = "FoodDetector.mlmodel"
-    print(f"Saving model to {output_path}...")
-    mlmodel.save(output_path)
-    
-    # Clean up ONNX file
-    if os.path.exists(onnx_model_path):
-        os.remove(onnx_model_path)
-        print(f"Removed temporary file: {onnx_model_path}")
-    
+    try:
+        # Example input shape (batch_size, channels, height, width)
+        dummy_input = torch.zeros(1, 3, 640, 640)
+
+        # Export the model
+        torch.onnx.export(
+            model,
+            dummy_input,
+            onnx_model_path,
+            opset_version=12,
+            input_names=['input'],
+            output_names=['output'],
+            dynamic_axes={'input': {0: 'batch_size'}, 'output': {0: 'batch_size'}},
+            # The TorchScript exporter; newer torch defaults to dynamo, which needs onnxscript
+            dynamo=False,
+        )
+
+        if optimize:
+            optimized_path = keep_onnx or 'food_detector.optimized.onnx'
+            print(f"Optimizing ONNX graph: {optimized_path}")
+            convert_path = optimized_path
+            stats = optimize_onnx(onnx_model_path, optimized_path)
+            print(f"  {stats['nodes_before']} -> {stats['nodes_after']} nodes "
+                  f"({stats['constants_folded']} constants folded, {stats['batch_norms_folded']} BatchNorms folded, "
+                  f"{stats['identities_removed']} Identity and {stats['dead_nodes_removed']} dead nodes removed)")
+
+            try:
+                rows = check_parity(model, [onnx_model_path, optimized_path])
+            except ImportError:
+                print("⚠️ onnxruntime is not installed; skipping the parity check")
+                rows = []
+            for path, batch_size, difference, ok, elapsed in rows:
+                print(f"  {'✅' if ok else '❌'} {os.path.basename(path)} batch {batch_size}: "
+                      f"max |diff| {difference:.2e}, {elapsed:.1f} ms in ONNX Runtime")
+            if not all(ok for *_, ok, _ in rows):
+                print("❌ The optimized graph does not match the PyTorch output; not converting it")
+                # Don't leave a mismatched graph behind for --keep-onnx either
+                keep_onnx = None
+                return 1
+        elif keep_onnx:
+            os.replace(onnx_model_path, keep_onnx)
+            onnx_model_path = convert_path = keep_onnx
+
+        print("Converting ONNX model to Core ML format...")
+        # Convert ONNX model to Core ML
+        mlmodel = ct.converters.onnx.convert(
+            model=convert_path,
+            minimum_ios_deployment_target='14.0',
+            predicted_feature_name='output'
+        )
+
+        # Set model metadata
+        mlmodel.author = "Food Scanner Pro"
+        mlmodel.license = "MIT"
+        mlmodel.short_description = "Food detection model based on YOLOv5"
+        mlmodel.version = "1.0"
+
+        # Save the model
+        print(f"Saving model to {output_path}...")
+        mlmodel.save(output_path)
+    finally:
+        # Clean up ONNX files, keeping the one asked for with --keep-onnx, also when a step fails
+        for path in {onnx_model_path, convert_path}:
+            if path != keep_onnx and os.path.exists(path):
+                os.remove(path)
+                print(f"Removed temporary file: {path}")
+
     print("Conversion complete!")
     print(f"Model saved to: {os.path.abspath(output_path)}")
     print("Add this model to your Xcode project to enable enhanced food detection.")
     print("\nNote: This is a general object detection model. For best results,")
     print("train a custom model specifically on food datasets with bounding boxes.")
+    return 0
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Convert YOLOv5 to Core ML through an optimized ONNX graph")
+    parser.add_argument("--output", default="FoodDetector.mlmodel", help="Core ML model to write")
+    parser.add_argument("--keep-onnx", help="Keep the (optimized) ONNX graph at this path")
+    parser.add_argument("--no-optimize", action="store_true", help="Convert the raw ONNX export")
+    args = parser.parse_args()
+    sys.exit(main(args.output, args.keep_onnx, not args.no_optimize)) 
\ No newline at end of file
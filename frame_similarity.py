@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Frame-similarity gate: reuse recognition results while the camera sees the same scene.
+
+Consecutive camera frames of a plate differ mostly by sensor noise and small
+hand movements. Recognizing each one again wastes the detector and
+classifier runs. The gate keeps a 64-bit perceptual hash of the last frame
+that was actually recognized (the anchor). A new frame whose hash is within
+max_distance bits of the anchor reuses the anchor's detections and
+classifications. Hashes:
+
+- phash (default): signs of the low-frequency 8x8 DCT coefficients of a
+  32x32 thumbnail against their median. It tolerates noise and small shifts
+  but still changes when an item is added to or taken off the plate.
+- dhash: signs of horizontal gradients on a 9x8 grayscale thumbnail. It is
+  cheaper, but it can miss small objects on large plain areas.
+
+Comparing against the anchor rather than the previous frame stops slow pans
+from drifting through the gate. After max_reuse hits in a row, the next frame
+is recognized again anyway, so results never go stale for long.
+
+The defaults are written into the Core ML models' metadata (frameGate.*
+keys, see gate_metadata()), so the app's gate uses the same settings that
+were tuned here with replay_recognition.py.
+
+Usage:
+python frame_similarity.py frames/                      # hit rate and distances for a frame directory
+python frame_similarity.py clip.mov --method dhash --max-distance 4
+"""
+
+import sys
+import argparse
+from collections import Counter
+
+import numpy as np
+
+METHODS = ("phash", "dhash")
+DEFAULT_METHOD = "phash"
+DEFAULT_MAX_DISTANCE = 6
+DEFAULT_MAX_REUSE = 30
+
+HASH_SIZE = 8
+PHASH_SIZE = 32
+
+# dhash treats brightness steps below this many gray levels as flat, so
+# sensor noise on plain backgrounds does not flip bits
+DHASH_STEP = 4
+
+
+def grayscale(frame, width, height):
+    from PIL import Image
+
+    return np.asarray(Image.fromarray(frame).convert("L").resize((width, height), Image.BOX), dtype=np.float32)
+
+
+def pack_bits(bits):
+    return int.from_bytes(np.packbits(bits.ravel()).tobytes(), "big")
+
+
+def dhash(frame, size=HASH_SIZE):
+    """size*size-bit difference hash of an RGB uint8 frame"""
+    pixels = np.round(grayscale(frame, size + 1, size) / DHASH_STEP)
+    return pack_bits(pixels[:, 1:] > pixels[:, :-1])
+
+
+def _dct_matrix(n):
+    k = np.arange(n)[:, np.newaxis]
+    matrix = np.cos(np.pi * (2 * np.arange(n) + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    matrix[0] /= np.sqrt(2)
+    return matrix.astype(np.float32)
+
+
+_DCT = _dct_matrix(PHASH_SIZE)
+
+
+def phash(frame, size=HASH_SIZE):
+    """size*size-bit DCT hash of an RGB uint8 frame"""
+    pixels = grayscale(frame, PHASH_SIZE, PHASH_SIZE)
+    coefficients = (_DCT @ pixels @ _DCT.T)[:size, :size]
+    # The DC term only carries overall brightness
+    median = np.median(coefficients.ravel()[1:])
+    return pack_bits(coefficients > median)
+
+
+HASHES = {"dhash": dhash, "phash": phash}
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class FrameSimilarityGate:
+    """Decides per frame whether the anchor frame's results can be reused"""
+
+    def __init__(self, method=DEFAULT_METHOD, max_distance=DEFAULT_MAX_DISTANCE, max_reuse=DEFAULT_MAX_REUSE):
+        if method not in HASHES:
+            raise ValueError(f"unknown method {method!r}; expected one of {', '.join(METHODS)}")
+        self.method = method
+        self.hash = HASHES[method]
+        self.max_distance = max_distance
+        self.max_reuse = max_reuse
+        self.anchor = None
+        self.results = None
+        self.reused = 0
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.distances = Counter()
+
+    def lookup(self, frame):
+        """(frame hash, the anchor's results or None when the frame must be recognized)"""
+        frame_hash = self.hash(frame)
+        if self.anchor is None:
+            self.misses += 1
+            return frame_hash, None
+        distance = hamming(frame_hash, self.anchor)
+        self.distances[distance] += 1
+        if distance > self.max_distance:
+            self.misses += 1
+            return frame_hash, None
+        if self.reused >= self.max_reuse:
+            self.expired += 1
+            self.misses += 1
+            return frame_hash, None
+        self.reused += 1
+        self.hits += 1
+        return frame_hash, self.results
+
+    def store(self, frame_hash, results):
+        """Make a freshly recognized frame the new anchor"""
+        self.anchor = frame_hash
+        self.results = results
+        self.reused = 0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def metrics(self):
+        return {
+            "method": self.method,
+            "maxDistance": self.max_distance,
+            "maxReuse": self.max_reuse,
+            "lookups": self.hits + self.misses,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "hitRate": round(self.hit_rate, 4),
+            "distances": dict(sorted(self.distances.items())),
+        }
+
+
+def gate_metadata(method=DEFAULT_METHOD, max_distance=DEFAULT_MAX_DISTANCE, max_reuse=DEFAULT_MAX_REUSE):
+    """Core ML user-defined metadata entries describing the gate"""
+    return {
+        "frameGate.method": method,
+        "frameGate.hashBits": str(HASH_SIZE * HASH_SIZE),
+        "frameGate.maxDistance": str(max_distance),
+        "frameGate.maxReuse": str(max_reuse),
+    }
+
+
+def main(argv=None):
+    from replay_recognition import iter_frames
+
+    parser = argparse.ArgumentParser(description="Measure the frame-similarity gate's hit rate on a clip")
+    parser.add_argument("source", help="Video file or directory of frame images")
+    parser.add_argument("--method", choices=METHODS, default=DEFAULT_METHOD, help="Perceptual hash")
+    parser.add_argument("--max-distance", type=int, default=DEFAULT_MAX_DISTANCE, help="Most differing hash bits for a hit")
+    parser.add_argument("--max-reuse", type=int, default=DEFAULT_MAX_REUSE, help="Hits in a row before forcing recognition")
+    args = parser.parse_args(argv)
+
+    gate = FrameSimilarityGate(args.method, args.max_distance, args.max_reuse)
+    for frame in iter_frames(args.source):
+        frame_hash, results = gate.lookup(frame)
+        if results is None:
+            gate.store(frame_hash, True)
+
+    metrics = gate.metrics()
+    print(f"📊 {metrics['lookups']} frames: {metrics['hits']} reused, {metrics['misses']} recognized "
+          f"({metrics['expired']} after {args.max_reuse} reuses)")
+    print(f"   Distance to anchor: {metrics['distances']}")
+    print(f"✅ Hit rate {metrics['hitRate']:.1%} with {args.method} <= {args.max_distance} bits")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Image quality gate for imported and downloaded photos.
+
+The importers used to take any file with a matching name. The 0-byte
+healthy_breakfast_photo.jpg and the "Please replace this..." cards written
+by download_category_images.py went straight into the asset catalog. This
+gate checks a batch of photos in one pass before any resizing or encoding:
+
+1. Bytes (no decoding): empty files, and truncated files (a JPEG without its
+   FFD9 end marker, a PNG without its IEND chunk).
+2. Decode at reduced size (JPEG draft mode) to an ANALYSIS_SIZE square,
+   keeping the real resolution from the header. Files Pillow cannot decode
+   fail here.
+3. NumPy over the batch, CHUNK images at a time so memory stays flat for
+   large batches:
+   - resolution: the short side must be at least --min-side
+   - blur: variance of the 4-neighbour Laplacian of the grayscale image
+   - exposure: mean brightness, and the shares of pixels clipped to black
+     or white (histogram ends)
+   - placeholders: the share of the most common color (4 bits per channel);
+     flat fills and instruction cards are almost a single color
+
+Each photo gets a list of problems; an empty list means it passes.
+add_images_to_xcode.py skips failing photos, download_images.py moves them
+to MealImages/quarantine/ instead of the catalog, and
+create_category_images_from_photos.py treats them as missing. Each of them
+takes --min-side to change the resolution limit and --skip-quality to turn
+the gate off.
+
+Requirements:
+- numpy, Pillow
+
+Usage:
+python image_quality.py MealImages/                          # report on a folder
+python image_quality.py temp_images/*.jpg --quarantine quarantine/ --json report.json
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+import itertools
+
+from asset_trace import span
+
+ANALYSIS_SIZE = 256
+# Images decoded and measured together; about 60 MB of working arrays at 256x256
+CHUNK = 64
+
+# Card renditions are 180pt (category) and 250x150pt (featured meals) at 2x
+MIN_SIDE = 300
+# Laplacian variance on the 256x256 grayscale image (0-255 levels)
+MIN_SHARPNESS = 30.0
+MIN_BRIGHTNESS = 30.0
+MAX_BRIGHTNESS = 230.0
+# Share of pixels at the ends of the histogram
+MAX_CLIPPED = 0.25
+CLIP_LOW = 3
+CLIP_HIGH = 252
+# Share of the single most common color
+MAX_DOMINANT_SHARE = 0.85
+
+PNG_END = b"IEND\xaeB`\x82"
+
+
+def file_problem(path):
+    """Problem visible in the file's bytes without decoding it, or None"""
+    try:
+        size = os.path.getsize(path)
+        if size == 0:
+            return "empty file"
+        with open(path, "rb") as f:
+            head = f.read(8)
+            f.seek(max(0, size - 64))
+            tail = f.read().rstrip(b"\0")
+    except FileNotFoundError:
+        # Moved or deleted since it was listed
+        return "missing file"
+    except OSError as e:
+        return f"unreadable ({e.strerror})"
+    if head.startswith(b"\xff\xd8") and not tail.endswith(b"\xff\xd9"):
+        return "truncated JPEG"
+    if head.startswith(b"\x89PNG") and not tail.endswith(PNG_END):
+        return "truncated PNG"
+    return None
+
+
+def load_for_analysis(path, size=ANALYSIS_SIZE):
+    """(original width, height, size x size x 3 uint8 array)"""
+    import numpy as np
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as img:
+        width, height = img.size
+        img.draft("RGB", (size, size))
+        img = ImageOps.exif_transpose(img).convert("RGB").resize((size, size), Image.BILINEAR)
+    return width, height, np.asarray(img)
+
+
+def batch_metrics(pixels):
+    """Per-image sharpness, brightness, clipping and dominant color share for an N x H x W x 3 uint8 stack"""
+    import numpy as np
+
+    gray = pixels.astype(np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    laplacian = (
+        gray[:, :-2, 1:-1] + gray[:, 2:, 1:-1] + gray[:, 1:-1, :-2] + gray[:, 1:-1, 2:] - 4 * gray[:, 1:-1, 1:-1]
+    )
+    count, height, width = gray.shape
+
+    # Histogram of 4-bit-per-channel colors for every image in one bincount
+    colors = (pixels >> 4).astype(np.int64)
+    index = (colors[..., 0] << 8) | (colors[..., 1] << 4) | colors[..., 2]
+    index += np.arange(count)[:, np.newaxis, np.newaxis] * 4096
+    histogram = np.bincount(index.ravel(), minlength=count * 4096).reshape(count, 4096)
+
+    return {
+        "sharpness": laplacian.var(axis=(1, 2)),
+        "brightness": gray.mean(axis=(1, 2)),
+        "shadowClip": (gray <= CLIP_LOW).mean(axis=(1, 2)),
+        "highlightClip": (gray >= CLIP_HIGH).mean(axis=(1, 2)),
+        "dominantShare": histogram.max(axis=1) / (height * width),
+    }
+
+
+def problems_for(metrics, width, height, min_side=MIN_SIDE):
+    problems = []
+    if min(width, height) < min_side:
+        problems.append(f"too small ({width}x{height})")
+    if metrics["dominantShare"] > MAX_DOMINANT_SHARE:
+        problems.append(f"placeholder or flat color ({metrics['dominantShare']:.0%} one color)")
+    elif metrics["sharpness"] < MIN_SHARPNESS:
+        # A flat image is trivially "blurry"; only report blur for real photos
+        problems.append(f"blurry (sharpness {metrics['sharpness']:.0f})")
+    if metrics["brightness"] < MIN_BRIGHTNESS:
+        problems.append(f"underexposed (mean {metrics['brightness']:.0f})")
+    elif metrics["brightness"] > MAX_BRIGHTNESS:
+        problems.append(f"overexposed (mean {metrics['brightness']:.0f})")
+    if metrics["shadowClip"] > MAX_CLIPPED:
+        problems.append(f"{metrics['shadowClip']:.0%} clipped to black")
+    if metrics["highlightClip"] > MAX_CLIPPED:
+        problems.append(f"{metrics['highlightClip']:.0%} clipped to white")
+    return problems
+
+
+def check_images(paths, min_side=MIN_SIDE, chunk=CHUNK, skip=False):
+    """{path: {"ok", "problems", "width", "height", metrics...}} for a batch of image files
+
+    skip=True (the importers' --skip-quality) passes every path unchecked.
+    """
+    if skip:
+        return {path: {"ok": True, "problems": []} for path in paths}
+    results = {}
+    paths = iter(paths)
+    while True:
+        batch = list(itertools.islice(paths, chunk))
+        if not batch:
+            return results
+        results.update(check_chunk(batch, min_side))
+
+
+def check_chunk(paths, min_side):
+    import numpy as np
+
+    results = {}
+    decoded = []
+    for path in paths:
+        with span("quality_bytes"):
+            problem = file_problem(path)
+        if problem is None:
+            try:
+                with span("decode"):
+                    decoded.append((path, *load_for_analysis(path)))
+                continue
+            except Exception as e:
+                problem = f"unreadable ({e})"
+        results[path] = {"ok": False, "problems": [problem]}
+
+    if decoded:
+        with span("quality_metrics"):
+            metrics = batch_metrics(np.stack([pixels for *_, pixels in decoded]))
+        for i, (path, width, height, _) in enumerate(decoded):
+            row = {name: round(float(values[i]), 4) for name, values in metrics.items()}
+            problems = problems_for(row, width, height, min_side)
+            results[path] = {"ok": not problems, "problems": problems, "width": width, "height": height, **row}
+    return {path: results[path] for path in paths}
+
+
+def quarantine(path, directory):
+    """Move a rejected file into directory, keeping its name; returns the new path"""
+    os.makedirs(directory, exist_ok=True)
+    target = os.path.join(directory, os.path.basename(path))
+    shutil.move(path, target)
+    return target
+
+
+def expand_paths(sources):
+    """Image files from a mix of files and directories"""
+    from asset_catalog import IMAGE_EXTENSIONS
+
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            paths += sorted(
+                entry.path for entry in os.scandir(source)
+                if entry.is_file() and not entry.name.startswith(".") and entry.name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+        else:
+            paths.append(source)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check photos for size, blur, exposure, placeholders and truncation")
+    parser.add_argument("sources", nargs="+", help="Image files or folders")
+    parser.add_argument("--min-side", type=int, default=MIN_SIDE, help="Smallest accepted short side in pixels")
+    parser.add_argument("--quarantine", help="Move failing images into this folder")
+    parser.add_argument("--json", help="Write the per-image results here")
+    args = parser.parse_args(argv)
+
+    paths = expand_paths(args.sources)
+    results = check_images(paths, args.min_side)
+    failed = [path for path in paths if not results[path]["ok"]]
+    for path in failed:
+        print(f"❌ {path}: {', '.join(results[path]['problems'])}")
+        if args.quarantine:
+            quarantine(path, args.quarantine)
+
+    if args.json:
+        with span("json_write"), open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    print(f"📊 {len(paths) - len(failed)} of {len(paths)} images passed" +
+          (f"; {len(failed)} moved to {args.quarantine}" if args.quarantine and failed else ""))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Incrementally maintained daily and weekly nutrition aggregates.
+
+AnalyticsService rescans every meal for each date range it shows. This tool
+keeps per-day and per-week totals (calories, protein, carbs, fats, meal and
+food item counts) in a sidecar SQLite database next to the store. It only
+recomputes the days that changed since the last run:
+
+- The high-water mark is the last persistent-history transaction processed
+  (ATRANSACTION.Z_PK). Only Meal and FoodItem changes after it are read.
+- meal_day (meal -> local day) and item_meal (item -> meal) remember where
+  each object was counted, so updates that move a meal or item, and deletes,
+  dirty both the old and the new day.
+- Each dirty day is recomputed from its meals' food items, and then each
+  dirty week from its days.
+
+The first run, a change of --timezone/--first-weekday, or history pruned past
+the high-water mark trigger a full rebuild. After that, a range query is one
+read of the days in range.
+
+--export writes the tables as compact column arrays (days since 1970-01-01),
+which AnalyticsService can load as DailyAggregateTable.
+
+Requirements:
+- numpy
+
+Usage:
+python materialize_aggregates.py FoodScannerPro.sqlite [--export aggregates.json]
+python materialize_aggregates.py FoodScannerPro.sqlite --rebuild --timezone Europe/London
+python materialize_aggregates.py FoodScannerPro.sqlite --range 2024-01-01 2024-01-31
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+from datetime import date
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from asset_trace import span
+from coredata_store import (
+    CORE_DATA_EPOCH,
+    connect,
+    has_history,
+    transaction_range,
+    changes_since,
+    load_meals,
+    load_food_items,
+    local_days,
+    week_starts,
+    day_to_date,
+)
+from meal_analytics import MACROS, join_items_to_meals
+
+SCHEMA_VERSION = 1
+
+# SQLite's default limit on host parameters is 999
+IN_CHUNK = 500
+
+AGGREGATE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS meal_day (pk INTEGER PRIMARY KEY, day INTEGER);
+CREATE INDEX IF NOT EXISTS meal_day_day ON meal_day (day);
+CREATE TABLE IF NOT EXISTS item_meal (pk INTEGER PRIMARY KEY, meal INTEGER);
+CREATE TABLE IF NOT EXISTS daily (
+    day INTEGER PRIMARY KEY,
+    calories REAL, protein REAL, carbs REAL, fats REAL,
+    meal_count INTEGER, food_item_count INTEGER
+);
+CREATE TABLE IF NOT EXISTS weekly (
+    week_start INTEGER PRIMARY KEY,
+    calories REAL, protein REAL, carbs REAL, fats REAL,
+    meal_count INTEGER, food_item_count INTEGER
+);
+"""
+
+
+def chunked(values, size=IN_CHUNK):
+    values = list(values)
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def select_in(connection, sql, values):
+    """Run sql (with one {placeholders} list) over values in chunks, yielding rows"""
+    for chunk in chunked(values):
+        yield from connection.execute(sql.format(placeholders=", ".join("?" * len(chunk))), chunk)
+
+
+class AggregateStore:
+    """The sidecar database of daily/weekly aggregates for one Core Data store"""
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(AGGREGATE_SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def get_state(self):
+        return dict(self.connection.execute("SELECT key, value FROM state"))
+
+    def set_state(self, **values):
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO state VALUES (?, ?)", [(key, str(value)) for key, value in values.items()]
+        )
+
+    def clear(self):
+        for table in ("meal_day", "item_meal", "daily", "weekly"):
+            self.connection.execute(f"DELETE FROM {table}")
+
+    def days_of_meals(self, meal_pks):
+        return dict(select_in(self.connection, "SELECT pk, day FROM meal_day WHERE pk IN ({placeholders})", meal_pks))
+
+    def meals_of_items(self, item_pks):
+        return dict(select_in(self.connection, "SELECT pk, meal FROM item_meal WHERE pk IN ({placeholders})", item_pks))
+
+    def meals_on_days(self, days):
+        return list(select_in(self.connection, "SELECT pk, day FROM meal_day WHERE day IN ({placeholders})", days))
+
+    def rebuild_weeks(self, weeks):
+        """Recompute weekly rows from the daily rows of the given week starts"""
+        for week in weeks:
+            row = self.connection.execute(
+                "SELECT COUNT(*), SUM(calories), SUM(protein), SUM(carbs), SUM(fats), SUM(meal_count),"
+                " SUM(food_item_count) FROM daily WHERE day BETWEEN ? AND ?",
+                (week, week + 6),
+            ).fetchone()
+            self.connection.execute("DELETE FROM weekly WHERE week_start = ?", (week,))
+            if row[0]:
+                self.connection.execute("INSERT INTO weekly VALUES (?, ?, ?, ?, ?, ?, ?)", (week, *row[1:]))
+
+
+def config_key(tz_name, first_weekday):
+    return f"{tz_name or 'local'}|{first_weekday}"
+
+
+def full_rebuild(store, aggregates, tz, first_weekday):
+    """Recompute every table from the store's columns"""
+    meals = load_meals(store)
+    items = load_food_items(store)
+    dated = ~np.isnan(meals["date"])
+    meal_days = np.full(len(meals["pk"]), -1, dtype=np.int64)
+    meal_days[dated] = local_days(meals["date"][dated], tz)
+    meal_index, in_meal = join_items_to_meals(meals, items)
+
+    aggregates.clear()
+    aggregates.connection.executemany(
+        "INSERT INTO meal_day VALUES (?, ?)",
+        ((int(pk), int(day) if ok else None) for pk, day, ok in zip(meals["pk"], meal_days, dated)),
+    )
+    aggregates.connection.executemany(
+        "INSERT INTO item_meal VALUES (?, ?)",
+        ((int(pk), int(meal) if meal else None) for pk, meal in zip(items["pk"], items["meal"])),
+    )
+
+    days, meal_counts = np.unique(meal_days[dated], return_counts=True)
+    item_days = meal_days[meal_index[in_meal]]
+    item_dated = dated[meal_index[in_meal]]
+    index = np.searchsorted(days, item_days[item_dated])
+    sums = {
+        name: np.bincount(index, weights=np.nan_to_num(items[name][in_meal][item_dated]), minlength=len(days))
+        for name in MACROS
+    }
+    item_counts = np.bincount(index, minlength=len(days))
+    aggregates.connection.executemany(
+        "INSERT INTO daily VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+            (int(day), *(float(sums[name][i]) for name in MACROS), int(meal_counts[i]), int(item_counts[i]))
+            for i, day in enumerate(days)
+        ),
+    )
+    aggregates.rebuild_weeks(sorted(set(week_starts(days, first_weekday).tolist())))
+    return len(days)
+
+
+def incremental_update(store, aggregates, high_water_mark, tz, first_weekday):
+    """Recompute only the days touched by Meal/FoodItem changes after high_water_mark; returns the day count"""
+    changes = changes_since(store, high_water_mark, ("Meal", "FoodItem"))
+    meal_pks = list(changes["Meal"])
+    item_pks = list(changes["FoodItem"])
+    if not meal_pks and not item_pks:
+        return 0
+
+    # Where the changed objects were counted before
+    old_meal_days = aggregates.days_of_meals(meal_pks)
+    old_item_meals = aggregates.meals_of_items(item_pks)
+    dirty_days = {day for day in old_meal_days.values() if day is not None}
+
+    # Where they are now
+    current_meals = list(select_in(store, "SELECT Z_PK, ZDATE FROM ZMEAL WHERE Z_PK IN ({placeholders})", meal_pks))
+    current_items = list(select_in(store, "SELECT Z_PK, ZMEAL FROM ZFOODITEM WHERE Z_PK IN ({placeholders})", item_pks))
+    dated = [(pk, value) for pk, value in current_meals if value is not None]
+    new_days = local_days(np.array([value + CORE_DATA_EPOCH for _, value in dated], dtype=np.float64), tz)
+    new_meal_days = {pk: None for pk, _ in current_meals}
+    new_meal_days.update((pk, int(day)) for (pk, _), day in zip(dated, new_days))
+    dirty_days.update(day for day in new_meal_days.values() if day is not None)
+
+    connection = aggregates.connection
+    for chunk in chunked(meal_pks):
+        connection.execute(f"DELETE FROM meal_day WHERE pk IN ({', '.join('?' * len(chunk))})", chunk)
+    connection.executemany("INSERT INTO meal_day VALUES (?, ?)", new_meal_days.items())
+    for chunk in chunked(item_pks):
+        connection.execute(f"DELETE FROM item_meal WHERE pk IN ({', '.join('?' * len(chunk))})", chunk)
+    connection.executemany("INSERT INTO item_meal VALUES (?, ?)", current_items)
+
+    # Items that moved, appeared or disappeared dirty the days of their old and new meals
+    touched_meals = {meal for meal in old_item_meals.values() if meal} | {meal for _, meal in current_items if meal}
+    touched_days = aggregates.days_of_meals(touched_meals)
+    touched_days.update((meal, old_meal_days[meal]) for meal in touched_meals if meal in old_meal_days)
+    dirty_days.update(day for day in touched_days.values() if day is not None)
+
+    recompute_days(store, aggregates, dirty_days)
+    aggregates.rebuild_weeks(sorted(set(week_starts(np.array(sorted(dirty_days)), first_weekday).tolist())))
+    return len(dirty_days)
+
+
+def recompute_days(store, aggregates, days):
+    """Replace the daily rows of the given days with fresh sums over their meals' food items"""
+    meals = aggregates.meals_on_days(days)
+    meal_day = dict(meals)
+    totals = {day: [0.0] * len(MACROS) + [0, 0] for day in days}
+    for _, day in meals:
+        totals[day][len(MACROS)] += 1
+    rows = select_in(
+        store,
+        "SELECT ZMEAL, COUNT(*), " + ", ".join(f"TOTAL(Z{name.upper()})" for name in MACROS)
+        + " FROM ZFOODITEM WHERE ZMEAL IN ({placeholders}) GROUP BY ZMEAL",
+        list(meal_day),
+    )
+    for meal, count, *sums in rows:
+        entry = totals[meal_day[meal]]
+        for i, value in enumerate(sums):
+            entry[i] += value
+        entry[len(MACROS) + 1] += count
+
+    connection = aggregates.connection
+    for chunk in chunked(days):
+        connection.execute(f"DELETE FROM daily WHERE day IN ({', '.join('?' * len(chunk))})", chunk)
+    connection.executemany(
+        "INSERT INTO daily VALUES (?, ?, ?, ?, ?, ?, ?)",
+        ((day, *entry) for day, entry in totals.items() if entry[len(MACROS)] > 0),
+    )
+
+
+def refresh(store_path, aggregates_path, tz_name=None, first_weekday=1, rebuild=False):
+    """Bring the aggregates up to date with the store; returns (mode, days recomputed)"""
+    tz = ZoneInfo(tz_name) if tz_name else None
+    store = connect(store_path)
+    aggregates = AggregateStore(aggregates_path)
+    try:
+        state = aggregates.get_state()
+        history = has_history(store)
+        first, last = transaction_range(store) if history else (0, 0)
+        high_water_mark = int(state.get("high_water_mark", -1))
+
+        reason = None
+        if rebuild:
+            reason = "requested"
+        elif state.get("schema_version") != str(SCHEMA_VERSION) or high_water_mark < 0:
+            reason = "first run"
+        elif state.get("config") != config_key(tz_name, first_weekday):
+            reason = "time zone or first weekday changed"
+        elif not history:
+            reason = "store has no persistent history"
+        elif first and high_water_mark < first - 1:
+            reason = "history was pruned past the high-water mark"
+
+        with aggregates.connection:
+            if reason:
+                with span("full_rebuild"):
+                    days = full_rebuild(store, aggregates, tz, first_weekday)
+                mode = f"rebuilt ({reason})"
+            else:
+                with span("incremental"):
+                    days = incremental_update(store, aggregates, high_water_mark, tz, first_weekday)
+                mode = "incremental"
+            aggregates.set_state(
+                schema_version=SCHEMA_VERSION,
+                config=config_key(tz_name, first_weekday),
+                high_water_mark=last,
+                store=os.path.abspath(store_path),
+                updated_at=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            )
+    finally:
+        store.close()
+        aggregates.close()
+    return mode, days
+
+
+def read_range(aggregates_path, start_day, end_day):
+    """Daily rows with start_day <= day <= end_day (days since 1970-01-01)"""
+    connection = sqlite3.connect(aggregates_path)
+    try:
+        return connection.execute(
+            "SELECT * FROM daily WHERE day BETWEEN ? AND ? ORDER BY day", (start_day, end_day)
+        ).fetchall()
+    finally:
+        connection.close()
+
+
+def export_tables(aggregates_path, export_path):
+    """Write the daily and weekly tables as column arrays for DailyAggregateTable"""
+    connection = sqlite3.connect(aggregates_path)
+    try:
+        state = dict(connection.execute("SELECT key, value FROM state"))
+        tables = {}
+        for table, key in (("daily", "day"), ("weekly", "week_start")):
+            rows = connection.execute(f"SELECT * FROM {table} ORDER BY {key}").fetchall()
+            columns = list(zip(*rows)) or [()] * 7
+            tables[table] = {
+                "day": list(columns[0]),
+                **{name: [round(value, 2) for value in columns[i + 1]] for i, name in enumerate(MACROS)},
+                "mealCount": list(columns[5]),
+                "foodItemCount": list(columns[6]),
+            }
+    finally:
+        connection.close()
+
+    tz_name, first_weekday = state["config"].split("|")
+    table = {
+        "version": SCHEMA_VERSION,
+        "timezone": tz_name,
+        "firstWeekday": int(first_weekday),
+        "highWaterMark": int(state["high_water_mark"]),
+        **tables,
+    }
+    with span("json_write"), open(export_path, "w") as f:
+        json.dump(table, f, separators=(",", ":"))
+    return table
+
+
+def day_number(value):
+    return (date.fromisoformat(value) - date(1970, 1, 1)).days
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Maintain incremental daily/weekly nutrition aggregates")
+    parser.add_argument("store", help="FoodScannerPro.sqlite")
+    parser.add_argument("--aggregates", help="Aggregate database (default: <store>.aggregates.sqlite)")
+    parser.add_argument("--timezone", help="IANA time zone for day grouping (default: this machine's)")
+    parser.add_argument("--first-weekday", type=int, default=1, help="1 = Sunday, 2 = Monday")
+    parser.add_argument("--rebuild", action="store_true", help="Recompute everything")
+    parser.add_argument("--export", help="Write the tables as JSON column arrays to this path")
+    parser.add_argument("--range", nargs=2, metavar=("START", "END"), help="Print the daily rows between two ISO dates")
+    args = parser.parse_args(argv)
+
+    aggregates_path = args.aggregates or os.path.splitext(args.store)[0] + ".aggregates.sqlite"
+    start = time.perf_counter()
+    mode, days = refresh(args.store, aggregates_path, args.timezone, args.first_weekday, args.rebuild)
+    print(f"✅ {mode}: {days} days recomputed in {(time.perf_counter() - start) * 1000:.1f} ms ({aggregates_path})")
+
+    if args.range:
+        for day, *values in read_range(aggregates_path, day_number(args.range[0]), day_number(args.range[1])):
+            calories, protein, carbs, fats, meal_count, item_count = values
+            print(f"{day_to_date(day)}  {calories:8.1f} kcal  P {protein:6.1f}  C {carbs:6.1f}  F {fats:6.1f}  "
+                  f"{meal_count} meals, {item_count} items")
+    if args.export:
+        table = export_tables(aggregates_path, args.export)
+        print(f"Exported {len(table['daily']['day'])} days and {len(table['weekly']['day'])} weeks to {args.export}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
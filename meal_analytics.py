@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Meal analytics over exported Core Data stores.
+
+Computes the same metrics as AnalyticsService.analyzeData for one or many
+FoodScannerPro.sqlite stores:
+  daily           processDailyCalorieIntake (per-day totals, 7-day moving average)
+  macros          processMacronutrientDistribution
+  trends          processNutritionTrends (weekly totals, first-to-last week change)
+  frequent_foods  processFrequentFoods
+plus a summary of the recognition history.
+
+Each table is read with one bulk query into NumPy columns, and every metric is
+a vectorized group-by (np.unique + np.bincount) instead of a loop over Meal
+objects. The Swift loops are ported row by row as reference_metrics(), and
+--validate checks the vectorized results against it.
+
+Days and weeks follow Calendar.current, so pass the user's --timezone and
+--first-weekday (1 = Sunday as in en_US, 2 = Monday).
+
+Requirements:
+- numpy
+
+Usage:
+python meal_analytics.py FoodScannerPro.sqlite [more.sqlite ...] [--output metrics.jsonl]
+python meal_analytics.py --fixture --validate
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from asset_trace import span
+from coredata_store import (
+    connect,
+    load_meals,
+    load_food_items,
+    load_history,
+    local_days,
+    week_starts,
+    day_to_date,
+    create_fixture_store,
+)
+
+MACROS = ("calories", "protein", "carbs", "fats")
+
+
+def percentage_change(start, end):
+    """calculatePercentageChange(from:to:)"""
+    if start <= 0:
+        return 0.0
+    return (end - start) / start * 100
+
+
+def join_items_to_meals(meals, items):
+    """Index into the meal columns for each food item, and a mask of items that belong to a meal"""
+    order = np.argsort(meals["pk"], kind="stable")
+    sorted_pks = meals["pk"][order]
+    positions = np.searchsorted(sorted_pks, items["meal"])
+    positions = np.minimum(positions, max(len(sorted_pks) - 1, 0))
+    in_meal = (sorted_pks[positions] == items["meal"]) if len(sorted_pks) else np.zeros(len(items["meal"]), bool)
+    meal_index = order[positions] if len(order) else positions
+    return meal_index, in_meal
+
+
+def grouped_sums(keys, item_keys, item_columns):
+    """Unique keys and the per-key sum of each item column"""
+    groups = np.unique(keys)
+    index = np.searchsorted(groups, item_keys)
+    sums = {name: np.bincount(index, weights=values, minlength=len(groups)) for name, values in item_columns.items()}
+    counts = np.bincount(index, minlength=len(groups))
+    return groups, sums, counts
+
+
+def daily_intake(meal_days, item_days, item_macros):
+    days, sums, _ = grouped_sums(meal_days, item_days, item_macros)
+    calories = sums["calories"]
+    moving_average = np.full(len(days), np.nan)
+    if len(days) > 7:
+        # Mean of the 7 days before each day (not including it), as in the Swift loop
+        cumulative = np.concatenate(([0.0], np.cumsum(calories)))
+        moving_average[7:] = (cumulative[7:-1] - cumulative[:-8]) / 7
+    return [
+        {
+            "date": day_to_date(day).isoformat(),
+            **{name: float(sums[name][i]) for name in MACROS},
+            "caloriesMovingAverage": None if np.isnan(moving_average[i]) else float(moving_average[i]),
+        }
+        for i, day in enumerate(days)
+    ]
+
+
+def macronutrient_distribution(item_macros):
+    totals = {name: float(values.sum()) for name, values in item_macros.items()}
+    calories = totals["calories"]
+
+    def share(grams, per_gram):
+        return grams * per_gram / calories * 100 if calories > 0 else 0.0
+
+    return {
+        "proteinPercentage": share(totals["protein"], 4),
+        "carbsPercentage": share(totals["carbs"], 4),
+        "fatsPercentage": share(totals["fats"], 9),
+        "totalProtein": totals["protein"],
+        "totalCarbs": totals["carbs"],
+        "totalFats": totals["fats"],
+    }
+
+
+def nutrition_trends(meal_weeks, item_weeks, item_macros):
+    weeks, sums, counts = grouped_sums(meal_weeks, item_weeks, item_macros)
+    weekly = [
+        {
+            "weekStartDate": day_to_date(week).isoformat(),
+            "totalCalories": float(sums["calories"][i]),
+            "totalProtein": float(sums["protein"][i]),
+            "totalCarbs": float(sums["carbs"][i]),
+            "totalFats": float(sums["fats"][i]),
+            # The Swift loop adds one to mealCount per food item, so both counts match
+            "mealCount": int(counts[i]),
+            "foodItemCount": int(counts[i]),
+        }
+        for i, week in enumerate(weeks)
+    ]
+    trends = {"caloriesTrend": 0.0, "proteinTrend": 0.0, "carbsTrend": 0.0, "fatsTrend": 0.0, "weeklyData": []}
+    if len(weekly) >= 2:
+        first, last = weekly[0], weekly[-1]
+        trends = {
+            "caloriesTrend": percentage_change(first["totalCalories"], last["totalCalories"]),
+            "proteinTrend": percentage_change(first["totalProtein"], last["totalProtein"]),
+            "carbsTrend": percentage_change(first["totalCarbs"], last["totalCarbs"]),
+            "fatsTrend": percentage_change(first["totalFats"], last["totalFats"]),
+            "weeklyData": weekly,
+        }
+    return trends
+
+
+def factorize(values):
+    """Integer codes for hashable values and the list of distinct values, in first-seen order"""
+    lookup = {}
+    codes = np.fromiter((lookup.setdefault(value, len(lookup)) for value in values), dtype=np.int64, count=len(values))
+    return codes, list(lookup)
+
+
+def frequent_foods(names, calories):
+    has_name = np.fromiter((name is not None for name in names), dtype=bool, count=len(names))
+    if not has_name.any():
+        return []
+    codes, unique = factorize(names[has_name])
+    counts = np.bincount(codes, minlength=len(unique))
+    totals = np.bincount(codes, weights=calories[has_name], minlength=len(unique))
+    # Most frequent first; ties by name so the order is stable
+    order = sorted(range(len(unique)), key=lambda i: (-counts[i], unique[i]))
+    return [
+        {
+            "name": unique[i],
+            "count": int(counts[i]),
+            "totalCalories": float(totals[i]),
+            "averageCalories": float(totals[i] / counts[i]),
+        }
+        for i in order
+    ]
+
+
+def recognition_summary(history, tz=None):
+    scans = len(history["pk"])
+    if not scans:
+        return {"scans": 0, "days": 0, "meanConfidence": 0.0, "recommendedShare": 0.0}
+    dated = ~np.isnan(history["timestamp"])
+    return {
+        "scans": scans,
+        "days": int(len(np.unique(local_days(history["timestamp"][dated], tz)))),
+        "meanConfidence": float(np.nanmean(history["confidence"])),
+        "recommendedShare": float(np.mean(history["is_recommended"] != 0)),
+    }
+
+
+def compute_metrics(meals, items, history=None, tz=None, first_weekday=1):
+    """All analytics for one store's columns"""
+    with span("join"):
+        meal_index, in_meal = join_items_to_meals(meals, items)
+        dated_meals = ~np.isnan(meals["date"])
+        meal_days = np.zeros(len(meals["pk"]), dtype=np.int64)
+        meal_days[dated_meals] = local_days(meals["date"][dated_meals], tz)
+        meal_weeks = week_starts(meal_days, first_weekday)
+
+        # Food items in any meal count toward the totals; only meals with a date are grouped by day
+        item_macros = {name: items[name][in_meal] for name in MACROS}
+        item_meal = meal_index[in_meal]
+        item_dated = dated_meals[item_meal]
+        dated_macros = {name: values[item_dated] for name, values in item_macros.items()}
+
+    with span("daily"):
+        daily = daily_intake(meal_days[dated_meals], meal_days[item_meal][item_dated], dated_macros)
+    with span("macros"):
+        macros = macronutrient_distribution(item_macros)
+    with span("trends"):
+        trends = nutrition_trends(meal_weeks[dated_meals], meal_weeks[item_meal][item_dated], dated_macros)
+    with span("frequent_foods"):
+        frequent = frequent_foods(items["name"][in_meal], items["calories"][in_meal])
+
+    metrics = {"daily": daily, "macros": macros, "trends": trends, "frequent_foods": frequent}
+    if history is not None:
+        metrics["recognition"] = recognition_summary(history, tz)
+    return metrics
+
+
+def analyze_store(store_path, tz=None, first_weekday=1):
+    connection = connect(store_path)
+    try:
+        with span("read", name=os.path.basename(store_path)):
+            meals = load_meals(connection)
+            items = load_food_items(connection)
+            history = load_history(connection)
+    finally:
+        connection.close()
+    return compute_metrics(meals, items, history, tz, first_weekday)
+
+
+def reference_metrics(store_path, tz=None, first_weekday=1):
+    """Row-by-row port of the AnalyticsService loops, used to validate compute_metrics"""
+    connection = connect(store_path)
+    try:
+        meals = connection.execute("SELECT Z_PK, ZDATE FROM ZMEAL ORDER BY ZDATE").fetchall()
+        items_by_meal = {}
+        for meal_pk, name, *macros in connection.execute(
+            "SELECT ZMEAL, ZNAME, ZCALORIES, ZPROTEIN, ZCARBS, ZFATS FROM ZFOODITEM"
+        ):
+            items_by_meal.setdefault(meal_pk, []).append((name, *[value or 0.0 for value in macros]))
+    finally:
+        connection.close()
+
+    def local_date(core_data_seconds):
+        return datetime.fromtimestamp(core_data_seconds + 978307200, tz).date()
+
+    daily, weekly = {}, {}
+    totals = dict.fromkeys(MACROS, 0.0)
+    foods = {}
+    for meal_pk, date in meals:
+        items = items_by_meal.get(meal_pk, [])
+        if date is not None:
+            day = local_date(date)
+            week = day - timedelta(days=(day.isoweekday() % 7 + 1 - first_weekday) % 7)
+            day_data = daily.setdefault(day, dict.fromkeys(MACROS, 0.0))
+            week_data = weekly.setdefault(week, dict.fromkeys(MACROS, 0.0) | {"count": 0})
+            for _, *macros in items:
+                for name, value in zip(MACROS, macros):
+                    day_data[name] += value
+                    week_data[name] += value
+                week_data["count"] += 1
+        for name, *macros in items:
+            for key, value in zip(MACROS, macros):
+                totals[key] += value
+            if name is not None:
+                food = foods.setdefault(name, [0, 0.0])
+                food[0] += 1
+                food[1] += macros[0]
+
+    days = sorted(daily)
+    calories = [daily[day]["calories"] for day in days]
+    averages = [None] * len(days)
+    if len(days) > 7:
+        for i in range(7, len(days)):
+            averages[i] = sum(calories[i - 7:i]) / 7
+    weeks = sorted(weekly)
+    return {
+        "daily": [
+            {"date": day.isoformat(), **daily[day], "caloriesMovingAverage": averages[i]}
+            for i, day in enumerate(days)
+        ],
+        "macros": macronutrient_distribution({name: np.array([totals[name]]) for name in MACROS}),
+        "weekly": [
+            {"weekStartDate": week.isoformat(), "totalCalories": weekly[week]["calories"], "count": weekly[week]["count"]}
+            for week in weeks
+        ],
+        "frequent_foods": sorted(
+            ({"name": name, "count": count, "totalCalories": total} for name, (count, total) in foods.items()),
+            key=lambda food: (-food["count"], food["name"]),
+        ),
+    }
+
+
+def validate(metrics, reference, tolerance=1e-6):
+    """Compare compute_metrics output to reference_metrics; returns a list of mismatch descriptions"""
+    problems = []
+
+    def close(a, b):
+        if a is None or b is None:
+            return a is b
+        return abs(a - b) <= tolerance * max(1.0, abs(a), abs(b))
+
+    if [d["date"] for d in metrics["daily"]] != [d["date"] for d in reference["daily"]]:
+        problems.append("daily: different set of days")
+    else:
+        for ours, theirs in zip(metrics["daily"], reference["daily"]):
+            for key in (*MACROS, "caloriesMovingAverage"):
+                if not close(ours[key], theirs[key]):
+                    problems.append(f"daily {ours['date']} {key}: {ours[key]} != {theirs[key]}")
+
+    for key, value in reference["macros"].items():
+        if not close(metrics["macros"][key], value):
+            problems.append(f"macros {key}: {metrics['macros'][key]} != {value}")
+
+    weekly = metrics["trends"]["weeklyData"]
+    if len(reference["weekly"]) >= 2:
+        if [w["weekStartDate"] for w in weekly] != [w["weekStartDate"] for w in reference["weekly"]]:
+            problems.append("trends: different set of weeks")
+        else:
+            for ours, theirs in zip(weekly, reference["weekly"]):
+                if not close(ours["totalCalories"], theirs["totalCalories"]) or ours["mealCount"] != theirs["count"]:
+                    problems.append(f"trends week {ours['weekStartDate']} differs")
+
+    ours = [(f["name"], f["count"]) for f in metrics["frequent_foods"]]
+    theirs = [(f["name"], f["count"]) for f in reference["frequent_foods"]]
+    if ours != theirs:
+        problems.append("frequent_foods: different names or counts")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute AnalyticsService metrics for Core Data stores")
+    parser.add_argument("stores", nargs="*", help="FoodScannerPro.sqlite files")
+    parser.add_argument("--timezone", help="IANA time zone for day grouping (default: this machine's)")
+    parser.add_argument("--first-weekday", type=int, default=1, help="Calendar.firstWeekday: 1 = Sunday, 2 = Monday")
+    parser.add_argument("--output", help="Write one JSON line of metrics per store to this file")
+    parser.add_argument("--validate", action="store_true", help="Check results against the row-by-row Swift port")
+    parser.add_argument("--fixture", action="store_true", help="Analyze a generated fixture store")
+    args = parser.parse_args(argv)
+
+    tz = ZoneInfo(args.timezone) if args.timezone else None
+    stores = list(args.stores)
+    temp_dir = None
+    if args.fixture:
+        temp_dir = tempfile.TemporaryDirectory()
+        stores.append(create_fixture_store(os.path.join(temp_dir.name, "FoodScannerPro.sqlite"), meal_count=2000, days=400))
+    if not stores:
+        parser.error("give at least one store, or --fixture")
+
+    output = open(args.output, "w") if args.output else None
+    failures = 0
+    try:
+        for store in stores:
+            start = time.perf_counter()
+            metrics = analyze_store(store, tz, args.first_weekday)
+            elapsed = (time.perf_counter() - start) * 1000
+            macros = metrics["macros"]
+            print(
+                f"📊 {store}: {len(metrics['daily'])} days, {len(metrics['trends']['weeklyData'])} weeks, "
+                f"{len(metrics['frequent_foods'])} foods, protein/carbs/fats "
+                f"{macros['proteinPercentage']:.0f}/{macros['carbsPercentage']:.0f}/{macros['fatsPercentage']:.0f}% "
+                f"({elapsed:.1f} ms)"
+            )
+            if args.validate:
+                problems = validate(metrics, reference_metrics(store, tz, args.first_weekday))
+                if problems:
+                    failures += 1
+                    for problem in problems[:10]:
+                        print(f"   ❌ {problem}")
+                else:
+                    print("   ✅ matches the Swift port")
+            if output:
+                output.write(json.dumps({"store": store, **metrics}) + "\n")
+    finally:
+        if output:
+            output.close()
+        if temp_dir:
+            temp_dir.cleanup()
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Pre-warm the app's nutrition cache for every classifier label.
+
+NutritionService starts with an empty nutrition_cache.json, so the first scan
+of each food waits on the USDA API. This tool looks up every Food101 class
+(FOOD101_CLASSES in convert_food101_model.py) ahead of time. It uses the same
+/foods/search request and parseUSDAFood mapping as the app, runs several
+lookups at once under a shared request-rate limit, and writes a
+[String: FoodNutritionInfo] JSON file that JSONDecoder can read directly.
+Entries are keyed the way the app looks them up: the label after
+cleanUpFoodName, lowercased.
+
+The file is written to foodscannerpro/Resources/Nutrition/ and bundled with the
+app. NutritionService loads it underneath the user's own cache.
+
+Usage:
+python prewarm_nutrition_cache.py --api-key YOUR_FDC_KEY
+python prewarm_nutrition_cache.py --mock                 # offline, against usda_mock_server
+python prewarm_nutrition_cache.py --mock --mock-database foodscannerpro/Resources/Nutrition/nutrition.sqlite
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+import importlib
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from asset_catalog import base_dir
+from asset_trace import span
+from build_nutrition_database import NUTRIENT_IDS, nutrition_dir
+
+coreml_dir = os.path.join(base_dir, "foodscannerpro/Resources/CoreML")
+default_cache_path = os.path.join(nutrition_dir, "nutrition_cache.json")
+
+USDA_BASE_URL = "https://api.nal.usda.gov/fdc/v1"
+
+# Foundation date used by Swift's default JSONEncoder date strategy (2001-01-01 UTC)
+SWIFT_REFERENCE_DATE = 978307200
+
+# The API key allows 1,000 requests per hour
+DEFAULT_RATE = 1000 / 3600
+
+MAX_RETRY_COUNT = 3
+
+
+def load_labels():
+    """The Food101 class labels the classifier is converted with"""
+    if coreml_dir not in sys.path:
+        sys.path.insert(0, coreml_dir)
+    return list(importlib.import_module("convert_food101_model").FOOD101_CLASSES)
+
+
+def clean_up_food_name(name):
+    """Python port of ContentView.cleanUpFoodName, which produces the cache key"""
+    clean = re.sub(r"\([^)]+\)", "", name)
+    clean = re.sub(r"Includes foods? for USDA'?s? [^,]+", "", clean)
+    parts = clean.split(",")
+    clean = next(
+        (
+            part for part in parts
+            if len(part.strip()) >= 3
+            and not any(word in part.strip().lower() for word in ("usda", "program", "distribution"))
+        ),
+        parts[0],
+    )
+    clean = re.sub(r"\([^)]+\)", "", clean.strip())
+    return " ".join(word[:1].upper() + word[1:].lower() for word in clean.split())
+
+
+def cache_key(label):
+    return clean_up_food_name(label).lower()
+
+
+def label_query(label):
+    return label.replace("_", " ")
+
+
+class RateLimiter:
+    """Spaces requests from all worker threads at least 1/rate seconds apart"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class USDAClient:
+    """The app's USDA requests, with its retry rules (1s on errors, 1/2/4s backoff on 429)"""
+
+    def __init__(self, api_key, base_url=USDA_BASE_URL, rate=DEFAULT_RATE, timeout=30):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.limiter = RateLimiter(rate)
+        self.timeout = timeout
+        self.requests = 0
+        self.retries = 0
+        self.lock = threading.Lock()
+
+    def get_json(self, path, params):
+        query = urllib.parse.urlencode(dict(params, api_key=self.api_key))
+        url = f"{self.base_url}{path}?{query}"
+        retry_count = 0
+        while True:
+            self.limiter.wait()
+            with self.lock:
+                self.requests += 1
+            try:
+                with urllib.request.urlopen(url, timeout=self.timeout) as response:
+                    return json.load(response)
+            except urllib.error.HTTPError as e:
+                if e.code != 429 or retry_count >= MAX_RETRY_COUNT:
+                    raise
+                delay = 2.0 ** retry_count
+            except (urllib.error.URLError, OSError):
+                if retry_count >= MAX_RETRY_COUNT:
+                    raise
+                delay = 1.0
+            retry_count += 1
+            with self.lock:
+                self.retries += 1
+            time.sleep(delay)
+
+    def search(self, query):
+        """The first /foods/search hit for a query, as the app requests it, or None"""
+        response = self.get_json("/foods/search", {
+            "query": query,
+            "dataType": "Foundation,SR Legacy",
+            "pageSize": "1",
+        })
+        foods = response.get("foods") or []
+        return foods[0] if foods else None
+
+    def details(self, fdc_id):
+        """Full food details, with nutrients converted to the search layout"""
+        food = self.get_json(f"/food/{fdc_id}", {})
+        food["foodNutrients"] = [
+            {"nutrientId": item["nutrient"]["id"], "value": item["amount"]}
+            for item in food.get("foodNutrients", [])
+            if "nutrient" in item and "amount" in item
+        ]
+        return food
+
+
+def parse_usda_food(food, timestamp):
+    """Python port of NutritionService.parseUSDAFood, encoded like Swift's JSONEncoder"""
+    values = {}
+    for nutrient in food.get("foodNutrients", []):
+        nutrient_id = nutrient.get("nutrientId")
+        if nutrient_id is not None and nutrient_id not in values and nutrient.get("value") is not None:
+            values[nutrient_id] = nutrient["value"]
+
+    info = {"foodName": food["description"]}
+    for column, nutrient_id in NUTRIENT_IDS.items():
+        value = float(values.get(nutrient_id, 0))
+        info[column] = int(value) if column == "calories" else value
+    info["servingSize"] = float(food.get("servingSize") or 100)
+    info["servingUnit"] = food.get("servingSizeUnit") or "g"
+    info["source"] = "USDA"
+    info["timestamp"] = timestamp - SWIFT_REFERENCE_DATE
+    return info
+
+
+def fetch_label(client, label):
+    """Look up one label; returns (key, FoodNutritionInfo dict or None)"""
+    with span("lookup", name=label):
+        food = client.search(label_query(label))
+        if food is None:
+            return cache_key(label), None
+        if not food.get("foodNutrients"):
+            food = dict(client.details(food["fdcId"]), **{
+                key: food[key] for key in ("servingSize", "servingSizeUnit") if key in food
+            })
+        return cache_key(label), parse_usda_food(food, time.time())
+
+
+def load_cache(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_cache(path, cache):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with span("json_write"), open(tmp_path, "w") as f:
+        json.dump(cache, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def prewarm_cache(client, labels, output_path=default_cache_path, workers=8, refresh=False):
+    """Fetch every label missing from the cache file and write it; returns (fetched, missing, failed)"""
+    cache = {} if refresh else load_cache(output_path)
+    pending = [label for label in labels if cache_key(label) not in cache]
+    print(f"📋 {len(labels)} labels, {len(labels) - len(pending)} already cached, fetching {len(pending)}")
+
+    fetched, missing, failed = [], [], []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(fetch_label, client, label): label for label in pending}
+        for future in as_completed(futures):
+            label = futures[future]
+            try:
+                key, info = future.result()
+            except Exception as e:
+                print(f"❌ {label}: {e}")
+                failed.append(label)
+                continue
+            if info is None:
+                print(f"⚠️ No USDA match for {label}")
+                missing.append(label)
+                continue
+            cache[key] = info
+            fetched.append(label)
+
+    write_cache(output_path, cache)
+    return fetched, missing, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-warm the bundled nutrition cache for every classifier label")
+    parser.add_argument("--api-key", default=os.environ.get("FDC_API_KEY", "DEMO_KEY"), help="FoodData Central API key")
+    parser.add_argument("--base-url", default=USDA_BASE_URL, help="API base URL (ends in /fdc/v1)")
+    parser.add_argument("--output", default=default_cache_path, help="Cache JSON file to write")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent lookups")
+    parser.add_argument("--rate", type=float, help="Maximum requests per second (default: 1000/hour, 0 = unlimited)")
+    parser.add_argument("--refresh", action="store_true", help="Fetch every label again instead of only missing ones")
+    parser.add_argument("--mock", action="store_true", help="Run against a local usda_mock_server instead of the API")
+    parser.add_argument("--mock-database", help="Offline nutrition database for the mock server to serve")
+    args = parser.parse_args(argv)
+
+    server = None
+    base_url = args.base_url
+    rate = args.rate
+    if args.mock:
+        from usda_mock_server import start_mock_server
+        server, base_url = start_mock_server(args.mock_database)
+        if rate is None:
+            rate = 0
+    if rate is None:
+        rate = DEFAULT_RATE
+
+    client = USDAClient(args.api_key, base_url, rate)
+    labels = load_labels()
+    start = time.perf_counter()
+    try:
+        fetched, missing, failed = prewarm_cache(client, labels, args.output, args.workers, args.refresh)
+    finally:
+        if server:
+            server.shutdown()
+            server.server_close()
+
+    elapsed = time.perf_counter() - start
+    print(f"\n✅ Cached {len(fetched)} foods in {elapsed:.1f}s ({client.requests} requests, {client.retries} retries)")
+    if missing or failed:
+        print(f"⚠️ {len(missing)} labels had no match and {len(failed)} failed; run again to retry them")
+    print(f"Cache written to {args.output}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
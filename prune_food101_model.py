@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Structured channel pruning for the Food101 classifier before Core ML conversion.
+
+Weight quantization makes the model smaller but leaves the work per frame
+unchanged. Removing whole convolution channels cuts FLOPs. Inside each
+ResNet block the channels between conv1 -> conv2 (and conv2 -> conv3 in
+bottleneck blocks) can be removed without touching the residual path. For
+every such channel group this tool:
+
+1. Ranks the channels on the calibration images by importance:
+   - l1: L1 norm of the producing filter's weights, which needs no data
+   - taylor: |activation x gradient| at the BatchNorm output (first-order
+     Taylor estimate of the loss change when the channel is removed)
+2. For each --sparsity level, keeps the most important (1 - sparsity) share
+   of the channels, rounded up to a multiple of --round-to so the kernels
+   stay vector-friendly, and rebuilds the conv/BatchNorm/conv layers at the
+   new width.
+3. Fine-tunes the pruned network for --steps on CPU by distilling from the
+   unpruned model, plus cross-entropy where the images are labeled.
+4. Converts it with convert_food101_model.convert_model(), the same
+   trace-and-convert path as the shipped model.
+
+The report lists parameters, multiply-accumulates, CPU latency and accuracy
+for every level (top-1 on labeled holdout images, and agreement with the
+unpruned model on all of them). It is also written to prune_report.json.
+
+Calibration images live in --calibration. Subfolders named after Food101
+classes (pizza/, ramen/, ...) count as labeled, and loose images are
+unlabeled. Every fifth image is held out for evaluation.
+
+Requirements:
+- torch, coremltools, numpy, Pillow
+
+Usage:
+python prune_food101_model.py --calibration calib/ --sparsity 0.25 0.5
+python prune_food101_model.py --calibration calib/ --importance l1 --steps 0 --skip-convert
+"""
+
+import os
+import sys
+import copy
+import json
+import math
+import time
+import argparse
+import importlib
+
+import numpy as np
+
+from asset_catalog import base_dir, IMAGE_EXTENSIONS
+from asset_trace import span
+from build_embedding_index import preprocess
+
+coreml_dir = os.path.join(base_dir, "foodscannerpro/Resources/CoreML")
+
+DEFAULT_SPARSITY = (0.25, 0.5)
+HOLDOUT_EVERY = 5
+DISTILL_TEMPERATURE = 2.0
+LATENCY_RUNS = 20
+
+
+def load_converter():
+    if coreml_dir not in sys.path:
+        sys.path.insert(0, coreml_dir)
+    return importlib.import_module("convert_food101_model")
+
+
+# --- Calibration data ---
+
+def load_calibration(directory, class_names, max_images=512):
+    """(inputs tensor, labels tensor with -1 for unlabeled, holdout mask)"""
+    import torch
+
+    label_of = {name: i for i, name in enumerate(class_names)}
+    samples = []
+    for entry in sorted(os.scandir(directory), key=lambda e: e.name):
+        if entry.is_dir() and entry.name in label_of:
+            samples += [
+                (os.path.join(entry.path, name), label_of[entry.name])
+                for name in sorted(os.listdir(entry.path)) if name.lower().endswith(IMAGE_EXTENSIONS)
+            ]
+        elif entry.is_file() and entry.name.lower().endswith(IMAGE_EXTENSIONS):
+            samples.append((entry.path, -1))
+    samples = samples[:max_images]
+    with span("preprocess"):
+        inputs = torch.from_numpy(np.stack([preprocess(path) for path, _ in samples]))
+    labels = torch.tensor([label for _, label in samples])
+    holdout = torch.arange(len(samples)) % HOLDOUT_EVERY == 0
+    return inputs, labels, holdout
+
+
+def batches(count, batch_size):
+    for start in range(0, count, batch_size):
+        yield slice(start, min(start + batch_size, count))
+
+
+def predict(model, inputs, batch_size=32):
+    import torch
+
+    model.eval()
+    with torch.no_grad():
+        return torch.cat([model(inputs[part]) for part in batches(len(inputs), batch_size)])
+
+
+# --- Channel groups and importance ---
+
+def prunable_groups(model):
+    """(block, producer conv, BatchNorm, consumer conv) attribute names for each block-internal width"""
+    groups = []
+    for block in model.modules():
+        if not all(hasattr(block, name) for name in ("conv1", "bn1", "conv2", "bn2")):
+            continue
+        pairs = [("conv1", "bn1", "conv2")]
+        if hasattr(block, "conv3"):
+            pairs.append(("conv2", "bn2", "conv3"))
+        for producer, norm, consumer in pairs:
+            # Grouped convolutions tie input and output channels together
+            if getattr(block, producer).groups == 1 and getattr(block, consumer).groups == 1:
+                groups.append((block, producer, norm, consumer))
+    return groups
+
+
+def l1_importance(model):
+    return [
+        getattr(block, producer).weight.detach().abs().sum(dim=(1, 2, 3))
+        for block, producer, _, _ in prunable_groups(model)
+    ]
+
+
+def distillation_loss(student_logits, teacher_logits, labels):
+    import torch.nn.functional as F
+
+    t = DISTILL_TEMPERATURE
+    loss = F.kl_div(
+        F.log_softmax(student_logits / t, dim=1), F.softmax(teacher_logits / t, dim=1), reduction="batchmean"
+    ) * t * t
+    labeled = labels >= 0
+    if labeled.any():
+        loss = loss + F.cross_entropy(student_logits[labeled], labels[labeled])
+    return loss
+
+
+def taylor_importance(model, inputs, teacher_logits, labels, batch_size=16):
+    """Mean |sum over positions of activation x gradient| per channel at each group's BatchNorm output"""
+    groups = prunable_groups(model)
+    scores = [0.0] * len(groups)
+    activations = {}
+    handles = []
+    for i, (block, _, norm, _) in enumerate(groups):
+        def hook(module, _input, output, i=i):
+            output.retain_grad()
+            activations[i] = output
+        handles.append(getattr(block, norm).register_forward_hook(hook))
+
+    model.eval()
+    try:
+        for part in batches(len(inputs), batch_size):
+            model.zero_grad()
+            distillation_loss(model(inputs[part]), teacher_logits[part], labels[part]).backward()
+            for i, activation in activations.items():
+                contribution = (activation * activation.grad).sum(dim=(2, 3)).abs().sum(dim=0)
+                scores[i] = scores[i] + contribution.detach()
+    finally:
+        for handle in handles:
+            handle.remove()
+        model.zero_grad()
+    return [score / len(inputs) for score in scores]
+
+
+# --- Surgery ---
+
+def slice_conv(conv, out_index=None, in_index=None):
+    import torch
+
+    weight = conv.weight.detach()
+    if out_index is not None:
+        weight = weight[out_index]
+    if in_index is not None:
+        weight = weight[:, in_index]
+    sliced = torch.nn.Conv2d(
+        weight.shape[1], weight.shape[0], conv.kernel_size, conv.stride, conv.padding, conv.dilation,
+        bias=conv.bias is not None, padding_mode=conv.padding_mode,
+    )
+    sliced.weight.data = weight.clone()
+    if conv.bias is not None:
+        bias = conv.bias.detach()
+        sliced.bias.data = (bias[out_index] if out_index is not None else bias).clone()
+    return sliced
+
+
+def slice_norm(norm, index):
+    import torch
+
+    sliced = torch.nn.BatchNorm2d(len(index), norm.eps, norm.momentum, norm.affine, norm.track_running_stats)
+    if norm.affine:
+        sliced.weight.data = norm.weight.detach()[index].clone()
+        sliced.bias.data = norm.bias.detach()[index].clone()
+    if norm.track_running_stats:
+        sliced.running_mean = norm.running_mean[index].clone()
+        sliced.running_var = norm.running_var[index].clone()
+    return sliced
+
+
+def kept_channels(importance, sparsity, round_to):
+    """Sorted indices of the channels to keep"""
+    channels = len(importance)
+    keep = math.ceil(channels * (1 - sparsity) / round_to) * round_to
+    keep = min(max(keep, round_to), channels)
+    return importance.argsort(descending=True)[:keep].sort().values
+
+
+def prune(model, importances, sparsity, round_to=8):
+    """A copy of model with each group narrowed to its most important channels"""
+    pruned = copy.deepcopy(model)
+    # Groups are found in the same order on the copy, so importances line up
+    for (block, producer, norm, consumer), importance in zip(prunable_groups(pruned), importances):
+        index = kept_channels(importance, sparsity, round_to)
+        setattr(block, producer, slice_conv(getattr(block, producer), out_index=index))
+        setattr(block, norm, slice_norm(getattr(block, norm), index))
+        setattr(block, consumer, slice_conv(getattr(block, consumer), in_index=index))
+    return pruned
+
+
+# --- Fine-tuning and evaluation ---
+
+def fine_tune(model, inputs, teacher_logits, labels, steps, learning_rate=1e-3, batch_size=16, seed=0):
+    """Distill from the unpruned model; BatchNorm statistics stay frozen (batches are small)"""
+    import torch
+
+    if steps <= 0 or not len(inputs):
+        return
+    generator = torch.Generator().manual_seed(seed)
+    optimizer = torch.optim.SGD(model.parameters(), lr=learning_rate, momentum=0.9, weight_decay=1e-4)
+    model.train()
+    for module in model.modules():
+        if isinstance(module, torch.nn.BatchNorm2d):
+            module.eval()
+    for step in range(steps):
+        part = torch.randint(len(inputs), (min(batch_size, len(inputs)),), generator=generator)
+        optimizer.zero_grad()
+        loss = distillation_loss(model(inputs[part]), teacher_logits[part], labels[part])
+        loss.backward()
+        optimizer.step()
+        if (step + 1) % 50 == 0:
+            print(f"    step {step + 1}/{steps}  loss {loss.item():.4f}")
+    model.eval()
+
+
+def count_macs(model):
+    """(parameters, multiply-accumulates for one 224x224 image)"""
+    import torch
+
+    macs = 0
+
+    def conv_hook(module, _input, output):
+        nonlocal macs
+        kernel = module.kernel_size[0] * module.kernel_size[1] * module.in_channels // module.groups
+        macs += output.numel() * kernel
+
+    def linear_hook(module, _input, output):
+        nonlocal macs
+        macs += output.numel() * module.in_features
+
+    handles = []
+    for module in model.modules():
+        if isinstance(module, torch.nn.Conv2d):
+            handles.append(module.register_forward_hook(conv_hook))
+        elif isinstance(module, torch.nn.Linear):
+            handles.append(module.register_forward_hook(linear_hook))
+    model.eval()
+    with torch.no_grad():
+        model(torch.zeros(1, 3, 224, 224))
+    for handle in handles:
+        handle.remove()
+    return sum(p.numel() for p in model.parameters()), macs
+
+
+def cpu_latency(model, runs=LATENCY_RUNS):
+    """Median single-image forward time in ms"""
+    import torch
+
+    model.eval()
+    example = torch.rand(1, 3, 224, 224)
+    times = []
+    with torch.no_grad():
+        model(example)
+        for _ in range(runs):
+            start = time.perf_counter()
+            model(example)
+            times.append((time.perf_counter() - start) * 1000)
+    return float(np.median(times))
+
+
+def evaluate(model, inputs, labels, holdout, teacher_logits):
+    logits = predict(model, inputs[holdout])
+    predictions = logits.argmax(dim=1)
+    result = {"agreement": float((predictions == teacher_logits[holdout].argmax(dim=1)).float().mean())}
+    labeled = labels[holdout] >= 0
+    if labeled.any():
+        result["top1"] = float((predictions[labeled] == labels[holdout][labeled]).float().mean())
+    return result
+
+
+def describe(sparsity, model, inputs, labels, holdout, teacher_logits):
+    parameters, macs = count_macs(model)
+    return {
+        "sparsity": sparsity,
+        "parameters": parameters,
+        "gmacs": round(macs / 1e9, 3),
+        "latencyMs": round(cpu_latency(model), 2),
+        **evaluate(model, inputs, labels, holdout, teacher_logits),
+    }
+
+
+def print_report(rows):
+    print(f"\n{'sparsity':>8} {'params':>8} {'GMACs':>7} {'latency':>9} {'speedup':>8} {'top-1':>7} {'agree':>7}")
+    baseline = rows[0]["latencyMs"]
+    for row in rows:
+        top1 = f"{row['top1']:.1%}" if "top1" in row else "-"
+        print(f"{row['sparsity']:>8.0%} {row['parameters'] / 1e6:>7.1f}M {row['gmacs']:>7.2f} "
+              f"{row['latencyMs']:>7.1f}ms {baseline / row['latencyMs']:>7.2f}x {top1:>7} {row['agreement']:>7.1%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prune Food101 classifier channels and convert each level to Core ML")
+    parser.add_argument("--calibration", required=True, help="Folder of calibration images (class subfolders are labeled)")
+    parser.add_argument("--sparsity", type=float, nargs="+", default=list(DEFAULT_SPARSITY), help="Share of channels to remove per level")
+    parser.add_argument("--importance", choices=("taylor", "l1"), default="taylor", help="Channel ranking")
+    parser.add_argument("--round-to", type=int, default=8, help="Keep channel counts at multiples of this")
+    parser.add_argument("--steps", type=int, default=200, help="Fine-tuning steps per level (0 to skip)")
+    parser.add_argument("--learning-rate", type=float, default=1e-3, help="Fine-tuning learning rate")
+    parser.add_argument("--batch-size", type=int, default=16, help="Calibration and fine-tuning batch size")
+    parser.add_argument("--max-images", type=int, default=512, help="Most calibration images to load")
+    parser.add_argument("--threads", type=int, default=0, help="torch CPU threads (0 = default)")
+    parser.add_argument("--output-dir", default="pruned", help="Where the .mlmodel files and prune_report.json go")
+    parser.add_argument("--skip-convert", action="store_true", help="Only report, do not convert to Core ML")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.calibration):
+        print(f"❌ {args.calibration} not found")
+        return 1
+
+    import torch
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    converter = load_converter()
+    model, class_names = converter.load_food101_model()
+    inputs, labels, holdout = load_calibration(args.calibration, list(class_names), args.max_images)
+    if not len(inputs):
+        print(f"❌ No images in {args.calibration}")
+        return 1
+    print(f"📋 {len(inputs)} calibration images ({int((labels >= 0).sum())} labeled, {int(holdout.sum())} held out)")
+
+    train = ~holdout
+    with span("teacher"):
+        teacher_logits = predict(model, inputs, args.batch_size)
+    with span("importance"):
+        if args.importance == "l1":
+            importances = l1_importance(model)
+        else:
+            importances = taylor_importance(model, inputs[train], teacher_logits[train], labels[train], args.batch_size)
+    print(f"📋 Ranked channels in {len(importances)} groups by {args.importance} importance")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    rows = [describe(0.0, model, inputs, labels, holdout, teacher_logits)]
+    for sparsity in sorted(args.sparsity):
+        print(f"\nPruning {sparsity:.0%} of the channels...")
+        with span("prune"):
+            pruned = prune(model, importances, sparsity, args.round_to)
+        with span("fine_tune"):
+            fine_tune(pruned, inputs[train], teacher_logits[train], labels[train], args.steps, args.learning_rate, args.batch_size)
+        row = describe(sparsity, pruned, inputs, labels, holdout, teacher_logits)
+        if not args.skip_convert:
+            output_path = os.path.join(args.output_dir, f"FoodClassifier_pruned{round(sparsity * 100)}.mlmodel")
+            with span("convert"):
+                converter.convert_model(
+                    pruned, class_names, output_path,
+                    description=f"Food101 classifier with {sparsity:.0%} of block channels pruned",
+                )
+            row["model"] = output_path
+        rows.append(row)
+
+    print_report(rows)
+    report_path = os.path.join(args.output_dir, "prune_report.json")
+    with span("json_write"), open(report_path, "w") as f:
+        json.dump({"importance": args.importance, "steps": args.steps, "levels": rows}, f, indent=2)
+    print(f"\n✅ Report written to {report_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+HEIC and lossless WebP renditions for the asset catalog, and a per-format report.
+
+HEIC is best written by the tools themselves, from the source pixels:
+`add_images_to_xcode.py --format heic` and the card renderers' `--format
+heic` call encode() with matched_quality() once per rendition. The HEIC
+quality is the lowest one whose SSIM against the source is at least what
+JPEG at REFERENCE_QUALITY (the importer's quality) reaches on the same
+pixels. The search runs on a MATCH_CROP-pixel center crop at full
+resolution, since HEIC encoding is slow.
+
+This script converts renditions that are already in the catalog, in place:
+
+- --lossy heic: JPEG renditions become HEIC at matched quality. This is a
+  second lossy generation on top of the JPEG, so re-importing or
+  re-rendering with --format heic gives better results.
+- --lossless webp: PNG renditions become lossless WebP. Opt-in until an
+  Xcode build with .webp image sets has been verified.
+
+Contents.json filenames are updated to match. A rendition is only replaced
+when the new file is smaller.
+
+--compare leaves the catalog alone and reports bytes, decode time and SSIM
+per format, across every JPEG/PNG rendition in the catalog. With --sources
+it encodes the original photos instead (downscaled like the importer), so
+SSIM is measured against the source rather than an already compressed JPEG.
+
+HEIC is read by UIImage and asset catalogs since iOS 11, and WebP since
+iOS 14.
+
+Requirements:
+- numpy, Pillow (with WebP)
+- pillow-heif for HEIC (pip install pillow-heif)
+
+Usage:
+python rendition_format.py --compare                     # report only
+python rendition_format.py --compare --sources MealImages/ # encodes of the original photos
+python rendition_format.py --lossy heic --lossless webp   # convert the catalog
+python rendition_format.py --compare --json formats.json FeaturedMeals/
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+
+from asset_catalog import xcassets_dir, load_contents, write_contents
+from asset_trace import span
+
+# Quality the JPEG renditions are written at (add_images_to_xcode.JPEG_QUALITY)
+REFERENCE_QUALITY = 90
+# HEIC qualities tried when matching, lowest first
+HEIC_QUALITIES = list(range(30, 96, 5))
+MATCH_CROP = 384
+DECODE_REPEATS = 3
+
+# format: (file extension, Pillow format name, save options)
+FORMATS = {
+    "jpeg": (".jpg", "JPEG", {"quality": REFERENCE_QUALITY, "optimize": True}),
+    "png": (".png", "PNG", {"optimize": True}),
+    "heic": (".heic", "HEIF", {}),
+    "webp": (".webp", "WEBP", {"lossless": True, "quality": 100, "method": 4}),
+}
+LOSSY_SOURCES = (".jpg", ".jpeg")
+LOSSLESS_SOURCES = (".png",)
+
+_heif_registered = False
+
+
+def enable_heif():
+    """Register the libheif opener with Pillow; raises ImportError without pillow-heif"""
+    global _heif_registered
+    if not _heif_registered:
+        try:
+            import pillow_heif
+        except ImportError:
+            raise ImportError("HEIC needs pillow-heif (pip install pillow-heif)") from None
+        pillow_heif.register_heif_opener()
+        _heif_registered = True
+
+
+def encode(img, fmt, quality=None):
+    """Encoded bytes of an RGB image in one of FORMATS"""
+    if fmt == "heic":
+        enable_heif()
+    _, pil_format, options = FORMATS[fmt]
+    if quality is not None:
+        options = {**options, "quality": quality}
+    buffer = io.BytesIO()
+    img.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def decode(data):
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as img:
+        return img.convert("RGB")
+
+
+def ssim(a, b, block=8):
+    """Mean SSIM of two same-size RGB images over non-overlapping blocks of the luma channel"""
+    import numpy as np
+
+    weights = np.array([0.299, 0.587, 0.114], dtype=np.float64)
+    height, width = a.size[1] // block * block, a.size[0] // block * block
+    x, y = [
+        (np.asarray(img, dtype=np.float64)[:height, :width] @ weights).reshape(height // block, block, width // block, block)
+        for img in (a, b)
+    ]
+    mean_x, mean_y = x.mean(axis=(1, 3)), y.mean(axis=(1, 3))
+    var_x, var_y = x.var(axis=(1, 3)), y.var(axis=(1, 3))
+    cov = (x * y).mean(axis=(1, 3)) - mean_x * mean_y
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    return float((((2 * mean_x * mean_y + c1) * (2 * cov + c2)) /
+                  ((mean_x ** 2 + mean_y ** 2 + c1) * (var_x + var_y + c2))).mean())
+
+
+def center_crop(img, size=MATCH_CROP):
+    left, top = max(0, (img.width - size) // 2), max(0, (img.height - size) // 2)
+    return img.crop((left, top, min(img.width, left + size), min(img.height, top + size)))
+
+
+def matched_quality(img, fmt="heic", reference_quality=REFERENCE_QUALITY, qualities=HEIC_QUALITIES):
+    """Lowest quality at which fmt matches the SSIM of JPEG at reference_quality on img's center crop"""
+    crop = center_crop(img)
+    target = ssim(crop, decode(encode(crop, "jpeg", reference_quality)))
+    low, high = 0, len(qualities) - 1
+    # Binary search: SSIM rises with quality
+    while low < high:
+        middle = (low + high) // 2
+        if ssim(crop, decode(encode(crop, fmt, qualities[middle]))) >= target:
+            high = middle
+        else:
+            low = middle + 1
+    return qualities[low]
+
+
+def iter_imagesets(catalog_dir):
+    """(imageset dir, Contents.json) for every imageset under catalog_dir"""
+    for dirpath, dirnames, _ in os.walk(catalog_dir):
+        dirnames.sort()
+        if dirpath.endswith(".imageset"):
+            yield dirpath, load_contents(dirpath)
+
+
+def rendition_files(imageset_dir, contents):
+    """Existing JPEG/PNG files named by a Contents.json, each once"""
+    files = []
+    for image in contents.get("images", []):
+        filename = image.get("filename")
+        if filename and filename.lower().endswith(LOSSY_SOURCES + LOSSLESS_SOURCES) and filename not in files \
+                and os.path.isfile(os.path.join(imageset_dir, filename)):
+            files.append(filename)
+    return files
+
+
+def convert_file(source, fmt):
+    """Encoded bytes of an image file in fmt (HEIC at matched quality) and the quality used"""
+    from PIL import Image
+
+    with span("decode"), Image.open(source) as img:
+        pixels = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") and fmt != "heic" else "RGB")
+    quality = matched_quality(pixels.convert("RGB"), fmt) if fmt == "heic" else None
+    with span("encode", format=fmt):
+        return encode(pixels, fmt, quality), quality
+
+
+def convert_catalog(catalog_dir=xcassets_dir, lossy="jpeg", lossless="png"):
+    """Re-encode JPEG renditions as lossy and PNG renditions as lossless; returns (converted, bytes before, after)"""
+    converted, before, after = 0, 0, 0
+    for imageset_dir, contents in iter_imagesets(catalog_dir):
+        renamed = {}
+        for filename in rendition_files(imageset_dir, contents):
+            fmt = lossy if filename.lower().endswith(LOSSY_SOURCES) else lossless
+            if fmt in ("jpeg", "png"):
+                continue
+            source = os.path.join(imageset_dir, filename)
+            size = os.path.getsize(source)
+            try:
+                data, quality = convert_file(source, fmt)
+            except Exception as e:
+                print(f"   ❌ {os.path.relpath(source, catalog_dir)}: {str(e)}")
+                continue
+            if len(data) >= size:
+                print(f"   = {os.path.relpath(source, catalog_dir)}: {fmt} is not smaller, kept")
+                continue
+
+            new_filename = os.path.splitext(filename)[0] + FORMATS[fmt][0]
+            with open(os.path.join(imageset_dir, new_filename), "wb") as f:
+                f.write(data)
+            os.remove(source)
+            renamed[filename] = new_filename
+            converted += 1
+            before += size
+            after += len(data)
+            print(f"   ✅ {os.path.relpath(source, catalog_dir)} -> {new_filename}"
+                  f"{f' (q{quality})' if quality else ''}: {size / 1024:.1f} -> {len(data) / 1024:.1f} KB")
+
+        if renamed:
+            for image in contents["images"]:
+                if image.get("filename") in renamed:
+                    image["filename"] = renamed[image["filename"]]
+            with span("json_write"):
+                write_contents(imageset_dir, contents)
+    return converted, before, after
+
+
+def decode_ms(data, repeats=DECODE_REPEATS):
+    """Best-of-repeats full decode time in milliseconds"""
+    from PIL import Image
+
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        with Image.open(io.BytesIO(data)) as img:
+            img.load()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def compare_formats(paths, formats=("jpeg", "heic", "png", "webp"), max_size=None):
+    """{format: {"bytes", "decodeMs", "ssim", "images"}} over the renditions, plus the files as they are now ("current")
+
+    With max_size the paths are source photos: each is downscaled to that
+    long edge first, like the importer, and encoded as JPEG and HEIC only;
+    "current" is left empty since the source file is not a rendition.
+    """
+    from PIL import Image
+
+    report = {name: {"bytes": 0, "decodeMs": 0.0, "ssim": 0.0, "images": 0} for name in ("current", *formats)}
+
+    def add(name, data, pixels):
+        row = report[name]
+        row["bytes"] += len(data)
+        row["decodeMs"] += decode_ms(data)
+        row["ssim"] += ssim(pixels, decode(data))
+        row["images"] += 1
+
+    for path in paths:
+        with open(path, "rb") as f:
+            current = f.read()
+        with span("decode"), Image.open(path) as img:
+            pixels = img.convert("RGB")
+        if max_size:
+            with span("resize"):
+                pixels.thumbnail((max_size, max_size), Image.LANCZOS)
+        else:
+            add("current", current, pixels)
+        # Source photos are compared as photos, whatever their file format
+        lossless_source = not max_size and path.lower().endswith(LOSSLESS_SOURCES)
+        for fmt in formats:
+            # JPEG and HEIC only for photos, PNG and WebP only for lossless sources
+            if (fmt in ("png", "webp")) != lossless_source:
+                continue
+            quality = matched_quality(pixels, fmt) if fmt == "heic" else None
+            with span("encode", format=fmt):
+                add(fmt, encode(pixels, fmt, quality), pixels)
+
+    for row in report.values():
+        if row["images"]:
+            row["ssim"] = round(row["ssim"] / row["images"], 4)
+            row["decodeMs"] = round(row["decodeMs"], 1)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert catalog renditions to HEIC / lossless WebP, or compare formats")
+    parser.add_argument("catalog", nargs="?", default=xcassets_dir, help="Asset catalog or folder inside it")
+    parser.add_argument("--compare", action="store_true", help="Only report bytes, decode time and SSIM per format")
+    parser.add_argument("--sources", nargs="+", help="With --compare: original photos or folders to encode instead")
+    parser.add_argument("--lossy", choices=["jpeg", "heic"], default="jpeg", help="Format for JPEG renditions")
+    parser.add_argument("--lossless", choices=["png", "webp"], default="png",
+                        help="Format for PNG renditions (webp is opt-in)")
+    parser.add_argument("--json", help="Write the comparison here")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.lossy == "heic" or args.compare:
+            enable_heif()
+    except ImportError as e:
+        print(f"❌ {e}")
+        return 1
+
+    if args.compare:
+        if args.sources:
+            from image_quality import expand_paths
+            from add_images_to_xcode import MAX_IMAGE_SIZE
+
+            paths = expand_paths(args.sources)
+            report = compare_formats(paths, max_size=MAX_IMAGE_SIZE)
+        else:
+            paths = [
+                os.path.join(imageset_dir, filename)
+                for imageset_dir, contents in iter_imagesets(args.catalog)
+                for filename in rendition_files(imageset_dir, contents)
+            ]
+            report = compare_formats(paths)
+        print(f"📊 {len(paths)} {'source photos' if args.sources else 'renditions'}")
+        print(f"   {'format':<8} {'images':>6} {'KB':>10} {'decode ms':>10} {'SSIM':>7}")
+        for name, row in report.items():
+            if row["images"]:
+                print(f"   {name:<8} {row['images']:>6} {row['bytes'] / 1024:>10.1f} {row['decodeMs']:>10.1f} {row['ssim']:>7.4f}")
+        if args.json:
+            with span("json_write"), open(args.json, "w") as f:
+                json.dump(report, f, indent=2)
+        return 0
+
+    converted, before, after = convert_catalog(args.catalog, args.lossy, args.lossless)
+    if converted:
+        print(f"✅ Converted {converted} renditions: {before / 1024:.1f} -> {after / 1024:.1f} KB "
+              f"({1 - after / before:.0%} smaller)")
+    elif args.lossy == "jpeg" and args.lossless == "png":
+        print("Nothing to convert: pass --lossy heic and/or --lossless webp")
+    else:
+        print("No renditions to convert")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Replay a video or image sequence through the recognition pipeline on CPU.
+
+This simulates what RecognitionController/FoodRecognitionService do with
+camera frames, using ONNX exports of the same models:
+
+1. Detection: the YOLOv5 detector (letterboxed 640x640 input, 85-column
+   output rows) runs on the frame. Boxes need confidence > --min-confidence,
+   like FoodRecognitionService.minimumConfidence (0.3). Overlapping boxes are
+   then merged with non-maximum suppression.
+2. Classification: every detected box is cropped and resized to 224x224, and
+   the crops go through the Food101 classifier in batches of --batch-size.
+   Without detections (or without --detector) the whole frame is classified,
+   as recognizeFood(in:) does. Each crop keeps its labels above the minimum
+   confidence, at most 10 of them.
+
+--frame-skip N processes every (N+1)th frame. --cache puts the
+frame-similarity gate from frame_similarity.py in front of the pipeline: a
+frame whose perceptual hash is close to the last recognized frame reuses
+its detections and classifications. The report gives end-to-end fps, the
+gate's hit rate and p50/p90/p99 latency per stage, so pipeline settings can
+be compared before changing the Swift code.
+
+The ONNX files are torch.onnx.export() outputs of the models that
+convert_food_detector_model.py and convert_food101_model.py load:
+"convert_food101_model.py --onnx food101.onnx" writes the classifier, and
+"convert_food_detector_model.py --keep-onnx food_detector.onnx" keeps the
+detector's.
+
+Requirements:
+- numpy, Pillow, onnxruntime
+- opencv-python (video files only; image directories need only Pillow)
+
+Usage:
+python replay_recognition.py clip.mov --detector food_detector.onnx --classifier food101.onnx
+python replay_recognition.py frames/ --classifier food101.onnx --frame-skip 2 --cache --cache-distance 8
+python replay_recognition.py clip.mov --detector food_detector.onnx --classifier food101.onnx --output results.jsonl
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+from asset_trace import span
+from frame_similarity import FrameSimilarityGate, METHODS, DEFAULT_MAX_DISTANCE, DEFAULT_MAX_REUSE
+from prewarm_nutrition_cache import load_labels
+
+DETECTOR_SIZE = 640
+CLASSIFIER_SIZE = 224
+
+# FoodRecognitionService.minimumConfidence; results must be strictly above it
+MINIMUM_CONFIDENCE = 0.3
+
+# FoodRecognitionService keeps .prefix(10) of the classifier's results
+MAX_RESULTS = 10
+
+IOU_THRESHOLD = 0.45
+
+# Share of the box size added around each crop, so the classifier sees some context
+CROP_PADDING = 0.1
+
+# torchvision normalization the Food101 model was trained with
+IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".heic", ".webp", ".bmp")
+
+
+def iter_frames(source):
+    """Yield RGB uint8 frames from a directory of images (sorted by name) or a video file"""
+    if os.path.isdir(source):
+        from PIL import Image
+
+        for name in sorted(os.listdir(source)):
+            if name.startswith(".") or not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            with span("read"), Image.open(os.path.join(source, name)) as img:
+                yield np.asarray(img.convert("RGB"))
+        return
+
+    import cv2
+
+    capture = cv2.VideoCapture(source)
+    if not capture.isOpened():
+        raise OSError(f"cannot open video {source}")
+    try:
+        while True:
+            with span("read"):
+                ok, frame = capture.read()
+            if not ok:
+                break
+            yield cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    finally:
+        capture.release()
+
+
+def resize(frame, width, height):
+    from PIL import Image
+
+    return np.asarray(Image.fromarray(frame).resize((width, height), Image.BILINEAR))
+
+
+def letterbox(frame, size=DETECTOR_SIZE):
+    """Scale a frame into a size x size gray canvas keeping its aspect ratio; returns (NCHW tensor, scale, pad)"""
+    height, width = frame.shape[:2]
+    scale = min(size / width, size / height)
+    new_width, new_height = round(width * scale), round(height * scale)
+    pad_x, pad_y = (size - new_width) // 2, (size - new_height) // 2
+    canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+    canvas[pad_y:pad_y + new_height, pad_x:pad_x + new_width] = resize(frame, new_width, new_height)
+    tensor = canvas.transpose(2, 0, 1)[np.newaxis].astype(np.float32) / 255
+    return tensor, scale, (pad_x, pad_y)
+
+
+def nms(boxes, scores, iou_threshold=IOU_THRESHOLD):
+    """Indices of the boxes kept by greedy non-maximum suppression, best first"""
+    order = np.argsort(-scores)
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    keep = []
+    while len(order):
+        best, rest = order[0], order[1:]
+        keep.append(best)
+        x1 = np.maximum(boxes[best, 0], boxes[rest, 0])
+        y1 = np.maximum(boxes[best, 1], boxes[rest, 1])
+        x2 = np.minimum(boxes[best, 2], boxes[rest, 2])
+        y2 = np.minimum(boxes[best, 3], boxes[rest, 3])
+        intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        iou = intersection / (areas[best] + areas[rest] - intersection + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+def decode_detections(output, scale, pad, frame_shape, min_confidence=MINIMUM_CONFIDENCE, classes=None):
+    """YOLOv5 rows (cx, cy, w, h, objectness, class scores...) -> (boxes in frame pixels, confidences)
+
+    classes limits the detections to those class indices.
+    """
+    rows = output.reshape(-1, output.shape[-1])
+    class_scores = rows[:, 5:] if classes is None else rows[:, 5:][:, list(classes)]
+    confidence = rows[:, 4] * class_scores.max(axis=1)
+    rows, confidence = rows[confidence > min_confidence], confidence[confidence > min_confidence]
+    if not len(rows):
+        return np.zeros((0, 4), dtype=np.float32), confidence
+    cx, cy, w, h = rows[:, 0], rows[:, 1], rows[:, 2], rows[:, 3]
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+    boxes[:, [0, 2]] = (boxes[:, [0, 2]] - pad[0]) / scale
+    boxes[:, [1, 3]] = (boxes[:, [1, 3]] - pad[1]) / scale
+    height, width = frame_shape[:2]
+    boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, width)
+    boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, height)
+    keep = nms(boxes, confidence)
+    return boxes[keep], confidence[keep]
+
+
+def crop_batch(frame, boxes, size=CLASSIFIER_SIZE, padding=CROP_PADDING):
+    """Normalized NCHW classifier input with one padded crop per box"""
+    height, width = frame.shape[:2]
+    crops = []
+    for x1, y1, x2, y2 in boxes:
+        pad_x, pad_y = (x2 - x1) * padding, (y2 - y1) * padding
+        left, top = int(max(x1 - pad_x, 0)), int(max(y1 - pad_y, 0))
+        right, bottom = int(min(x2 + pad_x, width)), int(min(y2 + pad_y, height))
+        crop = frame[top:max(bottom, top + 1), left:max(right, left + 1)]
+        crops.append(resize(crop, size, size))
+    batch = np.stack(crops).astype(np.float32) / 255
+    return ((batch - IMAGENET_MEAN) / IMAGENET_STD).transpose(0, 3, 1, 2).astype(np.float32)
+
+
+def softmax(logits):
+    exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def top_results(probabilities, labels, min_confidence=MINIMUM_CONFIDENCE, limit=MAX_RESULTS):
+    """[(label, confidence)] above min_confidence, best first, at most limit"""
+    order = np.argsort(-probabilities)[:limit]
+    return [(labels[i], float(probabilities[i])) for i in order if probabilities[i] > min_confidence]
+
+
+def load_session(path, threads=0):
+    """CPU onnxruntime session; threads=0 lets onnxruntime choose"""
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = threads
+    return ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+
+class RecognitionPipeline:
+    """Detector (optional) followed by batched classification of the detected crops"""
+
+    def __init__(self, classifier, labels, detector=None, min_confidence=MINIMUM_CONFIDENCE, batch_size=8):
+        self.classifier = classifier
+        self.classifier_input = classifier.get_inputs()[0].name
+        self.detector = detector
+        self.detector_input = detector.get_inputs()[0].name if detector else None
+        self.labels = labels
+        self.min_confidence = min_confidence
+        self.batch_size = batch_size
+
+    def detect(self, frame):
+        tensor, scale, pad = letterbox(frame)
+        output = self.detector.run(None, {self.detector_input: tensor})[0]
+        return decode_detections(output, scale, pad, frame.shape, self.min_confidence)
+
+    def classify(self, batch):
+        probabilities = []
+        for start in range(0, len(batch), self.batch_size):
+            logits = self.classifier.run(None, {self.classifier_input: batch[start:start + self.batch_size]})[0]
+            probabilities.append(softmax(logits))
+        return np.concatenate(probabilities)
+
+    def process(self, frame):
+        """Results for one frame and the time spent in each stage (ms)"""
+        timings = {}
+        height, width = frame.shape[:2]
+        boxes = np.array([[0, 0, width, height]], dtype=np.float32)
+        box_confidence = np.array([1.0])
+        if self.detector is not None:
+            start = time.perf_counter()
+            with span("detect"):
+                detected, confidence = self.detect(frame)
+            timings["detect"] = (time.perf_counter() - start) * 1000
+            if len(detected):
+                boxes, box_confidence = detected, confidence
+
+        start = time.perf_counter()
+        with span("crop"):
+            batch = crop_batch(frame, boxes)
+        timings["crop"] = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        with span("classify"):
+            probabilities = self.classify(batch)
+        timings["classify"] = (time.perf_counter() - start) * 1000
+
+        results = [
+            {
+                "box": [round(float(value), 1) for value in box],
+                "boxConfidence": round(float(confidence), 4),
+                "labels": [(label, round(score, 4)) for label, score in top_results(row, self.labels, self.min_confidence)],
+            }
+            for box, confidence, row in zip(boxes, box_confidence, probabilities)
+        ]
+        return results, timings
+
+
+def replay(frames, pipeline, frame_skip=0, cache=None, on_result=None):
+    """Run the pipeline over frames; returns stats with per-frame latencies (ms) and counts"""
+    stats = {"frames": 0, "processed": 0, "cached": 0, "latency": [], "stages": {}}
+    start = time.perf_counter()
+    for index, frame in enumerate(frames):
+        stats["frames"] += 1
+        if index % (frame_skip + 1):
+            continue
+        frame_start = time.perf_counter()
+        results = None
+        if cache is not None:
+            with span("cache_lookup"):
+                frame_hash, results = cache.lookup(frame)
+        cached = results is not None
+        if not cached:
+            results, timings = pipeline.process(frame)
+            for stage, value in timings.items():
+                stats["stages"].setdefault(stage, []).append(value)
+            if cache is not None:
+                cache.store(frame_hash, results)
+        latency = (time.perf_counter() - frame_start) * 1000
+        stats["latency"].append(latency)
+        stats["processed"] += 1
+        stats["cached"] += cached
+        if on_result:
+            on_result({"frame": index, "cached": cached, "latencyMs": round(latency, 2), "results": results})
+    stats["seconds"] = time.perf_counter() - start
+    if cache is not None:
+        stats["cache"] = cache.metrics()
+    return stats
+
+
+def percentiles(values, points=(50, 90, 99)):
+    if not values:
+        return {f"p{point}": 0.0 for point in points}
+    return {f"p{point}": float(np.percentile(values, point)) for point in points}
+
+
+def print_report(stats):
+    seconds = max(stats["seconds"], 1e-9)
+    print(f"📊 {stats['frames']} frames read, {stats['processed']} processed, {stats['cached']} served from cache")
+    if "cache" in stats:
+        cache = stats["cache"]
+        print(f"   Frame gate: {cache['method']} <= {cache['maxDistance']} bits, hit rate {cache['hitRate']:.1%}"
+              f" ({cache['expired']} recognized again after {cache['maxReuse']} reuses)")
+    print(f"   End-to-end: {stats['frames'] / seconds:.1f} source fps, {stats['processed'] / seconds:.1f} processed fps")
+    rows = [("frame", stats["latency"])] + sorted(stats["stages"].items())
+    print(f"   {'stage':<10} {'p50':>8} {'p90':>8} {'p99':>8}  (ms)")
+    for stage, values in rows:
+        p = percentiles(values)
+        print(f"   {stage:<10} {p['p50']:8.1f} {p['p90']:8.1f} {p['p99']:8.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay frames through the detector and classifier on CPU")
+    parser.add_argument("source", help="Video file or directory of frame images")
+    parser.add_argument("--classifier", required=True, help="Food101 classifier ONNX file")
+    parser.add_argument("--detector", help="YOLOv5 detector ONNX file (default: classify whole frames)")
+    parser.add_argument("--min-confidence", type=float, default=MINIMUM_CONFIDENCE, help="Drop results at or below this confidence")
+    parser.add_argument("--batch-size", type=int, default=8, help="Crops per classifier call")
+    parser.add_argument("--frame-skip", type=int, default=0, help="Process every (N+1)th frame")
+    parser.add_argument("--cache", action="store_true", help="Reuse results while frames match the last recognized one")
+    parser.add_argument("--cache-method", choices=METHODS, default=METHODS[0], help="Perceptual hash for the frame gate")
+    parser.add_argument("--cache-distance", type=int, default=DEFAULT_MAX_DISTANCE, help="Most differing hash bits for a cache hit")
+    parser.add_argument("--cache-max-reuse", type=int, default=DEFAULT_MAX_REUSE, help="Cache hits in a row before recognizing again")
+    parser.add_argument("--threads", type=int, default=0, help="onnxruntime intra-op threads (0 = automatic)")
+    parser.add_argument("--output", help="Write one JSON line of results per processed frame")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.source):
+        print(f"❌ {args.source} not found")
+        return 1
+
+    pipeline = RecognitionPipeline(
+        load_session(args.classifier, args.threads),
+        load_labels(),
+        detector=load_session(args.detector, args.threads) if args.detector else None,
+        min_confidence=args.min_confidence,
+        batch_size=args.batch_size,
+    )
+    cache = FrameSimilarityGate(args.cache_method, args.cache_distance, args.cache_max_reuse) if args.cache else None
+
+    output = open(args.output, "w") if args.output else None
+    try:
+        on_result = (lambda record: output.write(json.dumps(record) + "\n")) if output else None
+        stats = replay(iter_frames(args.source), pipeline, args.frame_skip, cache, on_result)
+    finally:
+        if output:
+            output.close()
+
+    print_report(stats)
+    print(f"✅ Replayed {args.source} in {stats['seconds']:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
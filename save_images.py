@@ -1,16 +1,15 @@
 #!/usr/bin/env python3
 import os
-import requests
-import json
-from PIL import Image
-import io
-import base64
 
-# Create necessary directories
-os.makedirs("temp_images", exist_ok=True)
+from asset_catalog import base_dir
+
+temp_dir = os.path.join(base_dir, "temp_images")
+
 
 # Helper function to save images from the internet
 def save_image_from_url(url, filename):
+    import requests
+
     try:
         response = requests.get(url)
         response.raise_for_status()  # Check for HTTP errors
@@ -24,9 +23,18 @@ def save_image_from_url(url, filename):
         print(f"Error saving {filename}: {str(e)}")
         return False
 
-# Download and save the images
-print("Please manually save the following images:")
-print("1. Save the yogurt parfait image as: temp_images/healthy_breakfast_photo.jpg")
-print("2. Save the Mediterranean ingredients image as: temp_images/mediterranean_diet_photo.jpg")
-print("3. Save the protein sources image as: temp_images/protein_rich_photo.jpg")
-print("\nAfter saving these images, run the create_category_images_from_photos.py script.") 
\ No newline at end of file
+
+def main():
+    # Create necessary directories
+    os.makedirs(temp_dir, exist_ok=True)
+
+    # Download and save the images
+    print("Please manually save the following images:")
+    print("1. Save the yogurt parfait image as: temp_images/healthy_breakfast_photo.jpg")
+    print("2. Save the Mediterranean ingredients image as: temp_images/mediterranean_diet_photo.jpg")
+    print("3. Save the protein sources image as: temp_images/protein_rich_photo.jpg")
+    print("\nAfter saving these images, run the create_category_images_from_photos.py script.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Detector-driven smart cropping for meal and category card images.
+
+Card renditions used to be squashed (category cards, img.resize to 360x360)
+or shipped at the photo's own aspect and center-cropped by SwiftUI (the
+1280px landscape featured meal photos in 250x150 cards), which cuts off food
+that is not in the middle. This tool picks, for each photo, the largest
+window at the card's aspect ratio that keeps the food centered:
+
+1. A weight map of where the food is: the boxes of the exported food
+   detector (food_detector.onnx from `convert detector --keep-onnx`), each
+   weighted by its confidence and area, run on CPU in batches. With the
+   stock COCO model only the food classes (and bowls) count, so a dining
+   table or a person does not pull the crop. Without a detector,
+   or when it finds nothing, a frequency-tuned saliency map (each pixel's
+   color distance from the photo's mean color) with a mild center prior
+   stands in.
+2. The window spans the full width or height of the photo and slides along
+   the other axis so the weighted center of the map sits in its middle,
+   clamped to the photo. If all detections (or the salient region) fit
+   into the window, they are kept inside it.
+
+Crop rectangles are cached in .asset_cache/smart_crops.json by the SHA-256
+of the photo and the aspect ratio, so re-rendering cards never runs
+inference again for a photo that has not changed.
+
+Requirements:
+- numpy, Pillow
+- onnxruntime (detector; without it the saliency map is used)
+
+Usage:
+python smart_crop.py temp_images/*.jpg --aspect 1                 # print crop boxes
+python smart_crop.py MealImages/*.jpg --aspect 1.667 --output-dir cropped/ --detector food_detector.onnx
+"""
+
+import os
+import sys
+import argparse
+
+from asset_catalog import base_dir, ContentCache, file_digest
+from asset_trace import span
+
+DEFAULT_DETECTOR = os.path.join(base_dir, "food_detector.onnx")
+
+# Card aspect ratios (width / height): category cards are square and the
+# featured meal cards in ContentView are 250x150
+CATEGORY_ASPECT = 1.0
+FEATURED_ASPECT = 250 / 150
+
+SALIENCY_SIZE = 64
+# Weight of the center prior relative to the normalized saliency map
+CENTER_PRIOR = 0.3
+# Share of the peak saliency above which a cell counts as part of the salient region
+SALIENT_LEVEL = 0.5
+DETECTOR_CONFIDENCE = 0.25
+# COCO class indices of the stock YOLOv5 detector that are food (bowl through cake).
+# Other boxes (dining table, person, cup) would pull the crop away from the food.
+COCO_CLASS_COUNT = 80
+COCO_FOOD_CLASSES = tuple(range(45, 56))
+
+
+def crop_window(width, height, aspect):
+    """(window width, window height) of the largest crop with the given aspect"""
+    if width / height > aspect:
+        return max(1, round(height * aspect)), height
+    return width, max(1, round(width / aspect))
+
+
+def place_window(center, window, extent, keep=None):
+    """Start of a window of length window along an axis of length extent, centered on center.
+
+    keep is an optional (start, end) span that should stay inside the window
+    when it fits.
+    """
+    start = center - window / 2
+    if keep is not None and keep[1] - keep[0] <= window:
+        start = min(max(start, keep[1] - window), keep[0])
+    return int(round(min(max(start, 0), extent - window)))
+
+
+def saliency_map(img, size=SALIENCY_SIZE):
+    """Frequency-tuned saliency of a PIL image on a size x size grid: color distance from the image mean"""
+    import numpy as np
+    from PIL import Image, ImageFilter
+
+    small = img.convert("RGB").resize((size, size), Image.BOX).filter(ImageFilter.GaussianBlur(1))
+    pixels = np.asarray(small.convert("YCbCr"), dtype=np.float32)
+    saliency = np.linalg.norm(pixels - pixels.reshape(-1, 3).mean(axis=0), axis=2)
+    return saliency / (saliency.max() + 1e-9)
+
+
+def center_prior(shape):
+    """Gaussian bump that leans ambiguous maps towards the middle of the photo"""
+    import numpy as np
+
+    y, x = np.mgrid[:shape[0], :shape[1]]
+    y, x = y / max(shape[0] - 1, 1) - 0.5, x / max(shape[1] - 1, 1) - 0.5
+    return CENTER_PRIOR * np.exp(-(x ** 2 + y ** 2) / 0.08)
+
+
+def weighted_center(weights, width, height):
+    """Weighted center of a map, in the photo's pixel coordinates"""
+    import numpy as np
+
+    rows, columns = weights.shape
+    total = weights.sum()
+    if total <= 0:
+        return width / 2, height / 2
+    y, x = np.mgrid[:rows, :columns]
+    return (
+        float((weights * (x + 0.5)).sum() / total) * width / columns,
+        float((weights * (y + 0.5)).sum() / total) * height / rows,
+    )
+
+
+def salient_span(saliency, width, height):
+    """((left, right), (top, bottom)) of the salient region plus one grid cell, in the photo's pixel coordinates"""
+    import numpy as np
+
+    rows, columns = np.nonzero(saliency >= SALIENT_LEVEL * saliency.max())
+    scale_x, scale_y = width / saliency.shape[1], height / saliency.shape[0]
+    return (
+        (max(columns.min() - 1, 0) * scale_x, min((columns.max() + 2) * scale_x, width)),
+        (max(rows.min() - 1, 0) * scale_y, min((rows.max() + 2) * scale_y, height)),
+    )
+
+
+def choose_crop(width, height, aspect, boxes=None, confidences=None, saliency=None):
+    """(left, top, right, bottom) crop for a photo from detections, or from a saliency map"""
+    window_width, window_height = crop_window(width, height, aspect)
+    keep_x = keep_y = None
+    if boxes is not None and len(boxes):
+        areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+        weights = confidences * areas
+        center_x = float((weights * (boxes[:, 0] + boxes[:, 2]) / 2).sum() / weights.sum())
+        center_y = float((weights * (boxes[:, 1] + boxes[:, 3]) / 2).sum() / weights.sum())
+        keep_x = (float(boxes[:, 0].min()), float(boxes[:, 2].max()))
+        keep_y = (float(boxes[:, 1].min()), float(boxes[:, 3].max()))
+    elif saliency is not None:
+        center_x, center_y = weighted_center(saliency + center_prior(saliency.shape), width, height)
+        keep_x, keep_y = salient_span(saliency, width, height)
+    else:
+        center_x, center_y = width / 2, height / 2
+    left = place_window(center_x, window_width, width, keep_x)
+    top = place_window(center_y, window_height, height, keep_y)
+    return left, top, left + window_width, top + window_height
+
+
+class SmartCropper:
+    """Crop boxes for photos, from the detector or saliency, cached by content hash"""
+
+    def __init__(self, detector_path=None, batch_size=8, cache=None):
+        self.batch_size = batch_size
+        self.cache = cache if cache is not None else ContentCache("smart_crops")
+        self.session = None
+        if detector_path and os.path.exists(detector_path):
+            try:
+                from replay_recognition import load_session
+                self.session = load_session(detector_path)
+            except ImportError:
+                print("⚠️ onnxruntime is not installed; using saliency maps for smart crops")
+        self.detected = 0
+        self.salient = 0
+
+    def detect(self, frames):
+        """(boxes, confidences) per RGB frame, letterboxed and run through the detector in one batch
+
+        With the stock 80-class COCO model only the food classes count; a
+        food-trained detector's classes are all used.
+        """
+        import numpy as np
+        from replay_recognition import decode_detections, letterbox
+
+        prepared = [letterbox(frame) for frame in frames]
+        input_name = self.session.get_inputs()[0].name
+        with span("detect"):
+            outputs = self.session.run(None, {input_name: np.concatenate([tensor for tensor, _, _ in prepared])})[0]
+        classes = COCO_FOOD_CLASSES if outputs.shape[-1] - 5 == COCO_CLASS_COUNT else None
+        return [
+            decode_detections(output[np.newaxis], scale, pad, frame.shape, DETECTOR_CONFIDENCE, classes)
+            for output, (_, scale, pad), frame in zip(outputs, prepared, frames)
+        ]
+
+    def crop_boxes(self, paths, aspect):
+        """{path: (left, top, right, bottom)}; only photos missing from the cache are analyzed"""
+        import numpy as np
+        from PIL import Image, ImageOps
+
+        boxes, pending = {}, []
+        for path in paths:
+            key = f"{file_digest(path)}:{aspect:.4f}"
+            entry = self.cache.get(key)
+            if entry is not None:
+                boxes[path] = tuple(entry["box"])
+            else:
+                pending.append((path, key))
+
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            with span("decode"):
+                images = []
+                for path, _ in batch:
+                    with Image.open(path) as img:
+                        images.append(ImageOps.exif_transpose(img).convert("RGB"))
+            detections = self.detect([np.asarray(img) for img in images]) if self.session is not None else [None] * len(images)
+            for (path, key), img, found in zip(batch, images, detections):
+                if found is not None and len(found[0]):
+                    box, source = choose_crop(img.width, img.height, aspect, *found), "detector"
+                    self.detected += 1
+                else:
+                    with span("saliency"):
+                        box, source = choose_crop(img.width, img.height, aspect, saliency=saliency_map(img)), "saliency"
+                    self.salient += 1
+                self.cache.put(key, {"box": list(box), "source": source})
+                boxes[path] = box
+        return boxes
+
+    def crop(self, img, path, size, box=None):
+        """img (opened from path) cropped around the food to size's aspect and resized to size
+
+        Pass the box from an earlier crop_boxes() call over a batch of photos
+        so the detector does not run one photo at a time.
+        """
+        from PIL import Image, ImageOps
+
+        img = ImageOps.exif_transpose(img)
+        if box is None:
+            box = self.crop_boxes([path], size[0] / size[1])[path]
+        with span("resize"):
+            return img.crop(box).resize(size, Image.LANCZOS)
+
+    def save(self):
+        # Category cards and featured meals share the cache, so keep other tools' entries
+        self.cache.save(prune=False)
+
+
+_default_cropper = None
+
+
+def default_cropper():
+    """Shared cropper that uses the exported detector when it exists"""
+    global _default_cropper
+    if _default_cropper is None:
+        _default_cropper = SmartCropper(DEFAULT_DETECTOR)
+    return _default_cropper
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Choose food-centered crop windows for card images")
+    parser.add_argument("images", nargs="+", help="Source photos")
+    parser.add_argument("--aspect", type=float, default=CATEGORY_ASPECT, help="Card width / height")
+    parser.add_argument("--detector", default=DEFAULT_DETECTOR, help="ONNX food detector (saliency is used without it)")
+    parser.add_argument("--batch-size", type=int, default=8, help="Photos per detector batch")
+    parser.add_argument("--output-dir", help="Also write the cropped photos here")
+    args = parser.parse_args(argv)
+
+    cropper = SmartCropper(args.detector, args.batch_size)
+    if cropper.session is None:
+        print("📋 No detector loaded; cropping with saliency maps")
+    boxes = cropper.crop_boxes(args.images, args.aspect)
+    cropper.save()
+
+    if args.output_dir:
+        from PIL import Image, ImageOps
+
+        os.makedirs(args.output_dir, exist_ok=True)
+    for path, box in boxes.items():
+        print(f"  {os.path.basename(path)}: {box}")
+        if args.output_dir:
+            with Image.open(path) as img:
+                ImageOps.exif_transpose(img).crop(box).convert("RGB").save(
+                    os.path.join(args.output_dir, os.path.splitext(os.path.basename(path))[0] + ".jpg"), quality=92
+                )
+    print(f"✅ {len(boxes)} crops: {cropper.detected} from detections, {cropper.salient} from saliency, "
+          f"{cropper.cache.hits} cached")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
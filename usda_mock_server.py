@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the USDA FoodData Central API.
+
+Serves the two endpoints the nutrition tools use, under the same paths as
+https://api.nal.usda.gov/fdc/v1:
+  GET /fdc/v1/foods/search?query=...&pageSize=...   (USDAResponse in NutritionModels.swift)
+  GET /fdc/v1/food/<fdcId>                          (food details, "full" format)
+
+Foods come from the offline nutrition database (build_nutrition_database.py)
+when one is given. Otherwise every query gets a deterministic synthetic food,
+so the pre-warmer can be run and tested without network access or data
+downloads. --latency and --rate-limit imitate API round trips and 429s.
+
+Usage:
+python usda_mock_server.py [--port 8089] [--database foodscannerpro/Resources/Nutrition/nutrition.sqlite]
+"""
+
+import sys
+import json
+import time
+import zlib
+import sqlite3
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from build_nutrition_database import NUTRIENT_IDS, search_foods
+
+# Unit names the FDC API reports for each nutrient
+NUTRIENT_UNITS = {
+    "calories": "KCAL",
+    "protein": "G",
+    "carbs": "G",
+    "fat": "G",
+    "fiber": "G",
+    "sugar": "G",
+    "sodium": "MG",
+    "cholesterol": "MG",
+    "potassium": "MG",
+    "calcium": "MG",
+    "iron": "MG",
+    "vitaminA": "UG",
+    "vitaminC": "MG",
+}
+
+# Upper bound of the synthetic value for each nutrient (per 100 g)
+SYNTHETIC_RANGES = {
+    "calories": 450,
+    "protein": 30,
+    "carbs": 60,
+    "fat": 30,
+    "fiber": 10,
+    "sugar": 30,
+    "sodium": 800,
+    "cholesterol": 200,
+    "potassium": 600,
+    "calcium": 300,
+    "iron": 5,
+    "vitaminA": 500,
+    "vitaminC": 60,
+}
+
+
+def synthetic_food(query):
+    """A deterministic food record for a query, with values derived from its CRC32"""
+    description = " ".join(query.split()).capitalize()
+    seed = zlib.crc32(description.lower().encode())
+    nutrients = {}
+    for i, (column, upper) in enumerate(SYNTHETIC_RANGES.items()):
+        fraction = ((seed >> (i % 24)) % 1000) / 1000
+        nutrients[column] = round(upper * fraction, 2)
+    return {"fdcId": 100000 + seed % 900000, "description": description, "nutrients": nutrients}
+
+
+class FoodSource:
+    """Looks up foods in an offline nutrition database, or makes synthetic ones"""
+
+    def __init__(self, database_path=None):
+        self.database_path = database_path
+        self.synthetic = {}
+        self.lock = threading.Lock()
+
+    def _from_row(self, row):
+        nutrients = {column: row[column] for column in NUTRIENT_IDS if row.get(column) is not None}
+        return {"fdcId": row["fdc_id"], "description": row["name"], "nutrients": nutrients}
+
+    def search(self, query, limit):
+        if self.database_path:
+            return [self._from_row(row) for row in search_foods(self.database_path, query, limit)]
+        food = synthetic_food(query)
+        with self.lock:
+            self.synthetic[food["fdcId"]] = food
+        return [food][:limit]
+
+    def details(self, fdc_id):
+        if self.database_path:
+            connection = sqlite3.connect(f"file:{self.database_path}?mode=ro", uri=True)
+            connection.row_factory = sqlite3.Row
+            try:
+                row = connection.execute("SELECT * FROM foods WHERE fdc_id = ?", (fdc_id,)).fetchone()
+            finally:
+                connection.close()
+            return self._from_row(dict(row)) if row else None
+        with self.lock:
+            return self.synthetic.get(fdc_id)
+
+
+def search_payload(food):
+    """A food in the /foods/search layout (USDAFood with USDANutrient entries)"""
+    return {
+        "fdcId": food["fdcId"],
+        "description": food["description"],
+        "dataType": "SR Legacy",
+        "foodNutrients": [
+            {
+                "nutrientId": NUTRIENT_IDS[column],
+                "nutrientName": column,
+                "value": value,
+                "unitName": NUTRIENT_UNITS[column],
+            }
+            for column, value in food["nutrients"].items()
+        ],
+    }
+
+
+def details_payload(food):
+    """A food in the /food/<fdcId> "full" layout, with nested nutrient objects"""
+    return {
+        "fdcId": food["fdcId"],
+        "description": food["description"],
+        "dataType": "SR Legacy",
+        "foodNutrients": [
+            {
+                "nutrient": {
+                    "id": NUTRIENT_IDS[column],
+                    "name": column,
+                    "unitName": NUTRIENT_UNITS[column].lower(),
+                },
+                "amount": value,
+            }
+            for column, value in food["nutrients"].items()
+        ],
+    }
+
+
+class RateLimiter:
+    """Allows `rate` requests per second; anything above that gets a 429"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self.next_allowed = 0.0
+        self.lock = threading.Lock()
+
+    def allow(self):
+        with self.lock:
+            now = time.monotonic()
+            if now < self.next_allowed:
+                return False
+            self.next_allowed = max(now, self.next_allowed) + self.interval
+            return True
+
+
+class MockUSDAHandler(BaseHTTPRequestHandler):
+    source = None
+    latency = 0.0
+    limiter = None
+    stats = None
+    stats_lock = None
+
+    def count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        self.count("requests")
+
+        if self.latency:
+            time.sleep(self.latency)
+        if not params.get("api_key"):
+            return self.send_json(403, {"error": {"code": "API_KEY_MISSING"}})
+        if self.limiter and not self.limiter.allow():
+            self.count("throttled")
+            return self.send_json(429, {"error": {"code": "OVER_RATE_LIMIT"}})
+
+        if url.path == "/fdc/v1/foods/search":
+            query = params.get("query", "").strip()
+            if not query:
+                return self.send_json(400, {"error": "query is required"})
+            foods = self.source.search(query, int(params.get("pageSize", 50)))
+            return self.send_json(200, {
+                "totalHits": len(foods),
+                "foods": [search_payload(food) for food in foods],
+            })
+
+        if url.path.startswith("/fdc/v1/food/"):
+            try:
+                fdc_id = int(url.path.rsplit("/", 1)[1])
+            except ValueError:
+                return self.send_json(400, {"error": "invalid fdcId"})
+            food = self.source.details(fdc_id)
+            if food is None:
+                return self.send_json(404, {"error": "not found"})
+            return self.send_json(200, details_payload(food))
+
+        self.send_json(404, {"error": "not found"})
+
+    def send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_mock_server(database_path=None, latency=0.0, rate_limit=None, port=0):
+    """Serve the mock API on a background thread; returns (server, base_url).
+
+    The base URL matches NutritionService.baseURL, ending in /fdc/v1. Call
+    server.shutdown() and server.server_close() when done; server.stats
+    counts requests and throttled requests.
+    """
+    stats = {"requests": 0, "throttled": 0}
+    handler = type("Handler", (MockUSDAHandler,), {
+        "source": FoodSource(database_path),
+        "latency": latency,
+        "limiter": RateLimiter(rate_limit) if rate_limit else None,
+        "stats": stats,
+        "stats_lock": threading.Lock(),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.stats = stats
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/fdc/v1"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the USDA FoodData Central API")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--database", help="Offline nutrition database to serve foods from")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds to wait before each response")
+    parser.add_argument("--rate-limit", type=float, help="Requests per second before answering 429")
+    args = parser.parse_args(argv)
+
+    server, base_url = start_mock_server(args.database, args.latency, args.rate_limit, args.port)
+    print(f"Mock USDA API at {base_url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())